@@ -28,7 +28,7 @@ class ASCAdmin(admin.ModelAdmin):
         'site'
     ]
     search_fields = ['code', 'first_name', 'last_name', 'phone', 'email']
-    ordering = ['last_name', 'first_name']
+    ordering = ['last_name_normalized', 'first_name_normalized']
     date_hierarchy = 'created_at'
 
     fieldsets = (
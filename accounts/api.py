@@ -1,6 +1,10 @@
+from django.db.models import Q
 from rest_framework import viewsets, serializers
 from rest_framework.pagination import PageNumberPagination
-from .models import ASC, User, Supervisor
+from config.conditional import ConditionalGetMixin
+from config.text import normalized_contains_q, normalized_prefix_q
+from .models import ASC, User
+from .scoping import scope_ascs
 
 
 class ASCSerializer(serializers.ModelSerializer):
@@ -23,37 +27,29 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class ASCViewSet(viewsets.ModelViewSet):
+NAME_SEARCH_FIELDS = ('first_name_normalized', 'last_name_normalized')
+
+
+class ASCViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ASC.objects.all().select_related('site', 'supervisor', 'zone_asc')
     serializer_class = ASCSerializer
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        user = self.request.user
-
-        # Si l'utilisateur est un superviseur, ne montrer que les ASCs de ses sites
-        if user.is_authenticated and user.role == 'SUPERVISOR':
-            try:
-                supervisor = Supervisor.objects.get(user=user)
-                # Récupérer les IDs des sites gérés par ce superviseur
-                supervisor_site_ids = supervisor.sites.values_list('id', flat=True)
-                # Filtrer les ASCs pour ne montrer que ceux de ces sites
-                queryset = queryset.filter(site_id__in=supervisor_site_ids)
-            except Supervisor.DoesNotExist:
-                # Si le superviseur n'a pas de profil Supervisor, ne montrer aucun ASC
-                queryset = queryset.none()
+        # Un superviseur ne voit que les ASCs de ses sites
+        queryset = scope_ascs(super().get_queryset(), self.request.user)
 
         # Recherche
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                first_name__icontains=search
-            ) | queryset.filter(
-                last_name__icontains=search
-            ) | queryset.filter(
-                code__icontains=search
-            )
+            # Noms normalisés : « Tanguiéta » est trouvé par « tanguieta ».
+            # Début des noms ou du code d'abord (index), sous-chaîne seulement sans résultat
+            condition = normalized_prefix_q(search, *NAME_SEARCH_FIELDS)
+            matches = queryset.filter((condition or Q()) | Q(code__istartswith=search))
+            if not matches.exists():
+                condition = normalized_contains_q(search, *NAME_SEARCH_FIELDS)
+                matches = queryset.filter((condition or Q()) | Q(code__icontains=search))
+            queryset = matches
 
         return queryset
 
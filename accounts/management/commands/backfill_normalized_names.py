@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour recalculer les noms normalisés (régions, districts, sites,
+ASCs, utilisateurs ; voir config/text.py) après des écritures qui ne passent pas
+par save() : SQL direct, restauration partielle, bulk_create sans
+with_normalized_names().
+"""
+from django.core.management.base import BaseCommand
+
+from accounts.models import User, ASC
+from config.text import backfill_normalized_names
+from locations.models import Region, District, Site
+
+MODELS = [Region, District, Site, User, ASC]
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les colonnes de noms normalisés (recherche et tri sans accents)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Taille des lots (défaut : 2000)')
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in MODELS:
+            updated = backfill_normalized_names(model, model.NORMALIZED_FIELDS, options['batch_size'])
+            total += updated
+            self.stdout.write(f'{model._meta.verbose_name_plural} : {updated} ligne(s) mise(s) à jour')
+        self.stdout.write(self.style.SUCCESS(f'✓ Noms normalisés recalculés : {total} ligne(s)'))
@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour générer un jeu de données volumineux et reproductible
+(mesures de performance, tests de charge).
+
+Contrairement à seed_demo, rien n'est supprimé : la commande s'exécute sur une
+base vide (python manage.py flush) et écrit par lots avec bulk_create. Les
+tickets suivent le workflow réel (création, envois / réceptions étape par
+étape, réparation, retour, clôture ou annulation) avec des durées réalistes ;
+un même équipement n'a jamais deux tickets ouverts en même temps et quelques
+équipements concentrent les pannes (pannes répétées). Résumés de fiabilité et
+index de recherche sont recalculés à la fin.
+
+Le jeu de données ne dépend que de --seed et de --end-date : deux exécutions
+avec les mêmes options produisent les mêmes lignes.
+
+Exemple (environ 2 millions d'événements) :
+    python manage.py seed_scale --ascs 5000 --equipment 50000 --tickets 200000
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User, ASC, Supervisor
+from assets.models import Equipment
+from assets.reliability import refresh_reliability
+from assets.search import normalize_identifier
+from config.text import with_normalized_names
+from locations.models import Region, District, Site
+from search.autocomplete import SOURCES, invalidate_autocomplete
+from search.indexing import rebuild_index
+from tickets.models import RepairTicket, Issue, TicketEvent, ProblemType
+from tickets.workflow import role_for_stage
+
+PREFIX = 'SEED'
+PASSWORD = 'pass123'
+
+SITES_PER_SUPERVISOR = 5
+ASCS_PER_SITE = 25
+SITES_PER_DISTRICT = 10
+DISTRICTS_PER_REGION = 5
+
+# Nombre d'utilisateurs par rôle pour les étapes centrales
+STAFF_COUNTS = {'PROGRAM': 5, 'LOGISTICS': 5, 'REPAIRER': 10, 'ESANTE': 3}
+
+# Catalogue (type, marque, modèle, poids)
+CATALOG = [
+    ('PHONE', 'Tecno', 'Spark 7', 30),
+    ('PHONE', 'Samsung', 'Galaxy A12', 20),
+    ('PHONE', 'Infinix', 'Hot 10', 15),
+    ('PHONE', 'Itel', 'A70', 10),
+    ('PHONE', 'Nokia', '105', 5),
+    ('TABLET', 'Samsung', 'Galaxy Tab A8', 12),
+    ('TABLET', 'Lenovo', 'Tab M10', 8),
+]
+
+# Types de problèmes créés si la base n'en contient aucun
+DEFAULT_PROBLEM_TYPES = [
+    ('Écran cassé', 'SCREEN_BROKEN', 'HARDWARE'),
+    ('Batterie défectueuse', 'BATTERY', 'HARDWARE'),
+    ('Ne s\'allume plus', 'NO_POWER', 'HARDWARE'),
+    ('Problème de réseau', 'NETWORK', 'HARDWARE'),
+    ('Application qui plante', 'APP_CRASH', 'SOFTWARE'),
+    ('Synchronisation impossible', 'SYNC', 'SOFTWARE'),
+]
+
+DESCRIPTIONS = [
+    'Écran cassé suite à une chute',
+    'Batterie ne tient plus la charge',
+    'Problème de réseau, pas de signal',
+    'Applications qui plantent régulièrement',
+    'Téléphone ne s\'allume plus',
+    'Synchronisation des données impossible',
+]
+
+# Temps moyen passé à chaque étape avant l'envoi suivant (jours)
+STAGE_HOLD_DAYS = {
+    'SUPERVISOR': 2, 'PROGRAM': 3, 'LOGISTICS': 4, 'REPAIRER': 10, 'ESANTE': 6,
+    'RETURNING_LOGISTICS': 3, 'RETURNING_PROGRAM': 2, 'RETURNING_SUPERVISOR': 2,
+}
+TRANSIT_DAYS = 1.5
+ESANTE_SHARE = 0.15
+CANCEL_SHARE = 0.02
+
+FORWARD = ['SUPERVISOR', 'PROGRAM', 'LOGISTICS']
+RETURN = ['RETURNING_LOGISTICS', 'RETURNING_PROGRAM', 'RETURNING_SUPERVISOR', 'RETURNED_ASC']
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Désactive auto_now / auto_now_add pour écrire des dates historiques avec bulk_create"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Trace:
+    """Parcours simulé d'un ticket jusqu'à la date de fin du jeu de données"""
+
+    def __init__(self, rng, created_at, end, supervisor_id, staff):
+        self.events = []  # (type, de, vers, utilisateur, date)
+        self.status = 'OPEN'
+        self.stage = 'SUPERVISOR'
+        self.holder_id = supervisor_id
+        self.repair_completed_date = None
+        self.closed_date = None
+        self.cancelled_date = None
+        self.updated_at = created_at
+
+        now = created_at
+        self.add('CREATED', 'SUPERVISOR', 'SUPERVISOR', supervisor_id, now)
+        repair_stage = 'ESANTE' if rng.random() < ESANTE_SHARE else 'REPAIRER'
+        path = FORWARD + [repair_stage] + RETURN
+        cancel_at = rng.randrange(len(path) - 1) if rng.random() < CANCEL_SHARE else None
+
+        for index, (stage, next_stage) in enumerate(zip(path, path[1:])):
+            now += timedelta(days=rng.expovariate(1 / STAGE_HOLD_DAYS[stage]))
+            if now > end:
+                return
+            if index == cancel_at:
+                self.add('CANCELLED', stage, stage, self.holder_id, now)
+                self.status, self.cancelled_date = 'CANCELLED', now
+                return
+            if stage == repair_stage:
+                self.add('REPAIRED', stage, stage, self.holder_id, now)
+                self.status, self.repair_completed_date = 'REPAIRED', now
+                now += timedelta(hours=rng.uniform(1, 24))
+                if now > end:
+                    return
+
+            self.add('SENT', stage, next_stage, self.holder_id, now)
+            self.stage, self.holder_id = next_stage, None
+            if next_stage == 'RETURNED_ASC':
+                self.status, self.closed_date = 'CLOSED', now
+                return
+            if next_stage.startswith('RETURNING'):
+                self.status = 'RETURNING'
+
+            now += timedelta(days=rng.expovariate(1 / TRANSIT_DAYS))
+            if now > end:
+                return
+            # Étapes superviseur : reçues par le superviseur de l'ASC
+            role = role_for_stage(next_stage)
+            receiver = supervisor_id if role == 'SUPERVISOR' else rng.choice(staff[role])
+            self.add('RECEIVED', stage, next_stage, receiver, now)
+            self.status, self.holder_id = 'IN_PROGRESS', receiver
+
+    def add(self, event_type, from_role, to_role, user_id, timestamp):
+        self.events.append((event_type, from_role, to_role, user_id, timestamp))
+        self.updated_at = timestamp
+
+    @property
+    def finished_at(self):
+        """Date à partir de laquelle l'équipement peut avoir un nouveau ticket (None si ouvert)"""
+        return self.closed_date or self.cancelled_date
+
+
+class Command(BaseCommand):
+    help = 'Génère un jeu de données volumineux et reproductible (bulk_create par lots)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Graine du générateur (défaut : 42)')
+        parser.add_argument('--ascs', type=int, default=5000, help='Nombre d\'ASCs (défaut : 5000)')
+        parser.add_argument('--equipment', type=int, default=50000, help='Nombre d\'équipements (défaut : 50000)')
+        parser.add_argument(
+            '--tickets', type=int, default=200000,
+            help='Nombre de tickets visé (défaut : 200000, environ 10 événements par ticket)'
+        )
+        parser.add_argument('--years', type=int, default=3, help='Période couverte par les tickets (défaut : 3 ans)')
+        parser.add_argument(
+            '--end-date', help='Date de fin du jeu de données, AAAA-MM-JJ (défaut : aujourd\'hui)'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Taille des lots (défaut : 5000)')
+
+    def handle(self, *args, **options):
+        if RepairTicket.objects.filter(ticket_number__startswith=f'{PREFIX}-').exists():
+            raise CommandError(
+                'La base contient déjà un jeu de données généré : videz-la avant '
+                '(python manage.py flush) pour obtenir un jeu reproductible.'
+            )
+
+        end_date = options['end_date'] or timezone.localdate().isoformat()
+        try:
+            self.end = timezone.make_aware(datetime.fromisoformat(end_date))
+        except ValueError:
+            raise CommandError(f'Date de fin invalide : {end_date}')
+        self.start = self.end - timedelta(days=365 * options['years'])
+        self.seed = options['seed']
+        self.rng = random.Random(self.seed)
+        self.batch_size = options['batch_size']
+
+        started = time.perf_counter()
+        with manual_timestamps(Equipment, RepairTicket, Issue):
+            with transaction.atomic():
+                self.create_geography(options['ascs'])
+                self.create_users()
+                self.create_ascs(options['ascs'])
+                self.create_problem_types()
+                self.create_equipment(options['equipment'])
+            self.create_tickets(options['tickets'])
+
+        self.stdout.write('Résumé de fiabilité des équipements...')
+        for ids in batched(self.equipment_ids, self.batch_size):
+            refresh_reliability(*ids)
+        self.stdout.write('Index de recherche...')
+        rebuild_index()
+        invalidate_autocomplete(*SOURCES)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Jeu de données généré en {elapsed:.0f} s (graine {self.seed}, fin {end_date}) : '
+            f'{len(self.site_ids)} sites, {len(self.asc_ids)} ASCs, {len(self.equipment_ids)} équipements, '
+            f'{self.ticket_total} tickets, {self.event_total} événements'
+        ))
+
+    def create_geography(self, asc_count):
+        site_count = max(1, -(-asc_count // ASCS_PER_SITE))
+        district_count = max(1, -(-site_count // SITES_PER_DISTRICT))
+        region_count = max(1, -(-district_count // DISTRICTS_PER_REGION))
+
+        regions = Region.objects.bulk_create(with_normalized_names(
+            Region(name=f'Région {i + 1:03d}', code=f'{PREFIX}-R{i + 1:03d}') for i in range(region_count)
+        ))
+        districts = District.objects.bulk_create(with_normalized_names(
+            District(region=regions[i // DISTRICTS_PER_REGION], name=f'District {i + 1:04d}', code=f'{PREFIX}-D{i + 1:04d}')
+            for i in range(district_count)
+        ))
+        sites = Site.objects.bulk_create(with_normalized_names(
+            Site(district=districts[i // SITES_PER_DISTRICT], name=f'CS {i + 1:05d}', code=f'{PREFIX}-S{i + 1:05d}')
+            for i in range(site_count)
+        ))
+        self.site_ids = [site.pk for site in sites]
+        self.site_districts = {site.pk: site.district_id for site in sites}
+        self.stdout.write(f'{region_count} régions, {district_count} districts, {site_count} sites')
+
+    def create_users(self):
+        # Un seul hachage : le hachage du mot de passe domine sinon le temps de création
+        password = make_password(PASSWORD)
+        users = []
+        for role, count in STAFF_COUNTS.items():
+            users += [
+                User(username=f'{PREFIX.lower()}-{role.lower()}-{i + 1}', password=password, role=role,
+                     first_name=role.capitalize(), last_name=str(i + 1))
+                for i in range(count)
+            ]
+        # Un superviseur pour SITES_PER_SUPERVISOR sites d'un même district
+        by_district = {}
+        for site_id in self.site_ids:
+            by_district.setdefault(self.site_districts[site_id], []).append(site_id)
+        supervisor_sites = [
+            sites for district_sites in by_district.values() for sites in batched(district_sites, SITES_PER_SUPERVISOR)
+        ]
+        for i, sites in enumerate(supervisor_sites):
+            users.append(User(
+                username=f'{PREFIX.lower()}-supervisor-{i + 1}', password=password, role='SUPERVISOR',
+                first_name='Superviseur', last_name=str(i + 1), site_id=sites[0]
+            ))
+        users = User.objects.bulk_create(with_normalized_names(users), batch_size=self.batch_size)
+
+        self.staff = {role: [] for role in STAFF_COUNTS}
+        supervisors = [user for user in users if user.role == 'SUPERVISOR']
+        for user in users:
+            if user.role in self.staff:
+                self.staff[user.role].append(user.pk)
+
+        profiles = Supervisor.objects.bulk_create([
+            Supervisor(user=user, code=f'{PREFIX}-SUP-{i + 1:05d}', first_name=user.first_name, last_name=user.last_name)
+            for i, user in enumerate(supervisors)
+        ], batch_size=self.batch_size)
+        Supervisor.sites.through.objects.bulk_create([
+            Supervisor.sites.through(supervisor_id=profile.pk, site_id=site_id)
+            for profile, sites in zip(profiles, supervisor_sites)
+            for site_id in sites
+        ], batch_size=self.batch_size)
+
+        self.site_supervisors = {
+            site_id: user.pk for user, sites in zip(supervisors, supervisor_sites) for site_id in sites
+        }
+        self.stdout.write(f'{len(users)} utilisateurs dont {len(supervisors)} superviseurs (mot de passe : {PASSWORD})')
+
+    def create_ascs(self, count):
+        rng = self.rng
+        ascs = []
+        for i in range(count):
+            site_id = self.site_ids[i // ASCS_PER_SITE]
+            ascs.append(ASC(
+                first_name=f'Prénom{i + 1}', last_name=f'Nom{i + 1}', code=f'{PREFIX}-ASC-{i + 1:06d}',
+                gender=rng.choice('MF'), phone=f'97{i:06d}', site_id=site_id,
+                supervisor_id=self.site_supervisors[site_id], is_active=rng.random() > 0.03,
+            ))
+        ascs = ASC.objects.bulk_create(with_normalized_names(ascs), batch_size=self.batch_size)
+        self.asc_ids = [asc.pk for asc in ascs]
+        self.asc_supervisors = {asc.pk: asc.supervisor_id for asc in ascs}
+        self.stdout.write(f'{count} ASCs')
+
+    def create_problem_types(self):
+        problem_types = list(ProblemType.objects.filter(is_active=True).values_list('pk', flat=True).order_by('pk'))
+        if not problem_types:
+            problem_types = [
+                ProblemType.objects.create(name=name, code=code, category=category).pk
+                for name, code, category in DEFAULT_PROBLEM_TYPES
+            ]
+        self.problem_type_ids = problem_types
+
+    def create_equipment(self, count):
+        rng = self.rng
+        weights = [weight for *_, weight in CATALOG]
+        # Permutation de [0, 10^13[ : IMEI uniques mais dispersés (recherche par préfixe réaliste)
+        offset = rng.randrange(10 ** 13)
+        equipments = []
+        for i in range(count):
+            equipment_type, brand, model, _ = rng.choices(CATALOG, weights)[0]
+            imei = f'35{(i * 7919 + offset) % 10 ** 13:013d}'
+            serial = f'SN{brand[:3].upper()}{i:08d}' if rng.random() < 0.6 else ''
+            created_at = self.start - timedelta(days=rng.randrange(0, 365))
+            acquired = created_at.date()
+            owner_id = rng.choice(self.asc_ids) if rng.random() < 0.95 else None
+            equipments.append(Equipment(
+                equipment_type=equipment_type, brand=brand, model=model,
+                imei=imei, imei_normalized=normalize_identifier(imei),
+                serial_number=serial, serial_normalized=normalize_identifier(serial),
+                owner_id=owner_id, status='FUNCTIONAL',
+                acquisition_date=acquired, warranty_expiry_date=acquired + timedelta(days=730),
+                assignment_date=acquired if owner_id else None,
+                created_at=created_at, updated_at=created_at,
+            ))
+        equipments = Equipment.objects.bulk_create(equipments, batch_size=self.batch_size)
+        self.equipment_ids = [equipment.pk for equipment in equipments]
+        self.equipment_owners = {equipment.pk: equipment.owner_id for equipment in equipments}
+        self.stdout.write(f'{count} équipements')
+
+    def plan_tickets(self, count):
+        """Tickets par équipement (quelques équipements concentrent les pannes), triés par date"""
+        rng = self.rng
+        owned = [pk for pk in self.equipment_ids if self.equipment_owners[pk]]
+        if not owned:
+            return []
+        weights = [min(rng.paretovariate(1.5), 20) for _ in owned]
+        per_equipment = {}
+        for equipment_id in rng.choices(owned, weights, k=count):
+            per_equipment[equipment_id] = per_equipment.get(equipment_id, 0) + 1
+
+        span = (self.end - self.start).total_seconds()
+        plans = []
+        for equipment_id in owned:
+            ticket_count = per_equipment.get(equipment_id, 0)
+            starts = sorted(rng.random() * span for _ in range(ticket_count))
+            available = self.start
+            for offset in starts:
+                created_at = max(self.start + timedelta(seconds=offset), available)
+                if created_at >= self.end:
+                    break
+                ticket_seed = rng.getrandbits(64)
+                asc_id = self.equipment_owners[equipment_id]
+                trace = Trace(random.Random(ticket_seed), created_at, self.end, self.asc_supervisors[asc_id], self.staff)
+                plans.append((created_at, equipment_id, ticket_seed))
+                if trace.finished_at is None:
+                    break  # Ticket encore ouvert : pas de nouveau ticket pour cet équipement
+                available = trace.finished_at + timedelta(days=rng.expovariate(1 / 30))
+        plans.sort()
+        return plans
+
+    def create_tickets(self, count):
+        plans = self.plan_tickets(count)
+        self.ticket_total = len(plans)
+        self.event_total = 0
+        final_status = {}
+
+        for number, batch in enumerate(batched(plans, self.batch_size)):
+            with transaction.atomic():
+                tickets, traces = [], []
+                for index, (created_at, equipment_id, ticket_seed) in enumerate(batch):
+                    rng = random.Random(ticket_seed)
+                    asc_id = self.equipment_owners[equipment_id]
+                    supervisor_id = self.asc_supervisors[asc_id]
+                    trace = Trace(rng, created_at, self.end, supervisor_id, self.staff)
+                    traces.append((trace, rng))
+                    tickets.append(RepairTicket(
+                        ticket_number=f'{PREFIX}-{number * self.batch_size + index + 1:08d}',
+                        equipment_id=equipment_id, asc_id=asc_id, status=trace.status,
+                        current_stage=trace.stage, current_holder_id=trace.holder_id,
+                        created_at=created_at, initial_send_date=created_at, updated_at=trace.updated_at,
+                        repair_completed_date=trace.repair_completed_date, closed_date=trace.closed_date,
+                        cancelled_date=trace.cancelled_date, created_by_id=supervisor_id,
+                        initial_problem_description=rng.choice(DESCRIPTIONS),
+                        cancellation_reason='Équipement remplacé' if trace.cancelled_date else '',
+                    ))
+                    final_status[equipment_id] = trace.status
+                tickets = RepairTicket.objects.bulk_create(tickets)
+
+                issues, events = [], []
+                for ticket, (trace, rng) in zip(tickets, traces):
+                    for problem_type_id in rng.sample(self.problem_type_ids, rng.choice([1, 1, 1, 2])):
+                        issues.append(Issue(ticket_id=ticket.pk, problem_type_id=problem_type_id, created_at=ticket.created_at))
+                    events += [
+                        TicketEvent(ticket_id=ticket.pk, event_type=event_type, from_role=from_role, to_role=to_role,
+                                    user_id=user_id, timestamp=timestamp)
+                        for event_type, from_role, to_role, user_id, timestamp in trace.events
+                    ]
+                Issue.objects.bulk_create(issues, batch_size=self.batch_size)
+                TicketEvent.objects.bulk_create(events, batch_size=self.batch_size)
+                self.event_total += len(events)
+            self.stdout.write(f'{min((number + 1) * self.batch_size, len(plans))}/{len(plans)} tickets')
+
+        # État des équipements d'après leur dernier ticket
+        statuses = {'CLOSED': 'FUNCTIONAL', 'CANCELLED': 'FAULTY'}
+        by_status = {}
+        for equipment_id, status in final_status.items():
+            by_status.setdefault(statuses.get(status, 'UNDER_REPAIR'), []).append(equipment_id)
+        for status, ids in by_status.items():
+            if status == 'FUNCTIONAL':
+                continue
+            for chunk in batched(ids, self.batch_size):
+                Equipment.objects.filter(pk__in=chunk).update(status=status)
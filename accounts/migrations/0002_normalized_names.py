@@ -0,0 +1,87 @@
+# Generated by Django 5.0.14 on 2026-10-19 17:37
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Copie figée de config.text (normalize_text, backfill_normalized_names) à la
+# date de la migration : le code applicatif peut évoluer sans la modifier
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def _normalize_text(value):
+    text = (value or '').casefold()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def _backfill(model, normalized_fields):
+    columns = list(normalized_fields)
+    batch = []
+    for obj in model.objects.only('pk', *normalized_fields.values()).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        for column, source in normalized_fields.items():
+            setattr(obj, column, _normalize_text(getattr(obj, source)))
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, columns)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, columns)
+
+
+def backfill_names(apps, schema_editor):
+    for model_name in ('User', 'ASC'):
+        _backfill(
+            apps.get_model('accounts', model_name),
+            {'first_name_normalized': 'first_name', 'last_name_normalized': 'last_name'},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('locations', '0002_normalized_names'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='asc',
+            options={'ordering': ['last_name_normalized', 'first_name_normalized'], 'verbose_name': 'ASC', 'verbose_name_plural': 'ASCs'},
+        ),
+        migrations.AddField(
+            model_name='asc',
+            name='first_name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='asc',
+            name='last_name_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='first_name_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_name_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='asc',
+            index=models.Index(fields=['last_name_normalized', 'first_name_normalized'], name='asc_normalized_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name_normalized', 'first_name_normalized'], name='user_normalized_name_idx'),
+        ),
+        migrations.RunPython(backfill_names, migrations.RunPython.noop),
+    ]
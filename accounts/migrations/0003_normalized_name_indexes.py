@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_normalized_names'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='asc',
+            name='last_name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='first_name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='last_name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+    ]
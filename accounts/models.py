@@ -1,11 +1,14 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
+from config.text import NormalizedNamesMixin
 from locations.models import Site, ZoneASC, District
 
 
-class User(AbstractUser):
+class User(NormalizedNamesMixin, AbstractUser):
     """Utilisateur personnalisé avec rôles"""
+    NORMALIZED_FIELDS = {'first_name_normalized': 'first_name', 'last_name_normalized': 'last_name'}
+
     ROLE_CHOICES = [
         ('ADMIN', 'Administrateur'),
         ('SUPERVISOR', 'Superviseur'),
@@ -17,6 +20,9 @@ class User(AbstractUser):
 
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, verbose_name="Rôle")
     phone = models.CharField(max_length=20, blank=True, verbose_name="Téléphone")
+    # Noms sans accents ni majuscules pour la recherche et le tri (voir config/text.py)
+    first_name_normalized = models.CharField(max_length=150, blank=True, editable=False, db_index=True)
+    last_name_normalized = models.CharField(max_length=150, blank=True, editable=False, db_index=True)
     site = models.ForeignKey(
         Site,
         on_delete=models.SET_NULL,
@@ -31,6 +37,9 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
+        indexes = [
+            models.Index(fields=['last_name_normalized', 'first_name_normalized'], name='user_normalized_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_role_display()})"
@@ -56,21 +65,14 @@ class User(AbstractUser):
     @classmethod
     def get_role_for_stage(cls, stage):
         """Retourne le rôle correspondant à une étape du workflow"""
-        stage_to_role = {
-            'SUPERVISOR': 'SUPERVISOR',
-            'PROGRAM': 'PROGRAM',
-            'LOGISTICS': 'LOGISTICS',
-            'REPAIRER': 'REPAIRER',
-            'ESANTE': 'ESANTE',
-            'RETURNING_LOGISTICS': 'LOGISTICS',
-            'RETURNING_PROGRAM': 'PROGRAM',
-            'RETURNING_SUPERVISOR': 'SUPERVISOR',
-        }
-        return stage_to_role.get(stage)
-
-
-class ASC(models.Model):
+        from tickets.workflow import role_for_stage
+        return role_for_stage(stage)
+
+
+class ASC(NormalizedNamesMixin, models.Model):
     """Agent de Santé Communautaire"""
+    NORMALIZED_FIELDS = {'first_name_normalized': 'first_name', 'last_name_normalized': 'last_name'}
+
     GENDER_CHOICES = [
         ('M', 'Masculin'),
         ('F', 'Féminin'),
@@ -79,6 +81,9 @@ class ASC(models.Model):
     # Identité
     first_name = models.CharField(max_length=100, verbose_name="Prénom")
     last_name = models.CharField(max_length=100, verbose_name="Nom")
+    # Noms sans accents ni majuscules pour la recherche et le tri (voir config/text.py)
+    first_name_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
+    last_name_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
     code = models.CharField(max_length=50, unique=True, verbose_name="Code ASC")
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, blank=True, verbose_name="Genre")
     phone = models.CharField(max_length=20, blank=True, verbose_name="Téléphone")
@@ -125,7 +130,11 @@ class ASC(models.Model):
     class Meta:
         verbose_name = "ASC"
         verbose_name_plural = "ASCs"
-        ordering = ['last_name', 'first_name']
+        ordering = ['last_name_normalized', 'first_name_normalized']
+        indexes = [
+            # Tri par défaut et recherche par préfixe du nom
+            models.Index(fields=['last_name_normalized', 'first_name_normalized'], name='asc_normalized_name_idx'),
+        ]
 
     def __str__(self):
         site_info = f" - {self.site}" if self.site else ""
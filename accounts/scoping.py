@@ -0,0 +1,57 @@
+"""
+Périmètre de visibilité des utilisateurs
+
+Un superviseur ne voit que les ASCs, équipements et tickets des sites qu'il
+gère (profil Supervisor) et de son propre site ; les autres rôles voient tout. Les identifiants des
+sites visibles sont lus en une requête et mémorisés sur l'objet utilisateur
+pour la durée de la requête seulement : pas de cache partagé entre requêtes
+(cache local à chaque worker), un site retiré à un superviseur cesse d'être
+visible dès la requête suivante.
+
+Le filtre appliqué porte sur la clé étrangère indexée du site
+(site_id__in, owner__site_id__in, asc__site_id__in).
+"""
+from django.db.models import Q
+
+from locations.models import Site
+
+ASC_SITE_FIELD = 'site_id'
+EQUIPMENT_SITE_FIELD = 'owner__site_id'
+TICKET_SITE_FIELD = 'asc__site_id'
+
+_UNRESOLVED = object()
+
+
+def visible_site_ids(user):
+    """Identifiants des sites visibles par l'utilisateur, ou None s'il voit tous les sites"""
+    if not user.is_authenticated or user.role != 'SUPERVISOR':
+        return None
+
+    site_ids = getattr(user, '_visible_site_ids', _UNRESOLVED)
+    if site_ids is _UNRESOLVED:
+        # Sans profil Supervisor ni site, aucun site
+        site_ids = frozenset(
+            Site.objects.filter(Q(supervisors__user_id=user.pk) | Q(pk=user.site_id)).values_list('pk', flat=True)
+        )
+        user._visible_site_ids = site_ids
+    return site_ids
+
+
+def scope_queryset(queryset, user, site_field):
+    """Restreint queryset aux lignes des sites visibles par l'utilisateur"""
+    site_ids = visible_site_ids(user)
+    if site_ids is None:
+        return queryset
+    return queryset.filter(**{f'{site_field}__in': site_ids})
+
+
+def scope_ascs(queryset, user):
+    return scope_queryset(queryset, user, ASC_SITE_FIELD)
+
+
+def scope_equipment(queryset, user):
+    return scope_queryset(queryset, user, EQUIPMENT_SITE_FIELD)
+
+
+def scope_tickets(queryset, user):
+    return scope_queryset(queryset, user, TICKET_SITE_FIELD)
@@ -1,3 +1,213 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Q
 from django.test import TestCase
+from django.urls import reverse
+from assets.models import Equipment
+from locations.models import Region, District, Site
+from tickets.models import RepairTicket, TicketEvent
+from .models import User, ASC, Supervisor
+from .scoping import visible_site_ids
+
+
+class VisibilityScopeTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        self.site = Site.objects.create(district=district, name='Test Site', code='TS')
+        self.other_site = Site.objects.create(district=district, name='Autre Site', code='AS')
+
+        self.user = User.objects.create_user(username='testsupervisor', password='testpass', role='SUPERVISOR')
+        self.supervisor = Supervisor.objects.create(user=self.user, code='SUP-TEST', first_name='Test', last_name='Sup')
+        self.supervisor.sites.add(self.site)
+        self.program = User.objects.create_user(username='testprogram', password='testpass', role='PROGRAM')
+
+        self.asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=self.site)
+        self.other_asc = ASC.objects.create(first_name='Autre', last_name='ASC', code='ASC-OTHER', site=self.other_site)
+        for i, asc in enumerate([self.asc, self.other_asc]):
+            equipment = Equipment.objects.create(
+                equipment_type='PHONE', brand='Test Brand', model='Test Model', imei=f'12345678{i}', owner=asc
+            )
+            RepairTicket.objects.create(
+                equipment=equipment, asc=asc, created_by=self.user, initial_problem_description='Panne'
+            )
+
+    def test_supervisor_sees_only_own_sites(self):
+        """Test listes HTML et API restreintes aux sites du superviseur"""
+        self.client.force_login(self.user)
+
+        self.assertEqual(list(self.client.get(reverse('tickets:list')).context['tickets']), [
+            RepairTicket.objects.get(asc=self.asc)
+        ])
+        self.assertEqual([e.owner for e in self.client.get(reverse('assets:list')).context['page_obj']], [self.asc])
+        self.assertEqual([a['code'] for a in self.client.get(reverse('asc-list')).json()['results']], ['ASC-TEST'])
+        other_ticket = RepairTicket.objects.get(asc=self.other_asc)
+        self.assertEqual(self.client.get(reverse('tickets:detail', args=[other_ticket.pk])).status_code, 404)
+
+    def test_other_roles_see_everything(self):
+        """Test absence de restriction pour les rôles hors superviseur"""
+        self.client.force_login(self.program)
+
+        self.assertEqual(len(self.client.get(reverse('tickets:list')).context['tickets']), 2)
+        self.assertIsNone(visible_site_ids(self.program))
+
+    def test_site_ids_memoized_per_request(self):
+        """Test sites visibles lus une fois par requête, relus à la requête suivante"""
+        self.assertEqual(visible_site_ids(self.user), {self.site.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(visible_site_ids(self.user), {self.site.pk})
+
+        self.supervisor.sites.add(self.other_site)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(visible_site_ids(user), {self.site.pk, self.other_site.pk})
+
+        self.supervisor.sites.remove(self.site, self.other_site)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(visible_site_ids(user), {self.user.site_id} - {None})
+
+    def test_supervisor_actions_limited_to_own_sites(self):
+        """Test actions sur tickets, événements et affectations hors périmètre refusées"""
+        self.client.force_login(self.user)
+        other_ticket = RepairTicket.objects.get(asc=self.other_asc)
+        other_equipment = Equipment.objects.get(owner=self.other_asc)
+
+        for name in ['receive', 'send', 'mark_repaired', 'add_comment', 'cancel']:
+            response = self.client.post(reverse(f'tickets:{name}', args=[other_ticket.pk]))
+            self.assertEqual(response.status_code, 404, name)
+
+        response = self.client.post(reverse('ticket-bulk-transition'), {
+            'action': 'SEND', 'ticket_ids': [other_ticket.pk], 'to_role': 'PROGRAM', 'comment': 'Lot',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], {str(other_ticket.pk): 'Ticket introuvable.'})
+
+        TicketEvent.objects.create(ticket=other_ticket, event_type='COMMENT', user=self.program, comment='Hors site')
+        events = self.client.get(reverse('event-list')).json()['results']
+        self.assertNotIn('Hors site', [event['comment'] for event in events])
+
+        self.assertEqual(self.client.post(reverse('assets:assign', args=[other_equipment.pk])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('assets:asc_assign_equipment', args=[self.other_asc.pk])).status_code, 404)
+        own_equipment = Equipment.objects.get(owner=self.asc)
+        response = self.client.post(reverse('assets:assign', args=[own_equipment.pk]), {'asc': self.other_asc.pk})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Equipment.objects.get(pk=own_equipment.pk).owner, self.asc)
+
+
+class NormalizedNamesTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Atacora', code='AT')
+        district = District.objects.create(region=region, name='Tanguiéta', code='TG')
+        self.site = Site.objects.create(district=district, name="Centre N'Dali", code='ND')
+        self.user = User.objects.create_user(
+            username='admin', password='testpass', role='ADMIN', first_name='Éric', last_name='Dossou'
+        )
+        for code, first_name, last_name in [
+            ('ASC-1', 'Yao', 'Fofana'), ('ASC-2', 'Adjoa', 'Édoh'), ('ASC-3', 'Kossi', "N'djéï"), ('ASC-4', 'Ama', 'dossou'),
+        ]:
+            ASC.objects.create(code=code, first_name=first_name, last_name=last_name, phone='97000000', site=self.site)
+
+    def test_normalized_on_save(self):
+        """Test colonnes normalisées renseignées à l'enregistrement, y compris avec update_fields"""
+        self.assertEqual(District.objects.get().name_normalized, 'tanguieta')
+        self.assertEqual(Site.objects.get().name_normalized, 'centre n dali')
+        self.assertEqual(ASC.objects.get(code='ASC-3').last_name_normalized, 'n djei')
+        self.assertEqual(self.user.first_name_normalized, 'eric')
+
+        self.user.last_name = 'Hounsou-Gbèdé'
+        self.user.save(update_fields=['last_name'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_name_normalized, 'hounsou gbede')
+
+    def test_sorting_ignores_accents_and_case(self):
+        """Test tri par défaut des ASCs : « Édoh » entre « dossou » et « Fofana »"""
+        self.assertEqual(
+            list(ASC.objects.values_list('last_name', flat=True)), ['dossou', 'Édoh', 'Fofana', "N'djéï"]
+        )
+
+    def test_api_search(self):
+        """Test recherche d'ASC insensible aux accents dans l'API"""
+        self.client.force_login(self.user)
+        for search in ['edoh', 'ÉDOH', 'N’djei']:
+            codes = [asc['code'] for asc in self.client.get('/api/ascs/', {'search': search}).json()['results']]
+            self.assertEqual(len(codes), 1, search)
+        codes = [asc['code'] for asc in self.client.get('/api/ascs/', {'search': 'asc-4'}).json()['results']]
+        self.assertEqual(codes, ['ASC-4'])
+
+    def test_api_search_prefix_then_contains(self):
+        """Test recherche par début de nom (index), sous-chaîne seulement sans résultat"""
+        ASC.objects.create(code='ASC-5', first_name='Afi', last_name='Sofanou', phone='97000000', site=self.site)
+        self.client.force_login(self.user)
+
+        def codes(search):
+            return sorted(asc['code'] for asc in self.client.get('/api/ascs/', {'search': search}).json()['results'])
+
+        self.assertEqual(codes('fof'), ['ASC-1'])
+        self.assertEqual(codes('yao FOF'), ['ASC-1'])
+        self.assertEqual(codes('ofan'), ['ASC-1', 'ASC-5'])
+        self.assertEqual(codes('djei'), ['ASC-3'])
+
+    def test_backfill_command(self):
+        """Test recalcul des colonnes après une écriture qui ne passe pas par save()"""
+        Site.objects.update(name='Natitingou Sud')
+        ASC.objects.filter(code='ASC-1').update(first_name='Rachidatou')
+
+        out = StringIO()
+        call_command('backfill_normalized_names', stdout=out)
+
+        self.assertIn('2 ligne(s)', out.getvalue())
+        self.assertEqual(Site.objects.get().name_normalized, 'natitingou sud')
+        self.assertEqual(ASC.objects.get(code='ASC-1').first_name_normalized, 'rachidatou')
+
+
+class SeedScaleTest(TestCase):
+    OPTIONS = {'ascs': 60, 'equipment': 200, 'tickets': 400, 'end_date': '2025-06-30', 'batch_size': 150}
+
+    def seed(self, **options):
+        call_command('seed_scale', stdout=StringIO(), **{**self.OPTIONS, **options})
+
+    def fingerprint(self):
+        return list(RepairTicket.objects.order_by('ticket_number').annotate(
+            event_count=Count('events')
+        ).values_list(
+            'ticket_number', 'equipment__imei', 'asc__code', 'status', 'current_stage',
+            'created_at', 'closed_date', 'event_count'
+        ))
+
+    def test_deterministic_with_seed(self):
+        """Test même graine, même jeu de données"""
+        self.seed()
+        first = self.fingerprint()
+        self.assertGreater(len(first), 300)
+        self.assertGreater(TicketEvent.objects.count(), 5 * len(first))
+
+        # Base non vide : la commande refuse de compléter le jeu existant
+        with self.assertRaises(CommandError):
+            self.seed()
+
+        for model in (RepairTicket, Equipment, ASC, Supervisor, Site, District, Region):
+            model.objects.all().delete()
+        User.objects.filter(username__startswith='seed-').delete()
+
+        self.seed()
+        self.assertEqual(self.fingerprint(), first)
+
+    def test_workflow_traces_consistent(self):
+        """Test un seul ticket ouvert par équipement et résumé de fiabilité renseigné"""
+        self.seed()
 
-# Create your tests here.
+        open_tickets = RepairTicket.objects.filter(closed_date__isnull=True, cancelled_date__isnull=True)
+        self.assertFalse(open_tickets.values('equipment').annotate(n=Count('pk')).filter(n__gt=1).exists())
+        self.assertFalse(Equipment.objects.filter(
+            ~Q(status='UNDER_REPAIR'), pk__in=open_tickets.values('equipment')
+        ).exists())
+        self.assertFalse(RepairTicket.objects.filter(status='CLOSED', current_stage='RETURNED_ASC').exclude(
+            events__event_type='SENT', events__to_role='RETURNED_ASC'
+        ).exists())
+        self.assertEqual(
+            sum(Equipment.objects.values_list('ticket_count', flat=True)), RepairTicket.objects.count()
+        )
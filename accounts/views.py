@@ -5,6 +5,11 @@ from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import transaction, models
 from .models import ASC, User, Supervisor
+from .scoping import scope_ascs
+from config.conditional import conditional_page, latest_of
+from monitoring.jobs import track_job
+from search.models import SearchDocument
+from search.query import matching_ids
 from locations.models import Site, ZoneASC, Region, District
 import warnings
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
@@ -22,20 +27,42 @@ PROGRAM_ID = "LOHCXZMzADu"
 @login_required
 def asc_list(request):
     """Liste des ASCs avec filtres"""
-    ascs = ASC.objects.all().select_related('site', 'supervisor')
+    ascs = scope_ascs(ASC.objects.all(), request.user).select_related('site', 'supervisor')
 
     search = request.GET.get('search')
     if search:
-        ascs = ascs.filter(code__icontains=search) | ascs.filter(first_name__icontains=search) | ascs.filter(last_name__icontains=search)
+        # Index plein texte : code, nom, prénom et site ; fragment de code
+        # (milieu ou fin, « KN-00 ») cherché aussi directement
+        ascs = ascs.filter(
+            models.Q(pk__in=matching_ids(search, SearchDocument.ASC))
+            | models.Q(code__icontains=search.strip())
+        )
 
     context = {'ascs': ascs}
     return render(request, 'accounts/asc_list.html', context)
 
 
+def _asc_detail_state(request, pk):
+    """État de l'ASC pour l'ETag : ASC, équipements et tickets"""
+    state = scope_ascs(ASC.objects.filter(pk=pk), request.user).aggregate(
+        updated_at=models.Max('updated_at'),
+        equipments_updated_at=models.Max('equipments__updated_at'),
+        equipment_count=models.Count('equipments', distinct=True),
+        tickets_updated_at=models.Max('repair_tickets__updated_at'),
+        ticket_count=models.Count('repair_tickets', distinct=True),
+    )
+    if state['updated_at'] is None:
+        return None
+    return tuple(state.values()), latest_of(
+        state['updated_at'], state['equipments_updated_at'], state['tickets_updated_at'],
+    )
+
+
 @login_required
+@conditional_page(_asc_detail_state)
 def asc_detail(request, pk):
     """Détail d'un ASC"""
-    asc = get_object_or_404(ASC.objects.select_related('site', 'supervisor'), pk=pk)
+    asc = get_object_or_404(scope_ascs(ASC.objects.select_related('site', 'supervisor'), request.user), pk=pk)
     equipments = asc.equipments.all()
     tickets = asc.repair_tickets.all()
 
@@ -328,6 +355,12 @@ def sync_organizational_units(request):
     if request.method != 'POST':
         return redirect('accounts:asc_list')
 
+    # Exécution enregistrée pour /metrics (durée de la synchronisation)
+    with track_job('dhis2_sync_org_units'):
+        return _sync_organizational_units(request)
+
+
+def _sync_organizational_units(request):
     # try:
     # Créer une instance API DHIS2
     api = Api(DHIS2_URL, DHIS2_USERNAME, DHIS2_PASSWORD)
@@ -434,6 +467,12 @@ def sync_ascs(request):
     if request.method != 'POST':
         return redirect('accounts:asc_list')
 
+    # Exécution enregistrée pour /metrics (durée de la synchronisation)
+    with track_job('dhis2_sync_ascs'):
+        return _sync_ascs(request)
+
+
+def _sync_ascs(request):
     # try:
     # Créer une instance API DHIS2
     api = Api(DHIS2_URL, DHIS2_USERNAME, DHIS2_PASSWORD)
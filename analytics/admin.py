@@ -0,0 +1,61 @@
+from django.contrib import admin
+from .models import (
+    RollupCheckpoint, FailureRollup, ProblemTypeRollup, FleetSize, SiteKpiRollup, StageKpiRollup, SlaForecast,
+)
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Tables calculées (refresh_failure_rollups, refresh_kpi_rollups) : consultation uniquement"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(FailureRollup)
+class FailureRollupAdmin(ReadOnlyAdmin):
+    list_display = ['period', 'equipment_type', 'brand', 'model', 'ticket_count']
+    list_filter = ['equipment_type', 'brand']
+    date_hierarchy = 'period'
+
+
+@admin.register(ProblemTypeRollup)
+class ProblemTypeRollupAdmin(ReadOnlyAdmin):
+    list_display = ['period', 'brand', 'model', 'problem_type', 'issue_count']
+    list_filter = ['equipment_type', 'brand', 'problem_type']
+    date_hierarchy = 'period'
+
+
+@admin.register(FleetSize)
+class FleetSizeAdmin(ReadOnlyAdmin):
+    list_display = ['equipment_type', 'brand', 'model', 'equipment_count']
+    list_filter = ['equipment_type']
+
+
+@admin.register(SiteKpiRollup)
+class SiteKpiRollupAdmin(ReadOnlyAdmin):
+    list_display = ['period', 'site', 'district', 'opened', 'closed', 'cancelled', 'overdue', 'backlog']
+    list_filter = ['region', 'district']
+    date_hierarchy = 'period'
+
+
+@admin.register(StageKpiRollup)
+class StageKpiRollupAdmin(ReadOnlyAdmin):
+    list_display = ['period', 'site', 'stage', 'exits', 'dwell_days']
+    list_filter = ['stage', 'region', 'district']
+    date_hierarchy = 'period'
+
+
+@admin.register(SlaForecast)
+class SlaForecastAdmin(ReadOnlyAdmin):
+    list_display = ['ticket', 'stage', 'due_at', 'breach_probability', 'stage_breach_probability', 'scored_at']
+    list_filter = ['stage']
+    list_select_related = ['ticket']
+    search_fields = ['ticket__ticket_number']
+
+
+@admin.register(RollupCheckpoint)
+class RollupCheckpointAdmin(ReadOnlyAdmin):
+    list_display = ['name', 'last_id', 'last_refreshed_at', 'updated_at']
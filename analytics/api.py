@@ -0,0 +1,91 @@
+from django.http import FileResponse
+from rest_framework import viewsets, serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from accounts.scoping import visible_site_ids
+from assets.models import Equipment
+from .columnar import DATASETS, PARTITIONED, export_file, read_manifest
+from .kpis import LEVELS, kpi_report
+from .rollups import reliability_summary
+
+
+class ReliabilityQuerySerializer(serializers.Serializer):
+    months = serializers.IntegerField(required=False, default=12, min_value=1, max_value=60)
+    equipment_type = serializers.ChoiceField(choices=Equipment.TYPE_CHOICES, required=False)
+    limit = serializers.IntegerField(required=False, default=10, min_value=1, max_value=100)
+
+
+class ReliabilityViewSet(viewsets.ViewSet):
+    """Fiabilité du parc : taux de panne par modèle et types de problèmes dominants"""
+
+    def list(self, request):
+        params = ReliabilityQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(reliability_summary(**params.validated_data))
+
+
+class KpiQuerySerializer(serializers.Serializer):
+    months = serializers.IntegerField(required=False, default=12, min_value=1, max_value=60)
+    level = serializers.ChoiceField(choices=list(LEVELS), required=False, default='district')
+    region = serializers.IntegerField(required=False)
+    district = serializers.IntegerField(required=False)
+
+
+class KpiViewSet(viewsets.ViewSet):
+    """Indicateurs mensuels par région / district / site, lus dans les rollups (voir analytics/kpis.py)"""
+
+    def list(self, request):
+        params = KpiQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(kpi_report(**params.validated_data, site_ids=visible_site_ids(request.user)))
+
+
+class ParquetDownloadSerializer(serializers.Serializer):
+    dataset = serializers.ChoiceField(choices=DATASETS)
+    month = serializers.RegexField(r'^\d{4}-\d{2}$', required=False)
+
+
+class ParquetExportViewSet(viewsets.ViewSet):
+    """
+    Fichiers Parquet produits par la commande export_parquet (voir
+    analytics/columnar.py) : manifeste et téléchargement. Les fichiers couvrent
+    tous les sites, ils ne sont pas proposés aux superviseurs.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if visible_site_ids(request.user) is not None:
+            raise PermissionDenied("L'export complet n'est pas accessible aux superviseurs.")
+
+    def list(self, request):
+        manifest = read_manifest()
+        download = reverse('parquet-export-download', request=request)
+        datasets = {}
+        for name, entry in manifest.get('datasets', {}).items():
+            if name in PARTITIONED:
+                datasets[name] = [
+                    {'month': month, 'rows': part['rows'], 'bytes': part['bytes'],
+                     'url': f'{download}?dataset={name}&month={month}'}
+                    for month, part in sorted(entry['partitions'].items())
+                ]
+            else:
+                datasets[name] = {'rows': entry['rows'], 'bytes': entry['bytes'], 'url': f'{download}?dataset={name}'}
+        return Response({
+            'exported_at': manifest.get('exported_at'),
+            'checkpoint': manifest.get('checkpoint'),
+            'datasets': datasets,
+        })
+
+    @action(detail=False)
+    def download(self, request):
+        params = ParquetDownloadSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        dataset, month = params.validated_data['dataset'], params.validated_data.get('month')
+        path = export_file(dataset, month)
+        if path is None:
+            raise NotFound("Fichier non exporté (lancer la commande export_parquet).")
+        filename = f'{dataset}-{month}.parquet' if month else f'{dataset}.parquet'
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename,
+                            content_type='application/vnd.apache.parquet')
@@ -0,0 +1,311 @@
+"""
+Export colonnaire (Parquet) des données de réparation pour les outils d'analyse
+
+Les faits (tickets, événements, problèmes signalés) sont écrits par mois de
+création du ticket, au format « hive » lisible par pandas, DuckDB, Power BI ou
+pyarrow.dataset :
+
+    <ANALYTICS_EXPORT_ROOT>/tickets/month=2026-10/data.parquet
+    <ANALYTICS_EXPORT_ROOT>/events/month=2026-10/data.parquet
+    <ANALYTICS_EXPORT_ROOT>/issues/month=2026-10/data.parquet
+    <ANALYTICS_EXPORT_ROOT>/equipment/data.parquet
+    <ANALYTICS_EXPORT_ROOT>/locations/data.parquet
+
+Un ticket, ses événements et ses problèmes sont donc toujours dans la même
+partition. Les colonnes répétitives (statut, étape, site, marque...) sont
+encodées en dictionnaire : fichiers compacts, lus comme des catégories.
+
+L'export est incrémental : le manifeste (_manifest.json, à côté des fichiers)
+garde le point de reprise. Ne sont réécrits que les mois contenant un ticket
+modifié depuis (updated_at), un nouvel événement ou problème, ou dont le
+nombre de tickets a changé (suppressions). Comme pour les rollups, le point de
+reprise est reculé de SAFETY_LAG pour ne pas manquer une transaction en cours.
+Les tables de dimension (équipements, sites) sont réécrites en entier quand
+elles ou les faits ont changé. Chaque fichier est écrit à côté puis renommé :
+un lecteur ne voit jamais de fichier partiel.
+
+Nécessite le paquet pyarrow.
+"""
+import json
+import os
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, DateField, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from assets.models import Equipment
+from locations.models import Region, District, Site
+from tickets.models import RepairTicket, TicketEvent, Issue
+from .kpis import month_bounds
+from .rollups import SAFETY_LAG
+
+MANIFEST_NAME = '_manifest.json'
+DATA_FILE = 'data.parquet'
+COMPRESSION = 'snappy'
+
+# Colonnes : (nom, champ de la requête, type) ; 'category' = texte encodé en dictionnaire
+TICKET_COLUMNS = [
+    ('ticket_id', 'pk', 'int'),
+    ('ticket_number', 'ticket_number', 'text'),
+    ('status', 'status', 'category'),
+    ('current_stage', 'current_stage', 'category'),
+    ('created_at', 'created_at', 'datetime'),
+    ('initial_send_date', 'initial_send_date', 'datetime'),
+    ('repair_completed_date', 'repair_completed_date', 'datetime'),
+    ('closed_date', 'closed_date', 'datetime'),
+    ('cancelled_date', 'cancelled_date', 'datetime'),
+    ('updated_at', 'updated_at', 'datetime'),
+    ('equipment_id', 'equipment_id', 'int'),
+    ('equipment_type', 'equipment__equipment_type', 'category'),
+    ('brand', 'equipment__brand', 'category'),
+    ('model', 'equipment__model', 'category'),
+    ('asc_id', 'asc_id', 'int'),
+    ('site_id', 'asc__site_id', 'int'),
+    ('site', 'asc__site__name', 'category'),
+    ('district', 'asc__site__district__name', 'category'),
+    ('region', 'asc__site__district__region__name', 'category'),
+    ('created_by_id', 'created_by_id', 'int'),
+]
+
+EVENT_COLUMNS = [
+    ('event_id', 'pk', 'int'),
+    ('ticket_id', 'ticket_id', 'int'),
+    ('event_type', 'event_type', 'category'),
+    ('from_role', 'from_role', 'category'),
+    ('to_role', 'to_role', 'category'),
+    ('user_id', 'user_id', 'int'),
+    ('timestamp', 'timestamp', 'datetime'),
+    ('comment', 'comment', 'text'),
+]
+
+ISSUE_COLUMNS = [
+    ('issue_id', 'pk', 'int'),
+    ('ticket_id', 'ticket_id', 'int'),
+    ('problem_type_id', 'problem_type_id', 'int'),
+    ('problem_type', 'problem_type__name', 'category'),
+    ('category', 'problem_type__category', 'category'),
+    ('created_at', 'created_at', 'datetime'),
+]
+
+EQUIPMENT_COLUMNS = [
+    ('equipment_id', 'pk', 'int'),
+    ('equipment_type', 'equipment_type', 'category'),
+    ('brand', 'brand', 'category'),
+    ('model', 'model', 'category'),
+    ('imei', 'imei', 'text'),
+    ('serial_number', 'serial_number', 'text'),
+    ('status', 'status', 'category'),
+    ('asc_id', 'owner_id', 'int'),
+    ('site_id', 'owner__site_id', 'int'),
+    ('site', 'owner__site__name', 'category'),
+    ('district', 'owner__site__district__name', 'category'),
+    ('region', 'owner__site__district__region__name', 'category'),
+    ('acquisition_date', 'acquisition_date', 'date'),
+    ('warranty_expiry_date', 'warranty_expiry_date', 'date'),
+    ('assignment_date', 'assignment_date', 'date'),
+    ('ticket_count', 'ticket_count', 'int'),
+    ('mtbf_days', 'mtbf_days', 'float'),
+    ('created_at', 'created_at', 'datetime'),
+    ('updated_at', 'updated_at', 'datetime'),
+]
+
+LOCATION_COLUMNS = [
+    ('site_id', 'pk', 'int'),
+    ('site_code', 'code', 'text'),
+    ('site', 'name', 'text'),
+    ('district_id', 'district_id', 'int'),
+    ('district', 'district__name', 'category'),
+    ('region_id', 'district__region_id', 'int'),
+    ('region', 'district__region__name', 'category'),
+]
+
+# Faits partitionnés par mois de création du ticket : (colonnes, requête, chemin vers le ticket)
+PARTITIONED = {
+    'tickets': (TICKET_COLUMNS, RepairTicket.objects.all, ''),
+    'events': (EVENT_COLUMNS, TicketEvent.objects.all, 'ticket__'),
+    'issues': (ISSUE_COLUMNS, Issue.objects.all, 'ticket__'),
+}
+
+DIMENSIONS = {
+    'equipment': (EQUIPMENT_COLUMNS, Equipment.objects.all),
+    'locations': (LOCATION_COLUMNS, Site.objects.all),
+}
+
+DATASETS = list(PARTITIONED) + list(DIMENSIONS)
+
+
+class ColumnarExportError(Exception):
+    """Export colonnaire impossible (dépendance manquante)"""
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ColumnarExportError("L'export Parquet nécessite le paquet pyarrow (pip install pyarrow).")
+    return pyarrow, pyarrow.parquet
+
+
+def export_root():
+    return Path(settings.ANALYTICS_EXPORT_ROOT)
+
+
+def read_manifest(root=None):
+    """Manifeste de l'export (point de reprise et fichiers), vide si aucun export"""
+    path = (root or export_root()) / MANIFEST_NAME
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+
+def _replace_file(path, write):
+    """Écrit via write(chemin temporaire) puis remplace path d'un seul coup"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def _write_manifest(root, manifest):
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2, ensure_ascii=False)
+    _replace_file(root / MANIFEST_NAME, write)
+
+
+def _table(columns, queryset):
+    """Table Arrow des lignes de queryset (une requête, valeurs lues par paquets)"""
+    pa, _ = _pyarrow()
+    types = {
+        'int': pa.int64(), 'float': pa.float64(), 'text': pa.string(), 'category': pa.string(),
+        'datetime': pa.timestamp('us', tz='UTC'), 'date': pa.date32(),
+    }
+    values = [[] for _ in columns]
+    for row in queryset.order_by('pk').values_list(*[path for _, path, _ in columns]).iterator(chunk_size=5000):
+        for column, value in zip(values, row):
+            column.append(value)
+    arrays = []
+    for (name, _, kind), column in zip(columns, values):
+        array = pa.array(column, type=types[kind])
+        arrays.append(array.dictionary_encode() if kind == 'category' else array)
+    return pa.Table.from_arrays(arrays, names=[name for name, _, _ in columns])
+
+
+def _write_table(path, table):
+    """Écrit un fichier Parquet ; retourne ses métadonnées pour le manifeste"""
+    _, pq = _pyarrow()
+    _replace_file(path, lambda temporary: pq.write_table(
+        table, temporary, compression=COMPRESSION, use_dictionary=True
+    ))
+    return {'rows': table.num_rows, 'bytes': path.stat().st_size}
+
+
+def _ticket_months(queryset, prefix=''):
+    """Mois (1er du mois, heure locale) de création des tickets concernés par queryset"""
+    return set(
+        queryset.annotate(month=TruncMonth(f'{prefix}created_at', output_field=DateField()))
+        .values_list('month', flat=True).distinct().order_by()
+    )
+
+
+def _changed_months(manifest, since):
+    """Mois à réécrire depuis le dernier export (tous sans point de reprise)"""
+    counts = dict(
+        RepairTicket.objects.annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values_list('month').annotate(count=Count('pk')).order_by()
+    )
+    if since is None:
+        return set(counts), counts
+
+    exported = manifest['datasets']['tickets']['partitions']
+    # Nombre de tickets différent (suppressions) ou mois disparu
+    changed = {month for month, count in counts.items() if exported.get(f'{month:%Y-%m}', {}).get('rows') != count}
+    changed |= {date.fromisoformat(f'{key}-01') for key in exported} - set(counts)
+    changed |= _ticket_months(RepairTicket.objects.filter(updated_at__gt=since))
+    changed |= _ticket_months(TicketEvent.objects.filter(pk__gt=manifest['last_event_id']), 'ticket__')
+    changed |= _ticket_months(Issue.objects.filter(pk__gt=manifest['last_issue_id']), 'ticket__')
+    return changed, counts
+
+
+def _dimensions_changed(since):
+    if since is None:
+        return True
+    return any(
+        model.objects.filter(updated_at__gt=since).exists() for model in (Equipment, Site, District, Region)
+    )
+
+
+def export_columnar(root=None, full=False):
+    """
+    Met à jour l'export Parquet (incrémental, voir le docstring du module) ;
+    retourne le manifeste, complété de 'written' : fichiers réécrits par jeu de données
+    """
+    _pyarrow()
+    root = Path(root or export_root())
+    manifest = {} if full else read_manifest(root)
+    started = timezone.now()
+    since = datetime.fromisoformat(manifest['checkpoint']) if manifest.get('checkpoint') else None
+    if since is None:
+        # Pas de point de reprise : export complet, anciens fichiers compris
+        for dataset in DATASETS:
+            shutil.rmtree(root / dataset, ignore_errors=True)
+        manifest = {'datasets': {name: {'partitions': {}} for name in PARTITIONED}}
+
+    # Bornes lues avant l'export : une ligne ajoutée pendant l'export sera reprise au passage suivant
+    last_event_id = TicketEvent.objects.aggregate(last=Max('pk'))['last'] or 0
+    last_issue_id = Issue.objects.aggregate(last=Max('pk'))['last'] or 0
+    months, counts = _changed_months(manifest, since)
+    written = {name: 0 for name in DATASETS}
+
+    for month in sorted(months):
+        key = f'{month:%Y-%m}'
+        start, end = month_bounds(month)
+        for name, (columns, queryset, prefix) in PARTITIONED.items():
+            path = root / name / f'month={key}' / DATA_FILE
+            partitions = manifest['datasets'][name]['partitions']
+            if month not in counts:
+                # Plus aucun ticket ce mois-ci
+                shutil.rmtree(path.parent, ignore_errors=True)
+                partitions.pop(key, None)
+                continue
+            rows = queryset().filter(**{f'{prefix}created_at__gte': start, f'{prefix}created_at__lt': end})
+            partitions[key] = {'path': str(path.relative_to(root)), **_write_table(path, _table(columns, rows))}
+            written[name] += 1
+
+    if months or _dimensions_changed(since):
+        for name, (columns, queryset) in DIMENSIONS.items():
+            path = root / name / DATA_FILE
+            manifest['datasets'][name] = {
+                'path': str(path.relative_to(root)), **_write_table(path, _table(columns, queryset()))
+            }
+            written[name] += 1
+
+    manifest.update({
+        'checkpoint': (started - SAFETY_LAG).isoformat(),
+        'exported_at': started.isoformat(),
+        'last_event_id': last_event_id,
+        'last_issue_id': last_issue_id,
+    })
+    _write_manifest(root, manifest)
+    return {**manifest, 'written': written}
+
+
+def export_file(dataset, month=None, root=None):
+    """Chemin d'un fichier exporté (partition month=AAAA-MM pour les faits), None s'il n'existe pas"""
+    root = Path(root or export_root())
+    entry = read_manifest(root).get('datasets', {}).get(dataset)
+    if entry is None:
+        return None
+    if dataset in PARTITIONED:
+        entry = entry['partitions'].get(month or '')
+        if entry is None:
+            return None
+    path = root / entry['path']
+    return path if path.is_file() else None
@@ -0,0 +1,203 @@
+"""
+Prévision des dépassements de délai des tickets en cours
+
+Deux délais sont suivis, comme dans le reste de l'application :
+- délai de traitement : ticket non clôturé OVERDUE_DAYS jours après l'envoi
+  initial (badge rouge, indicateur « passés en retard » de kpis.py) ;
+- délai à l'étape : OVERDUE_DAYS jours à l'étape actuelle depuis la dernière
+  arrivée (alertes de check_delay_alerts).
+
+Les distributions viennent des histogrammes des FORECAST_MONTHS derniers mois
+de StageKpiRollup, tous sites confondus : temps passé à chaque étape et
+acheminement vers l'étape. Pour un ticket arrivé depuis e jours, la durée
+restante à son étape suit la distribution de l'étape sachant « plus de e
+jours » ; s'y ajoutent acheminements et étapes suivantes du workflow
+(tickets.workflow.TRANSITIONS, Réparateur ou E-Santé selon leur fréquence)
+jusqu'au retour à l'ASC, qui clôture le ticket.
+
+Les durées sont discrétisées au quart de jour jusqu'à l'échéance (au-delà,
+le dépassement est certain) : la durée de l'étape suivante à la clôture est
+calculée par convolution une fois par étape et par passage, puis chaque
+ticket ne coûte que quelques centaines d'opérations. Un ticket resté plus
+longtemps que tous les passages observés est compté comme en dépassement ;
+sans historique pour son étape, pas de prévision (probabilités vides).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from tickets import workflow
+from tickets.models import RepairTicket, TicketEvent
+from .kpis import OVERDUE_DAYS, STAGE_EVENT_TYPES
+from .models import SlaForecast, StageKpiRollup
+from .rollups import period_start
+from .sketches import DurationSketch
+
+# Historique utilisé pour les distributions
+FORECAST_MONTHS = 6
+
+# Probabilité à partir de laquelle un ticket est signalé à risque
+RISK_THRESHOLD = 0.5
+
+STEP_DAYS = 0.25
+# Indice de la dernière case : durées au-delà de l'échéance
+LAST = int(OVERDUE_DAYS / STEP_DAYS) + 1
+
+# L'envoi vers cette étape clôture le ticket
+CLOSING_STAGE = 'RETURNED_ASC'
+
+
+def _days(delta):
+    return delta.total_seconds() / 86400
+
+
+def _bin(days):
+    return min(max(round(days / STEP_DAYS), 0), LAST)
+
+
+def _point(days=0.0):
+    """Distribution d'une durée certaine"""
+    pmf = [0.0] * (LAST + 1)
+    pmf[_bin(days)] = 1.0
+    return pmf
+
+
+def _distribution(sketch, elapsed=0.0):
+    """Durée restante d'après un histogramme, sachant elapsed jours écoulés ; None sans passage plus long"""
+    pmf = [0.0] * (LAST + 1)
+    total = 0
+    for value, count in sketch.values():
+        if value > elapsed:
+            pmf[_bin(value - elapsed)] += count
+            total += count
+    if not total:
+        return None
+    return [p / total for p in pmf]
+
+
+def _convolve(first, second):
+    """Distribution de la somme de deux durées indépendantes (cumulée dans la dernière case)"""
+    pmf = [0.0] * (LAST + 1)
+    for i, p in enumerate(first):
+        if p:
+            for j, q in enumerate(second):
+                if q:
+                    pmf[min(i + j, LAST)] += p * q
+    return pmf
+
+
+def _at_least(pmf, days):
+    """Probabilité d'une durée d'au moins days jours"""
+    return min(sum(p for index, p in enumerate(pmf) if index * STEP_DAYS >= days), 1.0)
+
+
+class SlaForecaster:
+    """Distributions des durées restantes par étape, calculées une fois pour un passage de scoring"""
+
+    def __init__(self, months=FORECAST_MONTHS):
+        self.dwell = {}
+        self.transit = {}
+        rollups = StageKpiRollup.objects.filter(period__gte=period_start(months))
+        for stage, dwell, transit in rollups.values_list('stage', 'dwell_sketch', 'transit_sketch').order_by():
+            self.dwell.setdefault(stage, DurationSketch()).merge(dwell)
+            self.transit.setdefault(stage, DurationSketch()).merge(transit)
+        self._after = {}
+
+    def _full(self, sketches, stage):
+        """Distribution complète d'une étape, durée nulle sans historique"""
+        return _distribution(sketches.get(stage, DurationSketch())) or _point()
+
+    def _remaining(self, sketches, stage, elapsed):
+        """Durée restante sachant elapsed jours écoulés, au-delà de l'échéance si jamais observée"""
+        return _distribution(sketches.get(stage, DurationSketch()), elapsed) or _point(OVERDUE_DAYS + 1)
+
+    def after(self, stage):
+        """Durée de la sortie de l'étape à la clôture du ticket"""
+        if stage not in self._after:
+            branches = workflow.next_stages(stage)
+            weights = {
+                next_stage: self.dwell[next_stage].count if next_stage in self.dwell else 0
+                for next_stage in branches
+            }
+            total = sum(weights.values())
+            pmf = [0.0] * (LAST + 1) if branches else _point()
+            for next_stage in branches:
+                if next_stage == CLOSING_STAGE:
+                    branch = _point()
+                else:
+                    branch = _convolve(
+                        _convolve(self._full(self.transit, next_stage), self._full(self.dwell, next_stage)),
+                        self.after(next_stage),
+                    )
+                weight = weights[next_stage] / total if total else 1 / len(branches)
+                for index, p in enumerate(branch):
+                    pmf[index] += weight * p
+            self._after[stage] = pmf
+        return self._after[stage]
+
+    def score(self, stage, received, arrived_at, due_at, now):
+        """
+        Probabilités de dépasser le délai de traitement (échéance due_at) et le
+        délai à l'étape, pour un ticket arrivé à son étape à arrived_at (reçu ou
+        encore en acheminement) ; (None, None) sans historique pour l'étape.
+        """
+        dwell = self.dwell.get(stage)
+        if dwell is None or not dwell.count:
+            return None, None
+        elapsed = max(_days(now - arrived_at), 0.0)
+
+        # Délai à l'étape : compté depuis l'envoi, puis de nouveau depuis la réception
+        if elapsed >= OVERDUE_DAYS:
+            stage_probability = 1.0
+        elif received:
+            stage_probability = _at_least(self._remaining(self.dwell, stage, elapsed), OVERDUE_DAYS - elapsed)
+        else:
+            in_transit = _at_least(self._remaining(self.transit, stage, elapsed), OVERDUE_DAYS - elapsed)
+            stage_probability = in_transit + (1 - in_transit) * _at_least(self._full(self.dwell, stage), OVERDUE_DAYS)
+
+        budget = _days(due_at - now)
+        if budget <= 0:
+            return 1.0, stage_probability
+        if received:
+            remaining = self._remaining(self.dwell, stage, elapsed)
+        else:
+            remaining = _convolve(self._remaining(self.transit, stage, elapsed), self._full(self.dwell, stage))
+        return _at_least(_convolve(remaining, self.after(stage)), budget), stage_probability
+
+
+def score_tickets(now=None):
+    """Recalcule les prévisions de tous les tickets en cours ; retourne (tickets évalués, tickets à risque)"""
+    now = now or timezone.now()
+    forecaster = SlaForecaster()
+    arrival = TicketEvent.objects.filter(
+        ticket=OuterRef('pk'), to_role=OuterRef('current_stage'), event_type__in=STAGE_EVENT_TYPES
+    ).order_by('-timestamp', '-pk').values('timestamp')[:1]
+    tickets = RepairTicket.objects.exclude(status__in=workflow.FINAL_STATUSES).annotate(
+        arrived_at=Subquery(arrival)
+    ).values_list('pk', 'current_stage', 'current_holder_id', 'initial_send_date', 'arrived_at')
+
+    delay = timedelta(days=OVERDUE_DAYS)
+    forecasts = []
+    for pk, stage, holder_id, sent_at, arrived_at in tickets.iterator(chunk_size=2000):
+        arrived_at = arrived_at or sent_at
+        breach, stage_breach = forecaster.score(stage, holder_id is not None, arrived_at, sent_at + delay, now)
+        forecasts.append(SlaForecast(
+            ticket_id=pk, stage=stage, due_at=sent_at + delay, breach_probability=breach,
+            stage_due_at=arrived_at + delay, stage_breach_probability=stage_breach, scored_at=now,
+        ))
+
+    with transaction.atomic():
+        SlaForecast.objects.all().delete()
+        SlaForecast.objects.bulk_create(forecasts, batch_size=2000)
+    return len(forecasts), at_risk(now=now).count()
+
+
+def at_risk(now=None):
+    """Prévisions des tickets probablement en dépassement d'un délai pas encore échu, les plus sûrs d'abord"""
+    now = now or timezone.now()
+    return SlaForecast.objects.filter(
+        Q(due_at__gt=now, breach_probability__gte=RISK_THRESHOLD)
+        | Q(stage_due_at__gt=now, stage_breach_probability__gte=RISK_THRESHOLD)
+    ).order_by('-breach_probability', '-stage_breach_probability', 'due_at')
@@ -0,0 +1,346 @@
+"""
+Indicateurs mensuels des tickets par région, district et site
+
+- SiteKpiRollup : par mois et par site, tickets ouverts (created_at),
+  clôturés (closed_date, avec la durée totale depuis l'envoi initial),
+  annulés, passés en retard (délai de OVERDUE_DAYS jours atteint ce mois-là
+  sans clôture ni annulation) et en cours en fin de mois (à l'instant du
+  rafraîchissement pour le mois courant) ;
+- StageKpiRollup : passages terminés dans chaque étape du workflow (voir
+  tickets.models.stage_segments, la création faisant entrer le ticket dans
+  sa première étape), comptés au mois de sortie de l'étape, et acheminements
+  vers l'étape (de l'envoi à la réception), comptés au mois de réception.
+
+Durées de traitement et temps passés par étape sont aussi rangés dans des
+histogrammes fusionnables (analytics/sketches.py) : percentiles p50/p90/p99
+sur n'importe quelle combinaison de mois, sites et étapes.
+
+Le site d'un ticket est celui de son ASC (tickets sans site ignorés). District
+et région sont recopiés dans les rollups : les rapports n'interrogent que ces
+tables, sans parcourir les tickets.
+
+Un mois est recalculé en entier, en quelques requêtes sur les tickets de ce
+mois. Le rafraîchissement ne recalcule que les mois touchés depuis le passage
+précédent : mois courant (retards et encours évoluent avec le temps), mois des
+dates des tickets modifiés (updated_at) et des nouveaux envois. Comme pour
+rollups.py, le point de reprise est reculé de SAFETY_LAG et les suppressions
+ne sont pas répercutées : refresh_kpis(rebuild=True) recalcule tout.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, DateField, Max, Min, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from locations.models import Site
+from tickets.models import RepairTicket, TicketEvent, stage_segments
+from .models import RollupCheckpoint, SiteKpiRollup, StageKpiRollup
+from .rollups import SAFETY_LAG, period_start
+from .sketches import DurationSketch
+
+CHECKPOINT_NAME = 'kpis'
+
+# Délai au-delà duquel un ticket est en retard (rouge, voir RepairTicket.get_delay_color)
+OVERDUE_DAYS = 14
+
+SITE_COUNTERS = ['opened', 'closed', 'cancelled', 'overdue', 'backlog']
+
+# Événements qui font entrer un ticket dans une étape ou en sortir
+STAGE_EVENT_TYPES = ['CREATED', 'SENT', 'RECEIVED']
+
+# Niveau de regroupement des rapports : champ du rollup et libellé
+LEVELS = {
+    'region': ('region', 'region__name'),
+    'district': ('district', 'district__name'),
+    'site': ('site', 'site__name'),
+}
+
+
+def _days(delta):
+    return delta.total_seconds() / 86400
+
+
+def month_start(value):
+    """Premier jour du mois (heure locale) d'une date/heure"""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def month_bounds(month):
+    """Début et fin (exclue) d'un mois, en dates/heures locales"""
+    start = timezone.make_aware(datetime.combine(month, time.min))
+    return start, timezone.make_aware(datetime.combine(month + relativedelta(months=1), time.min))
+
+
+def _months_between(first, last):
+    month = first
+    while month <= last:
+        yield month
+        month += relativedelta(months=1)
+
+
+def _site_areas():
+    """District et région de chaque site"""
+    return {
+        site_id: (district_id, region_id)
+        for site_id, district_id, region_id in Site.objects.values_list('pk', 'district_id', 'district__region_id')
+    }
+
+
+def _site_kpis(month, now):
+    """Compteurs de SiteKpiRollup pour un mois : {site_id: {champ: valeur}}"""
+    start, end = month_bounds(month)
+    until = min(end, now)
+    overdue_delay = timedelta(days=OVERDUE_DAYS)
+    tickets = RepairTicket.objects.filter(asc__site__isnull=False)
+    rows = defaultdict(lambda: dict.fromkeys(SITE_COUNTERS, 0) | {
+        'resolution_days': 0.0, 'resolution_sketch': DurationSketch(),
+    })
+
+    def count(field, queryset):
+        for site_id, total in queryset.values_list('asc__site_id').annotate(total=Count('pk')).order_by():
+            rows[site_id][field] = total
+
+    count('opened', tickets.filter(created_at__gte=start, created_at__lt=end))
+    count('cancelled', tickets.filter(cancelled_date__gte=start, cancelled_date__lt=end))
+    # En cours à la fin du mois (ou maintenant) : créés avant, ni clôturés ni annulés avant
+    count('backlog', tickets.filter(created_at__lt=until).exclude(closed_date__lt=until).exclude(
+        cancelled_date__lt=until
+    ))
+
+    closed = tickets.filter(closed_date__gte=start, closed_date__lt=end)
+    for site_id, sent_at, closed_at in closed.values_list('asc__site_id', 'initial_send_date', 'closed_date'):
+        days = _days(closed_at - sent_at)
+        rows[site_id]['closed'] += 1
+        rows[site_id]['resolution_days'] += days
+        rows[site_id]['resolution_sketch'].add(days)
+
+    # Retard atteint ce mois-ci (et déjà atteint pour le mois courant)
+    due = tickets.filter(initial_send_date__gte=start - overdue_delay, initial_send_date__lt=until - overdue_delay)
+    for site_id, sent_at, closed_at, cancelled_at in due.values_list(
+        'asc__site_id', 'initial_send_date', 'closed_date', 'cancelled_date'
+    ):
+        due_at = sent_at + overdue_delay
+        if (closed_at is None or closed_at > due_at) and (cancelled_at is None or cancelled_at > due_at):
+            rows[site_id]['overdue'] += 1
+
+    for row in rows.values():
+        row['resolution_sketch'] = row['resolution_sketch'].to_json()
+    return rows
+
+
+def _stage_entries(events):
+    """Événements d'étape pour stage_segments : la création vaut entrée dans la première étape"""
+    for event_type, to_role, timestamp in events:
+        yield ('SENT' if event_type == 'CREATED' else event_type), to_role, timestamp
+
+
+def _transits(events):
+    """Acheminements (étape, envoi, réception) : d'un envoi vers une étape à sa réception"""
+    sent = None
+    for event_type, to_role, timestamp in events:
+        if event_type == 'SENT':
+            sent = to_role, timestamp
+        elif event_type == 'RECEIVED' and sent is not None and sent[0] == to_role:
+            yield to_role, sent[1], timestamp
+            sent = None
+
+
+def _stage_kpis(month):
+    """Passages et acheminements terminés au cours d'un mois : {(site_id, étape): {champ: valeur}}"""
+    start, end = month_bounds(month)
+    moving = TicketEvent.objects.filter(
+        event_type__in=['SENT', 'RECEIVED'], timestamp__gte=start, timestamp__lt=end
+    )
+    events = TicketEvent.objects.filter(
+        ticket__in=moving.values('ticket_id'), event_type__in=STAGE_EVENT_TYPES, ticket__asc__site__isnull=False
+    ).order_by('ticket_id', 'timestamp', 'pk').values_list(
+        'ticket_id', 'ticket__asc__site_id', 'event_type', 'to_role', 'timestamp'
+    ).iterator(chunk_size=5000)
+
+    rows = defaultdict(lambda: {
+        'exits': 0, 'dwell_days': 0.0, 'dwell_sketch': DurationSketch(), 'transit_sketch': DurationSketch(),
+    })
+    for (_, site_id), group in groupby(events, key=itemgetter(0, 1)):
+        ticket_events = [event[2:] for event in group]
+        for stage, entered, left in stage_segments(_stage_entries(ticket_events)):
+            if start <= left < end:
+                days = _days(left - entered)
+                row = rows[site_id, stage]
+                row['exits'] += 1
+                row['dwell_days'] += days
+                row['dwell_sketch'].add(days)
+        for stage, sent_at, received_at in _transits(ticket_events):
+            if start <= received_at < end:
+                rows[site_id, stage]['transit_sketch'].add(_days(received_at - sent_at))
+
+    for row in rows.values():
+        row['dwell_sketch'] = row['dwell_sketch'].to_json()
+        row['transit_sketch'] = row['transit_sketch'].to_json()
+    return rows
+
+
+def _write_month(month, now, areas):
+    """Remplace les rollups d'un mois"""
+    SiteKpiRollup.objects.filter(period=month).delete()
+    StageKpiRollup.objects.filter(period=month).delete()
+    SiteKpiRollup.objects.bulk_create([
+        SiteKpiRollup(period=month, site_id=site_id, district_id=areas[site_id][0], region_id=areas[site_id][1],
+                      **values)
+        for site_id, values in _site_kpis(month, now).items() if site_id in areas
+    ])
+    StageKpiRollup.objects.bulk_create([
+        StageKpiRollup(period=month, site_id=site_id, district_id=areas[site_id][0], region_id=areas[site_id][1],
+                       stage=stage, **values)
+        for (site_id, stage), values in _stage_kpis(month).items() if site_id in areas
+    ])
+
+
+def _changed_months(checkpoint, now):
+    """Mois à recalculer depuis le passage précédent"""
+    since = checkpoint.last_refreshed_at - SAFETY_LAG
+    current = month_start(now)
+    months = set(_months_between(month_start(since), current))
+
+    overdue_delay = timedelta(days=OVERDUE_DAYS)
+    changed = RepairTicket.objects.filter(updated_at__gt=since).values_list(
+        'created_at', 'closed_date', 'cancelled_date', 'initial_send_date'
+    )
+    for created_at, closed_at, cancelled_at, sent_at in changed.iterator(chunk_size=5000):
+        months.update(month_start(value) for value in (created_at, closed_at, cancelled_at) if value)
+        months.add(month_start(sent_at + overdue_delay))
+
+    months.update(
+        TicketEvent.objects.filter(pk__gt=checkpoint.last_id, event_type__in=['SENT', 'RECEIVED'])
+        .annotate(month=TruncMonth('timestamp', output_field=DateField()))
+        .values_list('month', flat=True).distinct().order_by()
+    )
+    return {month for month in months if month <= current}
+
+
+def refresh_kpis(rebuild=False):
+    """Recalcule les indicateurs des mois modifiés (tous avec rebuild) ; retourne le nombre de mois recalculés"""
+    now = timezone.now()
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT_NAME)
+        last_event_id = TicketEvent.objects.aggregate(last=Max('pk'))['last'] or 0
+
+        if rebuild or checkpoint.last_refreshed_at is None:
+            SiteKpiRollup.objects.all().delete()
+            StageKpiRollup.objects.all().delete()
+            first = RepairTicket.objects.aggregate(first=Min('created_at'))['first']
+            months = list(_months_between(month_start(first), month_start(now))) if first else []
+        else:
+            months = sorted(_changed_months(checkpoint, now))
+
+        areas = _site_areas()
+        for month in months:
+            _write_month(month, now, areas)
+
+        checkpoint.last_id = last_event_id
+        checkpoint.last_refreshed_at = now
+        checkpoint.save()
+    return len(months)
+
+
+def _average(total, count):
+    return round(total / count, 1) if count else None
+
+
+def _merged_sketches(rows):
+    """Histogrammes fusionnés par clé à partir de lignes (clé, histogramme), et leur fusion totale"""
+    by_key = defaultdict(DurationSketch)
+    total = DurationSketch()
+    for key, buckets in rows:
+        by_key[key].merge(buckets)
+        total.merge(buckets)
+    return by_key, total
+
+
+def kpi_report(months=12, level='district', region=None, district=None, site_ids=None):
+    """
+    Indicateurs des months derniers mois par mois et par zone (level : région,
+    district ou site), durées par étape sur la période (moyenne et percentiles) ;
+    lit uniquement les rollups. site_ids restreint aux sites visibles (superviseurs).
+    """
+    since = period_start(months)
+    sites = SiteKpiRollup.objects.filter(period__gte=since)
+    stages = StageKpiRollup.objects.filter(period__gte=since)
+    for field, value in (('region', region), ('district', district)):
+        if value:
+            sites = sites.filter(**{field: value})
+            stages = stages.filter(**{field: value})
+    if site_ids is not None:
+        sites = sites.filter(site__in=site_ids)
+        stages = stages.filter(site__in=site_ids)
+
+    key, name = LEVELS[level]
+    resolution_sketches, resolution_total = _merged_sketches(
+        ((period, area), buckets) for period, area, buckets in
+        sites.filter(closed__gt=0).values_list('period', key, 'resolution_sketch').order_by()
+    )
+    sums = {field: Sum(field) for field in SITE_COUNTERS + ['resolution_days']}
+    rows = []
+    for row in sites.values('period', key, name).annotate(**sums).order_by('-period', name):
+        sketch = resolution_sketches.get((row['period'], row[key]), DurationSketch())
+        rows.append({
+            'period': row['period'],
+            'id': row[key],
+            'name': row[name],
+            **{field: row[field] for field in SITE_COUNTERS},
+            'avg_resolution_days': _average(row['resolution_days'], row['closed']),
+            'resolution_percentiles': sketch.percentiles(),
+        })
+
+    totals = sites.aggregate(**sums)
+    stage_labels = dict(RepairTicket.STAGE_CHOICES)
+    stage_rows = {
+        row['stage']: row for row in stages.filter(exits__gt=0).values('stage')
+        .annotate(exits=Sum('exits'), dwell=Sum('dwell_days')).order_by()
+    }
+    stage_sketches, _ = _merged_sketches(
+        stages.filter(exits__gt=0).values_list('stage', 'dwell_sketch').order_by()
+    )
+    return {
+        'since': since,
+        'months': months,
+        'level': level,
+        'rows': rows,
+        'totals': {
+            **{field: totals[field] or 0 for field in SITE_COUNTERS if field != 'backlog'},
+            'avg_resolution_days': _average(totals['resolution_days'] or 0, totals['closed'] or 0),
+            'resolution_percentiles': resolution_total.percentiles(),
+        },
+        'stages': [{
+            'stage': stage,
+            'label': stage_labels[stage],
+            'exits': stage_rows[stage]['exits'],
+            'avg_days': _average(stage_rows[stage]['dwell'], stage_rows[stage]['exits']),
+            **stage_sketches[stage].percentiles(),
+        } for stage, _ in RepairTicket.STAGE_CHOICES if stage in stage_rows],
+    }
+
+
+def turnaround_summary(months=None, site_ids=None):
+    """
+    Durée de traitement des tickets clôturés (envoi initial → clôture, en jours) :
+    nombre, moyenne et percentiles, sur les months derniers mois (tout
+    l'historique si None), depuis les rollups.
+    """
+    closed = SiteKpiRollup.objects.filter(closed__gt=0)
+    if months is not None:
+        closed = closed.filter(period__gte=period_start(months))
+    if site_ids is not None:
+        closed = closed.filter(site__in=site_ids)
+
+    count, total = 0, 0.0
+    sketch = DurationSketch()
+    for closed_count, days, buckets in closed.values_list('closed', 'resolution_days', 'resolution_sketch'):
+        count += closed_count
+        total += days
+        sketch.merge(buckets)
+    return {'count': count, 'avg_days': _average(total, count), **sketch.percentiles()}
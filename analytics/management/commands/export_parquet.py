@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour exporter tickets, événements, problèmes, équipements et
+sites au format Parquet (outils d'analyse, notebooks). À planifier (cron),
+par exemple chaque nuit ; seuls les mois modifiés sont réécrits.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.columnar import ColumnarExportError, export_columnar, export_root
+
+
+class Command(BaseCommand):
+    help = 'Exporte les données de réparation au format Parquet, par mois (incrémental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Dossier de destination (défaut : ANALYTICS_EXPORT_ROOT)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Réécrit tous les fichiers (après suppression de données par exemple)',
+        )
+
+    def handle(self, *args, **options):
+        root = options['output'] or export_root()
+        try:
+            result = export_columnar(root=root, full=options['full'])
+        except ColumnarExportError as exc:
+            raise CommandError(str(exc))
+
+        written = result['written']
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Export Parquet à jour dans {root} : {written['tickets']} mois réécrit(s), "
+            f"{written['equipment'] + written['locations']} table(s) de référence"
+        ))
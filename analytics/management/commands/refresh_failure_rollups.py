@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour rafraîchir les rollups de fiabilité du parc
+(pannes par modèle, problèmes par type). À planifier (cron), par exemple toutes
+les heures ; seules les nouvelles lignes sont agrégées.
+"""
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rafraîchit les rollups de fiabilité du parc (incrémental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recalcule tous les rollups (après suppression de tickets par exemple)',
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_rollups(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Rollups à jour : {result['tickets']} ticket(s) et {result['issues']} problème(s) intégrés"
+        ))
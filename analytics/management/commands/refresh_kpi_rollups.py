@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour rafraîchir les indicateurs mensuels par région, district
+et site (tickets ouverts, clôturés, en retard, durées par étape). À planifier
+(cron), par exemple toutes les heures ; seuls les mois modifiés sont recalculés.
+"""
+from django.core.management.base import BaseCommand
+
+from analytics.kpis import refresh_kpis
+
+
+class Command(BaseCommand):
+    help = 'Rafraîchit les indicateurs mensuels par zone (incrémental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recalcule tous les mois (après suppression de tickets par exemple)',
+        )
+
+    def handle(self, *args, **options):
+        months = refresh_kpis(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f"✓ Indicateurs à jour : {months} mois recalculé(s)"))
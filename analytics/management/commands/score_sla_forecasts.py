@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour recalculer les prévisions de dépassement de délai des
+tickets en cours, à partir des durées par étape des indicateurs (lancer
+refresh_kpi_rollups avant). À planifier (cron), par exemple toutes les heures.
+"""
+from django.core.management.base import BaseCommand
+
+from analytics.forecast import score_tickets
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les probabilités de dépassement de délai des tickets en cours'
+
+    def handle(self, *args, **options):
+        scored, risky = score_tickets()
+        self.stdout.write(self.style.SUCCESS(f"✓ {scored} ticket(s) évalué(s), {risky} à risque"))
@@ -0,0 +1,93 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FailureRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(verbose_name='Mois')),
+                ('equipment_type', models.CharField(max_length=20, verbose_name="Type d'équipement")),
+                ('brand', models.CharField(max_length=50, verbose_name='Marque')),
+                ('model', models.CharField(max_length=100, verbose_name='Modèle')),
+                ('ticket_count', models.PositiveIntegerField(default=0, verbose_name='Tickets')),
+            ],
+            options={
+                'verbose_name': 'Pannes par modèle',
+                'verbose_name_plural': 'Pannes par modèle',
+                'ordering': ['-period', 'brand', 'model'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FleetSize',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_type', models.CharField(max_length=20, verbose_name="Type d'équipement")),
+                ('brand', models.CharField(max_length=50, verbose_name='Marque')),
+                ('model', models.CharField(max_length=100, verbose_name='Modèle')),
+                ('equipment_count', models.PositiveIntegerField(default=0, verbose_name='Équipements')),
+            ],
+            options={
+                'verbose_name': 'Taille du parc',
+                'verbose_name_plural': 'Tailles du parc',
+                'ordering': ['brand', 'model'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProblemTypeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(verbose_name='Mois')),
+                ('equipment_type', models.CharField(max_length=20, verbose_name="Type d'équipement")),
+                ('brand', models.CharField(max_length=50, verbose_name='Marque')),
+                ('model', models.CharField(max_length=100, verbose_name='Modèle')),
+                ('issue_count', models.PositiveIntegerField(default=0, verbose_name='Problèmes')),
+            ],
+            options={
+                'verbose_name': 'Problèmes par type',
+                'verbose_name_plural': 'Problèmes par type',
+                'ordering': ['-period', 'brand', 'model'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Rollup')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Dernier identifiant traité')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Point de reprise',
+                'verbose_name_plural': 'Points de reprise',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='failurerollup',
+            constraint=models.UniqueConstraint(fields=('period', 'equipment_type', 'brand', 'model'), name='analytics_failure_rollup_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='fleetsize',
+            constraint=models.UniqueConstraint(fields=('equipment_type', 'brand', 'model'), name='analytics_fleet_size_key'),
+        ),
+        migrations.AddField(
+            model_name='problemtyperollup',
+            name='problem_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='tickets.problemtype', verbose_name='Type de problème'),
+        ),
+        migrations.AddConstraint(
+            model_name='problemtyperollup',
+            constraint=models.UniqueConstraint(fields=('period', 'equipment_type', 'brand', 'model', 'problem_type'), name='analytics_problem_rollup_key'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('locations', '0002_normalized_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupcheckpoint',
+            name='last_refreshed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernier rafraîchissement'),
+        ),
+        migrations.CreateModel(
+            name='SiteKpiRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(verbose_name='Mois')),
+                ('opened', models.PositiveIntegerField(default=0, verbose_name='Ouverts')),
+                ('closed', models.PositiveIntegerField(default=0, verbose_name='Clôturés')),
+                ('cancelled', models.PositiveIntegerField(default=0, verbose_name='Annulés')),
+                ('overdue', models.PositiveIntegerField(default=0, verbose_name='Passés en retard')),
+                ('backlog', models.PositiveIntegerField(default=0, verbose_name='En cours en fin de mois')),
+                ('resolution_days', models.FloatField(default=0, verbose_name='Durée totale de traitement (jours)')),
+                ('district', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.district', verbose_name='District')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.region', verbose_name='Région')),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.site', verbose_name='Site')),
+            ],
+            options={
+                'verbose_name': 'Indicateurs par site',
+                'verbose_name_plural': 'Indicateurs par site',
+                'ordering': ['-period', 'site'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StageKpiRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(verbose_name='Mois')),
+                ('stage', models.CharField(choices=[('SUPERVISOR', 'Superviseur'), ('PROGRAM', 'Programme'), ('LOGISTICS', 'Logistique'), ('REPAIRER', 'Réparateur'), ('ESANTE', 'E-Santé'), ('RETURNING_LOGISTICS', 'Retour - Logistique'), ('RETURNING_PROGRAM', 'Retour - Programme'), ('RETURNING_SUPERVISOR', 'Retour - Superviseur'), ('RETURNED_ASC', "Retourné à l'ASC")], max_length=30, verbose_name='Étape')),
+                ('exits', models.PositiveIntegerField(default=0, verbose_name='Passages')),
+                ('dwell_days', models.FloatField(default=0, verbose_name='Durée totale (jours)')),
+                ('district', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.district', verbose_name='District')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.region', verbose_name='Région')),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.site', verbose_name='Site')),
+            ],
+            options={
+                'verbose_name': 'Durées par étape',
+                'verbose_name_plural': 'Durées par étape',
+                'ordering': ['-period', 'site', 'stage'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sitekpirollup',
+            constraint=models.UniqueConstraint(fields=('period', 'site'), name='analytics_site_kpi_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='stagekpirollup',
+            constraint=models.UniqueConstraint(fields=('period', 'site', 'stage'), name='analytics_stage_kpi_key'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+def reset_kpi_checkpoint(apps, schema_editor):
+    """Recalcul complet au prochain refresh_kpi_rollups : les mois existants n'ont pas d'histogramme"""
+    RollupCheckpoint = apps.get_model('analytics', 'RollupCheckpoint')
+    RollupCheckpoint.objects.filter(name='kpis').update(last_refreshed_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_kpi_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitekpirollup',
+            name='resolution_sketch',
+            field=models.JSONField(default=dict, verbose_name='Histogramme des durées de traitement'),
+        ),
+        migrations.AddField(
+            model_name='stagekpirollup',
+            name='dwell_sketch',
+            field=models.JSONField(default=dict, verbose_name='Histogramme des durées'),
+        ),
+        migrations.RunPython(reset_kpi_checkpoint, migrations.RunPython.noop),
+    ]
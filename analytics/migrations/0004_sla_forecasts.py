@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def reset_kpi_checkpoint(apps, schema_editor):
+    """Recalcul complet au prochain refresh_kpi_rollups : acheminements et première étape absents des mois existants"""
+    RollupCheckpoint = apps.get_model('analytics', 'RollupCheckpoint')
+    RollupCheckpoint.objects.filter(name='kpis').update(last_refreshed_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_kpi_sketches'),
+        ('tickets', '0002_normalized_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagekpirollup',
+            name='transit_sketch',
+            field=models.JSONField(default=dict, verbose_name='Histogramme des acheminements'),
+        ),
+        migrations.CreateModel(
+            name='SlaForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('SUPERVISOR', 'Superviseur'), ('PROGRAM', 'Programme'), ('LOGISTICS', 'Logistique'), ('REPAIRER', 'Réparateur'), ('ESANTE', 'E-Santé'), ('RETURNING_LOGISTICS', 'Retour - Logistique'), ('RETURNING_PROGRAM', 'Retour - Programme'), ('RETURNING_SUPERVISOR', 'Retour - Superviseur'), ('RETURNED_ASC', "Retourné à l'ASC")], max_length=30, verbose_name='Étape')),
+                ('due_at', models.DateTimeField(verbose_name='Échéance du traitement')),
+                ('breach_probability', models.FloatField(null=True, verbose_name='Probabilité de retard')),
+                ('stage_due_at', models.DateTimeField(verbose_name="Échéance à l'étape")),
+                ('stage_breach_probability', models.FloatField(null=True, verbose_name="Probabilité de retard à l'étape")),
+                ('scored_at', models.DateTimeField(verbose_name='Calculée le')),
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sla_forecast', to='tickets.repairticket', verbose_name='Ticket')),
+            ],
+            options={
+                'verbose_name': 'Prévision de retard',
+                'verbose_name_plural': 'Prévisions de retard',
+                'ordering': ['-breach_probability'],
+            },
+        ),
+        migrations.RunPython(reset_kpi_checkpoint, migrations.RunPython.noop),
+    ]
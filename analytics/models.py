@@ -0,0 +1,164 @@
+from django.db import models
+from locations.models import Region, District, Site
+from tickets.models import ProblemType, RepairTicket
+
+
+class RollupCheckpoint(models.Model):
+    """Dernier identifiant source intégré par un rollup incrémental"""
+    name = models.CharField(max_length=50, unique=True, verbose_name="Rollup")
+    last_id = models.BigIntegerField(default=0, verbose_name="Dernier identifiant traité")
+    last_refreshed_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernier rafraîchissement")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Point de reprise"
+        verbose_name_plural = "Points de reprise"
+
+    def __str__(self):
+        return f"{self.name} ({self.last_id})"
+
+
+class FailureRollup(models.Model):
+    """Nombre de tickets ouverts par mois et par modèle d'équipement"""
+    period = models.DateField(verbose_name="Mois")
+    equipment_type = models.CharField(max_length=20, verbose_name="Type d'équipement")
+    brand = models.CharField(max_length=50, verbose_name="Marque")
+    model = models.CharField(max_length=100, verbose_name="Modèle")
+    ticket_count = models.PositiveIntegerField(default=0, verbose_name="Tickets")
+
+    class Meta:
+        verbose_name = "Pannes par modèle"
+        verbose_name_plural = "Pannes par modèle"
+        ordering = ['-period', 'brand', 'model']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'equipment_type', 'brand', 'model'], name='analytics_failure_rollup_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%m/%Y} - {self.brand} {self.model} : {self.ticket_count}"
+
+
+class ProblemTypeRollup(models.Model):
+    """Nombre de problèmes signalés par mois, modèle d'équipement et type de problème"""
+    period = models.DateField(verbose_name="Mois")
+    equipment_type = models.CharField(max_length=20, verbose_name="Type d'équipement")
+    brand = models.CharField(max_length=50, verbose_name="Marque")
+    model = models.CharField(max_length=100, verbose_name="Modèle")
+    problem_type = models.ForeignKey(
+        ProblemType,
+        on_delete=models.CASCADE,
+        related_name='rollups',
+        verbose_name="Type de problème"
+    )
+    issue_count = models.PositiveIntegerField(default=0, verbose_name="Problèmes")
+
+    class Meta:
+        verbose_name = "Problèmes par type"
+        verbose_name_plural = "Problèmes par type"
+        ordering = ['-period', 'brand', 'model']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'equipment_type', 'brand', 'model', 'problem_type'],
+                name='analytics_problem_rollup_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%m/%Y} - {self.brand} {self.model} - {self.problem_type.name} : {self.issue_count}"
+
+
+class FleetSize(models.Model):
+    """Taille du parc par modèle d'équipement (dénominateur des taux de panne)"""
+    equipment_type = models.CharField(max_length=20, verbose_name="Type d'équipement")
+    brand = models.CharField(max_length=50, verbose_name="Marque")
+    model = models.CharField(max_length=100, verbose_name="Modèle")
+    equipment_count = models.PositiveIntegerField(default=0, verbose_name="Équipements")
+
+    class Meta:
+        verbose_name = "Taille du parc"
+        verbose_name_plural = "Tailles du parc"
+        ordering = ['brand', 'model']
+        constraints = [
+            models.UniqueConstraint(fields=['equipment_type', 'brand', 'model'], name='analytics_fleet_size_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.brand} {self.model} : {self.equipment_count}"
+
+
+class KpiRollupBase(models.Model):
+    """Mois et site d'un indicateur ; district et région recopiés pour les regroupements sans jointure"""
+    period = models.DateField(verbose_name="Mois")
+    site = models.ForeignKey(Site, on_delete=models.CASCADE, related_name='+', verbose_name="Site")
+    district = models.ForeignKey(District, on_delete=models.CASCADE, related_name='+', verbose_name="District")
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='+', verbose_name="Région")
+
+    class Meta:
+        abstract = True
+
+
+class SiteKpiRollup(KpiRollupBase):
+    """Tickets ouverts, clôturés, annulés, passés en retard et en attente par mois et par site"""
+    opened = models.PositiveIntegerField(default=0, verbose_name="Ouverts")
+    closed = models.PositiveIntegerField(default=0, verbose_name="Clôturés")
+    cancelled = models.PositiveIntegerField(default=0, verbose_name="Annulés")
+    overdue = models.PositiveIntegerField(default=0, verbose_name="Passés en retard")
+    backlog = models.PositiveIntegerField(default=0, verbose_name="En cours en fin de mois")
+    resolution_days = models.FloatField(default=0, verbose_name="Durée totale de traitement (jours)")
+    # Histogramme des durées de traitement des tickets clôturés (voir analytics/sketches.py)
+    resolution_sketch = models.JSONField(default=dict, verbose_name="Histogramme des durées de traitement")
+
+    class Meta:
+        verbose_name = "Indicateurs par site"
+        verbose_name_plural = "Indicateurs par site"
+        ordering = ['-period', 'site']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'site'], name='analytics_site_kpi_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%m/%Y} - {self.site} : {self.opened} ouvert(s), {self.closed} clôturé(s)"
+
+
+class StageKpiRollup(KpiRollupBase):
+    """Passages terminés dans chaque étape du workflow par mois de sortie et par site, acheminements vers l'étape"""
+    stage = models.CharField(max_length=30, choices=RepairTicket.STAGE_CHOICES, verbose_name="Étape")
+    exits = models.PositiveIntegerField(default=0, verbose_name="Passages")
+    dwell_days = models.FloatField(default=0, verbose_name="Durée totale (jours)")
+    dwell_sketch = models.JSONField(default=dict, verbose_name="Histogramme des durées")
+    # Délais d'acheminement vers l'étape (envoi → réception), au mois de réception
+    transit_sketch = models.JSONField(default=dict, verbose_name="Histogramme des acheminements")
+
+    class Meta:
+        verbose_name = "Durées par étape"
+        verbose_name_plural = "Durées par étape"
+        ordering = ['-period', 'site', 'stage']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'site', 'stage'], name='analytics_stage_kpi_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%m/%Y} - {self.site} - {self.get_stage_display()} : {self.exits}"
+
+
+class SlaForecast(models.Model):
+    """Probabilités de dépassement des délais d'un ticket en cours (voir analytics/forecast.py)"""
+    ticket = models.OneToOneField(
+        RepairTicket, on_delete=models.CASCADE, related_name='sla_forecast', verbose_name="Ticket"
+    )
+    stage = models.CharField(max_length=30, choices=RepairTicket.STAGE_CHOICES, verbose_name="Étape")
+    due_at = models.DateTimeField(verbose_name="Échéance du traitement")
+    breach_probability = models.FloatField(null=True, verbose_name="Probabilité de retard")
+    stage_due_at = models.DateTimeField(verbose_name="Échéance à l'étape")
+    stage_breach_probability = models.FloatField(null=True, verbose_name="Probabilité de retard à l'étape")
+    scored_at = models.DateTimeField(verbose_name="Calculée le")
+
+    class Meta:
+        verbose_name = "Prévision de retard"
+        verbose_name_plural = "Prévisions de retard"
+        ordering = ['-breach_probability']
+
+    def __str__(self):
+        return f"{self.ticket} : {self.breach_probability or 0:.0%}"
@@ -0,0 +1,158 @@
+"""
+Rollups de fiabilité du parc
+
+Les tickets (par modèle d'équipement) et les problèmes signalés (par modèle et
+type de problème) sont agrégés par mois dans des tables de rollup. Le
+rafraîchissement est incrémental : seules les lignes dont l'identifiant dépasse
+le point de reprise (RollupCheckpoint) sont agrégées, en une requête GROUP BY,
+puis ajoutées aux compteurs existants.
+
+Les lignes créées depuis moins de SAFETY_LAG sont laissées au passage suivant :
+une transaction plus ancienne encore en cours pourrait valider un identifiant
+inférieur au point de reprise. Les suppressions ne sont pas répercutées ;
+refresh_rollups(rebuild=True) recalcule tout.
+
+Les lectures (reliability_summary) ne portent que sur les tables de rollup.
+"""
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, DateField, F, Max, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from assets.models import Equipment
+from tickets.models import RepairTicket, Issue, ProblemType
+from .models import RollupCheckpoint, FailureRollup, ProblemTypeRollup, FleetSize
+
+SAFETY_LAG = timedelta(minutes=5)
+
+MODEL_FIELDS = ('equipment_type', 'brand', 'model')
+
+
+def _refresh(name, queryset, equipment_path, rollup_model, count_field, extra_fields=()):
+    """Intègre les nouvelles lignes de queryset dans rollup_model ; retourne le nombre de lignes sources"""
+    checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=name)
+
+    pending = queryset.filter(pk__gt=checkpoint.last_id)
+    upper = pending.filter(created_at__lt=timezone.now() - SAFETY_LAG).aggregate(upper=Max('pk'))['upper']
+    if upper is None:
+        return 0
+
+    dimensions = {field: F(f'{equipment_path}__{field}') for field in MODEL_FIELDS}
+    groups = pending.filter(pk__lte=upper).annotate(
+        period=TruncMonth('created_at', output_field=DateField())
+    ).values('period', *extra_fields, **dimensions).annotate(count=Count('pk')).order_by()
+
+    # Clé d'un rollup : mois, modèle d'équipement et dimensions supplémentaires (clés étrangères)
+    group_fields = ('period',) + MODEL_FIELDS + tuple(extra_fields)
+    key_fields = ('period',) + MODEL_FIELDS + tuple(f'{field}_id' for field in extra_fields)
+    increments = {}
+    processed = 0
+    for group in groups:
+        key = tuple(group[field] for field in group_fields)
+        increments[key] = increments.get(key, 0) + group['count']
+        processed += group['count']
+
+    existing = {
+        tuple(getattr(row, field) for field in key_fields): row
+        for row in rollup_model.objects.filter(period__in={key[0] for key in increments})
+    }
+    to_update, to_create = [], []
+    for key, count in increments.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(rollup_model(**dict(zip(key_fields, key)), **{count_field: count}))
+        else:
+            setattr(row, count_field, getattr(row, count_field) + count)
+            to_update.append(row)
+    rollup_model.objects.bulk_update(to_update, [count_field])
+    rollup_model.objects.bulk_create(to_create)
+
+    checkpoint.last_id = upper
+    checkpoint.save()
+    return processed
+
+
+def _refresh_fleet():
+    """Recalcule la taille du parc par modèle (table réduite, remplacée en entier)"""
+    sizes = Equipment.objects.values(*MODEL_FIELDS).annotate(count=Count('pk')).order_by()
+    FleetSize.objects.all().delete()
+    FleetSize.objects.bulk_create([
+        FleetSize(**{field: size[field] for field in MODEL_FIELDS}, equipment_count=size['count'])
+        for size in sizes
+    ])
+
+
+def refresh_rollups(rebuild=False):
+    """Rafraîchit les rollups de fiabilité ; retourne le nombre de tickets et problèmes intégrés"""
+    with transaction.atomic():
+        if rebuild:
+            FailureRollup.objects.all().delete()
+            ProblemTypeRollup.objects.all().delete()
+            RollupCheckpoint.objects.filter(name__in=['tickets', 'issues']).delete()
+
+        tickets = _refresh('tickets', RepairTicket.objects.all(), 'equipment', FailureRollup, 'ticket_count')
+        issues = _refresh(
+            'issues', Issue.objects.all(), 'ticket__equipment', ProblemTypeRollup, 'issue_count',
+            extra_fields=('problem_type',)
+        )
+        _refresh_fleet()
+    return {'tickets': tickets, 'issues': issues}
+
+
+def period_start(months):
+    """Premier jour du mois de début d'une fenêtre de months mois (mois courant inclus)"""
+    today = timezone.localdate()
+    return today.replace(day=1) - relativedelta(months=months - 1)
+
+
+def reliability_summary(months=12, equipment_type=None, limit=10):
+    """
+    Modèles les plus souvent en panne (taux pour 100 équipements) et types de
+    problèmes dominants sur les months derniers mois, à partir des rollups
+    """
+    since = period_start(months)
+    failures = FailureRollup.objects.filter(period__gte=since)
+    problems = ProblemTypeRollup.objects.filter(period__gte=since)
+    fleet = FleetSize.objects.all()
+    if equipment_type:
+        failures = failures.filter(equipment_type=equipment_type)
+        problems = problems.filter(equipment_type=equipment_type)
+        fleet = fleet.filter(equipment_type=equipment_type)
+
+    fleet_sizes = {
+        tuple(row[field] for field in MODEL_FIELDS): row['equipment_count']
+        for row in fleet.values(*MODEL_FIELDS, 'equipment_count')
+    }
+
+    models = []
+    for row in failures.values(*MODEL_FIELDS).annotate(tickets=Sum('ticket_count')).order_by():
+        fleet_size = fleet_sizes.get(tuple(row[field] for field in MODEL_FIELDS), 0)
+        models.append({
+            **row,
+            'fleet_size': fleet_size,
+            'failure_rate': round(100 * row['tickets'] / fleet_size, 1) if fleet_size else None,
+        })
+    models.sort(key=lambda row: (row['failure_rate'] or 0, row['tickets']), reverse=True)
+
+    problem_rows = list(
+        problems.values('problem_type').annotate(issues=Sum('issue_count')).order_by('-issues')[:limit]
+    )
+    names = dict(ProblemType.objects.filter(
+        pk__in=[row['problem_type'] for row in problem_rows]
+    ).values_list('pk', 'name'))
+    total_issues = problems.aggregate(total=Sum('issue_count'))['total'] or 0
+
+    return {
+        'since': since,
+        'months': months,
+        'models': models[:limit],
+        'problem_types': [{
+            'problem_type': row['problem_type'],
+            'name': names.get(row['problem_type'], ''),
+            'issues': row['issues'],
+            'share': round(100 * row['issues'] / total_issues, 1) if total_issues else None,
+        } for row in problem_rows],
+    }
@@ -0,0 +1,84 @@
+"""
+Histogrammes de durées fusionnables (percentiles des délais de traitement)
+
+Chaque durée (en jours) est rangée dans un intervalle logarithmique : la borne
+supérieure de l'intervalle i est GAMMA ** i, avec GAMMA = (1 + a) / (1 - a).
+Un percentile est estimé au centre de son intervalle, à RELATIVE_ACCURACY près
+(2 % : 9,8 à 10,2 jours pour 10 jours) quel que soit le nombre de valeurs.
+
+Les intervalles ne dépendent pas des données : deux histogrammes (deux sites,
+deux mois, deux étapes) se fusionnent en additionnant leurs compteurs, et un
+percentile sur n'importe quelle combinaison se calcule sans relire les tickets.
+Stockés en JSON ({indice: nombre}, quelques dizaines à quelques centaines
+d'entrées), voir SiteKpiRollup.resolution_sketch et StageKpiRollup.dwell_sketch.
+"""
+import math
+from collections import Counter
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Durées inférieures (dont les durées nulles ou négatives) comptées à une minute
+MIN_DAYS = 1 / 1440
+
+PERCENTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+def _center(index):
+    """Centre de l'intervalle ]GAMMA^(i-1), GAMMA^i] : erreur relative ≤ RELATIVE_ACCURACY"""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+class DurationSketch:
+    """Histogramme logarithmique de durées en jours"""
+
+    def __init__(self, buckets=None):
+        self.buckets = Counter({int(index): count for index, count in (buckets or {}).items()})
+
+    @classmethod
+    def merged(cls, sketches):
+        """Fusion d'histogrammes sérialisés (to_json)"""
+        sketch = cls()
+        for buckets in sketches:
+            sketch.merge(buckets)
+        return sketch
+
+    def add(self, days, count=1):
+        self.buckets[math.ceil(math.log(max(days, MIN_DAYS)) / _LOG_GAMMA)] += count
+
+    def merge(self, other):
+        """Ajoute un autre histogramme (DurationSketch ou forme sérialisée)"""
+        buckets = other.buckets if isinstance(other, DurationSketch) else other
+        for index, count in buckets.items():
+            self.buckets[int(index)] += count
+
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+
+    def values(self):
+        """(durée estimée, nombre) de chaque intervalle, par durée croissante"""
+        for index in sorted(self.buckets):
+            yield _center(index), self.buckets[index]
+
+    def quantile(self, q):
+        """Durée (jours) au rang q (0 à 1), None si l'histogramme est vide"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for value, count in self.values():
+            seen += count
+            if seen > rank:
+                return value
+
+    def percentiles(self, digits=1):
+        """p50 / p90 / p99 arrondis, None si l'histogramme est vide"""
+        if not self.buckets:
+            return dict.fromkeys(PERCENTILES)
+        return {name: round(self.quantile(q), digits) for name, q in PERCENTILES.items()}
+
+    def to_json(self):
+        return {str(index): count for index, count in sorted(self.buckets.items()) if count}
@@ -0,0 +1,456 @@
+import io
+import importlib.util
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User, ASC, Supervisor
+from locations.models import Region, District, Site
+from assets.models import Equipment
+from tickets.models import RepairTicket, TicketEvent, Issue, ProblemType
+from .columnar import export_columnar, read_manifest
+from .forecast import SlaForecaster
+from .kpis import kpi_report, month_bounds, month_start, refresh_kpis, turnaround_summary
+from .models import (
+    FailureRollup, ProblemTypeRollup, RollupCheckpoint, SiteKpiRollup, SlaForecast, StageKpiRollup,
+)
+from .rollups import refresh_rollups, reliability_summary
+from .sketches import RELATIVE_ACCURACY, DurationSketch
+
+
+class FailureRollupTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.user = User.objects.create_user(username='testsupervisor', password='testpass', role='SUPERVISOR')
+        self.asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=site)
+        self.screen = ProblemType.objects.create(name='Écran cassé', code='SCREEN_BROKEN', category='HARDWARE')
+        self.battery = ProblemType.objects.create(name='Batterie', code='BATTERY', category='HARDWARE')
+        self.spark = [self.create_equipment('Tecno', 'Spark', i) for i in range(4)]
+        self.tab = [self.create_equipment('Samsung', 'Tab A', i) for i in range(10)]
+
+    def create_equipment(self, brand, model, i):
+        return Equipment.objects.create(
+            equipment_type='PHONE', brand=brand, model=model, imei=f'{brand}-{i}', owner=self.asc
+        )
+
+    def create_ticket(self, equipment, *problem_types):
+        ticket = RepairTicket.objects.create(
+            equipment=equipment, asc=self.asc, created_by=self.user, initial_problem_description='Panne'
+        )
+        for problem_type in problem_types:
+            Issue.objects.create(ticket=ticket, problem_type=problem_type)
+        # Hors de la marge de sécurité du rafraîchissement incrémental
+        past = timezone.now() - timedelta(hours=1)
+        RepairTicket.objects.filter(pk=ticket.pk).update(created_at=past)
+        Issue.objects.filter(ticket=ticket).update(created_at=past)
+        return ticket
+
+    def test_incremental_refresh(self):
+        """Test que seules les nouvelles lignes sont ajoutées aux compteurs"""
+        self.create_ticket(self.spark[0], self.screen, self.battery)
+        self.create_ticket(self.spark[1], self.screen)
+        self.assertEqual(refresh_rollups(), {'tickets': 2, 'issues': 3})
+
+        self.create_ticket(self.tab[0], self.screen)
+        recent = RepairTicket.objects.create(
+            equipment=self.spark[2], asc=self.asc, created_by=self.user, initial_problem_description='Panne'
+        )
+        self.assertEqual(refresh_rollups(), {'tickets': 1, 'issues': 1})
+
+        self.assertEqual(FailureRollup.objects.get(brand='Tecno').ticket_count, 2)
+        self.assertEqual(ProblemTypeRollup.objects.get(brand='Tecno', problem_type=self.screen).issue_count, 2)
+        self.assertEqual(ProblemTypeRollup.objects.get(brand='Samsung').issue_count, 1)
+        # Le ticket trop récent sera intégré au passage suivant
+        self.assertLess(RollupCheckpoint.objects.get(name='tickets').last_id, recent.pk)
+
+    def test_rebuild_matches_incremental(self):
+        """Test qu'un recalcul complet donne les mêmes compteurs"""
+        self.create_ticket(self.spark[0], self.screen)
+        refresh_rollups()
+        self.create_ticket(self.spark[1], self.battery)
+        refresh_rollups()
+        incremental = list(ProblemTypeRollup.objects.values_list('brand', 'problem_type', 'issue_count').order_by('pk'))
+
+        refresh_rollups(rebuild=True)
+
+        rebuilt = list(ProblemTypeRollup.objects.values_list('brand', 'problem_type', 'issue_count').order_by('pk'))
+        self.assertEqual(sorted(incremental), sorted(rebuilt))
+
+    def test_reliability_summary_and_api(self):
+        """Test taux de panne par modèle et types de problèmes dominants"""
+        for equipment in self.spark[:2]:
+            self.create_ticket(equipment, self.screen)
+        self.create_ticket(self.tab[0], self.battery)
+        refresh_rollups()
+
+        with self.assertNumQueries(5):
+            summary = reliability_summary(months=12)
+
+        self.assertEqual(summary['models'][0]['brand'], 'Tecno')
+        self.assertEqual(summary['models'][0]['failure_rate'], 50.0)
+        self.assertEqual(summary['models'][1]['failure_rate'], 10.0)
+        self.assertEqual(summary['problem_types'][0]['name'], 'Écran cassé')
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('reliability-list'), {'months': 6})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['problem_types'][0]['issues'], 2)
+
+        response = self.client.get(reverse('dashboard:home'))
+        self.assertContains(response, 'Tab A')
+
+
+@skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow non installé')
+class ParquetExportTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_override = override_settings(ANALYTICS_EXPORT_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        region = Region.objects.create(name='Maritime', code='MA')
+        district = District.objects.create(region=region, name='Golfe', code='GO')
+        site = Site.objects.create(district=district, name='Bè', code='BE')
+        self.user = User.objects.create_user(username='testlogistics', password='testpass', role='LOGISTICS')
+        asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=site)
+        screen = ProblemType.objects.create(name='Écran cassé', code='SCREEN_BROKEN', category='HARDWARE')
+
+        now = timezone.now()
+        self.months = [now - timedelta(days=62), now - timedelta(days=62), now - timedelta(days=1)]
+        self.tickets = []
+        for i, created_at in enumerate(self.months):
+            equipment = Equipment.objects.create(equipment_type='PHONE', brand='Tecno', model='Spark',
+                                                 imei=f'35000000000000{i}', owner=asc)
+            ticket = RepairTicket.objects.create(equipment=equipment, asc=asc, created_by=self.user,
+                                                 initial_problem_description='Panne')
+            TicketEvent.objects.create(ticket=ticket, event_type='CREATED', to_role='SUPERVISOR', user=self.user)
+            Issue.objects.create(ticket=ticket, problem_type=screen)
+            self.tickets.append(ticket)
+            # Hors de la marge de sécurité de l'export incrémental
+            RepairTicket.objects.filter(pk=ticket.pk).update(created_at=created_at, updated_at=now - timedelta(hours=1))
+        for model in (Equipment, Site, District, Region):
+            model.objects.update(updated_at=now - timedelta(hours=1))
+
+    def month_key(self, value):
+        return f'{timezone.localtime(value):%Y-%m}'
+
+    def test_export_is_partitioned_by_ticket_month(self):
+        """Test export complet : une partition par mois, colonnes répétitives encodées en dictionnaire"""
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        result = export_columnar()
+
+        old, recent = self.month_key(self.months[0]), self.month_key(self.months[2])
+        self.assertEqual(result['written'], {'tickets': 2, 'events': 2, 'issues': 2, 'equipment': 1, 'locations': 1})
+        self.assertEqual(sorted(result['datasets']['events']['partitions']), [old, recent])
+        self.assertEqual(result['datasets']['tickets']['partitions'][old]['rows'], 2)
+
+        tickets = pq.read_table(f'{self.root}/tickets/month={old}/data.parquet')
+        self.assertTrue(str(tickets.schema.field('status').type).startswith('dictionary'))
+        self.assertEqual(tickets.column('site').to_pylist(), ['Bè', 'Bè'])
+        self.assertEqual(
+            sorted(tickets.column('ticket_id').to_pylist()), [self.tickets[0].pk, self.tickets[1].pk]
+        )
+        events = ds.dataset(f'{self.root}/events', format='parquet', partitioning='hive').to_table()
+        self.assertEqual(events.num_rows, 3)
+        locations = pq.read_table(f'{self.root}/locations/data.parquet').to_pylist()
+        self.assertEqual(locations[0]['region'], 'Maritime')
+
+    def test_export_is_incremental(self):
+        """Test que seuls les mois modifiés sont réécrits, suppressions comprises"""
+        export_columnar()
+        self.assertEqual(export_columnar()['written']['tickets'], 0)
+
+        TicketEvent.objects.create(ticket=self.tickets[2], event_type='COMMENT', user=self.user)
+        result = export_columnar()
+        self.assertEqual(result['written'], {'tickets': 1, 'events': 1, 'issues': 1, 'equipment': 1, 'locations': 1})
+        self.assertEqual(result['datasets']['events']['partitions'][self.month_key(self.months[2])]['rows'], 2)
+
+        self.tickets[2].delete()
+        result = export_columnar()
+        self.assertEqual(list(result['datasets']['tickets']['partitions']), [self.month_key(self.months[0])])
+        self.assertEqual(read_manifest()['datasets']['tickets'], result['datasets']['tickets'])
+
+    def test_command_and_api(self):
+        """Test commande export_parquet, manifeste et téléchargement par l'API"""
+        out = io.StringIO()
+        call_command('export_parquet', stdout=out)
+        self.assertIn('2 mois réécrit(s)', out.getvalue())
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('parquet-export-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['datasets']['tickets']), 2)
+
+        month = self.month_key(self.months[2])
+        response = self.client.get(reverse('parquet-export-download'), {'dataset': 'tickets', 'month': month})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content)[:4], b'PAR1')
+        response = self.client.get(reverse('parquet-export-download'), {'dataset': 'tickets', 'month': '1999-01'})
+        self.assertEqual(response.status_code, 404)
+
+        supervisor = User.objects.create_user(username='testsupervisor', password='testpass', role='SUPERVISOR')
+        self.client.force_login(supervisor)
+        self.assertEqual(self.client.get(reverse('parquet-export-list')).status_code, 403)
+
+    def test_command_requires_pyarrow(self):
+        """Test message explicite sans le paquet pyarrow"""
+        with mock.patch.dict(sys.modules, {'pyarrow': None}):
+            with self.assertRaisesMessage(CommandError, 'pyarrow'):
+                call_command('export_parquet', stdout=io.StringIO())
+
+
+class KpiRollupTest(TestCase):
+    def setUp(self):
+        """Créer des données de test : deux sites de districts différents, tickets du mois précédent"""
+        region = Region.objects.create(name='Maritime', code='MA')
+        self.golfe = District.objects.create(region=region, name='Golfe', code='GO')
+        self.lacs = District.objects.create(region=region, name='Lacs', code='LA')
+        self.site = Site.objects.create(district=self.golfe, name='Bè', code='BE')
+        self.other_site = Site.objects.create(district=self.lacs, name='Aného', code='AN')
+        self.user = User.objects.create_user(username='testlogistics', password='testpass', role='LOGISTICS')
+
+        self.month = month_start(timezone.now()) - relativedelta(months=1)
+        self.start = month_bounds(self.month)[0]
+        # Créé, envoyé, reçu et transmis par le programme, clôturé 8 jours après l'envoi
+        self.closed = self.create_ticket(self.site, days=2, closed_days=10, events=[
+            ('CREATED', 'SUPERVISOR', 1), ('SENT', 'PROGRAM', 2), ('RECEIVED', 'PROGRAM', 3), ('SENT', 'LOGISTICS', 5),
+        ])
+        # Toujours en cours : en retard 14 jours après l'envoi
+        self.pending = self.create_ticket(self.other_site, days=1, events=[('SENT', 'PROGRAM', 1)])
+
+    def create_ticket(self, site, days, closed_days=None, events=()):
+        asc = ASC.objects.create(first_name='Test', last_name='ASC', code=f'ASC-{site.code}', site=site)
+        equipment = Equipment.objects.create(equipment_type='PHONE', brand='Tecno', model='Spark',
+                                             imei=f'IMEI-{site.code}', owner=asc)
+        ticket = RepairTicket.objects.create(equipment=equipment, asc=asc, created_by=self.user,
+                                             initial_problem_description='Panne')
+        for event_type, to_role, day in events:
+            TicketEvent.objects.create(ticket=ticket, event_type=event_type, to_role=to_role, user=self.user,
+                                       timestamp=self.start + timedelta(days=day))
+        created_at = self.start + timedelta(days=days)
+        closed_at = self.start + timedelta(days=closed_days) if closed_days else None
+        RepairTicket.objects.filter(pk=ticket.pk).update(
+            created_at=created_at, initial_send_date=created_at, closed_date=closed_at,
+            status='CLOSED' if closed_at else 'OPEN',
+            # Hors de la marge de sécurité du rafraîchissement incrémental
+            updated_at=timezone.now() - timedelta(hours=1),
+        )
+        return ticket
+
+    def test_refresh_computes_monthly_counters(self):
+        """Test compteurs par site et durées d'étape du mois de sortie"""
+        self.assertEqual(refresh_kpis(), 2)
+
+        closed = SiteKpiRollup.objects.get(period=self.month, site=self.site)
+        self.assertEqual((closed.opened, closed.closed, closed.overdue, closed.backlog), (1, 1, 0, 0))
+        self.assertAlmostEqual(closed.resolution_days, 8.0)
+        self.assertEqual(closed.district, self.golfe)
+        pending = SiteKpiRollup.objects.get(period=self.month, site=self.other_site)
+        self.assertEqual((pending.opened, pending.closed, pending.overdue, pending.backlog), (1, 0, 1, 1))
+
+        stages = {rollup.stage: rollup for rollup in StageKpiRollup.objects.all()}
+        self.assertEqual(set(stages), {'SUPERVISOR', 'PROGRAM'})
+        self.assertEqual((stages['PROGRAM'].site, stages['PROGRAM'].exits), (self.site, 1))
+        self.assertAlmostEqual(stages['PROGRAM'].dwell_days, 2.0)
+        # La création fait entrer le ticket dans sa première étape
+        self.assertAlmostEqual(stages['SUPERVISOR'].dwell_days, 1.0)
+        # Acheminement vers le programme : de l'envoi à la réception
+        transit = DurationSketch(stages['PROGRAM'].transit_sketch)
+        self.assertEqual(transit.count, 1)
+        self.assertAlmostEqual(transit.quantile(0.5), 1.0, places=1)
+
+    def test_incremental_refresh(self):
+        """Test que seuls le mois courant et les mois des tickets modifiés sont recalculés"""
+        refresh_kpis()
+        self.assertEqual(refresh_kpis(), 1)
+
+        self.pending.refresh_from_db()
+        self.pending.closed_date = timezone.now()
+        self.pending.status = 'CLOSED'
+        self.pending.save()
+        self.assertEqual(refresh_kpis(), 2)
+
+        current = SiteKpiRollup.objects.get(period=month_start(timezone.now()), site=self.other_site)
+        self.assertEqual((current.closed, current.backlog), (1, 0))
+        self.assertEqual(SiteKpiRollup.objects.get(period=self.month, site=self.other_site).overdue, 1)
+
+    def test_report_by_level(self):
+        """Test regroupement par district, totaux et durées moyennes par étape"""
+        refresh_kpis()
+
+        with self.assertNumQueries(5):
+            report = kpi_report(months=3, level='district')
+
+        previous = [row for row in report['rows'] if row['period'] == self.month]
+        self.assertEqual([row['name'] for row in previous], ['Golfe', 'Lacs'])
+        self.assertEqual(previous[0]['avg_resolution_days'], 8.0)
+        # Percentiles estimés à RELATIVE_ACCURACY près, arrondis au dixième
+        self.assertAlmostEqual(previous[0]['resolution_percentiles']['p90'], 8.0, delta=8.0 * RELATIVE_ACCURACY + 0.05)
+        self.assertEqual(previous[1]['resolution_percentiles'], {'p50': None, 'p90': None, 'p99': None})
+        self.assertEqual(report['totals']['opened'], 2)
+        self.assertEqual(report['totals']['overdue'], 1)
+        stage = report['stages'][1]
+        self.assertEqual([row['stage'] for row in report['stages']], ['SUPERVISOR', 'PROGRAM'])
+        self.assertEqual((stage['label'], stage['exits'], stage['avg_days']), ('Programme', 1, 2.0))
+        self.assertAlmostEqual(stage['p50'], 2.0, delta=2.0 * RELATIVE_ACCURACY + 0.05)
+
+        report = kpi_report(months=3, level='site', district=self.lacs.pk)
+        self.assertEqual({row['name'] for row in report['rows']}, {'Aného'})
+
+    def test_api_and_page_are_scoped(self):
+        """Test API et page des indicateurs limitées aux sites du superviseur"""
+        call_command('refresh_kpi_rollups', stdout=io.StringIO())
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('kpi-list'), {'months': 3, 'level': 'site'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals']['opened'], 2)
+        self.assertEqual(self.client.get(reverse('kpi-list'), {'level': 'pays'}).status_code, 400)
+
+        supervisor = User.objects.create_user(username='testsupervisor', password='testpass', role='SUPERVISOR')
+        profile = Supervisor.objects.create(user=supervisor, code='SUP-TEST', first_name='Test', last_name='Sup')
+        profile.sites.add(self.site)
+        self.client.force_login(supervisor)
+        response = self.client.get(reverse('kpi-list'), {'months': 3})
+        self.assertEqual(response.json()['totals']['opened'], 1)
+
+        response = self.client.get(reverse('dashboard:kpis'), {'level': 'site'})
+        self.assertContains(response, 'Bè')
+        self.assertNotContains(response, 'Aného</td>')
+
+    def test_turnaround_on_dashboard(self):
+        """Test durée de traitement du tableau de bord lue dans les histogrammes"""
+        refresh_kpis()
+        summary = turnaround_summary()
+        self.assertEqual((summary['count'], summary['avg_days']), (1, 8.0))
+        self.assertAlmostEqual(summary['p99'], 8.0, delta=8.0 * RELATIVE_ACCURACY + 0.05)
+        self.assertEqual(turnaround_summary(site_ids=[self.other_site.pk])['p50'], None)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:home'))
+        self.assertEqual(response.context['turnaround'], summary)
+        self.assertContains(response, '1 ticket(s) clôturé(s)')
+
+
+class DurationSketchTest(TestCase):
+    def test_percentiles_within_relative_accuracy(self):
+        """Test percentiles estimés à RELATIVE_ACCURACY près"""
+        values = [0.5 + i * 0.37 for i in range(1000)]
+        sketch = DurationSketch()
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact) / exact, RELATIVE_ACCURACY)
+        self.assertIsNone(DurationSketch().quantile(0.5))
+        sketch.add(-1)
+        self.assertLess(sketch.quantile(0), 0.001)
+
+    def test_merge_matches_single_sketch(self):
+        """Test fusion de deux histogrammes sérialisés identique à un histogramme unique"""
+        first, second, combined = DurationSketch(), DurationSketch(), DurationSketch()
+        for i in range(200):
+            (first if i % 3 else second).add(i / 7)
+            combined.add(i / 7)
+
+        merged = DurationSketch.merged([first.to_json(), second.to_json()])
+        self.assertEqual(merged.to_json(), combined.to_json())
+        self.assertEqual(merged.percentiles(), combined.percentiles())
+        self.assertEqual(merged.count, 200)
+
+
+class SlaForecastTest(TestCase):
+    def setUp(self):
+        """Créer des données de test : historique d'une journée par étape, sauf la logistique"""
+        region = Region.objects.create(name='Maritime', code='MA')
+        district = District.objects.create(region=region, name='Golfe', code='GO')
+        self.site = Site.objects.create(district=district, name='Bè', code='BE')
+        self.user = User.objects.create_user(username='testlogistics', password='testpass', role='LOGISTICS')
+        self.asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=self.site)
+        self.now = timezone.now()
+
+        for stage, _ in RepairTicket.STAGE_CHOICES:
+            # Logistique : moitié des passages en 1 jour, moitié en 20 jours
+            dwell = [1] * 5 + [20] * 5 if stage == 'LOGISTICS' else [1] * 10
+            StageKpiRollup.objects.create(
+                period=month_start(self.now), site=self.site, district=district, region=region, stage=stage,
+                exits=len(dwell), dwell_days=sum(dwell),
+                dwell_sketch=self.sketch(dwell), transit_sketch=self.sketch([0.5] * 10),
+            )
+
+    def sketch(self, values):
+        sketch = DurationSketch()
+        for value in values:
+            sketch.add(value)
+        return sketch.to_json()
+
+    def score(self, stage, received=True, arrived_days=0.0, sent_days=0.0):
+        return SlaForecaster().score(
+            stage, received, self.now - timedelta(days=arrived_days),
+            self.now - timedelta(days=sent_days) + timedelta(days=14), self.now,
+        )
+
+    def test_breach_probabilities(self):
+        """Test probabilités de retard d'après les étapes restantes et le temps déjà écoulé"""
+        # Reste : logistique (1 ou 20 jours) puis 4 étapes d'un jour et demi (acheminement compris)
+        breach, stage_breach = self.score('LOGISTICS', arrived_days=0.5, sent_days=1)
+        self.assertAlmostEqual(breach, 0.5)
+        self.assertAlmostEqual(stage_breach, 0.5)
+        # Déjà 2 jours à la logistique : seuls les passages de 20 jours restent possibles
+        self.assertEqual(self.score('LOGISTICS', arrived_days=2, sent_days=3), (1.0, 1.0))
+        # Retour : 3 étapes restantes, largement dans les temps
+        self.assertEqual(self.score('RETURNING_LOGISTICS', arrived_days=0.5, sent_days=5), (0.0, 0.0))
+        # Échéance dépassée
+        self.assertEqual(self.score('PROGRAM', received=True, arrived_days=0.5, sent_days=15), (1.0, 0.0))
+        # En acheminement depuis plus longtemps que jamais observé : compté en dépassement
+        self.assertEqual(self.score('PROGRAM', received=False, arrived_days=1, sent_days=1), (1.0, 1.0))
+
+        StageKpiRollup.objects.filter(stage='REPAIRER').delete()
+        self.assertEqual(self.score('REPAIRER'), (None, None))
+
+    def test_command_and_dashboard(self):
+        """Test scoring des tickets en cours et liste des tickets à risque du tableau de bord"""
+        tickets = []
+        for i, (stage, status) in enumerate([('LOGISTICS', 'IN_PROGRESS'), ('RETURNING_PROGRAM', 'RETURNING'),
+                                             ('RETURNED_ASC', 'CLOSED')]):
+            equipment = Equipment.objects.create(equipment_type='PHONE', brand='Tecno', model='Spark',
+                                                 imei=f'IMEI-{i}', owner=self.asc)
+            ticket = RepairTicket.objects.create(
+                equipment=equipment, asc=self.asc, created_by=self.user, initial_problem_description='Panne',
+                current_stage=stage, status=status, current_holder=self.user,
+                initial_send_date=self.now - timedelta(days=1),
+            )
+            TicketEvent.objects.create(ticket=ticket, event_type='RECEIVED', to_role=stage, user=self.user,
+                                       timestamp=self.now - timedelta(hours=12))
+            tickets.append(ticket)
+
+        out = io.StringIO()
+        call_command('score_sla_forecasts', stdout=out)
+        self.assertIn('2 ticket(s) évalué(s), 1 à risque', out.getvalue())
+        forecast = SlaForecast.objects.get(ticket=tickets[0])
+        self.assertGreaterEqual(forecast.breach_probability, 0.5)
+        self.assertEqual(forecast.due_at, tickets[0].initial_send_date + timedelta(days=14))
+        self.assertEqual(SlaForecast.objects.get(ticket=tickets[1]).breach_probability, 0.0)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:home'))
+        self.assertEqual(response.context['sla_at_risk'], [forecast])
+        self.assertContains(response, tickets[0].ticket_number)
@@ -1,26 +1,31 @@
 from rest_framework import viewsets, serializers
+from config.conditional import ConditionalGetMixin
+from accounts.scoping import scope_equipment
 from .models import Equipment
 
 
 class EquipmentSerializer(serializers.ModelSerializer):
     owner_name = serializers.CharField(source='owner.get_full_name', read_only=True)
+    repeat_failure = serializers.BooleanField(source='is_repeat_failure', read_only=True)
 
     class Meta:
         model = Equipment
         fields = [
             'id', 'equipment_type', 'brand', 'model', 'imei', 'serial_number',
             'owner', 'owner_name', 'status', 'acquisition_date',
-            'warranty_expiry_date', 'notes', 'created_at'
+            'warranty_expiry_date', 'notes', 'created_at',
+            'ticket_count', 'last_ticket_at', 'last_closed_date', 'mtbf_days', 'repeat_failure'
         ]
+        read_only_fields = ['ticket_count', 'last_ticket_at', 'last_closed_date', 'mtbf_days']
 
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class EquipmentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Equipment.objects.all().select_related('owner')
     serializer_class = EquipmentSerializer
     pagination_class = None  # Désactiver la pagination pour obtenir tous les résultats
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = scope_equipment(super().get_queryset(), self.request.user)
         asc_id = self.request.query_params.get('asc_id')
 
         if asc_id:
@@ -0,0 +1,40 @@
+"""
+Lignes de l'export des équipements (voir config/exports.py)
+"""
+from config.exports import CHUNK_SIZE
+from .models import Equipment
+
+# Statuts affichés, y compris ceux positionnés par les tickets
+STATUS_LABELS = dict(Equipment.STATUS_CHOICES + [('UNDER_REPAIR', 'En réparation'), ('RETIRED', 'Réformé')])
+TYPE_LABELS = dict(Equipment.TYPE_CHOICES)
+
+EQUIPMENT_FIELDS = [
+    'equipment_type', 'brand', 'model', 'imei', 'serial_number', 'status',
+    'owner__code', 'owner__first_name', 'owner__last_name',
+    'owner__site__name', 'owner__site__district__name', 'owner__site__district__region__name',
+    'acquisition_date', 'warranty_expiry_date', 'assignment_date',
+    'ticket_count', 'last_ticket_at', 'last_closed_date', 'mtbf_days',
+]
+
+EQUIPMENT_HEADER = [
+    'Type', 'Marque', 'Modèle', 'IMEI', 'N° de série', 'Statut',
+    'Code ASC', 'ASC', 'Site', 'District', 'Région',
+    "Date d'acquisition", 'Fin de garantie', "Date d'attribution",
+    'Nombre de tickets', 'Dernier ticket', 'Dernière clôture', 'Temps moyen entre pannes (jours)',
+]
+
+
+def equipment_rows(equipments):
+    """Lignes de l'export des équipements (voir EQUIPMENT_HEADER), dans l'ordre des clés"""
+    rows = equipments.order_by('pk').values_list(*EQUIPMENT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    for (equipment_type, brand, model, imei, serial_number, status,
+         owner_code, owner_first_name, owner_last_name, site, district, region,
+         acquired, warranty_expiry, assigned, ticket_count, last_ticket_at, last_closed_date, mtbf_days) in rows:
+        yield [
+            TYPE_LABELS.get(equipment_type, equipment_type), brand, model, imei, serial_number,
+            STATUS_LABELS.get(status, status),
+            owner_code, f'{owner_first_name or ""} {owner_last_name or ""}'.strip(), site, district, region,
+            acquired, warranty_expiry, assigned,
+            ticket_count, last_ticket_at, last_closed_date,
+            round(mtbf_days, 1) if mtbf_days is not None else None,
+        ]
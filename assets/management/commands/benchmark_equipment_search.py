@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour mesurer le temps de recherche d'équipements par IMEI /
+numéro de série (exact, préfixe, sous-chaîne) sur un parc volumineux.
+
+Les équipements de test sont créés avec un préfixe dédié puis supprimés à la fin.
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from assets.models import Equipment
+from assets.search import normalize_identifier, search_equipment
+
+PREFIX = 'BENCH-SR'
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps de recherche d'équipements par IMEI / numéro de série"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--devices', type=int, default=200000, help="Nombre d'équipements de test")
+        parser.add_argument('--queries', type=int, default=200, help='Nombre de recherches par type')
+
+    def handle(self, *args, **options):
+        devices = options['devices']
+        queries = options['queries']
+
+        self.stdout.write(self.style.SUCCESS("=== Benchmark de recherche d'équipements ==="))
+        self.stdout.write(f'Équipements: {devices} | Recherches par type: {queries}')
+        self.stdout.write(f'Base de données: {connection.vendor}')
+
+        imeis = self._create_fixtures(devices)
+        try:
+            samples = random.sample(imeis, min(queries, len(imeis)))
+            scenarios = [
+                ('Exact', [imei for imei in samples]),
+                ('Préfixe (8)', [imei[:8] for imei in samples]),
+                ('Sous-chaîne (6)', [imei[5:11] for imei in samples]),
+            ]
+            self.stdout.write('')
+            self.stdout.write(self.style.SUCCESS('=== Résultats (ms) ==='))
+            for label, terms in scenarios:
+                timings = []
+                for term in terms:
+                    started = time.perf_counter()
+                    search_equipment(Equipment.objects.all(), term)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                self.stdout.write(f'{label:<16} médiane: {statistics.median(timings):7.2f} | p95: {p95:7.2f}')
+        finally:
+            self._cleanup()
+
+    def _create_fixtures(self, devices):
+        """Crée les équipements de test (bulk_create : normalisation explicite)"""
+        self._cleanup()
+        imeis = [f'35{random.randrange(10 ** 13):013d}' for _ in range(devices)]
+        imeis = list(dict.fromkeys(imeis))
+        Equipment.objects.bulk_create([
+            Equipment(
+                equipment_type='PHONE',
+                brand='Bench',
+                model=PREFIX,
+                imei=imei,
+                imei_normalized=normalize_identifier(imei),
+                serial_number=f'SN{i:08d}',
+                serial_normalized=f'SN{i:08d}',
+            )
+            for i, imei in enumerate(imeis)
+        ], batch_size=5000)
+        return imeis
+
+    def _cleanup(self):
+        """Supprime les données de test"""
+        Equipment.objects.filter(model=PREFIX).delete()
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:39
+
+import re
+
+from django.db import migrations, models, transaction, DatabaseError
+
+# Copie figée de assets.search.normalize_identifier à la date de la migration :
+# les règles de normalisation peuvent évoluer sans modifier les données produites ici
+_NON_ALNUM = re.compile(r'[^0-9A-Z]')
+
+
+def normalize_identifier(value):
+    return _NON_ALNUM.sub('', (value or '').upper())
+
+
+def backfill_normalized_identifiers(apps, schema_editor):
+    Equipment = apps.get_model('assets', 'Equipment')
+    batch = []
+    for equipment in Equipment.objects.only('pk', 'imei', 'serial_number').iterator(chunk_size=2000):
+        equipment.imei_normalized = normalize_identifier(equipment.imei)
+        equipment.serial_normalized = normalize_identifier(equipment.serial_number)
+        batch.append(equipment)
+        if len(batch) >= 2000:
+            Equipment.objects.bulk_update(batch, ['imei_normalized', 'serial_normalized'])
+            batch = []
+    if batch:
+        Equipment.objects.bulk_update(batch, ['imei_normalized', 'serial_normalized'])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Index trigramme pour la recherche par sous-chaîne (PostgreSQL uniquement)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        # L'extension peut nécessiter des droits particuliers : sans elle, seule la
+        # recherche par préfixe est indexée
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError:
+        return
+    for column in ('imei_normalized', 'serial_normalized'):
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS assets_equipment_{column}_trgm '
+            f'ON assets_equipment USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in ('imei_normalized', 'serial_normalized'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS assets_equipment_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='imei_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='serial_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(backfill_normalized_identifiers, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('assets', '0002_equipment_normalized_identifiers'),
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['-created_at'], name='assets_equip_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['status', '-created_at'], name='assets_equip_status_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:52
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+# Copie figée de assets.reliability à la date de la migration : le code
+# applicatif peut évoluer sans modifier les données produites ici
+REPEAT_FAILURE_COUNT = 3
+RELIABILITY_FIELDS = ['ticket_count', 'last_ticket_at', 'last_closed_date', 'mtbf_days', 'repeat_anchor_at']
+
+
+def summarize_tickets(tickets):
+    """Résumé de fiabilité à partir de couples (created_at, closed_date) triés par date de création"""
+    count = len(tickets)
+    closed_dates = [closed for _, closed in tickets if closed]
+
+    intervals = []
+    for (previous_created, previous_closed), (created, _) in zip(tickets, tickets[1:]):
+        start = previous_closed or previous_created
+        intervals.append(max((created - start).total_seconds(), 0) / 86400)
+
+    return {
+        'ticket_count': count,
+        'last_ticket_at': tickets[-1][0] if tickets else None,
+        'last_closed_date': max(closed_dates) if closed_dates else None,
+        'mtbf_days': round(sum(intervals) / len(intervals), 1) if intervals else None,
+        'repeat_anchor_at': tickets[-REPEAT_FAILURE_COUNT][0] if count >= REPEAT_FAILURE_COUNT else None,
+    }
+
+
+def backfill_reliability(apps, schema_editor):
+    Equipment = apps.get_model('assets', 'Equipment')
+    RepairTicket = apps.get_model('tickets', 'RepairTicket')
+
+    tickets = defaultdict(list)
+    rows = RepairTicket.objects.order_by('equipment_id', 'created_at', 'pk').values_list(
+        'equipment_id', 'created_at', 'closed_date'
+    )
+    for equipment_id, created_at, closed_date in rows.iterator(chunk_size=5000):
+        tickets[equipment_id].append((created_at, closed_date))
+
+    Equipment.objects.bulk_update(
+        [Equipment(pk=pk, **summarize_tickets(items)) for pk, items in tickets.items()],
+        RELIABILITY_FIELDS,
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_equipment_list_indexes'),
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='last_closed_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Dernière clôture'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='last_ticket_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Dernier ticket'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='mtbf_days',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Temps moyen entre pannes (jours)'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='repeat_anchor_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Date du Nième ticket le plus récent'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='ticket_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de tickets'),
+        ),
+        migrations.RunPython(backfill_reliability, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from accounts.models import ASC
+from .search import normalize_identifier
 
 
 class Equipment(models.Model):
@@ -15,6 +16,14 @@ class Equipment(models.Model):
         ('FAULTY', 'En panne')
     ]
 
+    # Couleurs Bootstrap par statut
+    STATUS_COLORS = {
+        'FUNCTIONAL': 'success',
+        'FAULTY': 'warning',
+        'UNDER_REPAIR': 'info',
+        'RETIRED': 'secondary',
+    }
+
     # Type et identification
     equipment_type = models.CharField(
         max_length=20,
@@ -34,6 +43,10 @@ class Equipment(models.Model):
         verbose_name="Numéro de série (additionnel)"
     )
 
+    # Identifiants normalisés pour la recherche (voir assets/search.py)
+    imei_normalized = models.CharField(max_length=50, blank=True, editable=False, db_index=True)
+    serial_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
+
     # Propriétaire
     owner = models.ForeignKey(
         ASC,
@@ -87,6 +100,19 @@ class Equipment(models.Model):
         verbose_name="Fiche de réception"
     )
 
+    # Fiabilité (maintenue par assets/reliability.py)
+    ticket_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de tickets")
+    last_ticket_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Dernier ticket")
+    last_closed_date = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Dernière clôture")
+    mtbf_days = models.FloatField(null=True, blank=True, editable=False, verbose_name="Temps moyen entre pannes (jours)")
+    repeat_anchor_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Date du Nième ticket le plus récent"
+    )
+
     # Informations complémentaires
     notes = models.TextField(blank=True, verbose_name="Notes")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -96,6 +122,11 @@ class Equipment(models.Model):
         verbose_name = "Équipement"
         verbose_name_plural = "Équipements"
         ordering = ['-created_at']
+        indexes = [
+            # Liste paginée (tri par date) et filtre par statut
+            models.Index(fields=['-created_at'], name='assets_equip_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='assets_equip_status_idx'),
+        ]
 
     def __str__(self):
         owner_info = ""
@@ -105,15 +136,20 @@ class Equipment(models.Model):
             owner_info = f" - {self.owner.get_full_name()}"
         return f"{self.brand} {self.model} ({self.imei}){owner_info}"
 
+    @property
+    def is_repeat_failure(self):
+        """Pannes répétées : au moins REPEAT_FAILURE_COUNT tickets sur la période (assets/reliability.py)"""
+        from .reliability import repeat_failure_since
+        return bool(self.repeat_anchor_at and self.repeat_anchor_at >= repeat_failure_since())
+
+    def save(self, *args, **kwargs):
+        self.imei_normalized = normalize_identifier(self.imei)
+        self.serial_normalized = normalize_identifier(self.serial_number)
+        super().save(*args, **kwargs)
+
     def get_status_color(self):
         """Retourne la couleur Bootstrap pour le statut"""
-        colors = {
-            'FUNCTIONAL': 'success',
-            'FAULTY': 'warning',
-            'UNDER_REPAIR': 'info',
-            'RETIRED': 'secondary',
-        }
-        return colors.get(self.status, 'secondary')
+        return self.STATUS_COLORS.get(self.status, 'secondary')
 
 
 class EquipmentHistory(models.Model):
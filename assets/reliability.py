@@ -0,0 +1,77 @@
+"""
+Suivi des pannes répétées par équipement
+
+Chaque équipement porte un résumé de ses tickets (nombre, dernier ticket,
+dernière clôture, temps moyen entre pannes) et la date de création de son
+Nième ticket le plus récent (repeat_anchor_at, indexée). « Au moins N tickets
+sur la période » revient alors à repeat_anchor_at >= début de la période :
+une simple lecture d'index, sans parcours de RepairTicket.
+
+Le résumé est recalculé à partir des tickets de l'équipement (index sur
+equipment_id) à la création d'un ticket (signal post_save), à sa suppression et
+à sa clôture (workflow). Les créations en masse appellent refresh_reliability().
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from tickets.models import RepairTicket
+from .models import Equipment
+
+REPEAT_FAILURE_COUNT = 3
+REPEAT_FAILURE_WINDOW = timedelta(days=182)  # ~6 mois
+
+RELIABILITY_FIELDS = ['ticket_count', 'last_ticket_at', 'last_closed_date', 'mtbf_days', 'repeat_anchor_at']
+
+
+def summarize_tickets(tickets):
+    """
+    Résumé de fiabilité à partir des tickets d'un équipement, sous forme de
+    couples (created_at, closed_date) triés par date de création
+    """
+    count = len(tickets)
+    closed_dates = [closed for _, closed in tickets if closed]
+
+    # Temps de bon fonctionnement : du retour (ou de la panne précédente) à la panne suivante
+    intervals = []
+    for (previous_created, previous_closed), (created, _) in zip(tickets, tickets[1:]):
+        start = previous_closed or previous_created
+        intervals.append(max((created - start).total_seconds(), 0) / 86400)
+
+    return {
+        'ticket_count': count,
+        'last_ticket_at': tickets[-1][0] if tickets else None,
+        'last_closed_date': max(closed_dates) if closed_dates else None,
+        'mtbf_days': round(sum(intervals) / len(intervals), 1) if intervals else None,
+        'repeat_anchor_at': tickets[-REPEAT_FAILURE_COUNT][0] if count >= REPEAT_FAILURE_COUNT else None,
+    }
+
+
+def refresh_reliability(*equipment_ids):
+    """Recalcule le résumé de fiabilité des équipements donnés (deux requêtes)"""
+    ids = {pk for pk in equipment_ids if pk is not None}
+    if not ids:
+        return
+
+    tickets = defaultdict(list)
+    rows = RepairTicket.objects.filter(equipment_id__in=ids).order_by('equipment_id', 'created_at', 'pk')
+    for equipment_id, created_at, closed_date in rows.values_list('equipment_id', 'created_at', 'closed_date'):
+        tickets[equipment_id].append((created_at, closed_date))
+
+    Equipment.objects.bulk_update(
+        [Equipment(pk=pk, **summarize_tickets(tickets[pk])) for pk in ids],
+        RELIABILITY_FIELDS
+    )
+
+
+def repeat_failure_since():
+    """Début de la période d'observation des pannes répétées"""
+    return timezone.now() - REPEAT_FAILURE_WINDOW
+
+
+def repeat_failures(queryset=None):
+    """Équipements ayant eu au moins REPEAT_FAILURE_COUNT tickets sur la période"""
+    if queryset is None:
+        queryset = Equipment.objects.all()
+    return queryset.filter(repeat_anchor_at__gte=repeat_failure_since())
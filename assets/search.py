@@ -0,0 +1,90 @@
+"""
+Recherche rapide d'équipements par IMEI / numéro de série
+
+Les identifiants sont normalisés (majuscules, chiffres et lettres uniquement :
+un IMEI saisi « 35-209900-176148-1 » devient « 352099001761481 ») et stockés
+dans des colonnes indexées (imei_normalized, serial_normalized).
+
+- Recherche par préfixe : parcours d'index. Sur SQLite, LIKE ... ESCAPE
+  n'utilise pas l'index, on passe donc par un intervalle [préfixe, successeur[ ;
+  sur PostgreSQL, startswith s'appuie sur l'index varchar_pattern_ops créé par
+  Django pour les colonnes db_index.
+- Recherche par sous-chaîne : index trigramme (pg_trgm) sur PostgreSQL, parcours
+  de table sur SQLite (réservée aux saisies d'au moins MIN_SUBSTRING_LENGTH caractères).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+MIN_QUERY_LENGTH = 3
+MIN_SUBSTRING_LENGTH = 4
+IDENTIFIER_FIELDS = ('imei_normalized', 'serial_normalized')
+
+_NON_ALNUM = re.compile(r'[^0-9A-Z]')
+
+
+def normalize_identifier(value):
+    """Normalise un IMEI / numéro de série : majuscules, sans espaces ni séparateurs"""
+    return _NON_ALNUM.sub('', (value or '').upper())
+
+
+def prefix_q(field, prefix):
+    """Condition « commence par » utilisable par l'index de la colonne"""
+    if connection.vendor == 'postgresql':
+        return Q(**{f'{field}__startswith': prefix})
+    # Les identifiants normalisés ne contiennent que [0-9A-Z] : l'intervalle est exact
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+def identifier_q(query):
+    """Condition de recherche (sous-chaîne) sur l'IMEI et le numéro de série, ou None"""
+    value = normalize_identifier(query)
+    if not value:
+        return None
+    condition = Q()
+    for field in IDENTIFIER_FIELDS:
+        condition |= Q(**{f'{field}__contains': value})
+    return condition
+
+
+def search_equipment(queryset, query, limit=10):
+    """
+    Équipements dont l'IMEI ou le numéro de série correspond à la saisie :
+    correspondances exactes, puis par préfixe ; à défaut, par sous-chaîne.
+    """
+    value = normalize_identifier(query)
+    if len(value) < MIN_QUERY_LENGTH:
+        return []
+
+    results = []
+    seen = set()
+
+    def collect(condition, order_by=None):
+        remaining = limit - len(results)
+        if remaining <= 0:
+            return
+        matches = queryset.filter(condition).exclude(pk__in=seen)
+        matches = matches.order_by(order_by) if order_by else matches.order_by()
+        for equipment in matches[:remaining]:
+            seen.add(equipment.pk)
+            results.append(equipment)
+
+    for field in IDENTIFIER_FIELDS:
+        collect(Q(**{field: value}))
+    for field in IDENTIFIER_FIELDS:
+        # Tri sur la colonne indexée : la requête s'arrête dès que la limite est atteinte
+        collect(prefix_q(field, value), order_by=field)
+    if not results and len(value) >= MIN_SUBSTRING_LENGTH:
+        # Recours à la sous-chaîne seulement si rien ne correspond par préfixe. Sans
+        # index trigramme, seuls les identifiants sont parcourus (index couvrant,
+        # plus étroit que la table) avant de lire les lignes trouvées
+        pks = []
+        for field in IDENTIFIER_FIELDS:
+            if len(pks) < limit:
+                pks += queryset.filter(**{f'{field}__contains': value}).exclude(pk__in=pks).order_by().values_list(
+                    'pk', flat=True
+                )[:limit - len(pks)]
+        collect(Q(pk__in=pks))
+    return results
@@ -0,0 +1,43 @@
+"""
+Invalidation de la chronologie des équipements (voir assets/timeline.py) et
+mise à jour de leur résumé de fiabilité (voir assets/reliability.py)
+
+Les écritures en masse (bulk_create, bulk_update, update) ne déclenchent pas
+ces signaux : elles appellent invalidate_timeline() / refresh_reliability()
+explicitement.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from tickets.models import RepairTicket, TicketEvent
+from .models import Equipment, EquipmentHistory
+from .reliability import refresh_reliability
+from .timeline import invalidate_timeline
+
+
+@receiver([post_save, post_delete], sender=EquipmentHistory)
+@receiver([post_save, post_delete], sender=RepairTicket)
+def invalidate_equipment_timeline(sender, instance, **kwargs):
+    invalidate_timeline(instance.equipment_id)
+
+
+@receiver(post_save, sender=RepairTicket)
+def refresh_equipment_reliability(sender, instance, created, **kwargs):
+    if created:
+        refresh_reliability(instance.equipment_id)
+
+
+@receiver(post_delete, sender=RepairTicket)
+def refresh_equipment_reliability_on_delete(sender, instance, **kwargs):
+    refresh_reliability(instance.equipment_id)
+
+
+@receiver(post_delete, sender=Equipment)
+def invalidate_deleted_equipment_timeline(sender, instance, **kwargs):
+    invalidate_timeline(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=TicketEvent)
+def invalidate_ticket_event_timeline(sender, instance, **kwargs):
+    equipment_id = RepairTicket.objects.filter(pk=instance.ticket_id).values_list('equipment_id', flat=True).first()
+    invalidate_timeline(equipment_id)
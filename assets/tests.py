@@ -1,3 +1,314 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User, ASC
+from locations.models import Region, District, Site
+from tickets.models import RepairTicket
+from tickets import workflow
+from .models import Equipment, EquipmentHistory
+from .reliability import refresh_reliability, repeat_failures, summarize_tickets
+from .search import normalize_identifier
+from .timeline import build_timeline, get_timeline
+
+
+class AscAssignEquipmentTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.user = User.objects.create_user(username='testsupervisor', password='testpass', role='SUPERVISOR', site=site)
+        self.asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=site)
+        self.other_asc = ASC.objects.create(first_name='Autre', last_name='ASC', code='ASC-OTHER', site=site)
+        self.url = reverse('assets:asc_assign_equipment', args=[self.asc.pk])
+        self.client.force_login(self.user)
+
+    def create_equipments(self, count, owner=None, start=0):
+        return Equipment.objects.bulk_create([
+            Equipment(equipment_type='PHONE', brand='Test Brand', model='Test Model', imei=f'IMEI-{i}', owner=owner)
+            for i in range(start, start + count)
+        ])
+
+    def test_assign_skips_owned_equipment(self):
+        """Test attribution groupée : les équipements déjà attribués sont ignorés"""
+        free = self.create_equipments(2)
+        owned = self.create_equipments(1, owner=self.other_asc, start=2)
+
+        response = self.client.post(self.url, {
+            'equipment_ids': [e.pk for e in free + owned],
+            'assignment_date': '2025-01-15',
+        })
+
+        self.assertRedirects(response, reverse('accounts:asc_detail', args=[self.asc.pk]), fetch_redirect_response=False)
+        self.assertEqual(Equipment.objects.filter(owner=self.asc).count(), 2)
+        self.assertEqual(Equipment.objects.get(pk=owned[0].pk).owner, self.other_asc)
+        self.assertEqual(
+            str(Equipment.objects.get(pk=free[0].pk).assignment_date), '2025-01-15'
+        )
+        self.assertEqual(EquipmentHistory.objects.filter(action='ASSIGNED').count(), 2)
+
+    def test_assign_query_count_is_constant(self):
+        """Test que le nombre de requêtes ne dépend pas du nombre d'équipements"""
+        def count_queries(equipments):
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(self.url, {'equipment_ids': [e.pk for e in equipments]})
+            return len(context.captured_queries)
+
+        few = count_queries(self.create_equipments(2))
+        many = count_queries(self.create_equipments(50, start=2))
+
+        self.assertEqual(few, many)
+        self.assertEqual(Equipment.objects.filter(owner=self.asc).count(), 52)
+
+
+class EquipmentSearchTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        self.user = User.objects.create_user(username='testlogistics', password='testpass', role='LOGISTICS')
+        self.phone = Equipment.objects.create(
+            equipment_type='PHONE', brand='Tecno', model='Spark', imei='35-209900-176148-1', serial_number='sn-ab12'
+        )
+        self.tablet = Equipment.objects.create(
+            equipment_type='TABLET', brand='Samsung', model='Tab A', imei='352099001799999'
+        )
+        Equipment.objects.create(equipment_type='PHONE', brand='Itel', model='A70', imei='860000000000001')
+        self.client.force_login(self.user)
+
+    def autocomplete(self, query):
+        response = self.client.get(reverse('assets:autocomplete'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [result['id'] for result in response.json()['results']]
+
+    def test_normalized_identifiers(self):
+        """Test normalisation : majuscules, sans séparateurs"""
+        self.assertEqual(normalize_identifier(' 35-209900 176148/1 '), '352099001761481')
+        self.assertEqual(self.phone.imei_normalized, '352099001761481')
+        self.assertEqual(self.phone.serial_normalized, 'SNAB12')
+
+    def test_autocomplete_exact_then_prefix(self):
+        """Test autocomplétion : correspondance exacte en premier, puis préfixe"""
+        self.assertEqual(self.autocomplete('3520 9900 1799 999'), [self.tablet.pk])
+        self.assertEqual(self.autocomplete('35209900'), [self.phone.pk, self.tablet.pk])
+        self.assertEqual(self.autocomplete('sn-ab'), [self.phone.pk])
+
+    def test_autocomplete_substring_and_short_query(self):
+        """Test recherche par sous-chaîne et saisie trop courte"""
+        self.assertEqual(self.autocomplete('176148'), [self.phone.pk])
+        self.assertEqual(self.autocomplete('35'), [])
+
+    def test_equipment_list_search(self):
+        """Test filtre de la liste des équipements par IMEI partiel"""
+        response = self.client.get(reverse('assets:list'), {'q': '1799'})
+
+        self.assertEqual(list(response.context['equipments']), [self.tablet])
+
+    def test_create_rejects_duplicate_with_separators(self):
+        """Test qu'un IMEI déjà enregistré est détecté malgré les séparateurs"""
+        response = self.client.post(reverse('assets:create'), {
+            'equipment_type': 'PHONE', 'brand': 'Tecno', 'model': 'Spark', 'imei': '352099001761481',
+        })
+
+        self.assertRedirects(response, reverse('assets:create'), fetch_redirect_response=False)
+        self.assertEqual(Equipment.objects.filter(imei_normalized='352099001761481').count(), 1)
+
+
+class EquipmentListTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        self.site = Site.objects.create(district=district, name='Test Site', code='TS')
+        other_site = Site.objects.create(district=district, name='Autre Site', code='AS')
+
+        self.user = User.objects.create_user(username='testlogistics', password='testpass', role='LOGISTICS')
+        asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=self.site)
+        other_asc = ASC.objects.create(first_name='Autre', last_name='ASC', code='ASC-OTHER', site=other_site)
+        Equipment.objects.bulk_create(
+            [Equipment(equipment_type='PHONE', brand='Tecno', model='Spark', imei=f'P{i}', owner=asc) for i in range(60)]
+            + [Equipment(equipment_type='TABLET', brand='Samsung', model='Tab', imei=f'T{i}', owner=other_asc,
+                         status='FAULTY') for i in range(5)]
+        )
+        self.client.force_login(self.user)
+
+    def test_list_is_paginated(self):
+        """Test pagination de la liste"""
+        response = self.client.get(reverse('assets:list'))
+
+        self.assertEqual(len(response.context['equipments']), 50)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+
+    def test_counts_and_filters(self):
+        """Test compteurs par statut / type et filtres combinés"""
+        response = self.client.get(reverse('assets:list'), {'site': self.site.pk, 'status': 'FUNCTIONAL'})
+
+        counts = {value: count for value, _, count in response.context['status_counts']}
+        self.assertEqual(counts['FUNCTIONAL'], 60)
+        self.assertEqual(counts['FAULTY'], 0)
+        self.assertEqual(response.context['page_obj'].paginator.count, 60)
+        self.assertEqual(response.context['status_querystring'], f'site={self.site.pk}')
+
+        response = self.client.get(reverse('assets:list'), {'type': 'TABLET'})
+        types = {value: count for value, _, count in response.context['type_counts']}
+        self.assertEqual(types, {'PHONE': 60, 'TABLET': 5, 'OTHER': 0})
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
+
+    def test_export_applies_list_filters(self):
+        """Test export CSV en flux avec les filtres de la liste"""
+        response = self.client.get(reverse('assets:export'), {'brand': 'Samsung', 'status': 'FAULTY', 'page': 2})
+
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Disposition'].endswith('.csv"'))
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith('Type,Marque,Modèle,IMEI'))
+        self.assertTrue(lines[1].startswith('Tablette,Samsung,Tab,T0,,En panne,ASC-OTHER,Autre ASC,Autre Site'))
+
+        response = self.client.get(reverse('assets:list'), {'brand': 'Samsung', 'format': 'csv', 'page': 2})
+        self.assertEqual(response.context['export_querystring'], 'brand=Samsung')
+
+
+class EquipmentTimelineTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor', password='testpass', role='SUPERVISOR', site=site
+        )
+        self.program = User.objects.create_user(username='testprogram', password='testpass', role='PROGRAM')
+        self.asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=site)
+        self.equipment = Equipment.objects.create(
+            equipment_type='PHONE', brand='Tecno', model='Spark', imei='123456789', owner=self.asc
+        )
+        now = timezone.now()
+        EquipmentHistory.objects.create(equipment=self.equipment, action='CREATED', created_by=self.supervisor)
+        EquipmentHistory.objects.filter(equipment=self.equipment).update(created_at=now - timedelta(days=10))
+        self.ticket = RepairTicket.objects.create(
+            equipment=self.equipment,
+            asc=self.asc,
+            created_by=self.supervisor,
+            current_holder=self.supervisor,
+            initial_problem_description='Écran cassé'
+        )
+        RepairTicket.objects.filter(pk=self.ticket.pk).update(created_at=now - timedelta(days=5))
+        cache.clear()
+
+    def test_timeline_merges_sources_newest_first(self):
+        """Test fusion historique / tickets / événements, du plus récent au plus ancien"""
+        workflow.send(self.ticket, self.supervisor, 'PROGRAM')
+
+        with self.assertNumQueries(3):
+            timeline = build_timeline(self.equipment.pk)
+
+        self.assertEqual([entry['kind'] for entry in timeline], ['event', 'ticket', 'history'])
+        self.assertEqual(timeline[0]['new_value'], 'Programme')
+        self.assertEqual(timeline[1]['ticket_number'], self.ticket.ticket_number)
+
+    def test_timeline_is_cached_and_invalidated(self):
+        """Test cache de la chronologie et invalidation lors d'une transition en masse"""
+        self.assertEqual(len(get_timeline(self.equipment.pk)), 2)
+        with self.assertNumQueries(0):
+            get_timeline(self.equipment.pk)
+
+        workflow.send(self.ticket, self.supervisor, 'PROGRAM')
+
+        self.assertEqual(len(get_timeline(self.equipment.pk)), 3)
+
+    def test_cached_timeline_rebuilt_for_new_state(self):
+        """Test entrée en cache d'un autre état (autre worker non invalidé) reconstruite"""
+        self.assertEqual(len(get_timeline(self.equipment.pk, version=('v1',))), 2)
+        with self.assertNumQueries(0):
+            get_timeline(self.equipment.pk, version=('v1',))
+
+        # Écriture sans invalidation, comme vue depuis un autre worker
+        with mock.patch('tickets.workflow.invalidate_timeline'), mock.patch('assets.signals.invalidate_timeline'):
+            workflow.send(self.ticket, self.supervisor, 'PROGRAM')
+        self.assertEqual(len(get_timeline(self.equipment.pk, version=('v1',))), 2)
+        self.assertEqual(len(get_timeline(self.equipment.pk, version=('v2',))), 3)
+
+    def test_detail_page_uses_timeline(self):
+        """Test affichage de la chronologie sur la fiche équipement"""
+        self.client.force_login(self.supervisor)
+        response = self.client.get(reverse('assets:detail', args=[self.equipment.pk]))
+
+        self.assertContains(response, 'Chronologie')
+        self.assertEqual(response.context['tickets'][0]['ticket_id'], self.ticket.pk)
+
+
+class EquipmentReliabilityTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.supervisor = User.objects.create_user(username='testsupervisor', password='testpass', role='SUPERVISOR')
+        self.asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=site)
+        self.equipment = Equipment.objects.create(
+            equipment_type='PHONE', brand='Test Brand', model='Test Model', imei='123456789', owner=self.asc
+        )
+        self.other = Equipment.objects.create(
+            equipment_type='PHONE', brand='Test Brand', model='Test Model', imei='987654321', owner=self.asc
+        )
+
+    def create_ticket(self, equipment, days_ago):
+        ticket = RepairTicket.objects.create(
+            equipment=equipment,
+            asc=self.asc,
+            created_by=self.supervisor,
+            current_holder=self.supervisor,
+            initial_problem_description='Panne'
+        )
+        RepairTicket.objects.filter(pk=ticket.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return ticket
+
+    def test_summary_and_mtbf(self):
+        """Test résumé : nombre de tickets, temps moyen entre pannes depuis le retour"""
+        now = timezone.now()
+        summary = summarize_tickets([
+            (now - timedelta(days=100), now - timedelta(days=90)),
+            (now - timedelta(days=60), now - timedelta(days=50)),
+            (now - timedelta(days=10), None),
+        ])
+
+        self.assertEqual(summary['ticket_count'], 3)
+        self.assertEqual(summary['mtbf_days'], 35.0)
+        self.assertEqual(summary['last_closed_date'], now - timedelta(days=50))
+        self.assertEqual(summary['repeat_anchor_at'], now - timedelta(days=100))
+
+    def test_repeat_failures_within_window(self):
+        """Test détection : au moins 3 tickets sur les 6 derniers mois"""
+        for days_ago in (300, 100, 40):
+            self.create_ticket(self.equipment, days_ago)
+        for days_ago in (150, 90, 20):
+            self.create_ticket(self.other, days_ago)
+
+        # Les dates modifiées par update() ne passent pas par les signaux
+        refresh_reliability(self.equipment.pk, self.other.pk)
+
+        self.assertEqual(list(repeat_failures()), [self.other])
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.ticket_count, 3)
+        self.assertFalse(self.equipment.is_repeat_failure)
+
+    def test_ticket_signals_refresh_summary(self):
+        """Test mise à jour du résumé à la création et à la suppression d'un ticket"""
+        tickets = [self.create_ticket(self.equipment, 0) for _ in range(3)]
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.ticket_count, 3)
+        self.assertTrue(self.equipment.is_repeat_failure)
+
+        tickets[0].delete()
 
-# Create your tests here.
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.ticket_count, 2)
+        self.assertFalse(self.equipment.is_repeat_failure)
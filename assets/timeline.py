@@ -0,0 +1,134 @@
+"""
+Chronologie unifiée d'un équipement
+
+Fusionne l'historique de l'équipement (EquipmentHistory), ses tickets de
+réparation et les événements de ces tickets en une seule liste triée du plus
+récent au plus ancien. Chaque source est lue par une requête (utilisateurs
+joints), déjà triée par date, puis les flux sont fusionnés avec heapq.merge.
+
+La chronologie est mise en cache par équipement. Elle est invalidée par les
+signaux post_save / post_delete (assets/signals.py) et, pour les écritures en
+masse qui ne déclenchent pas de signaux (bulk_create, bulk_update, update),
+par un appel explicite à invalidate_timeline().
+
+Le cache par défaut (LocMemCache) est propre à chaque worker gunicorn :
+l'invalidation ne vaut que pour le worker qui a fait l'écriture. La fiche
+équipement passe donc l'état lu en base pour son ETag (version) : l'entrée
+est enregistrée avec cet état et reconstruite s'il a changé, si bien qu'une
+page n'est jamais servie avec l'ETag d'un état plus récent que son contenu.
+Sans version, l'entrée peut avoir jusqu'à TIMELINE_CACHE_TIMEOUT secondes de
+retard sur un autre worker.
+"""
+import heapq
+from itertools import islice
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db import transaction
+
+from tickets.models import RepairTicket, TicketEvent
+from .models import EquipmentHistory
+
+TIMELINE_LIMIT = 200
+TIMELINE_CACHE_TIMEOUT = 30
+
+
+def _cache_key(equipment_id):
+    return f'equipment-timeline:{equipment_id}'
+
+
+def _user_name(user):
+    return (user.get_full_name() or user.username) if user else ''
+
+
+def _history_entries(equipment_id):
+    history = EquipmentHistory.objects.filter(
+        equipment_id=equipment_id
+    ).select_related('created_by').order_by('-created_at', '-pk')
+    for h in history.iterator():
+        yield {
+            'kind': 'history',
+            'timestamp': h.created_at,
+            'title': h.get_action_display(),
+            'old_value': h.old_value,
+            'new_value': h.new_value,
+            'notes': h.notes,
+            'user': _user_name(h.created_by),
+        }
+
+
+def _ticket_entries(equipment_id):
+    tickets = RepairTicket.objects.filter(
+        equipment_id=equipment_id
+    ).select_related('created_by').order_by('-created_at', '-pk')
+    for ticket in tickets.iterator():
+        yield {
+            'kind': 'ticket',
+            'timestamp': ticket.created_at,
+            'title': f'Ticket {ticket.ticket_number} créé',
+            'ticket_id': ticket.pk,
+            'ticket_number': ticket.ticket_number,
+            'notes': ticket.initial_problem_description,
+            'status': ticket.status,
+            'status_display': ticket.get_status_display(),
+            'stage_display': ticket.get_current_stage_display(),
+            'user': _user_name(ticket.created_by),
+        }
+
+
+def _event_entries(equipment_id):
+    # La création est déjà représentée par l'entrée du ticket
+    events = TicketEvent.objects.filter(
+        ticket__equipment_id=equipment_id
+    ).exclude(event_type='CREATED').select_related('ticket', 'user').order_by('-timestamp', '-pk')
+    for event in events.iterator():
+        yield {
+            'kind': 'event',
+            'timestamp': event.timestamp,
+            'title': event.get_event_type_display(),
+            'ticket_id': event.ticket_id,
+            'ticket_number': event.ticket.ticket_number,
+            'old_value': event.get_from_role_display(),
+            'new_value': event.get_to_role_display(),
+            'notes': event.comment,
+            'user': _user_name(event.user),
+        }
+
+
+def build_timeline(equipment_id, limit=TIMELINE_LIMIT):
+    """Construit la chronologie (au plus limit entrées, les plus récentes)"""
+    merged = heapq.merge(
+        _history_entries(equipment_id),
+        _ticket_entries(equipment_id),
+        _event_entries(equipment_id),
+        key=itemgetter('timestamp'),
+        reverse=True,
+    )
+    return list(islice(merged, limit))
+
+
+def get_timeline(equipment_id, version=None):
+    """
+    Chronologie de l'équipement, depuis le cache si possible. Avec version (état
+    de l'équipement lu en base), l'entrée n'est reprise que si elle a été
+    construite pour le même état.
+    """
+    key = _cache_key(equipment_id)
+    cached = cache.get(key)
+    if cached is not None and (version is None or cached[0] == version):
+        return cached[1]
+    timeline = build_timeline(equipment_id)
+    cache.set(key, (version, timeline), TIMELINE_CACHE_TIMEOUT)
+    return timeline
+
+
+def invalidate_timeline(*equipment_ids):
+    """
+    Invalide la chronologie en cache des équipements donnés, immédiatement puis
+    après validation de la transaction en cours (une lecture concurrente a pu
+    remettre en cache l'état précédent entre-temps)
+    """
+    keys = [_cache_key(pk) for pk in set(equipment_ids) if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
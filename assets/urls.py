@@ -5,8 +5,10 @@ app_name = 'assets'
 
 urlpatterns = [
     path('', views.equipment_list, name='list'),
+    path('export/', views.equipment_export, name='export'),
     path('<int:pk>/', views.equipment_detail, name='detail'),
     path('<int:pk>/assign/', views.equipment_assign, name='assign'),
     path('create/', views.equipment_create, name='create'),
+    path('api/autocomplete/', views.equipment_autocomplete, name='autocomplete'),
     path('asc/<int:asc_pk>/assign/', views.asc_assign_equipment, name='asc_assign_equipment'),
 ]
@@ -1,30 +1,174 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
 from django.utils import timezone
+from django.db import transaction
+from django.core.paginator import Paginator
+from django.db.models import Count, Max, Q
+from config.conditional import conditional_page, latest_of
+from config.exports import export_format, export_response
+from .exports import EQUIPMENT_HEADER, equipment_rows
 from .models import Equipment, EquipmentHistory
+from .reliability import repeat_failures
+from .search import normalize_identifier, identifier_q, search_equipment
+from .timeline import get_timeline, invalidate_timeline
 from accounts.models import ASC
+from accounts.scoping import scope_ascs, scope_equipment
+from locations.models import District, Site
+from search.autocomplete import invalidate_autocomplete
+from search.indexing import index_equipment
+
+
+# Statuts proposés dans les filtres (UNDER_REPAIR est positionné par les tickets)
+STATUS_FILTERS = Equipment.STATUS_CHOICES + [('UNDER_REPAIR', 'En réparation')]
+
+EQUIPMENTS_PER_PAGE = 50
+
+
+def _filtered_equipment(request):
+    """
+    Équipements visibles filtrés par recherche, marque, site, district et
+    pannes répétées (filtres appliqués avant les compteurs de la liste)
+    """
+    equipments = scope_equipment(Equipment.objects.all(), request.user)
+
+    # Recherche par IMEI / numéro de série (partiel, sans tenir compte des séparateurs)
+    query = request.GET.get('q', '').strip()
+    condition = identifier_q(query)
+    if condition is not None:
+        equipments = equipments.filter(condition)
+
+    brand = request.GET.get('brand', '')
+    site = request.GET.get('site', '')
+    district = request.GET.get('district', '')
+    if brand:
+        equipments = equipments.filter(brand=brand)
+    if site.isdigit():
+        equipments = equipments.filter(owner__site_id=site)
+    if district.isdigit():
+        equipments = equipments.filter(owner__site__district_id=district)
+    if request.GET.get('repeat'):
+        equipments = repeat_failures(equipments)
+    return equipments
+
+
+def _filter_status_type(request, equipments):
+    """Filtres statut et type (après les compteurs de la liste)"""
+    status = request.GET.get('status', '')
+    equipment_type = request.GET.get('type', '')
+    if status:
+        equipments = equipments.filter(status=status)
+    if equipment_type:
+        equipments = equipments.filter(equipment_type=equipment_type)
+    return equipments
 
 
 @login_required
 def equipment_list(request):
-    """Liste des équipements"""
-    equipments = Equipment.objects.all().select_related('owner')
-    context = {'equipments': equipments}
+    """Liste paginée des équipements avec filtres et compteurs"""
+    equipments = _filtered_equipment(request).select_related('owner')
+    query = request.GET.get('q', '').strip()
+    district = request.GET.get('district', '')
+
+    # Compteurs par statut et par type en une seule requête (avant filtre statut/type)
+    counts = equipments.aggregate(
+        total=Count('pk'),
+        **{f'status_{value}': Count('pk', filter=Q(status=value)) for value, _ in STATUS_FILTERS},
+        **{f'type_{value}': Count('pk', filter=Q(equipment_type=value)) for value, _ in Equipment.TYPE_CHOICES},
+    )
+
+    equipments = _filter_status_type(request, equipments)
+
+    page = Paginator(equipments, EQUIPMENTS_PER_PAGE).get_page(request.GET.get('page'))
+
+    def querystring(*excluded):
+        """Paramètres de filtre conservés dans les liens (pagination, compteurs)"""
+        params = request.GET.copy()
+        for key in ('page',) + excluded:
+            params.pop(key, None)
+        return params.urlencode()
+
+    context = {
+        'equipments': page.object_list,
+        'page_obj': page,
+        'querystring': querystring(),
+        'status_querystring': querystring('status'),
+        'export_querystring': querystring('format'),
+        'type_querystring': querystring('type'),
+        'query': query,
+        'total_count': counts['total'],
+        'status_counts': [
+            (value, label, counts[f'status_{value}']) for value, label in STATUS_FILTERS
+        ],
+        'type_counts': [
+            (value, label, counts[f'type_{value}']) for value, label in Equipment.TYPE_CHOICES
+        ],
+        'brands': Equipment.objects.order_by('brand').values_list('brand', flat=True).distinct(),
+        'districts': District.objects.order_by('name_normalized'),
+        'sites': Site.objects.filter(district_id=district).order_by('name_normalized') if district.isdigit()
+        else Site.objects.order_by('name_normalized'),
+    }
     return render(request, 'assets/list.html', context)
 
 
 @login_required
+def equipment_export(request):
+    """Export CSV / XLSX en flux des équipements filtrés"""
+    equipments = _filter_status_type(request, _filtered_equipment(request))
+    return export_response(
+        EQUIPMENT_HEADER, equipment_rows(equipments),
+        f'equipements-{timezone.localdate():%Y%m%d}', export_format(request), sheet_name='Équipements',
+    )
+
+
+@login_required
+def equipment_autocomplete(request):
+    """API d'autocomplétion des équipements par IMEI / numéro de série"""
+    equipments = search_equipment(
+        scope_equipment(Equipment.objects.select_related('owner'), request.user), request.GET.get('q', '')
+    )
+
+    results = [{
+        'id': equipment.id,
+        'text': str(equipment),
+        'imei': equipment.imei,
+        'serial_number': equipment.serial_number,
+        'status': equipment.status,
+    } for equipment in equipments]
+
+    return JsonResponse({'results': results})
+
+
+def _equipment_detail_state(request, pk):
+    """État de l'équipement pour l'ETag : équipement, historique et tickets"""
+    state = scope_equipment(Equipment.objects.filter(pk=pk), request.user).aggregate(
+        updated_at=Max('updated_at'),
+        owner_updated_at=Max('owner__updated_at'),
+        last_history=Max('history__id'),
+        last_history_at=Max('history__created_at'),
+        tickets_updated_at=Max('repair_tickets__updated_at'),
+    )
+    if state['updated_at'] is None:
+        return None
+    return tuple(state.values()), latest_of(
+        state['updated_at'], state['owner_updated_at'],
+        state['last_history_at'], state['tickets_updated_at'],
+    )
+
+
+@login_required
+@conditional_page(_equipment_detail_state)
 def equipment_detail(request, pk):
     """Détail d'un équipement"""
-    equipment = get_object_or_404(Equipment.objects.select_related('owner'), pk=pk)
-    history = equipment.history.all()
-    tickets = equipment.repair_tickets.all()
+    equipment = get_object_or_404(scope_equipment(Equipment.objects.select_related('owner'), request.user), pk=pk)
+    # Chronologie construite pour l'état qui a servi à l'ETag (cache propre au worker)
+    timeline = get_timeline(equipment.pk, version=getattr(request, 'conditional_state', None))
 
     context = {
         'equipment': equipment,
-        'history': history,
-        'tickets': tickets,
+        'timeline': timeline,
+        'tickets': [entry for entry in timeline if entry['kind'] == 'ticket'],
     }
     return render(request, 'assets/detail.html', context)
 
@@ -48,14 +192,14 @@ def equipment_create(request):
         notes = request.POST.get('notes')
 
         # Vérifier que l'IMEI n'existe pas déjà
-        if Equipment.objects.filter(imei=imei).exists():
+        if Equipment.objects.filter(imei_normalized=normalize_identifier(imei)).exists():
             messages.error(request, f'Un équipement avec l\'IMEI "{imei}" existe déjà.')
             return redirect('assets:create')
 
         # Récupérer le propriétaire si spécifié
         owner = None
         if owner_id:
-            owner = get_object_or_404(ASC, pk=owner_id)
+            owner = get_object_or_404(scope_ascs(ASC.objects.all(), request.user), pk=owner_id)
 
         # Créer l'équipement
         equipment = Equipment.objects.create(
@@ -108,13 +252,13 @@ def equipment_create(request):
 @login_required
 def equipment_assign(request, pk):
     """Attribuer un équipement à un ASC"""
-    equipment = get_object_or_404(Equipment, pk=pk)
+    equipment = get_object_or_404(scope_equipment(Equipment.objects.all(), request.user), pk=pk)
 
     if request.method == 'POST':
         asc_id = request.POST.get('asc')
 
         if asc_id:
-            new_asc = get_object_or_404(ASC, pk=asc_id)
+            new_asc = get_object_or_404(scope_ascs(ASC.objects.all(), request.user), pk=asc_id)
             old_owner = equipment.owner
 
             # Mettre à jour le propriétaire
@@ -137,7 +281,7 @@ def equipment_assign(request, pk):
         else:
             messages.error(request, 'Veuillez sélectionner un ASC.')
 
-    ascs = ASC.objects.filter(is_active=True).select_related('site')
+    ascs = scope_ascs(ASC.objects.filter(is_active=True), request.user).select_related('site')
     context = {
         'equipment': equipment,
         'ascs': ascs,
@@ -148,7 +292,7 @@ def equipment_assign(request, pk):
 @login_required
 def asc_assign_equipment(request, asc_pk):
     """Attribuer plusieurs équipements à un ASC"""
-    asc = get_object_or_404(ASC, pk=asc_pk)
+    asc = get_object_or_404(scope_ascs(ASC.objects.all(), request.user), pk=asc_pk)
 
     if request.method == 'POST':
         equipment_ids = request.POST.getlist('equipment_ids')
@@ -156,13 +300,22 @@ def asc_assign_equipment(request, asc_pk):
         reception_form = request.FILES.get('reception_form')
 
         if equipment_ids:
-            assigned_count = 0
-            skipped_count = 0
-            for equipment_id in equipment_ids:
-                try:
-                    equipment = Equipment.objects.get(pk=equipment_id)
-
-                    # VÉRIFICATION CRITIQUE: Un équipement ne peut appartenir qu'à un seul ASC
+            equipment_ids = [pk for pk in equipment_ids if pk.isdigit()]
+            now = timezone.now()
+
+            with transaction.atomic():
+                # Verrouillage de tous les équipements sélectionnés en une requête
+                equipments = list(
+                    Equipment.objects.select_for_update(of=('self',))
+                    .filter(pk__in=equipment_ids)
+                    .select_related('owner')
+                    .order_by('pk')
+                )
+
+                # VÉRIFICATION CRITIQUE: Un équipement ne peut appartenir qu'à un seul ASC
+                to_assign = []
+                skipped_count = 0
+                for equipment in equipments:
                     if equipment.owner is not None:
                         skipped_count += 1
                         messages.warning(
@@ -170,17 +323,24 @@ def asc_assign_equipment(request, asc_pk):
                             f'Équipement {equipment.imei} ignoré - déjà attribué à {equipment.owner.get_full_name()}'
                         )
                         continue
+                    to_assign.append(equipment)
 
-                    # Mettre à jour l'équipement
+                update_fields = ['owner', 'updated_at']
+                for equipment in to_assign:
                     equipment.owner = asc
+                    equipment.updated_at = now  # bulk_update ne déclenche pas auto_now
                     if assignment_date:
                         equipment.assignment_date = assignment_date
-                    if reception_form and assigned_count == 0:  # Save form only for first equipment
-                        equipment.reception_form = reception_form
-                    equipment.save()
-
-                    # Créer un enregistrement d'historique
-                    EquipmentHistory.objects.create(
+                if assignment_date:
+                    update_fields.append('assignment_date')
+                if reception_form and to_assign:
+                    # La fiche n'est enregistrée que pour le premier équipement
+                    to_assign[0].reception_form.save(reception_form.name, reception_form, save=False)
+                    update_fields.append('reception_form')
+
+                Equipment.objects.bulk_update(to_assign, update_fields)
+                EquipmentHistory.objects.bulk_create([
+                    EquipmentHistory(
                         equipment=equipment,
                         action='ASSIGNED',
                         old_value='Non assigné',
@@ -188,9 +348,12 @@ def asc_assign_equipment(request, asc_pk):
                         notes=f"Équipement assigné à {asc.get_full_name()}",
                         created_by=request.user
                     )
-                    assigned_count += 1
-                except Equipment.DoesNotExist:
-                    continue
+                    for equipment in to_assign
+                ])
+                invalidate_timeline(*[equipment.pk for equipment in to_assign])
+                index_equipment(*[equipment.pk for equipment in to_assign])
+                invalidate_autocomplete('equipment')
+            assigned_count = len(to_assign)
 
             if assigned_count > 0:
                 messages.success(request, f'{assigned_count} équipement(s) attribué(s) à {asc.get_full_name()} avec succès!')
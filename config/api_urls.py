@@ -3,6 +3,8 @@ from rest_framework.routers import DefaultRouter
 from tickets.api import RepairTicketViewSet, TicketEventViewSet
 from assets.api import EquipmentViewSet
 from accounts.api import ASCViewSet, UserViewSet
+from analytics.api import KpiViewSet, ParquetExportViewSet, ReliabilityViewSet
+from search.api import SearchViewSet
 
 router = DefaultRouter()
 router.register('tickets', RepairTicketViewSet, basename='ticket')
@@ -10,6 +12,10 @@ router.register('events', TicketEventViewSet, basename='event')
 router.register('equipment', EquipmentViewSet, basename='equipment')
 router.register('ascs', ASCViewSet, basename='asc')
 router.register('users', UserViewSet, basename='user')
+router.register('reliability', ReliabilityViewSet, basename='reliability')
+router.register('kpis', KpiViewSet, basename='kpi')
+router.register('exports/parquet', ParquetExportViewSet, basename='parquet-export')
+router.register('search', SearchViewSet, basename='search')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -0,0 +1,157 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified) pour les vues HTML et l'API.
+
+Les validateurs sont calculés à partir d'une requête d'agrégat légère
+(updated_at, dernier id, nombre de lignes) afin qu'un client qui envoie
+If-None-Match reçoive un 304 sans sérialisation ni rendu de template.
+"""
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Construit un ETag fort à partir d'une liste de valeurs"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def latest_of(*values):
+    """Retourne la date la plus récente parmi des valeurs éventuellement nulles"""
+    dates = [value for value in values if value is not None]
+    return max(dates) if dates else None
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """Retourne une réponse 304 si les validateurs du client correspondent, sinon None"""
+    return get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+
+
+def set_validators(response, etag, last_modified=None):
+    """Ajoute les en-têtes ETag / Last-Modified à une réponse réussie"""
+    if 200 <= response.status_code < 300:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(_timestamp(last_modified))
+        # Le contenu dépend de l'utilisateur : le navigateur doit revalider
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def collection_version(queryset, field='updated_at'):
+    """Nombre de lignes, dernier id et dernière modification en une seule requête"""
+    return queryset.order_by().aggregate(
+        count=Count('pk'),
+        last_pk=Max('pk'),
+        last_modified=Max(field),
+    )
+
+
+def conditional_page(state_func):
+    """
+    Décorateur pour les pages de détail HTML.
+
+    state_func(request, *args, **kwargs) retourne (parts, last_modified) décrivant
+    l'état de la ressource, ou None si la ressource n'existe pas (la vue gère le 404).
+    parts est exposé à la vue dans request.conditional_state : un contenu mis en
+    cache doit correspondre à cet état pour être servi avec l'ETag qui en découle.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            # Les messages en attente doivent être affichés : pas de 304 dans ce cas
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view_func(request, *args, **kwargs)
+
+            state = state_func(request, *args, **kwargs)
+            if state is None:
+                return view_func(request, *args, **kwargs)
+
+            parts, last_modified = state
+            request.conditional_state = parts
+
+            def page_etag():
+                # Le jeton CSRF est inclus dans les formulaires de la page
+                return make_etag(request.path, request.user.pk, request.META.get('CSRF_COOKIE'), *parts)
+
+            response = not_modified_response(request, page_etag(), last_modified)
+            if response is not None:
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            # Le rendu a pu créer le cookie CSRF : l'ETag est recalculé après la vue
+            return set_validators(response, page_etag(), last_modified)
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    Ajoute le support ETag / Last-Modified aux actions list et retrieve d'un ViewSet.
+
+    conditional_field désigne le champ de date qui évolue à chaque modification.
+    """
+    conditional_field = 'updated_at'
+
+    def get_conditional_parts(self):
+        """Valeurs supplémentaires intégrées à l'ETag (ex: date du jour pour les délais)"""
+        return ()
+
+    def get_last_modified(self, last_modified):
+        """Last-Modified envoyé ; à relever à start_of_today() si le contenu dépend du jour"""
+        return last_modified
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        version = collection_version(queryset, self.conditional_field)
+        etag = make_etag(
+            self.basename, request.get_full_path(), request.user.pk,
+            version['count'], version['last_pk'], version['last_modified'],
+            *self.get_conditional_parts()
+        )
+        last_modified = self.get_last_modified(version['last_modified'])
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        last_modified = getattr(instance, self.conditional_field)
+        etag = make_etag(
+            self.basename, instance.pk, request.user.pk, last_modified,
+            *self.get_conditional_parts()
+        )
+        last_modified = self.get_last_modified(last_modified)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+
+def today_part():
+    """Date locale du jour, pour les ressources dont l'affichage dépend de l'âge (délais)"""
+    return timezone.localdate()
+
+
+def start_of_today():
+    """
+    Début du jour local. À inclure dans le Last-Modified des ressources qui
+    intègrent today_part() à leur ETag : un client qui n'envoie que
+    If-Modified-Since ne reçoit pas de 304 le lendemain (délais recalculés).
+    """
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
@@ -0,0 +1,266 @@
+"""
+Exports CSV / XLSX en flux (tickets, événements, équipements)
+
+Les lignes sont lues par paquets (iterator(chunk_size=...)) et le fichier est
+produit au fur et à mesure dans une StreamingHttpResponse : la mémoire reste
+constante quelle que soit la taille de l'export et le navigateur reçoit les
+premiers octets immédiatement, sans attendre la fin des requêtes.
+
+- CSV : UTF-8 avec BOM (accents lus correctement par Excel), séparateur
+  virgule, dates locales AAAA-MM-JJ HH:MM:SS, décimales avec un point ;
+- XLSX : classeur écrit directement (archive zip produite en flux, cellules
+  texte « inlineStr »), sans dépendance : dates et nombres typés, ligne
+  d'en-tête en gras et figée.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Lignes lues par requête (iterator) et taille des blocs envoyés au client
+CHUNK_SIZE = 2000
+FLUSH_SIZE = 64 * 1024
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def export_format(request):
+    """Format demandé (?format=csv|xlsx), CSV par défaut"""
+    fmt = request.GET.get('format', 'csv')
+    return fmt if fmt in EXPORT_FORMATS else 'csv'
+
+
+def _local(value, tz):
+    """Date/heure locale sans fuseau (les deux formats l'affichent telle quelle)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(tz)
+    return value.replace(tzinfo=None)
+
+
+# CSV
+
+def _csv_value(value, tz):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return _local(value, tz).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def csv_stream(header, rows):
+    """Fichier CSV produit par blocs d'environ FLUSH_SIZE octets"""
+    tz = timezone.get_current_timezone()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([_csv_value(value, tz) for value in row])
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+# XLSX
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Styles de cellule (attribut s) : 1 = date/heure, 2 = date, 3 = en-tête en gras
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2">'
+    '<numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/>'
+    '<numFmt numFmtId="165" formatCode="dd/mm/yyyy"/>'
+    '</numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '</sheetView></sheetViews>'
+    '<sheetData>'
+)
+
+_SHEET_END = '</sheetData></worksheet>'
+
+
+class _Sink:
+    """Flux d'écriture non positionnable : zipfile y écrit, le générateur vide"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _column_letters(count):
+    letters = []
+    for index in range(count):
+        name = ''
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            name = chr(65 + remainder) + name
+        letters.append(name)
+    return letters
+
+
+def _xlsx_text(value):
+    return escape(_XML_ILLEGAL.sub('', value))
+
+
+def _xlsx_cell(ref, value, tz, style=0):
+    """Cellule XML (chaîne vide pour une valeur absente)"""
+    if value is None or value == '':
+        return ''
+    style_attr = f' s="{style}"' if style else ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{ref}"{style_attr}><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        serial = (_local(value, tz) - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}" s="1"><v>{serial:.6f}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{ref}" s="2"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{_xlsx_text(str(value))}</t></is></c>'
+
+
+def _xlsx_row(number, letters, values, tz, style=0):
+    cells = ''.join(
+        _xlsx_cell(f'{letter}{number}', value, tz, style) for letter, value in zip(letters, values)
+    )
+    return f'<row r="{number}">{cells}</row>'
+
+
+def xlsx_stream(header, rows, sheet_name='Export'):
+    """Classeur XLSX d'une feuille, produit par blocs d'environ FLUSH_SIZE octets compressés"""
+    letters = _column_letters(len(header))
+    tz = timezone.get_current_timezone()
+    sheet_name = re.sub(r'[\[\]:*?/\\]', ' ', sheet_name)[:31]
+    sink = _Sink()
+    # Flux non positionnable : zipfile écrit les tailles après chaque fichier
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=_xlsx_text(sheet_name)))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        archive.writestr('xl/styles.xml', _STYLES)
+        yield sink.take()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            buffer = [_SHEET_START, _xlsx_row(1, letters, header, tz, style=3)]
+            size = 0
+            for number, row in enumerate(rows, start=2):
+                xml = _xlsx_row(number, letters, row, tz)
+                buffer.append(xml)
+                size += len(xml)
+                if size >= FLUSH_SIZE:
+                    sheet.write(''.join(buffer).encode('utf-8'))
+                    buffer = []
+                    size = 0
+                    data = sink.take()
+                    if data:
+                        yield data
+            buffer.append(_SHEET_END)
+            sheet.write(''.join(buffer).encode('utf-8'))
+    yield sink.take()
+
+
+def export_response(header, rows, filename, fmt='csv', sheet_name='Export'):
+    """Réponse en flux pour un export (filename sans extension)"""
+    if fmt == 'xlsx':
+        content = xlsx_stream(header, rows, sheet_name=sheet_name)
+    else:
+        fmt = 'csv'
+        content = csv_stream(header, rows)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    response['Cache-Control'] = 'no-store'
+    # Pas de mise en tampon par un proxy Nginx : les blocs partent dès qu'ils sont prêts
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -62,9 +62,16 @@ INSTALLED_APPS = [
     'tickets',
     'dashboard',
     'employees',
+    'analytics',
+    'monitoring',
+    'search',
 ]
 
 MIDDLEWARE = [
+    # Désactivé sauf si REQUEST_PROFILING_ENABLED (voir monitoring/profiling.py)
+    'monitoring.profiling.ProfilingMiddleware',
+    # Durée et nombre des requêtes par vue pour /metrics
+    'monitoring.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -165,6 +172,9 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Export Parquet pour les outils d'analyse (voir analytics/columnar.py)
+ANALYTICS_EXPORT_ROOT = Path(os.environ.get('ANALYTICS_EXPORT_ROOT', BASE_DIR / 'exports'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -195,6 +205,14 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard:home'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Profilage des requêtes (nombre de requêtes SQL, temps base / rendu / Python)
+REQUEST_PROFILING_ENABLED = os.environ.get('REQUEST_PROFILING_ENABLED', 'False') == 'True'
+REQUEST_PROFILING_SLOW_MS = int(os.environ.get('REQUEST_PROFILING_SLOW_MS', '500'))
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', '1.0'))
+
+# Endpoint /metrics : jeton Bearer du scraper Prometheus (sinon réservé au staff)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Email Configuration
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
@@ -0,0 +1,118 @@
+"""
+Normalisation des textes pour la recherche et le tri (noms français).
+
+« Tanguiéta », « TANGUIETA » et « tanguieta » deviennent « tanguieta » ;
+« N'djéï » devient « n djei ». Les noms (régions, districts, sites, ASCs,
+utilisateurs) ont une colonne normalisée indexée, tenue à jour par
+NormalizedNamesMixin.save() : les recherches et les tris portent sur cette
+colonne plutôt que sur des fonctions (UPPER, unaccent) qui empêchent l'usage
+des index. Les écritures en masse appellent with_normalized_names() avant
+bulk_create, ou backfill_normalized_names() après des écritures en SQL.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+BACKFILL_BATCH_SIZE = 2000
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_text(*values):
+    """Texte normalisé : minuscules, sans accents, mots séparés par une espace"""
+    text = ' '.join(str(value) for value in values if value).casefold()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def normalized_prefix_q(query, *fields):
+    """
+    Condition « chaque mot saisi commence une des colonnes normalisées », ou None
+    si la saisie est vide. Parcours d'index : startswith (index varchar_pattern_ops
+    des colonnes db_index) sur PostgreSQL, intervalle [mot, successeur[ sur
+    SQLite, où LIKE n'utilise pas l'index ; les colonnes normalisées ne
+    contenant que [0-9a-z ], l'intervalle est exact.
+    """
+    words = normalize_text(query).split()
+    if not words:
+        return None
+    condition = Q()
+    for word in words:
+        word_condition = Q()
+        for field in fields:
+            if connection.vendor == 'postgresql':
+                word_condition |= Q(**{f'{field}__startswith': word})
+            else:
+                upper = word[:-1] + chr(ord(word[-1]) + 1)
+                word_condition |= Q(**{f'{field}__gte': word, f'{field}__lt': upper})
+        condition &= word_condition
+    return condition
+
+
+def normalized_contains_q(query, *fields):
+    """Condition « contient » sur des colonnes normalisées, ou None si la saisie est vide"""
+    value = normalize_text(query)
+    if not value:
+        return None
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__contains': value})
+    return condition
+
+
+class NormalizedNamesMixin:
+    """
+    Renseigne les colonnes normalisées (NORMALIZED_FIELDS : colonne -> champ
+    source) à chaque enregistrement, y compris avec update_fields
+    """
+    NORMALIZED_FIELDS = {}
+
+    def set_normalized_names(self):
+        for column, source in self.NORMALIZED_FIELDS.items():
+            setattr(self, column, normalize_text(getattr(self, source)))
+
+    def save(self, *args, **kwargs):
+        self.set_normalized_names()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                column for column, source in self.NORMALIZED_FIELDS.items() if source in update_fields
+            }
+        super().save(*args, **kwargs)
+
+
+def with_normalized_names(objects):
+    """Renseigne les colonnes normalisées d'objets destinés à bulk_create"""
+    objects = list(objects)
+    for obj in objects:
+        obj.set_normalized_names()
+    return objects
+
+
+def backfill_normalized_names(model, normalized_fields, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Recalcule les colonnes normalisées de toutes les lignes de model (migrations,
+    données écrites en SQL) ; retourne le nombre de lignes modifiées
+    """
+    sources = list(normalized_fields.values())
+    columns = list(normalized_fields)
+    batch = []
+    updated = 0
+    for obj in model.objects.only('pk', *sources, *columns).order_by('pk').iterator(chunk_size=batch_size):
+        values = {column: normalize_text(getattr(obj, source)) for column, source in normalized_fields.items()}
+        if any(getattr(obj, column) != value for column, value in values.items()):
+            for column, value in values.items():
+                setattr(obj, column, value)
+            batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, columns)
+            updated += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, columns)
+        updated += len(batch)
+    return updated
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
 from dashboard.views import home_redirect, CustomLoginView
+from monitoring.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -13,7 +14,9 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('assets/', include('assets.urls')),
     path('employees/', include('employees.urls')),
+    path('search/', include('search.urls')),
     path('api/', include('config.api_urls')),
+    path('metrics', metrics, name='metrics'),
 
     # Authentication URLs
     path('login/', CustomLoginView.as_view(), name='login'),
@@ -9,6 +9,11 @@ from datetime import timedelta
 from tickets.models import RepairTicket
 from assets.models import Equipment
 from accounts.models import ASC
+from accounts.scoping import visible_site_ids
+from analytics.forecast import at_risk
+from analytics.kpis import LEVELS, kpi_report, turnaround_summary
+from analytics.rollups import reliability_summary
+from locations.models import District, Region
 
 
 class CustomLoginView(LoginView):
@@ -48,15 +53,11 @@ def dashboard_home(request):
     yellow_tickets = [t for t in all_tickets if 7 < t.get_delay_days() <= 14]
     green_tickets = [t for t in all_tickets if t.get_delay_days() <= 7]
 
-    # Durée moyenne de traitement
-    closed_with_dates = RepairTicket.objects.filter(
-        status='CLOSED',
-        closed_date__isnull=False
-    )
-    avg_duration = None
-    if closed_with_dates.exists():
-        durations = [(t.closed_date - t.initial_send_date).days for t in closed_with_dates]
-        avg_duration = sum(durations) / len(durations)
+    # Durée de traitement : moyenne et percentiles (rollups, voir analytics/kpis.py)
+    turnaround = turnaround_summary()
+
+    # Prévisions de dépassement de délai (score_sla_forecasts)
+    sla_at_risk = at_risk()
 
     # Top 5 des points de blocage
     blocked_tickets = [t for t in all_tickets if t.is_blocked()]
@@ -84,12 +85,51 @@ def dashboard_home(request):
         'red_count': len(red_tickets),
         'yellow_count': len(yellow_tickets),
         'green_count': len(green_tickets),
-        'avg_duration': round(avg_duration, 1) if avg_duration else None,
+        'avg_duration': turnaround['avg_days'],
+        'turnaround': turnaround,
         'top_blockages': top_blockages,
         'recent_red_tickets': recent_red_tickets,
         'stage_stats': stage_stats,
         'total_ascs': ASC.objects.filter(is_active=True).count(),
         'total_equipment': Equipment.objects.count(),
+        # Tickets probablement en retard bientôt (voir analytics/forecast.py)
+        'sla_at_risk': list(sla_at_risk.select_related('ticket__asc')[:10]),
+        'sla_at_risk_count': sla_at_risk.count(),
+        # Fiabilité du parc (tables de rollup, voir analytics/rollups.py)
+        'reliability': reliability_summary(months=12, limit=5),
     }
 
     return render(request, 'dashboard/home.html', context)
+
+
+# Périodes et niveaux proposés sur la page des indicateurs
+KPI_MONTH_CHOICES = [3, 6, 12, 24]
+KPI_LEVEL_LABELS = {'region': 'Région', 'district': 'District', 'site': 'Site'}
+
+
+@login_required
+def kpi_report_view(request):
+    """Indicateurs mensuels par zone (tickets ouverts, clôturés, en retard), lus dans les rollups"""
+    months = request.GET.get('months', '')
+    months = int(months) if months.isdigit() and int(months) in KPI_MONTH_CHOICES else 12
+    level = request.GET.get('level')
+    level = level if level in LEVELS else 'district'
+    region = request.GET.get('region', '')
+    district = request.GET.get('district', '')
+
+    report = kpi_report(
+        months=months, level=level,
+        region=int(region) if region.isdigit() else None,
+        district=int(district) if district.isdigit() else None,
+        site_ids=visible_site_ids(request.user),
+    )
+    context = {
+        'report': report,
+        'month_choices': KPI_MONTH_CHOICES,
+        'level_labels': KPI_LEVEL_LABELS,
+        'level_label': KPI_LEVEL_LABELS[level],
+        'regions': Region.objects.order_by('name_normalized'),
+        'districts': District.objects.filter(region_id=region).order_by('name_normalized') if region.isdigit()
+        else District.objects.order_by('name_normalized'),
+    }
+    return render(request, 'dashboard/kpis.html', context)
@@ -6,7 +6,7 @@ from .models import Region, District, Site, ZoneASC
 class RegionAdmin(admin.ModelAdmin):
     list_display = ['name', 'code', 'created_at']
     search_fields = ['name', 'code']
-    ordering = ['name']
+    ordering = ['name_normalized']
 
 
 @admin.register(District)
@@ -14,7 +14,7 @@ class DistrictAdmin(admin.ModelAdmin):
     list_display = ['name', 'region', 'code', 'created_at']
     list_filter = ['region']
     search_fields = ['name', 'code', 'region__name']
-    ordering = ['region', 'name']
+    ordering = ['region', 'name_normalized']
 
 
 @admin.register(Site)
@@ -22,7 +22,7 @@ class SiteAdmin(admin.ModelAdmin):
     list_display = ['name', 'district', 'code', 'phone', 'created_at']
     list_filter = ['district__region', 'district']
     search_fields = ['name', 'code', 'phone', 'district__name']
-    ordering = ['district', 'name']
+    ordering = ['district', 'name_normalized']
 
 
 @admin.register(ZoneASC)
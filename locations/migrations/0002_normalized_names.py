@@ -0,0 +1,77 @@
+# Generated by Django 5.0.14 on 2026-10-19 17:37
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Copie figée de config.text (normalize_text, backfill_normalized_names) à la
+# date de la migration : le code applicatif peut évoluer sans la modifier
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def _normalize_text(value):
+    text = (value or '').casefold()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def _backfill(model, normalized_fields):
+    columns = list(normalized_fields)
+    batch = []
+    for obj in model.objects.only('pk', *normalized_fields.values()).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        for column, source in normalized_fields.items():
+            setattr(obj, column, _normalize_text(getattr(obj, source)))
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, columns)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, columns)
+
+
+def backfill_names(apps, schema_editor):
+    for model_name in ('Region', 'District', 'Site'):
+        _backfill(apps.get_model('locations', model_name), {'name_normalized': 'name'})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='district',
+            options={'ordering': ['region', 'name_normalized'], 'verbose_name': 'District', 'verbose_name_plural': 'Districts'},
+        ),
+        migrations.AlterModelOptions(
+            name='region',
+            options={'ordering': ['name_normalized'], 'verbose_name': 'Région', 'verbose_name_plural': 'Régions'},
+        ),
+        migrations.AlterModelOptions(
+            name='site',
+            options={'ordering': ['district', 'name_normalized'], 'verbose_name': 'Site', 'verbose_name_plural': 'Sites'},
+        ),
+        migrations.AddField(
+            model_name='district',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(backfill_names, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,15 @@
 from django.db import models
 
+from config.text import NormalizedNamesMixin
 
-class Region(models.Model):
+
+class Region(NormalizedNamesMixin, models.Model):
     """Région administrative"""
+    NORMALIZED_FIELDS = {'name_normalized': 'name'}
+
     name = models.CharField(max_length=100, unique=True, verbose_name="Nom")
+    # Nom sans accents ni majuscules pour la recherche et le tri (voir config/text.py)
+    name_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
     code = models.CharField(max_length=20, unique=True, verbose_name="Code")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -11,16 +17,19 @@ class Region(models.Model):
     class Meta:
         verbose_name = "Région"
         verbose_name_plural = "Régions"
-        ordering = ['name']
+        ordering = ['name_normalized']
 
     def __str__(self):
         return self.name
 
 
-class District(models.Model):
+class District(NormalizedNamesMixin, models.Model):
     """District sanitaire"""
+    NORMALIZED_FIELDS = {'name_normalized': 'name'}
+
     region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='districts')
     name = models.CharField(max_length=100, verbose_name="Nom")
+    name_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
     code = models.CharField(max_length=20, verbose_name="Code")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -28,17 +37,20 @@ class District(models.Model):
     class Meta:
         verbose_name = "District"
         verbose_name_plural = "Districts"
-        ordering = ['region', 'name']
+        ordering = ['region', 'name_normalized']
         unique_together = ['region', 'code']
 
     def __str__(self):
         return f"{self.name} ({self.region.name})"
 
 
-class Site(models.Model):
+class Site(NormalizedNamesMixin, models.Model):
     """Site (Centre de santé)"""
+    NORMALIZED_FIELDS = {'name_normalized': 'name'}
+
     district = models.ForeignKey(District, on_delete=models.CASCADE, related_name='sites')
     name = models.CharField(max_length=150, verbose_name="Nom")
+    name_normalized = models.CharField(max_length=150, blank=True, editable=False, db_index=True)
     code = models.CharField(max_length=20, unique=True, verbose_name="Code")
     address = models.TextField(blank=True, verbose_name="Adresse")
     phone = models.CharField(max_length=20, blank=True, verbose_name="Téléphone")
@@ -48,7 +60,7 @@ class Site(models.Model):
     class Meta:
         verbose_name = "Site"
         verbose_name_plural = "Sites"
-        ordering = ['district', 'name']
+        ordering = ['district', 'name_normalized']
 
     def __str__(self):
         return f"{self.name} ({self.district.name})"
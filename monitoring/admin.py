@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.contrib import admin
+from django.db.models import Avg, Count, Max, Sum
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from .models import RequestProfile, JobRun
+
+WORST_ENDPOINTS_HOURS = 24
+WORST_ENDPOINTS_HOUR_CHOICES = [1, 6, 24, 72, 168]
+WORST_ENDPOINTS_LIMIT = 50
+
+
+def worst_endpoints(hours=WORST_ENDPOINTS_HOURS, limit=WORST_ENDPOINTS_LIMIT):
+    """Vues les plus coûteuses sur les hours dernières heures (temps moyen décroissant)"""
+    since = timezone.now() - timedelta(hours=hours)
+    return list(
+        RequestProfile.objects.filter(created_at__gte=since)
+        .values('view_name', 'method')
+        .annotate(
+            requests=Count('pk'),
+            avg_time=Avg('total_time_ms'),
+            max_time=Max('total_time_ms'),
+            total_time=Sum('total_time_ms'),
+            avg_queries=Avg('query_count'),
+            max_queries=Max('query_count'),
+            avg_db_time=Avg('db_time_ms'),
+            avg_render_time=Avg('render_time_ms'),
+        )
+        .order_by('-avg_time')[:limit]
+    )
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profils enregistrés par le middleware : consultation et agrégation"""
+    list_display = [
+        'created_at', 'method', 'view_name', 'status_code', 'total_time_ms',
+        'query_count', 'db_time_ms', 'render_time_ms', 'python_time_ms'
+    ]
+    list_filter = ['method', 'status_code']
+    search_fields = ['view_name', 'path']
+    date_hierarchy = 'created_at'
+    change_list_template = 'admin/monitoring/requestprofile/change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                'worst/',
+                self.admin_site.admin_view(self.worst_endpoints_view),
+                name='monitoring_requestprofile_worst',
+            ),
+        ] + super().get_urls()
+
+    def worst_endpoints_view(self, request):
+        """Agrégation des vues les plus lentes sur les N dernières heures"""
+        # Périodes proposées uniquement : une valeur arbitraire peut dépasser timedelta
+        hours = request.GET.get('hours', '')
+        hours = int(hours) if hours.isdigit() and int(hours) in WORST_ENDPOINTS_HOUR_CHOICES else WORST_ENDPOINTS_HOURS
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Vues les plus lentes ({hours} dernières heures)',
+            'hours': hours,
+            'hour_choices': WORST_ENDPOINTS_HOUR_CHOICES,
+            'endpoints': worst_endpoints(hours),
+        }
+        return TemplateResponse(request, 'admin/monitoring/requestprofile/worst_endpoints.html', context)
+
+
+@admin.register(JobRun)
+class JobRunAdmin(admin.ModelAdmin):
+    """Exécutions enregistrées par track_job : consultation uniquement"""
+    list_display = ['name', 'started_at', 'duration_ms', 'success', 'items_ok', 'items_failed']
+    list_filter = ['name', 'success']
+    date_hierarchy = 'started_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,292 @@
+"""
+Suite de benchmarks : vues, API, commandes et synchronisation DHIS2
+
+Chaque cas est exécuté une fois à vide (chauffe), puis --repeat fois pour la
+latence, puis une dernière fois sous instrumentation (nombre de requêtes SQL et
+pic mémoire Python via tracemalloc, qui ralentit l'exécution). Le cache est
+vidé avant chaque exécution : les mesures portent sur le travail en base.
+
+Chaque exécution a lieu dans une transaction annulée : les commandes (alertes,
+rappels) et les synchronisations retrouvent le même état à chaque itération et
+la base mesurée n'est pas modifiée. Les tâches transaction.on_commit ne sont
+donc pas exécutées. La synchronisation DHIS2 est rejouée à partir d'un export
+JSON (dhis2_events_export_*.json) au lieu d'interroger le serveur.
+"""
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User, ASC
+from assets.models import Equipment
+from tickets.models import RepairTicket, TicketEvent
+
+# Volumes de seed_scale par échelle
+SCALES = {
+    'small': {'ascs': 250, 'equipment': 2500, 'tickets': 10000},
+    'medium': {'ascs': 1000, 'equipment': 10000, 'tickets': 40000},
+    'large': {'ascs': 5000, 'equipment': 50000, 'tickets': 200000},
+}
+
+
+def latest_dhis2_export():
+    """Export DHIS2 le plus récent livré avec le projet (None si absent)"""
+    exports = sorted(Path(settings.BASE_DIR).glob('dhis2_events_export_*.json'))
+    return exports[-1] if exports else None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryCounter:
+    """Compte les requêtes SQL exécutées (sans la limite du journal de CaptureQueriesContext)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+class BenchmarkCase:
+    """Cas mesuré : run() exécute une itération et retourne le code HTTP (ou None)"""
+
+    def __init__(self, name, kind, run):
+        self.name = name
+        self.kind = kind
+        self.run = run
+
+    def execute(self):
+        # Itération annulée : état identique d'une itération à l'autre
+        cache.clear()
+        with transaction.atomic():
+            try:
+                with redirect_stdout(io.StringIO()):
+                    return self.run()
+            finally:
+                transaction.set_rollback(True)
+
+    def measure(self, repeat):
+        result = {'name': self.name, 'kind': self.kind}
+        try:
+            self.execute()
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                status = self.execute()
+                timings.append((time.perf_counter() - started) * 1000)
+
+            queries = QueryCounter()
+            tracemalloc.start()
+            try:
+                with connection.execute_wrapper(queries):
+                    self.execute()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        except Exception as e:
+            result['error'] = f'{type(e).__name__}: {e}'
+            return result
+
+        result.update({
+            'status': status,
+            'iterations': repeat,
+            'latency_ms': {
+                'min': round(min(timings), 2),
+                'median': round(statistics.median(timings), 2),
+                'p95': round(percentile(timings, 0.95), 2),
+                'max': round(max(timings), 2),
+                'mean': round(statistics.fmean(timings), 2),
+            },
+            'queries': queries.count,
+            'peak_memory_kib': round(peak / 1024, 1),
+        })
+        return result
+
+
+def _users():
+    """Utilisateurs des mesures : un compte programme (tout voir) et un superviseur (périmètre)"""
+    program = User.objects.filter(role__in=['PROGRAM', 'ADMIN'], is_active=True).order_by('role', 'pk').first()
+    supervisor = User.objects.filter(
+        role='SUPERVISOR', is_active=True, supervisor_profile__isnull=False
+    ).order_by('pk').first()
+    return program, supervisor
+
+
+def _client(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def build_cases(dhis2_export=None):
+    """Cas de la suite, construits à partir des données présentes en base"""
+    program, supervisor = _users()
+    if program is None:
+        raise ValueError('Aucun utilisateur PROGRAM ou ADMIN actif : rien à mesurer.')
+    client = _client(program)
+
+    def get(url, as_client=client):
+        return lambda: as_client.get(url).status_code
+
+    cases = [
+        BenchmarkCase('dashboard_home', 'view', get(reverse('dashboard:home'))),
+        BenchmarkCase('ticket_list', 'view', get(reverse('tickets:list'))),
+    ]
+    if supervisor is not None:
+        cases.append(BenchmarkCase(
+            'ticket_list (superviseur)', 'view', get(reverse('tickets:list'), _client(supervisor))
+        ))
+
+    # Ticket le plus récent ayant un historique complet
+    ticket = RepairTicket.objects.filter(status='CLOSED').order_by('-pk').first() or \
+        RepairTicket.objects.order_by('-pk').first()
+    if ticket is not None:
+        cases.append(BenchmarkCase('ticket_detail', 'view', get(reverse('tickets:detail', args=[ticket.pk]))))
+
+    cases += [
+        BenchmarkCase('api ticket-list', 'api', get(reverse('ticket-list'))),
+        BenchmarkCase('api equipment-list', 'api', get(reverse('equipment-list'))),
+        BenchmarkCase('api asc-list', 'api', get(reverse('asc-list'))),
+        BenchmarkCase('api event-list', 'api', get(reverse('event-list'))),
+    ]
+    if ticket is not None:
+        cases.append(BenchmarkCase('api ticket-detail', 'api', get(reverse('ticket-detail', args=[ticket.pk]))))
+
+    def command(name):
+        return lambda: call_command(name, stdout=io.StringIO(), stderr=io.StringIO())
+
+    cases += [
+        BenchmarkCase('check_delay_alerts', 'command', command('check_delay_alerts')),
+        BenchmarkCase('send_reminders', 'command', command('send_reminders')),
+    ]
+
+    if dhis2_export is not None:
+        with open(dhis2_export, encoding='utf-8') as f:
+            data = json.load(f)
+
+        def sync(url_name):
+            def run():
+                with mock.patch('accounts.views.export_program_events_reusable', return_value=data):
+                    return client.post(reverse(url_name)).status_code
+            return run
+
+        cases += [
+            BenchmarkCase('dhis2 sync_org_units', 'sync', sync('accounts:sync_organizational_units')),
+            BenchmarkCase('dhis2 sync_ascs', 'sync', sync('accounts:sync_ascs')),
+        ]
+    return cases
+
+
+def dataset_volumes():
+    return {
+        'ascs': ASC.objects.count(),
+        'equipment': Equipment.objects.count(),
+        'tickets': RepairTicket.objects.count(),
+        'events': TicketEvent.objects.count(),
+    }
+
+
+def run_scale(name, volumes=None, repeat=5, seed=42, dhis2_export=None, stdout=None):
+    """
+    Mesure tous les cas sur une échelle. Avec volumes, la base est vidée puis
+    remplie par seed_scale ; sans volumes, les données présentes sont mesurées.
+    """
+    scale = {'name': name}
+    if volumes is not None:
+        call_command('flush', interactive=False, verbosity=0)
+        started = time.perf_counter()
+        call_command(
+            'seed_scale', seed=seed, end_date=timezone.localdate().isoformat(),
+            stdout=io.StringIO(), **volumes
+        )
+        scale['seed_seconds'] = round(time.perf_counter() - started, 1)
+    scale['volumes'] = dataset_volumes()
+
+    scale['results'] = []
+    # Transaction englobante annulée : sessions de connexion et écritures éventuelles comprises
+    with transaction.atomic():
+        for case in build_cases(dhis2_export):
+            result = case.measure(repeat)
+            scale['results'].append(result)
+            if stdout is not None:
+                stdout.write(format_result(result))
+        transaction.set_rollback(True)
+    return scale
+
+
+def build_report(scales, repeat, seed):
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'database': {
+            'vendor': connection.vendor,
+            'version': '.'.join(map(str, connection.get_database_version())),
+        },
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'repeat': repeat,
+        'seed': seed,
+        'scales': scales,
+    }
+
+
+def format_result(result):
+    if 'error' in result:
+        return f'  {result["name"]:<28} ERREUR {result["error"]}'
+    latency = result['latency_ms']
+    return (
+        f'  {result["name"]:<28} {latency["median"]:>9.1f} ms (p95 {latency["p95"]:.1f}) '
+        f'{result["queries"]:>5} requêtes {result["peak_memory_kib"]:>9.0f} Kio  [{result["status"]}]'
+    )
+
+
+def compare_reports(before, after):
+    """Lignes comparant deux rapports (médiane et nombre de requêtes) pour les cas communs"""
+    previous = {
+        (scale['name'], result['name']): result
+        for scale in before['scales'] for result in scale['results'] if 'error' not in result
+    }
+    lines = []
+    for scale in after['scales']:
+        for result in scale['results']:
+            old = previous.get((scale['name'], result['name']))
+            if old is None or 'error' in result:
+                continue
+            old_median, new_median = old['latency_ms']['median'], result['latency_ms']['median']
+            change = (new_median - old_median) / old_median * 100 if old_median else 0
+            lines.append(
+                f'  {scale["name"]:<8} {result["name"]:<28} {old_median:>9.1f} -> {new_median:>9.1f} ms '
+                f'({change:+.0f} %)  requêtes {old["queries"]} -> {result["queries"]}'
+            )
+    return lines
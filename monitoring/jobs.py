@@ -0,0 +1,45 @@
+"""
+Suivi des tâches planifiées et synchronisations
+
+track_job() enregistre chaque exécution dans JobRun (durée, succès, nombre
+d'éléments traités / en erreur). Les commandes tournent dans des processus
+séparés (cron) : l'endpoint /metrics lit donc ces exécutions en base plutôt
+que des compteurs en mémoire.
+
+    with track_job('send_reminders') as run:
+        ...
+        run.items_ok += 1
+
+track_job() s'utilise aussi comme décorateur (@track_job('check_delay_alerts')).
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import JobRun
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def track_job(name):
+    """Chronomètre et enregistre une exécution de la tâche name"""
+    run = JobRun(name=name, started_at=timezone.now())
+    start = time.perf_counter()
+    try:
+        yield run
+        run.success = True
+    except BaseException as e:
+        run.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        run.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        run.finished_at = timezone.now()
+        try:
+            run.save()
+        except DatabaseError:
+            # Le suivi ne doit pas masquer le résultat de la tâche
+            logger.exception("Impossible d'enregistrer l'exécution de %s", name)
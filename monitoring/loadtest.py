@@ -0,0 +1,410 @@
+"""
+Test de charge : utilisateurs de terrain simulés à travers le workflow
+
+Chaque utilisateur virtuel (un thread, une session HTTP) se connecte par le
+formulaire de connexion puis enchaîne des sessions réalistes contre un serveur
+en cours d'exécution : liste des tickets, détail, commentaire, confirmation de
+réception, réparation (étapes Réparateur / E-Santé) et envoi à l'étape
+suivante, entrecoupés d'un temps de réflexion.
+
+Le travail à traiter est préparé à partir de la base (tickets en attente de
+réception à l'étape de chaque rôle, dans le périmètre des superviseurs ;
+tickets détenus par chaque utilisateur) puis transmis d'étape en étape pendant
+le test : un ticket envoyé par un superviseur rejoint la file du programme,
+etc. Le harnais doit donc utiliser la même base que le serveur.
+
+Résultats par endpoint : débit, latences (p50 / p95 / p99 / max) et taux
+d'erreur (statut HTTP >= 400 ou erreur réseau). Sous PostgreSQL, les attentes
+de verrou sont échantillonnées dans pg_stat_activity pendant le test ; SQLite
+n'expose pas ses verrous (ils se traduisent par des erreurs 500 « database is
+locked »).
+"""
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection
+
+from accounts.models import User, Supervisor
+from accounts.scoping import scope_tickets
+from tickets import workflow
+from tickets.models import RepairTicket
+from .benchmarks import percentile
+
+ENDPOINTS = ['login', 'ticket_list', 'ticket_detail', 'comment', 'receive', 'repair', 'send']
+
+# Étapes où chaque rôle confirme des réceptions
+ROLE_STAGES = {
+    'SUPERVISOR': ['SUPERVISOR', 'RETURNING_SUPERVISOR'],
+    'PROGRAM': ['PROGRAM', 'RETURNING_PROGRAM'],
+    'LOGISTICS': ['LOGISTICS', 'RETURNING_LOGISTICS'],
+    'REPAIRER': ['REPAIRER'],
+    'ESANTE': ['ESANTE'],
+}
+
+DETAIL_SAMPLE = 200
+CSRF_COOKIE = 'csrftoken'
+
+
+class Stats:
+    """Mesures par endpoint, partagées entre les threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(list)
+
+    def record(self, endpoint, elapsed_ms, error=None):
+        with self.lock:
+            self.timings[endpoint].append(elapsed_ms)
+            if error:
+                self._fail(endpoint, error)
+
+    def fail(self, endpoint, error):
+        """Requête déjà mesurée mais en échec (réponse inattendue)"""
+        with self.lock:
+            self._fail(endpoint, error)
+
+    def _fail(self, endpoint, error):
+        self.errors[endpoint] += 1
+        if len(self.error_samples[endpoint]) < 3:
+            self.error_samples[endpoint].append(error)
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            timings = self.timings.get(endpoint)
+            if not timings:
+                continue
+            count = len(timings)
+            endpoints[endpoint] = {
+                'requests': count,
+                'throughput_rps': round(count / elapsed, 2) if elapsed else None,
+                'errors': self.errors[endpoint],
+                'error_rate': round(self.errors[endpoint] / count, 4),
+                'latency_ms': {
+                    'p50': round(statistics.median(timings), 1),
+                    'p95': round(percentile(timings, 0.95), 1),
+                    'p99': round(percentile(timings, 0.99), 1),
+                    'max': round(max(timings), 1),
+                },
+                'error_samples': self.error_samples[endpoint],
+            }
+        return endpoints
+
+
+class WorkQueues:
+    """Tickets en attente de réception par étape, avec les utilisateurs autorisés à les recevoir"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(list)  # étape -> [(ticket_id, utilisateurs ou None)]
+
+    def put(self, stage, ticket_id, user_ids=None):
+        with self.lock:
+            self.pending[stage].append((ticket_id, user_ids))
+
+    def take(self, stages, user_id):
+        with self.lock:
+            for stage in stages:
+                queue = self.pending[stage]
+                for index, (ticket_id, user_ids) in enumerate(queue):
+                    if user_ids is None or user_id in user_ids:
+                        del queue[index]
+                        return ticket_id
+        return None
+
+    def size(self):
+        with self.lock:
+            return sum(len(queue) for queue in self.pending.values())
+
+
+def _supervisors_by_site():
+    """Superviseurs pouvant recevoir les tickets de chaque site (sites du profil et site du compte)"""
+    by_site = defaultdict(set)
+    for user_id, site_id in Supervisor.sites.through.objects.values_list('supervisor__user_id', 'site_id'):
+        by_site[site_id].add(user_id)
+    for user_id, site_id in User.objects.filter(role='SUPERVISOR', site__isnull=False).values_list('pk', 'site_id'):
+        by_site[site_id].add(user_id)
+    return by_site
+
+
+def prepare_work(users):
+    """File des tickets à recevoir et tickets détenus par chacun des utilisateurs virtuels"""
+    queues = WorkQueues()
+    by_site = _supervisors_by_site()
+    stages = sorted({stage for user in users for stage in ROLE_STAGES.get(user.role, [])})
+    pending = RepairTicket.objects.filter(
+        current_stage__in=stages, current_holder__isnull=True
+    ).exclude(status__in=workflow.FINAL_STATUSES).order_by('pk').values_list('pk', 'current_stage', 'asc__site_id')
+    for ticket_id, stage, site_id in pending:
+        is_supervisor_stage = workflow.role_for_stage(stage) == 'SUPERVISOR'
+        queues.put(stage, ticket_id, frozenset(by_site.get(site_id, ())) if is_supervisor_stage else None)
+
+    held = defaultdict(list)
+    rows = RepairTicket.objects.filter(current_holder__in=users).exclude(
+        status__in=workflow.FINAL_STATUSES
+    ).order_by('pk').values_list('current_holder_id', 'pk')
+    for user_id, ticket_id in rows:
+        held[user_id].append(ticket_id)
+    return queues, held
+
+
+class VirtualUser(threading.Thread):
+    """Utilisateur de terrain simulé : connexion puis sessions de travail jusqu'à l'échéance"""
+
+    def __init__(self, harness, user, password, start_delay, seed):
+        super().__init__(daemon=True)
+        self.harness = harness
+        self.user = user
+        self.password = password
+        self.start_delay = start_delay
+        self.rng = random.Random(seed)
+        self.held = list(harness.held.get(user.pk, []))
+
+    def request(self, endpoint, method, path, data=None):
+        """Requête HTTP mesurée (redirections non suivies) ; retourne la réponse ou None"""
+        harness = self.harness
+        headers = {}
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.session.cookies.get(CSRF_COOKIE, '')
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, harness.base_url + path, data=data, headers=headers,
+                allow_redirects=False, timeout=harness.timeout
+            )
+        except Exception as e:
+            harness.stats.record(endpoint, (time.perf_counter() - started) * 1000, f'{type(e).__name__}: {e}')
+            return None
+        elapsed = (time.perf_counter() - started) * 1000
+        error = f'HTTP {response.status_code} {path}' if response.status_code >= 400 else None
+        harness.stats.record(endpoint, elapsed, error)
+        return None if error else response
+
+    def login(self):
+        if self.request('login', 'GET', '/login/') is None:
+            return False
+        response = self.request('login', 'POST', '/login/', {
+            'username': self.user.username,
+            'password': self.password,
+            'csrfmiddlewaretoken': self.session.cookies.get(CSRF_COOKIE, ''),
+        })
+        if response is None:
+            return False
+        if response.status_code != 302:
+            # Formulaire réaffiché : identifiants refusés
+            self.harness.stats.fail('login', f'Connexion refusée pour {self.user.username}')
+            return False
+        return True
+
+    def run(self):
+        import requests
+
+        harness = self.harness
+        time.sleep(self.start_delay)
+        self.session = requests.Session()
+        try:
+            if not self.login():
+                return
+            while time.monotonic() < harness.deadline:
+                self.session_iteration()
+                time.sleep(self.rng.expovariate(1 / harness.think) if harness.think else 0)
+        finally:
+            connection.close()
+
+    def session_iteration(self):
+        harness = self.harness
+        self.request('ticket_list', 'GET', '/tickets/')
+
+        to_receive = harness.queues.take(ROLE_STAGES.get(self.user.role, []), self.user.pk)
+        ticket_id = to_receive or (self.held[0] if self.held else None)
+        sample = harness.samples.get(self.user.pk)
+        if ticket_id is None and sample:
+            ticket_id = self.rng.choice(sample)
+        if ticket_id is None:
+            return
+
+        self.request('ticket_detail', 'GET', f'/tickets/{ticket_id}/')
+        if self.rng.random() < harness.comment_rate:
+            self.request('comment', 'POST', f'/tickets/{ticket_id}/comment/', {'comment': 'Test de charge'})
+
+        if to_receive is not None:
+            if self.request('receive', 'POST', f'/tickets/{ticket_id}/receive/', {'comment': ''}) is None:
+                return
+            self.held.append(ticket_id)
+
+        if ticket_id in self.held:
+            self.forward(ticket_id)
+
+    def forward(self, ticket_id):
+        """Réparation éventuelle puis envoi à l'étape suivante (suivi du ticket dans les files)"""
+        harness = self.harness
+        self.held.remove(ticket_id)
+        ticket = RepairTicket.objects.values('current_stage', 'status', 'current_holder_id', 'asc__site_id').get(
+            pk=ticket_id
+        )
+        if ticket['current_holder_id'] != self.user.pk:
+            return  # Réception refusée (ticket déjà pris ou envoyé par cet utilisateur)
+
+        stage = ticket['current_stage']
+        if stage in workflow.REPAIR_STAGES and ticket['status'] != 'REPAIRED':
+            if self.request('repair', 'POST', f'/tickets/{ticket_id}/mark-repaired/', {
+                'resolution_notes': 'Test de charge'
+            }) is None:
+                return
+
+        next_stages = [next_stage for next_stage in workflow.next_stages(stage) if next_stage != 'ESANTE']
+        if not next_stages:
+            return
+        to_role = next_stages[0]
+        if self.request('send', 'POST', f'/tickets/{ticket_id}/send/', {'to_role': to_role, 'comment': ''}) is None:
+            return
+        if workflow.role_for_stage(to_role) == 'SUPERVISOR':
+            harness.queues.put(to_role, ticket_id, frozenset(harness.by_site.get(ticket['asc__site_id'], ())))
+        elif to_role != 'RETURNED_ASC':
+            harness.queues.put(to_role, ticket_id)
+
+
+class LockSampler(threading.Thread):
+    """Échantillonne les sessions PostgreSQL en attente de verrou pendant le test"""
+
+    def __init__(self, interval, deadline):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.deadline = deadline
+        self.samples = []
+        self.deadlocks = None
+        self.error = None
+
+    def run(self):
+        from django.db import connections
+
+        try:
+            with connections['default'].cursor() as cursor:
+                start_deadlocks = self._deadlocks(cursor)
+                while time.monotonic() < self.deadline:
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    )
+                    self.samples.append(cursor.fetchone()[0])
+                    time.sleep(self.interval)
+                self.deadlocks = self._deadlocks(cursor) - start_deadlocks
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+        finally:
+            connections['default'].close()
+
+    @staticmethod
+    def _deadlocks(cursor):
+        cursor.execute('SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()')
+        return cursor.fetchone()[0]
+
+    def summary(self):
+        if self.error:
+            return {'available': False, 'error': self.error}
+        samples = self.samples or [0]
+        return {
+            'available': True,
+            'samples': len(self.samples),
+            'max_waiting': max(samples),
+            'mean_waiting': round(statistics.fmean(samples), 2),
+            'samples_with_waits': sum(1 for sample in samples if sample),
+            'deadlocks': self.deadlocks,
+        }
+
+
+class LoadTest:
+    """Prépare les utilisateurs virtuels, exécute le test et produit le rapport"""
+
+    def __init__(self, base_url, users, password, duration=60, ramp_up=10, think=1.0,
+                 comment_rate=0.3, timeout=30, seed=42, lock_interval=0.5):
+        self.base_url = base_url.rstrip('/')
+        self.users = users
+        self.password = password
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.think = think
+        self.comment_rate = comment_rate
+        self.timeout = timeout
+        self.seed = seed
+        self.lock_interval = lock_interval
+        self.stats = Stats()
+
+    def prepare(self):
+        self.queues, self.held = prepare_work(self.users)
+        self.by_site = _supervisors_by_site()
+        # Tickets consultés quand il n'y a rien à traiter : échantillon du périmètre de chacun
+        self.samples = {}
+        for user in {user.pk: user for user in self.users}.values():
+            self.samples[user.pk] = list(
+                scope_tickets(RepairTicket.objects.all(), user).order_by('-pk').values_list('pk', flat=True)[
+                    :DETAIL_SAMPLE]
+            )
+        return self.queues.size()
+
+    def run(self):
+        pending = self.prepare()
+        # Les threads ouvrent leurs propres connexions : celle de la préparation est libérée
+        connection.close()
+
+        started = time.monotonic()
+        self.deadline = started + self.ramp_up + self.duration
+        sampler = None
+        if connection.vendor == 'postgresql':
+            sampler = LockSampler(self.lock_interval, self.deadline)
+            sampler.start()
+
+        rng = random.Random(self.seed)
+        count = len(self.users)
+        threads = [
+            VirtualUser(self, user, self.password, self.ramp_up * index / count, rng.getrandbits(32))
+            for index, user in enumerate(self.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if sampler is not None:
+            sampler.join()
+        elapsed = time.monotonic() - started
+
+        endpoints = self.stats.summary(elapsed)
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        errors = sum(endpoint['errors'] for endpoint in endpoints.values())
+        if sampler is not None:
+            lock_waits = sampler.summary()
+        else:
+            lock_waits = {'available': False, 'error': f'Attentes de verrou non observables ({connection.vendor})'}
+        return {
+            'base_url': self.base_url,
+            'users': count,
+            'duration_s': round(elapsed, 1),
+            'pending_receptions': pending,
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+            'error_rate': round(errors / total, 4) if total else None,
+            'endpoints': endpoints,
+            'lock_waits': lock_waits,
+        }
+
+
+def select_users(roles, count):
+    """count utilisateurs actifs, répartis entre les rôles (réutilisés s'il en manque)"""
+    by_role = {
+        role: list(User.objects.filter(role=role, is_active=True).order_by('pk'))
+        for role in roles
+    }
+    missing = [role for role, users in by_role.items() if not users]
+    if missing:
+        raise ValueError(f'Aucun utilisateur actif pour : {", ".join(missing)}')
+    selected = []
+    for index in range(count):
+        users = by_role[roles[index % len(roles)]]
+        selected.append(users[(index // len(roles)) % len(users)])
+    return selected
+
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour exécuter la suite de benchmarks (vues, API REST,
+check_delay_alerts, send_reminders, synchronisation DHIS2 rejouée) à plusieurs
+échelles et produire un rapport JSON comparable d'une version à l'autre.
+
+Par défaut les mesures ont lieu dans une base de test dédiée (comme
+manage.py test : test_<nom> sous PostgreSQL, base en mémoire sous SQLite),
+remplie par seed_scale pour chaque échelle. --current-db mesure la base
+configurée telle quelle, sans la modifier.
+
+Exemples :
+    python manage.py benchmark_suite --scales small,medium --output avant.json
+    python manage.py benchmark_suite --scales small,medium --output apres.json --compare avant.json
+"""
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from monitoring.benchmarks import SCALES, build_report, compare_reports, latest_dhis2_export, run_scale
+
+
+class Command(BaseCommand):
+    help = 'Mesure latence, requêtes SQL et mémoire des vues, API et commandes à plusieurs échelles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='small',
+            help=f'Échelles séparées par des virgules parmi {", ".join(SCALES)} (défaut : small)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Itérations mesurées par cas (défaut : 5)')
+        parser.add_argument('--seed', type=int, default=42, help='Graine de seed_scale (défaut : 42)')
+        parser.add_argument('--output', help='Fichier du rapport JSON (défaut : benchmark-<base>-<date>.json)')
+        parser.add_argument('--compare', help='Rapport JSON précédent à comparer')
+        parser.add_argument('--dhis2-export', help='Export DHIS2 rejoué (défaut : export le plus récent du projet)')
+        parser.add_argument(
+            '--current-db', action='store_true',
+            help='Mesurer la base configurée sans la remplir (aucune écriture conservée)'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Conserver la base de test entre deux exécutions')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scales'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCALES]
+        if unknown:
+            raise CommandError(f'Échelles inconnues : {", ".join(unknown)}')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat doit être au moins 1.')
+
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Rapport de comparaison illisible : {e}')
+
+        dhis2_export = options['dhis2_export'] or latest_dhis2_export()
+        if dhis2_export is None:
+            self.stdout.write(self.style.WARNING('Aucun export DHIS2 trouvé : synchronisation non mesurée'))
+
+        # Emails vers la boîte locale (locmem), ALLOWED_HOSTS de test
+        setup_test_environment()
+        old_name = None
+        if not options['current_db']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            scales = []
+            if options['current_db']:
+                scales.append(self.run('current', None, options, dhis2_export))
+            else:
+                for name in names:
+                    scales.append(self.run(name, SCALES[name], options, dhis2_export))
+            vendor = connection.vendor
+            report = build_report(scales, options['repeat'], options['seed'])
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        output = options['output'] or f'benchmark-{vendor}-{datetime.now():%Y%m%d-%H%M%S}.json'
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+        if previous is not None:
+            self.stdout.write('')
+            self.stdout.write(self.style.SUCCESS(f'=== Comparaison avec {options["compare"]} ==='))
+            for line in compare_reports(previous, report):
+                self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rapport écrit dans {output}'))
+
+    def run(self, name, volumes, options, dhis2_export):
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f'=== Échelle {name} ({connection.vendor}) ==='))
+        if volumes is not None:
+            self.stdout.write('Génération des données (seed_scale)...')
+        scale = run_scale(
+            name, volumes, repeat=options['repeat'], seed=options['seed'],
+            dhis2_export=dhis2_export, stdout=self.stdout
+        )
+        volumes = scale['volumes']
+        self.stdout.write(
+            f'  {volumes["ascs"]} ASCs, {volumes["equipment"]} équipements, '
+            f'{volumes["tickets"]} tickets, {volumes["events"]} événements'
+        )
+        return scale
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour simuler des utilisateurs de terrain concurrents contre un
+serveur en cours d'exécution (runserver ou gunicorn) et mesurer débit,
+latences et taux d'erreur par endpoint, ainsi que les attentes de verrou
+(PostgreSQL).
+
+La commande lit la même base que le serveur pour préparer le travail
+(tickets à recevoir, tickets détenus) : lancer le serveur et la commande avec
+les mêmes réglages. Les actions sont réellement appliquées (réceptions,
+envois, commentaires) : utiliser une base de test, par exemple remplie avec
+seed_scale (mot de passe des comptes : pass123).
+
+Exemple : 100 superviseurs qui confirment des réceptions en même temps
+    gunicorn --workers 3 config.wsgi:application &
+    python manage.py loadtest --users 100 --roles SUPERVISOR --ramp-up 5 --duration 60
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.loadtest import ENDPOINTS, ROLE_STAGES, LoadTest, select_users
+
+
+class Command(BaseCommand):
+    help = 'Test de charge : utilisateurs concurrents à travers le workflow contre un serveur local'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='URL du serveur (défaut : http://127.0.0.1:8000)')
+        parser.add_argument('--users', type=int, default=20, help='Nombre d\'utilisateurs virtuels (défaut : 20)')
+        parser.add_argument(
+            '--roles', default='SUPERVISOR,PROGRAM,LOGISTICS,REPAIRER',
+            help=f'Rôles simulés parmi {", ".join(ROLE_STAGES)} (défaut : SUPERVISOR,PROGRAM,LOGISTICS,REPAIRER)'
+        )
+        parser.add_argument('--password', default='pass123', help='Mot de passe des comptes (défaut : pass123)')
+        parser.add_argument('--duration', type=float, default=60, help='Durée du palier en secondes (défaut : 60)')
+        parser.add_argument('--ramp-up', type=float, default=10, help='Montée en charge en secondes (défaut : 10)')
+        parser.add_argument('--think', type=float, default=1.0, help='Temps de réflexion moyen en secondes (défaut : 1)')
+        parser.add_argument(
+            '--comment-rate', type=float, default=0.3, help='Part des consultations suivies d\'un commentaire (défaut : 0.3)'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Graine des choix aléatoires (défaut : 42)')
+        parser.add_argument('--output', help='Fichier du rapport JSON')
+
+    def handle(self, *args, **options):
+        try:
+            import requests  # noqa: F401
+        except ImportError:
+            raise CommandError('Le test de charge nécessite le paquet requests (pip install requests).')
+
+        roles = [role.strip().upper() for role in options['roles'].split(',') if role.strip()]
+        unknown = [role for role in roles if role not in ROLE_STAGES]
+        if unknown or not roles:
+            raise CommandError(f'Rôles inconnus : {", ".join(unknown) or "aucun"}')
+        if options['users'] < 1:
+            raise CommandError('--users doit être au moins 1.')
+
+        try:
+            users = select_users(roles, options['users'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        loadtest = LoadTest(
+            options['base_url'], users, options['password'], duration=options['duration'],
+            ramp_up=options['ramp_up'], think=options['think'], comment_rate=options['comment_rate'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS('=== Test de charge ==='))
+        self.stdout.write(
+            f'{options["base_url"]} | {len(users)} utilisateurs ({", ".join(roles)}) | '
+            f'montée {options["ramp_up"]:.0f} s + palier {options["duration"]:.0f} s'
+        )
+        report = loadtest.run()
+
+        self.stdout.write('')
+        self.stdout.write(f'Tickets en attente de réception au départ : {report["pending_receptions"]}')
+        self.stdout.write(f'{"Endpoint":<15}{"Requêtes":>10}{"req/s":>9}{"Erreurs":>9}{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}')
+        for endpoint in ENDPOINTS:
+            stats = report['endpoints'].get(endpoint)
+            if stats is None:
+                continue
+            latency = stats['latency_ms']
+            self.stdout.write(
+                f'{endpoint:<15}{stats["requests"]:>10}{stats["throughput_rps"]:>9.1f}'
+                f'{stats["error_rate"]:>8.1%} {latency["p50"]:>8.0f}{latency["p95"]:>9.0f}'
+                f'{latency["p99"]:>9.0f}{latency["max"]:>9.0f}'
+            )
+            for sample in stats['error_samples']:
+                self.stdout.write(self.style.WARNING(f'    {sample}'))
+
+        lock_waits = report['lock_waits']
+        if lock_waits['available']:
+            self.stdout.write(
+                f'Attentes de verrou : max {lock_waits["max_waiting"]} session(s), '
+                f'moyenne {lock_waits["mean_waiting"]}, {lock_waits["samples_with_waits"]}/{lock_waits["samples"]} '
+                f'échantillons avec attente, {lock_waits["deadlocks"]} interblocage(s)'
+            )
+        else:
+            self.stdout.write(self.style.WARNING(lock_waits['error']))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+        summary = (
+            f'✓ {report["requests"]} requêtes en {report["duration_s"]} s '
+            f'({report["throughput_rps"]} req/s, erreurs {report["error_rate"] or 0:.1%})'
+        )
+        if report['error_rate']:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour supprimer les profils de requêtes anciens (table alimentée
+par le middleware de profilage). À planifier (cron), par exemple chaque nuit.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from monitoring.models import RequestProfile
+
+
+class Command(BaseCommand):
+    help = 'Supprime les profils de requêtes plus anciens que --days jours'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Durée de conservation en jours (défaut : 7)',
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = RequestProfile.objects.filter(created_at__lt=since).delete()
+        self.stdout.write(self.style.SUCCESS(f'✓ {deleted} profil(s) de requête supprimé(s)'))
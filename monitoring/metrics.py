@@ -0,0 +1,203 @@
+"""
+Métriques au format d'exposition Prometheus (endpoint /metrics)
+
+- Compteurs et histogrammes en mémoire, propres à chaque processus : durée et
+  nombre des requêtes HTTP par vue (MetricsMiddleware). Avec plusieurs
+  workers, chaque processus expose ses propres valeurs, distinguées par
+  l'étiquette worker (PID) : chaque série reste monotone quel que soit le
+  worker qui répond au scrape ; agréger avec sum without (worker).
+- Jauges calculées en base par quelques requêtes d'agrégat (tickets en cours
+  par étape, tickets en retard, alertes email, exécutions des tâches), mises en
+  cache METRICS_CACHE_SECONDS : un scrape toutes les 15 s reste peu coûteux.
+"""
+import bisect
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+METRICS_CACHE_SECONDS = 10
+METRICS_CACHE_KEY = 'monitoring-metrics'
+
+# Mêmes seuils que RepairTicketViewSet.overdue (délai > 14 jours)
+OVERDUE_DAYS = 14
+ACTIVE_STATUSES = ['OPEN', 'IN_PROGRESS', 'REPAIRED', 'RETURNING']
+
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur monotone par combinaison d'étiquettes"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self, extra=()):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, _labels(self.labelnames, labels, extra), value
+
+
+class Histogram:
+    """Histogramme cumulatif (seaux fixes) par combinaison d'étiquettes"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            counts, total = self._values.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def samples(self, extra=()):
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                bucket_labels = _labels(self.labelnames, labels, list(extra) + [('le', _number(bound))])
+                yield f'{self.name}_bucket', bucket_labels, cumulative
+            yield f'{self.name}_sum', _labels(self.labelnames, labels, extra), total
+            yield f'{self.name}_count', _labels(self.labelnames, labels, extra), cumulative
+
+
+class Gauge:
+    """Jauge dont les valeurs sont fournies au moment de l'exposition"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self.values = {}
+
+    def samples(self, extra=()):
+        for labels, value in sorted(self.values.items()):
+            yield self.name, _labels(self.labelnames, labels, extra), value
+
+
+REQUEST_DURATION = Histogram(
+    'repair_tracker_http_request_duration_seconds', 'Durée des requêtes HTTP', ['view', 'method']
+)
+REQUESTS = Counter(
+    'repair_tracker_http_requests_total', 'Requêtes HTTP traitées', ['view', 'method', 'status']
+)
+
+
+class MetricsMiddleware:
+    """Mesure la durée et le nombre des requêtes HTTP par vue"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        # Nom de vue plutôt que chemin : nombre d'étiquettes borné
+        view = (match.view_name if match else '') or '<non résolue>'
+        REQUEST_DURATION.observe(time.perf_counter() - start, view, request.method)
+        REQUESTS.inc(view, request.method, str(response.status_code))
+        return response
+
+
+def database_gauges():
+    """Valeurs des jauges calculées en base (quelques requêtes d'agrégat)"""
+    from tickets.models import RepairTicket, DelayAlertLog
+    from .models import JobRun
+
+    now = timezone.now()
+    active = RepairTicket.objects.filter(status__in=ACTIVE_STATUSES)
+
+    backlog = Gauge('repair_tracker_tickets_backlog', 'Tickets en cours par étape', ['stage'])
+    for row in active.values('current_stage').annotate(count=Count('pk')).order_by():
+        backlog.values[(row['current_stage'],)] = row['count']
+
+    overdue = Gauge('repair_tracker_tickets_overdue', f'Tickets en cours depuis plus de {OVERDUE_DAYS} jours')
+    overdue.values[()] = active.filter(initial_send_date__lte=now - timedelta(days=OVERDUE_DAYS + 1)).count()
+
+    alerts = Gauge(
+        'repair_tracker_delay_alert_emails_total', 'Emails d\'alerte de délai envoyés', ['outcome'], kind='counter'
+    )
+    for row in DelayAlertLog.objects.values('email_sent_successfully').annotate(count=Count('pk')).order_by():
+        alerts.values[('sent' if row['email_sent_successfully'] else 'failed',)] = row['count']
+
+    runs = Gauge('repair_tracker_job_runs_total', 'Exécutions des tâches', ['job', 'outcome'], kind='counter')
+    items = Gauge('repair_tracker_job_items_total', 'Éléments traités par les tâches', ['job', 'outcome'], kind='counter')
+    for row in JobRun.objects.values('name', 'success').annotate(
+        count=Count('pk'), ok=Sum('items_ok'), failed=Sum('items_failed')
+    ).order_by():
+        runs.values[(row['name'], 'success' if row['success'] else 'failure')] = row['count']
+        for outcome in ('ok', 'failed'):
+            key = (row['name'], outcome)
+            items.values[key] = items.values.get(key, 0) + (row[outcome] or 0)
+
+    duration = Gauge('repair_tracker_job_last_duration_seconds', 'Durée de la dernière exécution', ['job'])
+    last_success = Gauge(
+        'repair_tracker_job_last_success_timestamp_seconds', 'Date de la dernière exécution réussie', ['job']
+    )
+    last_ids = JobRun.objects.values('name').annotate(last_id=Max('pk')).values_list('last_id', flat=True)
+    for name, duration_ms in JobRun.objects.filter(pk__in=list(last_ids)).values_list('name', 'duration_ms'):
+        duration.values[(name,)] = round((duration_ms or 0) / 1000, 3)
+    for row in JobRun.objects.filter(success=True).values('name').annotate(last=Max('finished_at')).order_by():
+        last_success.values[(row['name'],)] = int(row['last'].timestamp())
+
+    return [backlog, overdue, alerts, runs, items, duration, last_success]
+
+
+def render_metrics():
+    """Texte d'exposition : jauges en base (en cache) puis métriques du processus"""
+    text = cache.get(METRICS_CACHE_KEY)
+    if text is None:
+        text = _render(database_gauges())
+        cache.set(METRICS_CACHE_KEY, text, METRICS_CACHE_SECONDS)
+    # PID lu à chaque rendu : les workers sont créés par fork après l'import
+    return text + _render([REQUEST_DURATION, REQUESTS], extra=[('worker', os.getpid())])
+
+
+def _render(metrics, extra=()):
+    lines = []
+    for metric in metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples(extra):
+            lines.append(f'{name}{labels} {_number(value)}')
+    return '\n'.join(lines) + '\n'
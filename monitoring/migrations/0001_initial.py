@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=200, verbose_name='Vue')),
+                ('method', models.CharField(max_length=10, verbose_name='Méthode')),
+                ('path', models.CharField(max_length=500, verbose_name='Chemin')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Code HTTP')),
+                ('query_count', models.PositiveIntegerField(verbose_name='Requêtes SQL')),
+                ('db_time_ms', models.FloatField(verbose_name='Temps base de données (ms)')),
+                ('render_time_ms', models.FloatField(verbose_name='Temps de rendu (ms)')),
+                ('python_time_ms', models.FloatField(verbose_name='Temps Python (ms)')),
+                ('total_time_ms', models.FloatField(verbose_name='Temps total (ms)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Profil de requête',
+                'verbose_name_plural': 'Profils de requêtes',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
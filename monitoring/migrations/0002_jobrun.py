@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Tâche')),
+                ('started_at', models.DateTimeField(verbose_name='Début')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('duration_ms', models.FloatField(blank=True, null=True, verbose_name='Durée (ms)')),
+                ('success', models.BooleanField(default=False, verbose_name='Succès')),
+                ('items_ok', models.PositiveIntegerField(default=0, verbose_name='Éléments traités')),
+                ('items_failed', models.PositiveIntegerField(default=0, verbose_name='Éléments en erreur')),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+            ],
+            options={
+                'verbose_name': 'Exécution de tâche',
+                'verbose_name_plural': 'Exécutions de tâches',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['name', '-started_at'], name='monitoring_jobrun_name_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """Coût d'une requête HTTP mesuré par le middleware de profilage"""
+    view_name = models.CharField(max_length=200, verbose_name="Vue")
+    method = models.CharField(max_length=10, verbose_name="Méthode")
+    path = models.CharField(max_length=500, verbose_name="Chemin")
+    status_code = models.PositiveSmallIntegerField(verbose_name="Code HTTP")
+    query_count = models.PositiveIntegerField(verbose_name="Requêtes SQL")
+    db_time_ms = models.FloatField(verbose_name="Temps base de données (ms)")
+    render_time_ms = models.FloatField(verbose_name="Temps de rendu (ms)")
+    python_time_ms = models.FloatField(verbose_name="Temps Python (ms)")
+    total_time_ms = models.FloatField(verbose_name="Temps total (ms)")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Profil de requête"
+        verbose_name_plural = "Profils de requêtes"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.view_name} ({self.total_time_ms:.0f} ms, {self.query_count} requêtes)"
+
+
+class JobRun(models.Model):
+    """Exécution d'une tâche planifiée ou d'une synchronisation (voir monitoring/jobs.py)"""
+    name = models.CharField(max_length=100, verbose_name="Tâche")
+    started_at = models.DateTimeField(verbose_name="Début")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+    duration_ms = models.FloatField(null=True, blank=True, verbose_name="Durée (ms)")
+    success = models.BooleanField(default=False, verbose_name="Succès")
+    items_ok = models.PositiveIntegerField(default=0, verbose_name="Éléments traités")
+    items_failed = models.PositiveIntegerField(default=0, verbose_name="Éléments en erreur")
+    error = models.TextField(blank=True, verbose_name="Erreur")
+
+    class Meta:
+        verbose_name = "Exécution de tâche"
+        verbose_name_plural = "Exécutions de tâches"
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['name', '-started_at'], name='monitoring_jobrun_name_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.started_at:%d/%m/%Y %H:%M})"
@@ -0,0 +1,158 @@
+"""
+Profilage des requêtes HTTP (optionnel, REQUEST_PROFILING_ENABLED)
+
+Pour chaque requête, ProfilingMiddleware mesure :
+- le nombre de requêtes SQL et leur durée (execute_wrapper sur chaque connexion) ;
+- le temps de rendu des templates (hors requêtes SQL lancées pendant le rendu) ;
+- le temps Python restant (total - base de données - rendu).
+
+Les mesures sont renvoyées dans l'en-tête Server-Timing (visible dans les outils
+de développement du navigateur), les requêtes plus lentes que
+REQUEST_PROFILING_SLOW_MS sont journalisées, et un échantillon
+(REQUEST_PROFILING_SAMPLE_RATE, requêtes lentes toujours incluses) est enregistré
+dans RequestProfile pour l'agrégation dans l'admin.
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, DatabaseError
+from django.template.backends.django import Template as DjangoTemplate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_MS = 500
+DEFAULT_EXCLUDED_PATHS = ('/static/', '/media/', '/favicon.ico')
+
+# Mesures de la requête en cours (None hors requête profilée)
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestTimer:
+    """Accumulateurs de la requête en cours"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper : compte et chronomètre chaque requête SQL"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+
+    def timings(self):
+        """Durées en millisecondes"""
+        total = (time.perf_counter() - self.start) * 1000
+        db = self.db_time * 1000
+        render = self.render_time * 1000
+        return {
+            'query_count': self.query_count,
+            'db_time_ms': round(db, 2),
+            'render_time_ms': round(render, 2),
+            'python_time_ms': round(max(total - db - render, 0), 2),
+            'total_time_ms': round(total, 2),
+        }
+
+
+def _timed_render(render):
+    """Chronomètre le rendu d'un template de premier niveau, hors temps SQL"""
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timer = _current.get()
+        if timer is None or timer.render_depth:
+            return render(self, *args, **kwargs)
+        timer.render_depth += 1
+        start, db_start = time.perf_counter(), timer.db_time
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timer.render_depth -= 1
+            timer.render_time += (time.perf_counter() - start) - (timer.db_time - db_start)
+    wrapper._profiled = True
+    return wrapper
+
+
+def _install_render_timer():
+    if not getattr(DjangoTemplate.render, '_profiled', False):
+        DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+
+def server_timing(timings):
+    """Valeur de l'en-tête Server-Timing"""
+    return ', '.join([
+        f'db;dur={timings["db_time_ms"]};desc="{timings["query_count"]} requêtes SQL"',
+        f'render;dur={timings["render_time_ms"]};desc="Rendu"',
+        f'app;dur={timings["python_time_ms"]};desc="Python"',
+        f'total;dur={timings["total_time_ms"]}',
+    ])
+
+
+class ProfilingMiddleware:
+    """Mesure le coût de chaque requête (à placer en tête de MIDDLEWARE)"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'REQUEST_PROFILING_SLOW_MS', DEFAULT_SLOW_MS)
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0)
+        self.excluded_paths = tuple(getattr(settings, 'REQUEST_PROFILING_EXCLUDED_PATHS', DEFAULT_EXCLUDED_PATHS))
+        _install_render_timer()
+
+    def __call__(self, request):
+        if request.path.startswith(self.excluded_paths):
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        timings = timer.timings()
+        response['Server-Timing'] = server_timing(timings)
+        self.record(request, response, timings)
+        return response
+
+    def record(self, request, response, timings):
+        """Journalise les requêtes lentes et enregistre un échantillon"""
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else '') or request.path
+        slow = timings['total_time_ms'] >= self.slow_ms
+        if slow:
+            logger.warning(
+                'Requête lente : %s %s (%s) %.0f ms, %d requêtes SQL (%.0f ms), rendu %.0f ms',
+                request.method, request.path, view_name, timings['total_time_ms'],
+                timings['query_count'], timings['db_time_ms'], timings['render_time_ms'],
+            )
+        if not slow and random.random() >= self.sample_rate:
+            return
+
+        from .models import RequestProfile
+        try:
+            RequestProfile.objects.create(
+                view_name=view_name[:200],
+                method=request.method,
+                path=request.path[:500],
+                status_code=response.status_code,
+                **timings
+            )
+        except DatabaseError:
+            # Le profilage ne doit jamais faire échouer la requête
+            logger.exception("Impossible d'enregistrer le profil de la requête %s", request.path)
@@ -0,0 +1,199 @@
+import io
+import os
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User, ASC
+from assets.models import Equipment
+from locations.models import Region, District, Site
+from tickets.models import RepairTicket
+from .admin import worst_endpoints
+from .benchmarks import run_scale, compare_reports, build_report, latest_dhis2_export
+from .jobs import track_job
+from .loadtest import LoadTest, select_users
+from .metrics import render_metrics
+from .models import RequestProfile, JobRun
+
+
+@override_settings(REQUEST_PROFILING_ENABLED=True, REQUEST_PROFILING_SLOW_MS=60000)
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        self.user = User.objects.create_user(
+            username='admin', password='testpass', role='ADMIN', is_staff=True, is_superuser=True
+        )
+        self.client.force_login(self.user)
+
+    def test_server_timing_and_profile(self):
+        """Test en-tête Server-Timing et enregistrement du profil de la vue"""
+        response = self.client.get(reverse('tickets:list'))
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('render;dur=', response['Server-Timing'])
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.view_name, 'tickets:list')
+        self.assertEqual(profile.status_code, 200)
+        self.assertGreater(profile.query_count, 0)
+        self.assertGreater(profile.render_time_ms, 0)
+        self.assertAlmostEqual(
+            profile.total_time_ms,
+            profile.db_time_ms + profile.render_time_ms + profile.python_time_ms,
+            delta=0.1
+        )
+
+    @override_settings(REQUEST_PROFILING_SLOW_MS=0, REQUEST_PROFILING_SAMPLE_RATE=0)
+    def test_slow_requests_logged_and_always_recorded(self):
+        """Test journalisation des requêtes lentes, enregistrées malgré l'échantillonnage"""
+        with self.assertLogs('monitoring.profiling', 'WARNING') as logs:
+            self.client.get(reverse('tickets:list'))
+
+        self.assertIn('Requête lente', logs.output[0])
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+    def test_worst_endpoints_admin(self):
+        """Test agrégation des vues les plus lentes dans l'admin"""
+        for total in (10, 30):
+            RequestProfile.objects.create(
+                view_name='tickets:list', method='GET', path='/tickets/', status_code=200, query_count=5,
+                db_time_ms=1, render_time_ms=1, python_time_ms=total - 2, total_time_ms=total
+            )
+
+        self.assertEqual(worst_endpoints(hours=1)[0]['avg_time'], 20)
+        response = self.client.get(reverse('admin:monitoring_requestprofile_worst'))
+        self.assertContains(response, 'tickets:list')
+
+        # Période hors des choix proposés : période par défaut
+        for hours in ['99999999999', '5', '-1']:
+            response = self.client.get(reverse('admin:monitoring_requestprofile_worst'), {'hours': hours})
+            self.assertEqual(response.context['hours'], 24, hours)
+
+
+class ProfilingDisabledTest(TestCase):
+    def test_no_header_when_disabled(self):
+        """Test middleware inactif par défaut"""
+        response = self.client.get(reverse('login'))
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.staff = User.objects.create_user(username='admin', password='testpass', role='ADMIN', is_staff=True)
+        asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=site)
+        for i, stage in enumerate(['SUPERVISOR', 'SUPERVISOR', 'REPAIRER']):
+            equipment = Equipment.objects.create(
+                equipment_type='PHONE', brand='Test Brand', model='Test Model', imei=f'12345678{i}', owner=asc
+            )
+            RepairTicket.objects.create(
+                equipment=equipment, asc=asc, created_by=self.staff, current_stage=stage,
+                initial_problem_description='Panne'
+            )
+        RepairTicket.objects.filter(current_stage='REPAIRER').update(
+            initial_send_date=timezone.now() - timedelta(days=20)
+        )
+        cache.clear()
+
+    def test_metrics_exposition(self):
+        """Test jauges en base, exécutions de tâches et durée des requêtes"""
+        with track_job('send_reminders') as run:
+            run.items_ok = 2
+        self.client.force_login(self.staff)
+        self.client.get(reverse('tickets:list'))
+
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('repair_tracker_tickets_backlog{stage="SUPERVISOR"} 2', body)
+        self.assertIn('repair_tracker_tickets_overdue 1', body)
+        self.assertIn('repair_tracker_job_runs_total{job="send_reminders",outcome="success"} 1', body)
+        self.assertIn('repair_tracker_job_items_total{job="send_reminders",outcome="ok"} 2', body)
+        self.assertIn(f'repair_tracker_http_request_duration_seconds_count{{view="tickets:list",method="GET",worker="{os.getpid()}"}}', body)
+
+    def test_gauges_are_cached(self):
+        """Test mise en cache des jauges calculées en base"""
+        render_metrics()
+        with self.assertNumQueries(0):
+            render_metrics()
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        """Test accès par jeton Bearer"""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_failed_job_recorded(self):
+        """Test enregistrement d'une exécution en erreur"""
+        with self.assertRaises(ValueError):
+            with track_job('dhis2_sync_ascs'):
+                raise ValueError('DHIS2 indisponible')
+
+        run = JobRun.objects.get()
+        self.assertFalse(run.success)
+        self.assertIn('DHIS2 indisponible', run.error)
+
+    def test_delay_alert_command_records_run(self):
+        """Test exécution de check_delay_alerts enregistrée"""
+        call_command('check_delay_alerts', stdout=io.StringIO())
+
+        self.assertTrue(JobRun.objects.get(name='check_delay_alerts').success)
+
+
+class BenchmarkSuiteTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        call_command(
+            'seed_scale', ascs=30, equipment=80, tickets=150, end_date=timezone.localdate().isoformat(),
+            stdout=io.StringIO()
+        )
+
+    def test_run_scale(self):
+        """Test mesures de chaque cas sans modifier la base"""
+        regions = Region.objects.count()
+        scale = run_scale('current', repeat=1, dhis2_export=latest_dhis2_export())
+
+        self.assertEqual(scale['volumes']['tickets'], RepairTicket.objects.count())
+        names = [result['name'] for result in scale['results']]
+        self.assertIn('ticket_list', names)
+        self.assertIn('dhis2 sync_ascs', names)
+        for result in scale['results']:
+            self.assertNotIn('error', result, result['name'])
+            self.assertIn(result['status'], (None, 200, 302), result['name'])
+            self.assertGreater(result['queries'], 0, result['name'])
+        # Synchronisation rejouée puis annulée
+        self.assertEqual(Region.objects.count(), regions)
+
+        report = build_report([scale], repeat=1, seed=42)
+        self.assertEqual(len(compare_reports(report, report)), len(scale['results']))
+
+
+class LoadTestHarnessTest(LiveServerTestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        call_command(
+            'seed_scale', ascs=30, equipment=80, tickets=150, end_date=timezone.localdate().isoformat(),
+            stdout=io.StringIO()
+        )
+
+    def test_sessions_against_live_server(self):
+        """Test connexion et sessions simulées, rapport par endpoint"""
+        users = select_users(['SUPERVISOR', 'PROGRAM'], 2)
+        report = LoadTest(self.live_server_url, users, 'pass123', duration=1, ramp_up=0, think=0).run()
+
+        self.assertGreater(report['requests'], 0)
+        self.assertEqual(report['endpoints']['login']['errors'], 0)
+        self.assertEqual(report['endpoints']['login']['requests'], 4)
+        self.assertGreater(report['endpoints']['ticket_list']['requests'], 0)
+        self.assertIn('p99', report['endpoints']['ticket_list']['latency_ms'])
+        self.assertIn('available', report['lock_waits'])
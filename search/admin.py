@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    """Index de recherche : consultation (maintenu automatiquement)"""
+    list_display = ['kind', 'object_id', 'title', 'subtitle', 'site', 'updated_at']
+    list_filter = ['kind']
+    search_fields = ['title', 'keywords']
+    list_select_related = ['site']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
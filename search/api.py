@@ -0,0 +1,32 @@
+from rest_framework import viewsets, serializers
+from rest_framework.pagination import PageNumberPagination
+from .models import SearchDocument
+from .query import search_documents
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(min_length=2, max_length=200)
+    kind = serializers.ChoiceField(choices=SearchDocument.KIND_CHOICES, required=False)
+
+
+class SearchDocumentSerializer(serializers.ModelSerializer):
+    url = serializers.CharField(source='get_absolute_url', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SearchDocument
+        fields = ['kind', 'object_id', 'title', 'subtitle', 'url', 'rank']
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """Recherche plein texte (tickets, ASCs, équipements), résultats classés et paginés"""
+
+    def list(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        kind = params.validated_data.get('kind')
+        documents = search_documents(params.validated_data['q'], request.user, kinds=[kind] if kind else None)
+
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(documents, request, view=self)
+        return paginator.get_paginated_response(SearchDocumentSerializer(page, many=True).data)
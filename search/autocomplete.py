@@ -0,0 +1,223 @@
+"""
+Autocomplétion en mémoire (utilisateurs, ASCs, sites, équipements)
+
+Chaque liste est chargée une fois par processus, à la première frappe, dans un
+index de préfixes compact : les mots normalisés (minuscules, sans accents,
+voir config/text.py) sont triés une fois pour toutes et
+chaque mot saisi est résolu par dichotomie dans cette liste. Une frappe ne
+touche pas la base de données, seulement le compteur de version en cache.
+
+Les signaux post_save / post_delete (search/signals.py) incrémentent la
+version de la liste concernée après validation de la transaction ; chaque
+processus la recharge à la frappe suivante. AUTOCOMPLETE_MAX_AGE borne l'âge
+d'une liste quand le cache n'est pas partagé entre processus (LocMemCache).
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from itertools import islice
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts.scoping import visible_site_ids
+from assets.search import normalize_identifier
+from config.text import normalize_text
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+AUTOCOMPLETE_MAX_AGE = 15 * 60
+
+# Préfixe présent dans plus d'une entrée sur BROAD_PREFIX_RATIO : parcours
+# séquentiel plutôt que réunion des listes de positions
+BROAD_PREFIX_RATIO = 20
+
+# Après tout caractère d'un mot normalisé : borne haute des mots d'un préfixe
+_PREFIX_END = '\uffff'
+
+
+class PrefixIndex:
+    """
+    Index de préfixes : entrées triées pour l'affichage et mots distincts triés,
+    chacun avec les positions des entrées qui le contiennent
+    """
+
+    def __init__(self, entries):
+        """entries : tuples (clé de tri, site_id, résultat, mots normalisés)"""
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.site_ids = [entry[1] for entry in entries]
+        self.results = [entry[2] for entry in entries]
+        self.entry_words = [entry[3] for entry in entries]
+
+        postings = {}
+        for position, words in enumerate(self.entry_words):
+            for word in words:
+                postings.setdefault(word, []).append(position)
+        self.terms = sorted(postings)
+        self.postings = [postings[term] for term in self.terms]
+
+    def __len__(self):
+        return len(self.results)
+
+    def lookup(self, query, site_ids=None, limit=DEFAULT_LIMIT):
+        """Entrées dont un mot commence par chacun des mots saisis, dans l'ordre de tri"""
+        typed = normalize_text(query).split()
+        if not typed:
+            return []
+
+        # Le mot saisi le plus sélectif fournit les candidats, les autres les filtrent
+        ranges = [
+            (bisect_left(self.terms, word), bisect_left(self.terms, word + _PREFIX_END), word)
+            for word in typed
+        ]
+        low, high, first = min(ranges, key=lambda item: item[1] - item[0])
+        others = [word for word in typed if word != first]
+
+        def matches(position):
+            if site_ids is not None and self.site_ids[position] not in site_ids:
+                return False
+            words = self.entry_words[position]
+            return all(any(word.startswith(prefix) for word in words) for prefix in others)
+
+        broad = len(self.results) // BROAD_PREFIX_RATIO
+        if high - low > broad or sum(map(len, self.postings[low:high])) > broad:
+            # Préfixe très courant (« 35 » pour les IMEI, une marque) : parcours des
+            # entrées dans l'ordre, arrêté dès que limit résultats sont trouvés
+            others.append(first)
+            found = islice(filter(matches, range(len(self.results))), limit)
+            return [self.results[position] for position in found]
+
+        candidates = set()
+        for postings in self.postings[low:high]:
+            candidates.update(postings)
+        # Positions croissantes = ordre de tri des entrées
+        return [self.results[position] for position in heapq.nsmallest(limit, filter(matches, candidates))]
+
+
+def _words(*values):
+    return tuple(sorted(set(normalize_text(*values).split())))
+
+
+def _user_entries():
+    User = apps.get_model('accounts', 'User')
+    roles = dict(User._meta.get_field('role').choices)
+    rows = User.objects.filter(is_active=True).values_list(
+        'pk', 'username', 'first_name', 'last_name', 'email', 'role', 'last_name_normalized', 'first_name_normalized'
+    )
+    for pk, username, first_name, last_name, email, role, *sort_key in rows:
+        name = f'{first_name} {last_name}'.strip() or username
+        yield (
+            (*sort_key, pk), None,
+            {'id': pk, 'text': f'{name} ({roles.get(role, role)})', 'email': email or ''},
+            _words(username, first_name, last_name, email),
+        )
+
+
+def _asc_entries():
+    ASC = apps.get_model('accounts', 'ASC')
+    rows = ASC.objects.values_list(
+        'pk', 'code', 'first_name', 'last_name', 'site_id', 'site__name', 'last_name_normalized', 'first_name_normalized'
+    )
+    for pk, code, first_name, last_name, site_id, site_name, *sort_key in rows:
+        text = f'{first_name} {last_name} ({code})' + (f' — {site_name}' if site_name else '')
+        yield (
+            (*sort_key, pk), site_id,
+            {'id': pk, 'text': text, 'code': code},
+            _words(code, first_name, last_name),
+        )
+
+
+def _site_entries():
+    Site = apps.get_model('locations', 'Site')
+    rows = Site.objects.values_list('pk', 'name', 'code', 'district__name', 'name_normalized')
+    for pk, name, code, district_name, name_normalized in rows:
+        yield (
+            (name_normalized, pk), pk,
+            {'id': pk, 'text': f'{name} ({district_name})' if district_name else name, 'code': code},
+            _words(name, code),
+        )
+
+
+def _equipment_entries():
+    Equipment = apps.get_model('assets', 'Equipment')
+    rows = Equipment.objects.values_list('pk', 'brand', 'model', 'imei', 'serial_number', 'owner__site_id')
+    for pk, brand, model, imei, serial_number, site_id in rows:
+        identifiers = [value for value in (imei, serial_number) if value]
+        yield (
+            (normalize_identifier(imei), pk), site_id,
+            {'id': pk, 'text': f'{brand} {model} — {imei}', 'imei': imei},
+            # IMEI / série bruts (découpés) et d'un seul tenant, comme search.indexing
+            _words(brand, model, *identifiers, *[normalize_identifier(value) for value in identifiers]),
+        )
+
+
+class Source:
+    """Liste d'autocomplétion : chargement paresseux, rechargée quand sa version change"""
+
+    def __init__(self, name, load):
+        self.name = name
+        self.load = load
+        self._index = None
+        self._version = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version_key(self):
+        return f'autocomplete-version:{self.name}'
+
+    def index(self):
+        """Index courant, rechargé si la version en cache a changé ou s'il est trop ancien"""
+        version = cache.get(self.version_key, 0)
+        index = self._index
+        if index is not None and version == self._version and time.monotonic() - self._loaded_at < AUTOCOMPLETE_MAX_AGE:
+            return index
+        with self._lock:
+            # Un autre thread a pu recharger entre-temps
+            if self._index is not index:
+                return self._index
+            self._index = PrefixIndex(self.load())
+            self._version = version
+            self._loaded_at = time.monotonic()
+            return self._index
+
+    def invalidate(self):
+        """Demande le rechargement (tous processus partageant le cache) après la transaction"""
+        def bump():
+            try:
+                cache.incr(self.version_key)
+            except ValueError:
+                cache.set(self.version_key, 1, None)
+        bump()
+        transaction.on_commit(bump)
+
+    def reset(self):
+        """Oublie l'index du processus courant (tests)"""
+        self._index = None
+
+
+SOURCES = {
+    'users': Source('users', _user_entries),
+    'ascs': Source('ascs', _asc_entries),
+    'sites': Source('sites', _site_entries),
+    'equipment': Source('equipment', _equipment_entries),
+}
+
+# Listes restreintes au périmètre des superviseurs (voir accounts/scoping.py)
+SCOPED_SOURCES = {'ascs', 'sites', 'equipment'}
+
+
+def autocomplete(name, query, user=None, limit=DEFAULT_LIMIT):
+    """Résultats d'autocomplétion de la liste name pour la saisie query"""
+    if len(normalize_text(query)) < MIN_QUERY_LENGTH:
+        return []
+    site_ids = visible_site_ids(user) if user is not None and name in SCOPED_SOURCES else None
+    return SOURCES[name].index().lookup(query, site_ids=site_ids, limit=max(1, min(limit, MAX_LIMIT)))
+
+
+def invalidate_autocomplete(*names):
+    for name in names:
+        SOURCES[name].invalidate()
@@ -0,0 +1,167 @@
+"""
+Construction et mise à jour de l'index de recherche plein texte
+
+Chaque ticket, ASC et équipement a un SearchDocument :
+- keywords : identifiants et noms (numéro de ticket, codes, noms, IMEI et
+  numéro de série, bruts et normalisés), pondérés plus fortement ;
+- content : description du problème, commentaires, marque / modèle, site.
+
+Le texte est normalisé (minuscules, sans accents ni ponctuation, voir
+config/text.py) avant stockage, comme les recherches : « Écran cassé » et
+« ecran casse » se rejoignent quel que soit le moteur. L'index (tsvector + GIN sous PostgreSQL,
+table FTS5 sous SQLite) est maintenu par la base à partir de ces colonnes.
+
+Les documents sont recalculés par lots (quelques requêtes par lot) : signaux
+post_save / post_delete (search/signals.py) pour les écritures unitaires,
+appels explicites après les écritures en masse (import, seed_scale), et
+rebuild_index() pour une reconstruction complète.
+"""
+from collections import defaultdict
+
+from django.apps import apps as global_apps
+
+from assets.search import normalize_identifier
+from config.text import normalize_text
+from .models import SearchDocument
+
+BATCH_SIZE = 2000
+
+DOCUMENT_FIELDS = ['title', 'subtitle', 'keywords', 'content', 'site_id']
+
+
+def _identifier_terms(*values):
+    """Identifiants bruts (découpés sur la ponctuation) et normalisés (d'un seul tenant)"""
+    terms = []
+    for value in values:
+        if value:
+            terms += [value, normalize_identifier(value)]
+    return terms
+
+
+def _ticket_documents(ids, apps):
+    RepairTicket = apps.get_model('tickets', 'RepairTicket')
+    TicketComment = apps.get_model('tickets', 'TicketComment')
+
+    comments = defaultdict(list)
+    for ticket_id, comment in TicketComment.objects.filter(ticket_id__in=ids).order_by('pk').values_list(
+        'ticket_id', 'comment'
+    ):
+        comments[ticket_id].append(comment)
+
+    rows = RepairTicket.objects.filter(pk__in=ids).values(
+        'pk', 'ticket_number', 'initial_problem_description',
+        'asc__code', 'asc__first_name', 'asc__last_name', 'asc__site_id', 'asc__site__name',
+        'equipment__imei', 'equipment__serial_number', 'equipment__brand', 'equipment__model',
+    )
+    for row in rows:
+        asc_name = f"{row['asc__first_name'] or ''} {row['asc__last_name'] or ''}".strip()
+        equipment = f"{row['equipment__brand']} {row['equipment__model']}"
+        yield row['pk'], {
+            'title': row['ticket_number'],
+            'subtitle': ' — '.join(part for part in [asc_name, equipment] if part.strip())[:255],
+            'keywords': normalize_text(
+                row['ticket_number'], row['asc__code'], asc_name,
+                *_identifier_terms(row['equipment__imei'], row['equipment__serial_number'])
+            ),
+            'content': normalize_text(
+                row['initial_problem_description'], *comments[row['pk']], equipment, row['asc__site__name']
+            ),
+            'site_id': row['asc__site_id'],
+        }
+
+
+def _asc_documents(ids, apps):
+    ASC = apps.get_model('accounts', 'ASC')
+    rows = ASC.objects.filter(pk__in=ids).values('pk', 'code', 'first_name', 'last_name', 'site_id', 'site__name')
+    for row in rows:
+        name = f"{row['first_name']} {row['last_name']}"
+        yield row['pk'], {
+            'title': name[:255],
+            'subtitle': ' — '.join(part for part in [row['code'], row['site__name']] if part)[:255],
+            'keywords': normalize_text(row['code'], name),
+            'content': normalize_text(row['site__name']),
+            'site_id': row['site_id'],
+        }
+
+
+def _equipment_documents(ids, apps):
+    Equipment = apps.get_model('assets', 'Equipment')
+    rows = Equipment.objects.filter(pk__in=ids).values(
+        'pk', 'brand', 'model', 'imei', 'serial_number',
+        'owner__code', 'owner__first_name', 'owner__last_name', 'owner__site_id', 'owner__site__name',
+    )
+    for row in rows:
+        owner = f"{row['owner__first_name'] or ''} {row['owner__last_name'] or ''}".strip()
+        yield row['pk'], {
+            'title': f"{row['brand']} {row['model']}"[:255],
+            'subtitle': row['imei'][:255],
+            'keywords': normalize_text(
+                *_identifier_terms(row['imei'], row['serial_number']), row['owner__code'], owner
+            ),
+            'content': normalize_text(row['brand'], row['model'], row['owner__site__name']),
+            'site_id': row['owner__site_id'],
+        }
+
+
+BUILDERS = {
+    SearchDocument.TICKET: _ticket_documents,
+    SearchDocument.ASC: _asc_documents,
+    SearchDocument.EQUIPMENT: _equipment_documents,
+}
+
+
+def index_objects(kind, *ids, apps=global_apps):
+    """Recalcule les documents des objets donnés ; supprime ceux des objets disparus"""
+    ids = sorted({pk for pk in ids if pk is not None})
+    Document = apps.get_model('search', 'SearchDocument')
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        documents = [
+            Document(kind=kind, object_id=pk, **fields)
+            for pk, fields in BUILDERS[kind](batch, apps)
+        ]
+        found = {document.object_id for document in documents}
+        missing = [pk for pk in batch if pk not in found]
+        if missing:
+            Document.objects.filter(kind=kind, object_id__in=missing).delete()
+        # Insertion ou mise à jour en une requête (l'index suit par trigger / colonne générée)
+        Document.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=['kind', 'object_id'],
+            update_fields=DOCUMENT_FIELDS + ['updated_at']
+        )
+
+
+def index_tickets(*ids):
+    index_objects(SearchDocument.TICKET, *ids)
+
+
+def index_ascs(*ids):
+    index_objects(SearchDocument.ASC, *ids)
+
+
+def index_equipment(*ids):
+    index_objects(SearchDocument.EQUIPMENT, *ids)
+
+
+def remove_documents(kind, *ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=ids).delete()
+
+
+SOURCE_MODELS = {
+    SearchDocument.TICKET: ('tickets', 'RepairTicket'),
+    SearchDocument.ASC: ('accounts', 'ASC'),
+    SearchDocument.EQUIPMENT: ('assets', 'Equipment'),
+}
+
+
+def rebuild_index(kinds=None, apps=global_apps):
+    """Reconstruit l'index (tous les types par défaut) ; retourne le nombre de documents par type"""
+    Document = apps.get_model('search', 'SearchDocument')
+    counts = {}
+    for kind in kinds or BUILDERS:
+        model = apps.get_model(*SOURCE_MODELS[kind])
+        ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        Document.objects.filter(kind=kind).exclude(object_id__in=model.objects.values('pk')).delete()
+        index_objects(kind, *ids, apps=apps)
+        counts[kind] = len(ids)
+    return counts
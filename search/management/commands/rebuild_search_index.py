@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour reconstruire l'index de recherche plein texte (après une
+restauration de base ou des écritures directes en SQL, par exemple).
+"""
+from django.core.management.base import BaseCommand
+
+from search.indexing import rebuild_index
+from search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche (tickets, ASCs, équipements)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            choices=[kind for kind, _ in SearchDocument.KIND_CHOICES],
+            help='Type à reconstruire (répétable ; tous par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        counts = rebuild_index(options['kind'])
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'✓ Index de recherche reconstruit : {summary}'))
@@ -0,0 +1,197 @@
+# Generated by Django 5.0.14 on 2026-10-19 17:20
+
+import re
+import unicodedata
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction, DatabaseError
+
+TABLE = 'search_searchdocument'
+FTS_TABLE = 'search_fts'
+BATCH_SIZE = 2000
+
+# Copie figée de config.text.normalize_text et assets.search.normalize_identifier
+# à la date de la migration : le code applicatif peut évoluer sans la modifier
+_NON_ALNUM_LOWER = re.compile(r'[^0-9a-z]+')
+_NON_ALNUM_UPPER = re.compile(r'[^0-9A-Z]')
+
+
+def create_fulltext_index(apps, schema_editor):
+    """Index plein texte : tsvector généré + GIN (PostgreSQL) ou table FTS5 + triggers (SQLite)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('simple', keywords), 'A') || "
+            f"setweight(to_tsvector('simple', content), 'B')) STORED"
+        )
+        schema_editor.execute(f'CREATE INDEX search_document_vector_gin ON {TABLE} USING gin (search_vector)')
+    elif vendor == 'sqlite':
+        try:
+            # FTS5 peut manquer dans certaines compilations de SQLite : recherche par LIKE à défaut
+            with transaction.atomic(using=schema_editor.connection.alias):
+                schema_editor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"keywords, content, content='{TABLE}', content_rowid='id')"
+                )
+        except DatabaseError:
+            return
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, keywords, content) VALUES (new.id, new.keywords, new.content); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, keywords, content) "
+            f"VALUES ('delete', old.id, old.keywords, old.content); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, keywords, content) "
+            f"VALUES ('delete', old.id, old.keywords, old.content); "
+            f"INSERT INTO {FTS_TABLE}(rowid, keywords, content) VALUES (new.id, new.keywords, new.content); END"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS search_document_vector_gin')
+        schema_editor.execute(f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector')
+    elif vendor == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def _normalize_text(*values):
+    text = ' '.join(str(value) for value in values if value).casefold()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALNUM_LOWER.sub(' ', text).strip()
+
+
+def _identifier_terms(*values):
+    terms = []
+    for value in values:
+        if value:
+            terms += [value, _NON_ALNUM_UPPER.sub('', value.upper())]
+    return terms
+
+
+def _ticket_documents(apps):
+    RepairTicket = apps.get_model('tickets', 'RepairTicket')
+    TicketComment = apps.get_model('tickets', 'TicketComment')
+
+    comments = defaultdict(list)
+    for ticket_id, comment in TicketComment.objects.order_by('pk').values_list('ticket_id', 'comment'):
+        comments[ticket_id].append(comment)
+
+    rows = RepairTicket.objects.order_by('pk').values(
+        'pk', 'ticket_number', 'initial_problem_description',
+        'asc__code', 'asc__first_name', 'asc__last_name', 'asc__site_id', 'asc__site__name',
+        'equipment__imei', 'equipment__serial_number', 'equipment__brand', 'equipment__model',
+    )
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        asc_name = f"{row['asc__first_name'] or ''} {row['asc__last_name'] or ''}".strip()
+        equipment = f"{row['equipment__brand']} {row['equipment__model']}"
+        yield 'ticket', row['pk'], {
+            'title': row['ticket_number'],
+            'subtitle': ' — '.join(part for part in [asc_name, equipment] if part.strip())[:255],
+            'keywords': _normalize_text(
+                row['ticket_number'], row['asc__code'], asc_name,
+                *_identifier_terms(row['equipment__imei'], row['equipment__serial_number'])
+            ),
+            'content': _normalize_text(
+                row['initial_problem_description'], *comments[row['pk']], equipment, row['asc__site__name']
+            ),
+            'site_id': row['asc__site_id'],
+        }
+
+
+def _asc_documents(apps):
+    ASC = apps.get_model('accounts', 'ASC')
+    rows = ASC.objects.order_by('pk').values('pk', 'code', 'first_name', 'last_name', 'site_id', 'site__name')
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        name = f"{row['first_name']} {row['last_name']}"
+        yield 'asc', row['pk'], {
+            'title': name[:255],
+            'subtitle': ' — '.join(part for part in [row['code'], row['site__name']] if part)[:255],
+            'keywords': _normalize_text(row['code'], name),
+            'content': _normalize_text(row['site__name']),
+            'site_id': row['site_id'],
+        }
+
+
+def _equipment_documents(apps):
+    Equipment = apps.get_model('assets', 'Equipment')
+    rows = Equipment.objects.order_by('pk').values(
+        'pk', 'brand', 'model', 'imei', 'serial_number',
+        'owner__code', 'owner__first_name', 'owner__last_name', 'owner__site_id', 'owner__site__name',
+    )
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        owner = f"{row['owner__first_name'] or ''} {row['owner__last_name'] or ''}".strip()
+        yield 'equipment', row['pk'], {
+            'title': f"{row['brand']} {row['model']}"[:255],
+            'subtitle': row['imei'][:255],
+            'keywords': _normalize_text(
+                *_identifier_terms(row['imei'], row['serial_number']), row['owner__code'], owner
+            ),
+            'content': _normalize_text(row['brand'], row['model'], row['owner__site__name']),
+            'site_id': row['owner__site_id'],
+        }
+
+
+def build_documents(apps, schema_editor):
+    """Documents initiaux des tickets, ASCs et équipements existants (table vide)"""
+    Document = apps.get_model('search', 'SearchDocument')
+    for builder in (_ticket_documents, _asc_documents, _equipment_documents):
+        batch = []
+        for kind, object_id, fields in builder(apps):
+            batch.append(Document(kind=kind, object_id=object_id, **fields))
+            if len(batch) >= BATCH_SIZE:
+                Document.objects.bulk_create(batch)
+                batch = []
+        Document.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('locations', '0001_initial'),
+        ('accounts', '0001_initial'),
+        ('assets', '0004_equipment_reliability'),
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ticket', 'Ticket'), ('asc', 'ASC'), ('equipment', 'Équipement')], max_length=20, verbose_name='Type')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Identifiant')),
+                ('title', models.CharField(max_length=255, verbose_name='Titre')),
+                ('subtitle', models.CharField(blank=True, max_length=255, verbose_name='Sous-titre')),
+                ('keywords', models.TextField(blank=True, verbose_name='Mots-clés')),
+                ('content', models.TextField(blank=True, verbose_name='Contenu')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('site', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='locations.site', verbose_name='Site')),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'indexes': [models.Index(fields=['kind', 'site'], name='search_document_kind_site')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_unique_object'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+from django.db import models
+from django.urls import reverse
+
+
+class SearchDocument(models.Model):
+    """
+    Document de l'index plein texte : un ticket, un ASC ou un équipement
+    (voir search/indexing.py). keywords et content contiennent le texte
+    normalisé ; l'index lui-même (tsvector / FTS5) est créé par la migration.
+    """
+    TICKET = 'ticket'
+    ASC = 'asc'
+    EQUIPMENT = 'equipment'
+    KIND_CHOICES = [
+        (TICKET, 'Ticket'),
+        (ASC, 'ASC'),
+        (EQUIPMENT, 'Équipement'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Type")
+    object_id = models.PositiveBigIntegerField(verbose_name="Identifiant")
+    title = models.CharField(max_length=255, verbose_name="Titre")
+    subtitle = models.CharField(max_length=255, blank=True, verbose_name="Sous-titre")
+    keywords = models.TextField(blank=True, verbose_name="Mots-clés")
+    content = models.TextField(blank=True, verbose_name="Contenu")
+    # Site de rattachement (périmètre des superviseurs)
+    site = models.ForeignKey(
+        'locations.Site',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Site"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Document de recherche"
+        verbose_name_plural = "Documents de recherche"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique_object'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'site'], name='search_document_kind_site'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.title}"
+
+    def get_absolute_url(self):
+        url_names = {
+            self.TICKET: 'tickets:detail',
+            self.ASC: 'accounts:asc_detail',
+            self.EQUIPMENT: 'assets:detail',
+        }
+        return reverse(url_names[self.kind], args=[self.object_id])
@@ -0,0 +1,136 @@
+"""
+Recherche plein texte dans l'index (voir search/indexing.py)
+
+La saisie est normalisée comme les documents puis découpée en mots ; chaque
+mot est cherché comme préfixe (« ecr » trouve « écran ») et tous doivent être
+présents. Les résultats sont triés par pertinence, les mots-clés (numéros,
+codes, noms, IMEI) pesant plus que le contenu.
+
+- PostgreSQL : colonne tsvector générée (search_vector) et index GIN,
+  to_tsquery('simple', 'mot:* & ...'), tri par ts_rank ;
+- SQLite : table FTS5 search_fts (contenu externe maintenu par triggers),
+  MATCH '"mot"* ...', tri par bm25 ;
+- autre base ou SQLite sans FTS5 : LIKE sur les colonnes normalisées (sans tri).
+
+Les fonctions retournent des querysets : pagination et filtres Django
+s'appliquent normalement.
+"""
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from accounts.scoping import visible_site_ids
+from config.text import normalize_text
+from .models import SearchDocument
+
+MIN_QUERY_LENGTH = 2
+FTS_TABLE = 'search_fts'
+
+_fts_tables = {}
+
+
+def query_terms(query):
+    """
+    Termes de la recherche, normalisés comme les documents. Un mot contenant de
+    la ponctuation (« 35-6938-03 », « TKT-2024-0042 ») donne deux variantes :
+    la suite de mots consécutifs et l'identifiant d'un seul tenant.
+    """
+    terms = []
+    for token in query.split():
+        words = normalize_text(token).split()
+        if words:
+            terms.append([' '.join(words)] + ([''.join(words)] if len(words) > 1 else []))
+    return terms
+
+
+def fulltext_backend():
+    """Moteur plein texte de la base courante : 'postgresql', 'fts5' ou None (LIKE)"""
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        # Table FTS5 créée par la migration si l'extension est disponible
+        key = connection.settings_dict['NAME']
+        if key not in _fts_tables:
+            _fts_tables[key] = FTS_TABLE in connection.introspection.table_names()
+        if _fts_tables[key]:
+            return 'fts5'
+    return None
+
+
+def match_documents(terms, queryset=None, ranked=True):
+    """
+    Documents contenant tous les termes (préfixes, voir query_terms) ; avec
+    ranked, annotés d'un score rank (plus grand = meilleur)
+    """
+    if queryset is None:
+        queryset = SearchDocument.objects.all()
+    backend = fulltext_backend()
+    table = SearchDocument._meta.db_table
+
+    if backend == 'postgresql':
+        # Mots consécutifs (<->), préfixe sur le dernier ; variantes en OU, termes en ET
+        tsquery = ' & '.join(
+            '(' + ' | '.join(' <-> '.join(variant.split()) + ':*' for variant in variants) + ')'
+            for variants in terms
+        )
+        queryset = queryset.filter(
+            RawSQL(f'"{table}"."search_vector" @@ to_tsquery(\'simple\', %s)', [tsquery], output_field=BooleanField())
+        )
+        return queryset if not ranked else queryset.annotate(
+            rank=RawSQL(f'ts_rank("{table}"."search_vector", to_tsquery(\'simple\', %s))', [tsquery],
+                        output_field=FloatField())
+        )
+
+    if backend == 'fts5':
+        # Phrase "mot mot"* : mots consécutifs, préfixe sur le dernier
+        match = ' AND '.join(
+            '(' + ' OR '.join(f'"{variant}"*' for variant in variants) + ')' for variants in terms
+        )
+        if not ranked:
+            return queryset.filter(
+                pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+            )
+        # Jointure avec la table FTS5 : bm25 n'est calculé qu'une fois par document
+        # (plus petit = plus pertinent ; mots-clés 10 fois plus importants que le contenu)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = "{table}"."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'rank': f'-bm25({FTS_TABLE}, 10.0, 1.0)'},
+        )
+
+    condition = Q()
+    for variants in terms:
+        term_condition = Q()
+        for variant in variants:
+            term_condition |= Q(keywords__contains=variant) | Q(content__contains=variant)
+        condition &= term_condition
+    queryset = queryset.filter(condition)
+    return queryset if not ranked else queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def search_documents(query, user=None, kinds=None, ranked=True):
+    """
+    Documents correspondant à la saisie, dans le périmètre de l'utilisateur ;
+    avec ranked, triés par pertinence
+    """
+    if len(normalize_text(query)) < MIN_QUERY_LENGTH:
+        return SearchDocument.objects.none()
+
+    queryset = SearchDocument.objects.all()
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if user is not None:
+        site_ids = visible_site_ids(user)
+        if site_ids is not None:
+            queryset = queryset.filter(site_id__in=site_ids)
+    documents = match_documents(query_terms(query), queryset, ranked=ranked)
+    return documents.order_by('-rank', 'kind', 'object_id') if ranked else documents
+
+
+def matching_ids(query, kind):
+    """Identifiants des objets d'un type correspondant à la saisie (sous-requête pour pk__in)"""
+    if len(normalize_text(query)) < MIN_QUERY_LENGTH:
+        return SearchDocument.objects.none().values('object_id')
+    documents = SearchDocument.objects.filter(kind=kind)
+    return match_documents(query_terms(query), documents, ranked=False).values('object_id')
@@ -0,0 +1,122 @@
+"""
+Mise à jour de l'index de recherche (voir search/indexing.py) et des listes
+d'autocomplétion (voir search/autocomplete.py)
+
+Un document reprend des champs d'autres objets (nom de l'ASC et IMEI dans les
+tickets, nom du site partout) : la modification d'un ASC, d'un équipement ou
+d'un site recalcule aussi les documents qui en dépendent. Les sauvegardes
+limitées à des champs non indexés (update_fields : statut, étape...) sont
+ignorées.
+
+Les écritures en masse (bulk_create, update) ne déclenchent pas ces signaux :
+elles appellent index_tickets() / index_objects() et invalidate_autocomplete()
+explicitement.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import ASC, User
+from assets.models import Equipment
+from locations.models import Site
+from tickets.models import RepairTicket, TicketComment
+from .autocomplete import invalidate_autocomplete
+from .indexing import index_ascs, index_equipment, index_tickets, remove_documents
+from .models import SearchDocument
+
+TICKET_FIELDS = {'ticket_number', 'initial_problem_description', 'asc', 'equipment'}
+ASC_FIELDS = {'code', 'first_name', 'last_name', 'site'}
+EQUIPMENT_FIELDS = {'brand', 'model', 'imei', 'serial_number', 'owner'}
+USER_FIELDS = {'username', 'first_name', 'last_name', 'email', 'role', 'is_active'}
+SITE_FIELDS = {'name', 'code', 'district'}
+
+
+def _indexed_fields_changed(update_fields, fields):
+    return update_fields is None or bool(set(update_fields) & fields)
+
+
+@receiver(post_save, sender=RepairTicket)
+def index_ticket(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_changed(update_fields, TICKET_FIELDS):
+        index_tickets(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=TicketComment)
+def index_ticket_comments(sender, instance, **kwargs):
+    index_tickets(instance.ticket_id)
+
+
+@receiver(post_save, sender=ASC)
+def index_asc(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_changed(update_fields, ASC_FIELDS):
+        index_ascs(instance.pk)
+        index_equipment(*instance.equipments.values_list('pk', flat=True))
+        index_tickets(*RepairTicket.objects.filter(asc=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Equipment)
+def index_equipment_document(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_changed(update_fields, EQUIPMENT_FIELDS):
+        index_equipment(instance.pk)
+        index_tickets(*instance.repair_tickets.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Site)
+def index_site_documents(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _indexed_fields_changed(update_fields, {'name'}):
+        index_ascs(*ASC.objects.filter(site=instance).values_list('pk', flat=True))
+        index_equipment(*Equipment.objects.filter(owner__site=instance).values_list('pk', flat=True))
+        index_tickets(*RepairTicket.objects.filter(asc__site=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=RepairTicket)
+def remove_ticket_document(sender, instance, **kwargs):
+    remove_documents(SearchDocument.TICKET, instance.pk)
+
+
+@receiver(post_delete, sender=ASC)
+def remove_asc_document(sender, instance, **kwargs):
+    remove_documents(SearchDocument.ASC, instance.pk)
+
+
+@receiver(post_delete, sender=Equipment)
+def remove_equipment_document(sender, instance, **kwargs):
+    remove_documents(SearchDocument.EQUIPMENT, instance.pk)
+
+
+# Listes d'autocomplétion (search/autocomplete.py) : rechargées à la frappe suivante
+
+AUTOCOMPLETE_SOURCES = {User: 'users', ASC: 'ascs', Site: 'sites', Equipment: 'equipment'}
+
+
+@receiver(post_save, sender=User)
+def refresh_user_autocomplete(sender, instance, update_fields=None, **kwargs):
+    # La connexion enregistre last_login seul : pas de rechargement
+    if _indexed_fields_changed(update_fields, USER_FIELDS):
+        invalidate_autocomplete('users')
+
+
+@receiver(post_save, sender=ASC)
+def refresh_asc_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_changed(update_fields, ASC_FIELDS):
+        invalidate_autocomplete('ascs')
+
+
+@receiver(post_save, sender=Equipment)
+def refresh_equipment_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_changed(update_fields, EQUIPMENT_FIELDS):
+        invalidate_autocomplete('equipment')
+
+
+@receiver(post_save, sender=Site)
+def refresh_site_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_changed(update_fields, SITE_FIELDS):
+        # Le nom du site figure aussi dans les libellés des ASCs
+        invalidate_autocomplete('sites', 'ascs')
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ASC)
+@receiver(post_delete, sender=Site)
+@receiver(post_delete, sender=Equipment)
+def refresh_autocomplete_on_delete(sender, instance, **kwargs):
+    invalidate_autocomplete(AUTOCOMPLETE_SOURCES[sender])
@@ -0,0 +1,279 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from accounts.models import User, ASC
+from assets.models import Equipment
+from locations.models import Region, District, Site
+from config.text import normalize_text
+from tickets.models import RepairTicket, TicketComment
+from .autocomplete import SOURCES, PrefixIndex, autocomplete
+from .indexing import rebuild_index
+from .models import SearchDocument
+from .query import search_documents
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        self.site = Site.objects.create(district=district, name='Kara Nord', code='KN')
+        self.other_site = Site.objects.create(district=district, name='Sokodé', code='SK')
+
+        self.admin = User.objects.create_user(username='admin', password='testpass', role='ADMIN')
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor', password='testpass', role='SUPERVISOR', site=self.site
+        )
+
+        self.asc = ASC.objects.create(
+            first_name='Akouvi', last_name='Mensah', code='ASC-KN-001', phone='97000000',
+            site=self.site, supervisor=self.supervisor
+        )
+        self.other_asc = ASC.objects.create(
+            first_name='Kodjo', last_name='Amégan', code='ASC-SK-001', phone='97000001',
+            site=self.other_site
+        )
+        self.equipment = Equipment.objects.create(
+            equipment_type='PHONE', brand='Tecno', model='Spark 8',
+            imei='356938035643809', owner=self.asc, status='FAULTY'
+        )
+        self.other_equipment = Equipment.objects.create(
+            equipment_type='PHONE', brand='Itel', model='A70',
+            imei='351756051523999', owner=self.other_asc, status='FAULTY'
+        )
+        self.ticket = RepairTicket.objects.create(
+            equipment=self.equipment, asc=self.asc, created_by=self.supervisor,
+            initial_problem_description='Écran cassé après une chute'
+        )
+        self.other_ticket = RepairTicket.objects.create(
+            equipment=self.other_equipment, asc=self.other_asc, created_by=self.admin,
+            initial_problem_description='Batterie qui ne charge plus'
+        )
+
+    def search(self, query, user=None, **kwargs):
+        return [(document.kind, document.object_id) for document in search_documents(query, user, **kwargs)]
+
+    def test_normalize_text(self):
+        """Test normalisation : minuscules, sans accents ni ponctuation"""
+        self.assertEqual(normalize_text('Écran  cassé !', 'ASC-KN-001'), 'ecran casse asc kn 001')
+
+    def test_accents_and_prefixes(self):
+        """Test recherche insensible aux accents, par préfixes de mots"""
+        self.assertEqual(self.search('ecran cass'), [('ticket', self.ticket.pk)])
+        self.assertEqual(self.search('BATTERIE'), [('ticket', self.other_ticket.pk)])
+        self.assertEqual(self.search('ecran batterie'), [])
+
+    def test_identifiers(self):
+        """Test recherche par numéro de ticket, code d'ASC et IMEI (partiel ou avec séparateurs)"""
+        self.assertIn(('ticket', self.ticket.pk), self.search(self.ticket.ticket_number))
+        self.assertIn(('asc', self.asc.pk), self.search('ASC-KN-001'))
+        self.assertIn(('equipment', self.equipment.pk), self.search('35693803'))
+        self.assertIn(('equipment', self.equipment.pk), self.search('35-693803-564380-9'))
+        self.assertNotIn(('equipment', self.other_equipment.pk), self.search('35693803'))
+
+    def test_ranking_prefers_keywords(self):
+        """Test que les mots-clés (noms) pèsent plus que le contenu (site)"""
+        kara_asc = ASC.objects.create(
+            first_name='Kara', last_name='Dzifa', code='ASC-SK-002', phone='97000002', site=self.other_site
+        )
+        results = self.search('kara', kinds=[SearchDocument.ASC])
+        self.assertEqual(results[0], ('asc', kara_asc.pk))
+        self.assertIn(('asc', self.asc.pk), results)
+
+    def test_like_fallback(self):
+        """Test recherche sans moteur plein texte (LIKE sur les colonnes normalisées)"""
+        with mock.patch('search.query.fulltext_backend', return_value=None):
+            self.assertEqual(self.search('ecran cass'), [('ticket', self.ticket.pk)])
+            self.assertIn(('equipment', self.equipment.pk), self.search('35-693803'))
+
+    def test_supervisor_scope(self):
+        """Test que le superviseur ne trouve que les objets de ses sites"""
+        self.assertEqual(self.search('batterie', self.supervisor), [])
+        self.assertEqual(self.search('ecran', self.supervisor), [('ticket', self.ticket.pk)])
+        self.assertEqual(len(self.search('asc', self.admin, kinds=[SearchDocument.ASC])), 2)
+
+    def test_signals_keep_index_current(self):
+        """Test mise à jour de l'index : commentaire, changement d'ASC, suppression"""
+        TicketComment.objects.create(ticket=self.ticket, user=self.supervisor, comment='Vitre fissurée')
+        self.assertEqual(self.search('fissuree'), [('ticket', self.ticket.pk)])
+
+        self.asc.last_name = 'Agbeko'
+        self.asc.save()
+        self.assertIn(('ticket', self.ticket.pk), self.search('agbeko'))
+        self.assertEqual(self.search('mensah'), [])
+
+        self.other_ticket.delete()
+        self.assertEqual(self.search('batterie'), [])
+
+    def test_rebuild_index(self):
+        """Test reconstruction complète de l'index"""
+        SearchDocument.objects.all().delete()
+        self.assertEqual(rebuild_index(), {'ticket': 2, 'asc': 2, 'equipment': 2})
+        self.assertCountEqual(self.search('spark'), [('ticket', self.ticket.pk), ('equipment', self.equipment.pk)])
+        call_command('rebuild_search_index', '--kind', 'asc', stdout=io.StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 6)
+
+    def test_search_page(self):
+        """Test page de résultats : compteurs par type et filtre"""
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('search:results'), {'q': 'tecno'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_count'], 2)
+        self.assertContains(response, reverse('tickets:detail', args=[self.ticket.pk]))
+        self.assertContains(response, reverse('assets:detail', args=[self.equipment.pk]))
+
+        response = self.client.get(reverse('search:results'), {'q': 'tecno', 'kind': 'equipment'})
+        self.assertEqual([document.object_id for document in response.context['documents']], [self.equipment.pk])
+
+        response = self.client.get(reverse('search:results'), {'q': 'e'})
+        self.assertTrue(response.context['too_short'])
+
+    def test_list_searches(self):
+        """Test recherche des listes de tickets et d'ASCs via l'index"""
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('tickets:list'), {'search': 'chute'})
+        self.assertContains(response, self.ticket.ticket_number)
+        self.assertNotContains(response, self.other_ticket.ticket_number)
+
+        response = self.client.get(reverse('accounts:asc_list'), {'search': 'amegan'})
+        self.assertContains(response, 'ASC-SK-001')
+        self.assertNotContains(response, 'ASC-KN-001')
+
+        # Fragment du milieu d'un code, hors préfixes de mots de l'index
+        response = self.client.get(reverse('accounts:asc_list'), {'search': 'K-00'})
+        self.assertEqual([asc.code for asc in response.context['ascs']], ['ASC-SK-001'])
+
+    def test_ticket_list_partial_number(self):
+        """Test numéro de ticket partiel ou d'un caractère, hors préfixes de mots de l'index"""
+        RepairTicket.objects.filter(pk=self.ticket.pk).update(ticket_number='TKT-20260101-AB12CD')
+        RepairTicket.objects.filter(pk=self.other_ticket.pk).update(ticket_number='TKT-20260101-ZZ99YY')
+        self.client.force_login(self.admin)
+        for search, ticket in [('12c', self.ticket), ('Z', self.other_ticket), ('0101-ab', self.ticket)]:
+            tickets = self.client.get(reverse('tickets:list'), {'search': search}).context['tickets']
+            self.assertEqual(list(tickets), [ticket], search)
+
+    def test_api(self):
+        """Test API de recherche"""
+        self.client.force_login(self.supervisor)
+        response = self.client.get('/api/search/', {'q': 'tecno'})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertCountEqual(
+            [result['url'] for result in data['results']],
+            [reverse('tickets:detail', args=[self.ticket.pk]), reverse('assets:detail', args=[self.equipment.pk])]
+        )
+
+        response = self.client.get('/api/search/', {'q': 'itel'})
+        self.assertEqual(response.json()['count'], 0)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'e'}).status_code, 400)
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        cache.clear()
+        for source in SOURCES.values():
+            source.reset()
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        self.site = Site.objects.create(district=district, name='Kara Nord', code='KN')
+        self.other_site = Site.objects.create(district=district, name='Kpalimé', code='KP')
+
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor', password='testpass', role='SUPERVISOR', site=self.site,
+            first_name='Élodie', last_name='Kossi', email='elodie.kossi@example.org'
+        )
+        self.asc = ASC.objects.create(
+            first_name='Akouvi', last_name='Mensah', code='ASC-KN-001', phone='97000000', site=self.site
+        )
+        self.other_asc = ASC.objects.create(
+            first_name='Akossiwa', last_name='Amégan', code='ASC-KP-001', phone='97000001', site=self.other_site
+        )
+        self.equipment = Equipment.objects.create(
+            equipment_type='PHONE', brand='Tecno', model='Spark 8',
+            imei='356938035643809', owner=self.asc, status='FUNCTIONAL'
+        )
+
+    def ids(self, source, query, user=None):
+        return [result['id'] for result in autocomplete(source, query, user)]
+
+    def test_prefix_index(self):
+        """Test index de préfixes : tous les mots saisis, ordre de tri, limite"""
+        index = PrefixIndex([
+            (('b',), None, 'Bernard Ama', ('ama', 'bernard')),
+            (('a',), None, 'Amaël Koffi', ('amael', 'koffi')),
+            (('c',), None, 'Koffi Ama', ('ama', 'koffi')),
+        ])
+        # Réunion des listes de positions (1) et parcours séquentiel des préfixes courants (20)
+        for ratio in (1, 20):
+            with mock.patch('search.autocomplete.BROAD_PREFIX_RATIO', ratio):
+                self.assertEqual(index.lookup('am'), ['Amaël Koffi', 'Bernard Ama', 'Koffi Ama'])
+                self.assertEqual(index.lookup('am', limit=1), ['Amaël Koffi'])
+                self.assertEqual(index.lookup('ko am'), ['Amaël Koffi', 'Koffi Ama'])
+                self.assertEqual(index.lookup('zz'), [])
+
+    def test_accent_insensitive(self):
+        """Test autocomplétion insensible aux accents et à la casse"""
+        self.assertEqual(self.ids('users', 'elo'), [self.supervisor.pk])
+        self.assertEqual(self.ids('users', 'ÉLODIE ko'), [self.supervisor.pk])
+        self.assertEqual(self.ids('ascs', 'akoss ameg'), [self.other_asc.pk])
+        self.assertEqual(self.ids('sites', 'kpali'), [self.other_site.pk])
+        self.assertEqual(self.ids('equipment', '35693803'), [self.equipment.pk])
+        self.assertEqual(self.ids('ascs', 'a'), [])
+
+    def test_no_query_per_keystroke(self):
+        """Test que seules la première frappe et celle après une modification lisent la base"""
+        self.ids('ascs', 'ak')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.ids('ascs', 'ako'), [self.other_asc.pk, self.asc.pk])
+
+        self.asc.last_name = 'Agbeko'
+        self.asc.save()
+        self.assertEqual(self.ids('ascs', 'agb'), [self.asc.pk])
+        with self.assertNumQueries(0):
+            self.ids('ascs', 'mensah')
+
+        # Sauvegarde de champs non indexés : pas de rechargement
+        self.equipment.status = 'FAULTY'
+        self.equipment.save(update_fields=['status'])
+        self.ids('equipment', 'tecno')
+        self.supervisor.save(update_fields=['last_login'])
+        self.ids('users', 'elo')
+        with self.assertNumQueries(0):
+            self.ids('equipment', 'tecno')
+            self.ids('users', 'elo')
+
+    def test_supervisor_scope(self):
+        """Test que le superviseur ne voit que les ASCs, sites et équipements de ses sites"""
+        self.assertEqual(self.ids('ascs', 'ako', self.supervisor), [self.asc.pk])
+        self.assertEqual(self.ids('sites', 'k', self.supervisor), [])
+        self.assertEqual(self.ids('sites', 'kara', self.supervisor), [self.site.pk])
+        self.assertEqual(self.ids('sites', 'kpa', self.supervisor), [])
+
+    def test_endpoints(self):
+        """Test endpoints d'autocomplétion (format Select2)"""
+        self.client.force_login(self.supervisor)
+        response = self.client.get(reverse('search:autocomplete', args=['ascs']), {'q': 'akouvi'})
+        self.assertEqual(response.json()['results'], [
+            {'id': self.asc.pk, 'text': 'Akouvi Mensah (ASC-KN-001) — Kara Nord', 'code': 'ASC-KN-001'}
+        ])
+        response = self.client.get(reverse('search:autocomplete', args=['unknown']), {'q': 'ak'})
+        self.assertEqual(response.status_code, 404)
+
+        # Limite ramenée entre 1 et MAX_LIMIT
+        for limit in ['-1', '0', '1']:
+            response = self.client.get(reverse('search:autocomplete', args=['ascs']), {'q': 'ak', 'limit': limit})
+            self.assertEqual(response.status_code, 200, limit)
+            self.assertEqual(len(response.json()['results']), 1, limit)
+
+        response = self.client.get(reverse('tickets:search_users_api'), {'q': 'kossi'})
+        self.assertEqual(response.json()['results'], [{
+            'id': self.supervisor.pk, 'text': 'Élodie Kossi (Superviseur)', 'email': 'elodie.kossi@example.org'
+        }])
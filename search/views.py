@@ -0,0 +1,53 @@
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, SOURCES, autocomplete
+from .models import SearchDocument
+from .query import MIN_QUERY_LENGTH, search_documents
+
+RESULTS_PER_PAGE = 20
+
+
+@login_required
+def search_results(request):
+    """Recherche plein texte dans les tickets, ASCs et équipements visibles"""
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind')
+    kinds = [kind] if kind in dict(SearchDocument.KIND_CHOICES) else None
+
+    # Nombre de résultats par type (filtres de la colonne de gauche)
+    counts = dict(
+        search_documents(query, request.user, ranked=False).order_by().values_list('kind').annotate(count=Count('pk'))
+    )
+    documents = search_documents(query, request.user, kinds=kinds)
+    page = Paginator(documents, RESULTS_PER_PAGE).get_page(request.GET.get('page'))
+
+    params = request.GET.copy()
+    params.pop('page', None)
+    context = {
+        'query': query,
+        'kind': kind if kinds else '',
+        'too_short': bool(query) and len(query) < MIN_QUERY_LENGTH,
+        'kind_counts': [(value, label, counts.get(value, 0)) for value, label in SearchDocument.KIND_CHOICES],
+        'total_count': sum(counts.values()),
+        'documents': page.object_list,
+        'page_obj': page,
+        'querystring': params.urlencode(),
+    }
+    return render(request, 'search/results.html', context)
+
+
+@login_required
+def autocomplete_results(request, source):
+    """Autocomplétion (Select2 : {'results': [{'id', 'text', ...}]}) sans requête en base"""
+    if source not in SOURCES:
+        raise Http404
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    limit = max(1, min(limit, MAX_LIMIT))
+    return JsonResponse({'results': autocomplete(source, request.GET.get('q', ''), request.user, limit)})
@@ -1,13 +1,20 @@
-from rest_framework import viewsets, serializers
+from django.db import transaction
+from rest_framework import viewsets, serializers, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from accounts.scoping import scope_tickets, visible_site_ids
+from config.conditional import ConditionalGetMixin, latest_of, start_of_today, today_part
+from .email_notifications import send_bulk_ticket_notification
+from .importers import import_tickets, ImportFileError
 from .models import RepairTicket, TicketEvent, Issue
+from . import workflow
 
 
 class IssueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Issue
-        fields = ['id', 'issue_type', 'description', 'created_at']
+        fields = ['id', 'problem_type', 'description', 'created_at']
 
 
 class TicketEventSerializer(serializers.ModelSerializer):
@@ -29,7 +36,7 @@ class RepairTicketSerializer(serializers.ModelSerializer):
         model = RepairTicket
         fields = [
             'id', 'ticket_number', 'equipment', 'equipment_name', 'asc', 'asc_name',
-            'status', 'priority', 'current_stage', 'current_holder', 'created_at',
+            'status', 'current_stage', 'current_holder', 'created_at',
             'initial_send_date', 'repair_completed_date', 'closed_date',
             'initial_problem_description', 'resolution_notes', 'delay_days',
             'delay_color', 'issues'
@@ -37,12 +44,40 @@ class RepairTicketSerializer(serializers.ModelSerializer):
         read_only_fields = ['ticket_number', 'created_at']
 
 
-class RepairTicketViewSet(viewsets.ModelViewSet):
+class BulkTransitionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=workflow.ACTION_CHOICES)
+    ticket_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=200
+    )
+    to_role = serializers.ChoiceField(choices=RepairTicket.STAGE_CHOICES, required=False)
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if attrs['action'] == workflow.SEND and not attrs.get('to_role'):
+            raise serializers.ValidationError({'to_role': "L'étape de destination est obligatoire pour un envoi."})
+        return attrs
+
+
+class TicketImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+
+class RepairTicketViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = RepairTicket.objects.all().select_related('equipment', 'asc', 'current_holder')
     serializer_class = RepairTicketSerializer
 
+    def get_conditional_parts(self):
+        # delay_days / delay_color évoluent chaque jour
+        return (today_part(),)
+
+    def get_last_modified(self, last_modified):
+        return latest_of(last_modified, start_of_today())
+
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = scope_tickets(super().get_queryset(), self.request.user)
         status = self.request.query_params.get('status')
         stage = self.request.query_params.get('stage')
 
@@ -71,7 +106,72 @@ class RepairTicketViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(warning_tickets, many=True)
         return Response(serializer.data)
 
-
-class TicketEventViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def bulk_transition(self, request):
+        """Applique une même transition à un lot de tickets en une seule transaction"""
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        to_role = data.get('to_role')
+        comment = data['comment']
+
+        # Tickets hors du périmètre de l'utilisateur : refusés comme introuvables
+        visible = set(scope_tickets(
+            RepairTicket.objects.filter(pk__in=data['ticket_ids']), request.user
+        ).values_list('pk', flat=True))
+        hidden = {pk: 'Ticket introuvable.' for pk in data['ticket_ids'] if pk not in visible}
+        if hidden:
+            return Response({'errors': hidden}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                tickets = workflow.apply_transition(
+                    data['ticket_ids'], request.user, data['action'], to_role=to_role, comment=comment
+                )
+
+                # Une seule notification pour l'équipe destinataire, après validation de la transaction
+                if data['action'] == workflow.SEND and to_role != 'RETURNED_ASC':
+                    ticket_ids = [ticket.pk for ticket in tickets]
+                    sender = request.user
+                    transaction.on_commit(lambda: send_bulk_ticket_notification(
+                        list(RepairTicket.objects.filter(pk__in=ticket_ids).select_related('equipment', 'asc')),
+                        sender=sender,
+                        to_role=to_role,
+                        comment=comment
+                    ))
+        except workflow.TransitionError as e:
+            return Response({'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'action': data['action'],
+            'count': len(tickets),
+            'ticket_ids': [ticket.pk for ticket in tickets],
+        })
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """Crée des tickets en masse depuis un fichier CSV/XLSX ; retourne le rapport ligne par ligne"""
+        serializer = TicketImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+
+        try:
+            report = import_tickets(upload, upload.name, request.user, dry_run=serializer.validated_data['dry_run'])
+        except ImportFileError as e:
+            return Response({'file': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if report.created else status.HTTP_200_OK
+        return Response(report.as_dict(), status=response_status)
+
+
+class TicketEventViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = TicketEvent.objects.all().select_related('ticket', 'user')
     serializer_class = TicketEventSerializer
+    conditional_field = 'timestamp'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        site_ids = visible_site_ids(self.request.user)
+        if site_ids is not None:
+            queryset = queryset.filter(ticket__asc__site_id__in=site_ids)
+        return queryset
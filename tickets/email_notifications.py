@@ -6,24 +6,14 @@ from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from accounts.models import User
+from .workflow import STAGE_ROLES
 
 
 def get_team_members_by_role(role):
     """
     Récupère tous les membres d'une équipe selon leur rôle
     """
-    role_mapping = {
-        'SUPERVISOR': 'SUPERVISOR',
-        'PROGRAM': 'PROGRAM',
-        'LOGISTICS': 'LOGISTICS',
-        'REPAIRER': 'REPAIRER',
-        'ESANTE': 'ESANTE',
-        'RETURNING_LOGISTICS': 'LOGISTICS',
-        'RETURNING_PROGRAM': 'PROGRAM',
-        'RETURNING_SUPERVISOR': 'SUPERVISOR',
-    }
-
-    target_role = role_mapping.get(role, role)
+    target_role = STAGE_ROLES.get(role, role)
     users = User.objects.filter(role=target_role, is_active=True, email__isnull=False).exclude(email='')
 
     # Log des membres trouvés
@@ -158,3 +148,53 @@ def send_ticket_notification(ticket, recipient, sender, to_role, comment=''):
         print(traceback.format_exc())
         print(f"{'='*80}\n")
         return False
+
+
+def send_bulk_ticket_notification(tickets, sender, to_role, comment=''):
+    """
+    Envoie une seule notification à l'équipe destinataire pour un lot de tickets
+
+    Args:
+        tickets: Les tickets envoyés (même étape de destination)
+        sender: L'utilisateur qui envoie les tickets
+        to_role: Le rôle/département destinataire
+        comment: Commentaire optionnel commun au lot
+    """
+    try:
+        team_members = get_team_members_by_role(to_role)
+        recipient_emails = [user.email for user in team_members if user.email]
+
+        if not recipient_emails or not tickets:
+            print(f"⚠️ Aucun destinataire email trouvé pour le rôle {to_role}")
+            return False
+
+        site_url = settings.SITE_URL if hasattr(settings, 'SITE_URL') else 'http://localhost:8000'
+        context = {
+            'tickets': [
+                {'ticket': ticket, 'url': f"{site_url}/tickets/{ticket.pk}/receive/?auto_confirm=1"}
+                for ticket in tickets
+            ],
+            'sender': sender,
+            'to_role': to_role,
+            'to_role_display': dict(tickets[0].STAGE_CHOICES).get(to_role, to_role),
+            'comment': comment,
+        }
+
+        subject = f"[IH Equipment Manager] {len(tickets)} nouveau(x) ticket(s) à traiter"
+        html_message = render_to_string('tickets/emails/bulk_ticket_notification.html', context)
+
+        email = EmailMessage(
+            subject=subject,
+            body=html_message,
+            from_email=settings.EMAIL_HOST_USER,
+            to=recipient_emails,
+        )
+        email.content_subtype = 'html'
+        email.send(fail_silently=False)
+
+        print(f"✅ Notification groupée envoyée ({len(tickets)} tickets) à {len(recipient_emails)} destinataire(s)")
+        return True
+
+    except Exception as e:
+        print(f"❌ ERREUR LORS DE L'ENVOI DE LA NOTIFICATION GROUPÉE: {type(e).__name__}: {e}")
+        return False
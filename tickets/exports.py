@@ -0,0 +1,145 @@
+"""
+Lignes des exports de tickets et d'événements (voir config/exports.py)
+
+Les tickets sont lus par paquets dans l'ordre des clés ; leurs événements
+d'étape sont lus en parallèle, triés par ticket, et rapprochés ticket par
+ticket (fusion de deux flux triés) : délai et temps passé à chaque étape sont
+calculés sans requête par ticket ni chargement de l'ensemble en mémoire.
+"""
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from assets.models import Equipment
+from config.exports import CHUNK_SIZE
+from .models import RepairTicket, TicketEvent, stage_segments
+
+STATUS_LABELS = dict(RepairTicket.STATUS_CHOICES)
+STAGE_LABELS = dict(RepairTicket.STAGE_CHOICES)
+EVENT_LABELS = dict(TicketEvent.EVENT_TYPE_CHOICES)
+TYPE_LABELS = dict(Equipment.TYPE_CHOICES)
+
+FINAL_STATUSES = {'CLOSED', 'CANCELLED'}
+
+# Étapes dont la durée est exportée (l'ASC n'est plus une étape de traitement)
+DURATION_STAGES = [value for value, _ in RepairTicket.STAGE_CHOICES if value != 'RETURNED_ASC']
+
+# Événements qui font entrer un ticket dans une étape
+STAGE_EVENT_TYPES = ['CREATED', 'SENT', 'RECEIVED']
+
+TICKET_FIELDS = [
+    'pk', 'ticket_number', 'status', 'current_stage',
+    'created_at', 'initial_send_date', 'repair_completed_date', 'closed_date', 'cancelled_date',
+    'asc__code', 'asc__first_name', 'asc__last_name',
+    'asc__site__name', 'asc__site__district__name', 'asc__site__district__region__name',
+    'equipment__equipment_type', 'equipment__brand', 'equipment__model',
+    'equipment__imei', 'equipment__serial_number',
+    'initial_problem_description',
+]
+
+TICKET_HEADER = [
+    'Numéro', 'Statut', 'Étape actuelle',
+    'Créé le', 'Envoyé le', 'Réparé le', 'Clôturé le', 'Annulé le',
+    'Code ASC', 'ASC', 'Site', 'District', 'Région',
+    "Type d'équipement", 'Marque', 'Modèle', 'IMEI', 'N° de série',
+    'Problème', 'Délai (jours)', "Jours à l'étape actuelle",
+] + [f'Jours — {STAGE_LABELS[stage]}' for stage in DURATION_STAGES]
+
+EVENT_HEADER = ['Ticket', "Type d'événement", 'De', 'Vers', 'Utilisateur', 'Date', 'Commentaire']
+
+
+def _days(delta):
+    return round(delta.total_seconds() / 86400, 1)
+
+
+def _ticket_events(tickets):
+    """Événements d'étape des tickets, groupés par ticket dans l'ordre des clés"""
+    events = TicketEvent.objects.filter(
+        ticket__in=tickets.order_by().values('pk'), event_type__in=STAGE_EVENT_TYPES
+    ).order_by('ticket_id', 'timestamp', 'pk').values_list(
+        'ticket_id', 'event_type', 'to_role', 'timestamp'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for ticket_id, group in groupby(events, key=itemgetter(0)):
+        yield ticket_id, [event[1:] for event in group]
+
+
+def ticket_rows(tickets, now=None):
+    """Lignes de l'export des tickets (voir TICKET_HEADER)"""
+    now = now or timezone.now()
+    rows = tickets.order_by('pk').values_list(*TICKET_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    events = _ticket_events(tickets)
+    pending = next(events, None)
+
+    for (pk, number, status, stage, created_at, sent_at, repaired_at, closed_at, cancelled_at,
+         asc_code, asc_first_name, asc_last_name, site, district, region,
+         equipment_type, brand, model, imei, serial_number, problem) in rows:
+        # Les deux flux sont triés par ticket : on avance celui des événements
+        while pending is not None and pending[0] < pk:
+            pending = next(events, None)
+        ticket_events = []
+        if pending is not None and pending[0] == pk:
+            ticket_events = pending[1]
+            pending = next(events, None)
+
+        end = closed_at or cancelled_at or now
+        durations = dict.fromkeys(DURATION_STAGES, timedelta())
+        for segment_stage, entered, left in stage_segments(ticket_events, end):
+            if segment_stage in durations:
+                durations[segment_stage] += left - entered
+
+        at_stage = None
+        if status not in FINAL_STATUSES:
+            arrivals = [timestamp for _, to_role, timestamp in ticket_events if to_role == stage]
+            at_stage = (now - arrivals[-1]).days if arrivals else 0
+
+        yield [
+            number, STATUS_LABELS.get(status, status), STAGE_LABELS.get(stage, stage),
+            created_at, sent_at, repaired_at, closed_at, cancelled_at,
+            asc_code, f'{asc_first_name or ""} {asc_last_name or ""}'.strip(), site, district, region,
+            TYPE_LABELS.get(equipment_type, equipment_type), brand, model, imei, serial_number,
+            problem, ((closed_at or cancelled_at or now) - sent_at).days, at_stage,
+        ] + [_days(durations[stage_value]) for stage_value in DURATION_STAGES]
+
+
+def _day_start(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def _parse_day(value):
+    """Date AAAA-MM-JJ saisie dans le filtre, None si absente ou invalide"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def filter_events(events, params):
+    """Filtres de l'export des événements : du / au (AAAA-MM-JJ, inclus), type d'événement"""
+    date_from = _parse_day(params.get('date_from'))
+    date_to = _parse_day(params.get('date_to'))
+    event_type = params.get('event_type')
+    if date_from:
+        events = events.filter(timestamp__gte=_day_start(date_from))
+    if date_to:
+        events = events.filter(timestamp__lt=_day_start(date_to + timedelta(days=1)))
+    if event_type in EVENT_LABELS:
+        events = events.filter(event_type=event_type)
+    return events
+
+
+def event_rows(events):
+    """Lignes de l'export des événements (voir EVENT_HEADER), dans l'ordre d'enregistrement"""
+    rows = events.order_by('pk').values_list(
+        'ticket__ticket_number', 'event_type', 'from_role', 'to_role',
+        'user__username', 'user__first_name', 'user__last_name', 'timestamp', 'comment',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    for number, event_type, from_role, to_role, username, first_name, last_name, timestamp, comment in rows:
+        user = f'{first_name or ""} {last_name or ""}'.strip() or username
+        yield [
+            number, EVENT_LABELS.get(event_type, event_type),
+            STAGE_LABELS.get(from_role, from_role), STAGE_LABELS.get(to_role, to_role),
+            user, timestamp, comment,
+        ]
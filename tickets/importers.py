@@ -0,0 +1,309 @@
+"""
+Import de tickets en masse depuis un fichier CSV ou XLSX
+
+Les lignes sont lues en flux, validées contre des dictionnaires préchargés
+(équipements par IMEI, ASC par code, types de problèmes par code) puis écrites
+par lots : tickets, problèmes, événements CREATED et passage des équipements
+en réparation via bulk_create / update, un lot par transaction. Résumés de
+fiabilité et index de recherche sont mis à jour explicitement pour chaque lot.
+
+Colonnes attendues (la première ligne contient les en-têtes) :
+    imei                 IMEI / numéro de série de l'équipement (obligatoire)
+    asc_code             Code de l'ASC (facultatif, propriétaire de l'équipement par défaut)
+    problem_description  Description du problème (obligatoire)
+    problem_types        Codes des types de problèmes séparés par « | », « , » ou « ; »
+    issue_description    Description additionnelle des problèmes (facultatif)
+"""
+import codecs
+import csv
+import itertools
+import re
+
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from accounts.models import ASC
+from accounts.scoping import scope_ascs, scope_equipment
+from assets.models import Equipment
+from assets.reliability import refresh_reliability
+from assets.search import normalize_identifier
+from assets.timeline import invalidate_timeline
+from search.indexing import index_tickets
+from .models import RepairTicket, Issue, TicketEvent, ProblemType, TICKET_NUMBER_MAX_ATTEMPTS
+
+REQUIRED_COLUMNS = ('imei', 'problem_description')
+BATCH_SIZE = 500
+
+# États des équipements pour lesquels un ticket peut être ouvert (comme le formulaire)
+OPENABLE_EQUIPMENT_STATUSES = frozenset(['FAULTY', 'FUNCTIONAL'])
+
+
+class ImportFileError(Exception):
+    """Fichier illisible ou au format incorrect"""
+
+
+class ImportReport:
+    """Résultat d'un import : tickets créés et erreurs par ligne"""
+
+    def __init__(self):
+        self.ticket_numbers = []
+        self.errors = []
+
+    @property
+    def created(self):
+        return len(self.ticket_numbers)
+
+    def add_error(self, line, message):
+        self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'ticket_numbers': self.ticket_numbers,
+            'errors': self.errors,
+        }
+
+
+def read_rows(fileobj, filename):
+    """Lit un fichier CSV ou XLSX en flux ; retourne un itérateur de (ligne, dict)"""
+    if filename.lower().endswith('.xlsx'):
+        rows = _xlsx_rows(fileobj)
+    else:
+        rows = _csv_rows(fileobj)
+
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFileError('Le fichier est vide.')
+
+    columns = [str(value or '').strip().lower() for value in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ImportFileError(f'Colonnes manquantes : {", ".join(missing)}')
+
+    def iterate():
+        for line, values in enumerate(rows, start=2):
+            row = {
+                column: str(value).strip() if value is not None else ''
+                for column, value in zip(columns, values)
+            }
+            if any(row.values()):
+                yield line, row
+
+    return iterate()
+
+
+def _csv_rows(fileobj):
+    """Lignes d'un CSV UTF-8 ; le séparateur (« , » ou « ; ») est déduit des en-têtes"""
+    text = codecs.iterdecode(fileobj, 'utf-8-sig')
+    try:
+        first_line = next(text)
+    except StopIteration:
+        return iter(())
+    except UnicodeDecodeError:
+        raise ImportFileError('Le fichier CSV doit être encodé en UTF-8.')
+
+    delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+
+    def iterate():
+        try:
+            yield from csv.reader(itertools.chain([first_line], text), delimiter=delimiter)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ImportFileError(f'Fichier CSV invalide : {e}')
+
+    return iterate()
+
+
+def _xlsx_rows(fileobj):
+    """Lignes de la première feuille d'un classeur XLSX (nécessite openpyxl)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("L'import XLSX nécessite le paquet openpyxl (pip install openpyxl).")
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f'Fichier XLSX invalide : {e}')
+    return workbook.active.iter_rows(values_only=True)
+
+
+def _split_codes(value):
+    return [code.strip() for code in re.split(r'[|,;]', value) if code.strip()]
+
+
+class TicketImporter:
+    """Valide et crée les tickets d'un fichier, lot par lot"""
+
+    def __init__(self, user, batch_size=BATCH_SIZE, dry_run=False):
+        self.user = user
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.report = ImportReport()
+
+        # Référentiels préchargés en une requête chacun, limités au périmètre de l'utilisateur
+        self.equipments = {
+            imei: (pk, owner_id, status)
+            for pk, imei, owner_id, status in scope_equipment(Equipment.objects.all(), user).values_list(
+                'pk', 'imei_normalized', 'owner_id', 'status'
+            )
+        }
+        self.ascs = dict(scope_ascs(ASC.objects.all(), user).values_list('code', 'pk'))
+        self.problem_types = dict(ProblemType.objects.filter(is_active=True).values_list('code', 'pk'))
+        self.seen_equipment_ids = set()
+
+    def run(self, rows):
+        """Importe les lignes (itérable de (ligne, dict)) et retourne le rapport"""
+        batch = []
+        try:
+            for line, row in rows:
+                data = self.validate(line, row)
+                if data is None:
+                    continue
+                batch.append(data)
+                if len(batch) >= self.batch_size:
+                    self.write(batch)
+                    batch = []
+        except ImportFileError as e:
+            # Fichier tronqué ou corrompu : les lignes déjà lues restent importées
+            self.report.add_error(None, str(e))
+        if batch:
+            self.write(batch)
+        return self.report
+
+    def validate(self, line, row):
+        """Retourne les données prêtes à écrire, ou None (erreur ajoutée au rapport)"""
+        imei = row.get('imei', '')
+        description = row.get('problem_description', '')
+        if not imei:
+            self.report.add_error(line, "L'IMEI est obligatoire.")
+            return None
+        if not description:
+            self.report.add_error(line, 'La description du problème est obligatoire.')
+            return None
+
+        equipment = self.equipments.get(normalize_identifier(imei))
+        if equipment is None:
+            self.report.add_error(line, f'Équipement introuvable : {imei}')
+            return None
+        equipment_id, owner_id, equipment_status = equipment
+        if equipment_status not in OPENABLE_EQUIPMENT_STATUSES or equipment_id in self.seen_equipment_ids:
+            self.report.add_error(line, f"L'équipement {imei} est déjà en réparation.")
+            return None
+
+        asc_code = row.get('asc_code', '')
+        if asc_code:
+            asc_id = self.ascs.get(asc_code)
+            if asc_id is None:
+                self.report.add_error(line, f'ASC introuvable : {asc_code}')
+                return None
+        else:
+            asc_id = owner_id
+            if asc_id is None:
+                self.report.add_error(line, f"L'équipement {imei} n'a pas de propriétaire ; indiquer asc_code.")
+                return None
+
+        codes = _split_codes(row.get('problem_types', ''))
+        unknown = [code for code in codes if code not in self.problem_types]
+        if unknown:
+            self.report.add_error(line, f'Types de problèmes inconnus : {", ".join(unknown)}')
+            return None
+
+        self.seen_equipment_ids.add(equipment_id)
+        return {
+            'line': line,
+            'equipment_id': equipment_id,
+            'asc_id': asc_id,
+            'description': description,
+            'problem_type_ids': [self.problem_types[code] for code in dict.fromkeys(codes)],
+            'issue_description': row.get('issue_description', ''),
+        }
+
+    def write(self, batch):
+        """Écrit un lot validé dans une transaction"""
+        if self.dry_run:
+            return
+
+        for attempt in range(TICKET_NUMBER_MAX_ATTEMPTS):
+            numbers = self._unique_numbers(len(batch))
+            try:
+                with transaction.atomic():
+                    tickets = self._write(batch, numbers)
+                break
+            except IntegrityError as e:
+                # Numéro attribué entre-temps par une création concurrente : nouveau tirage
+                if RepairTicket.objects.filter(ticket_number__in=numbers).exists():
+                    continue
+                # Autre contrainte (équipement ou ASC supprimé entre-temps...) : lot rejeté
+                self._reject(batch, f"Ticket non enregistré : {e}")
+                return
+        else:
+            self._reject(batch, 'Impossible de générer un numéro de ticket unique.')
+            return
+
+        self.report.ticket_numbers.extend(ticket.ticket_number for ticket in tickets)
+
+    def _reject(self, batch, message):
+        for data in batch:
+            self.seen_equipment_ids.discard(data['equipment_id'])
+            self.report.add_error(data['line'], message)
+
+    def _write(self, batch, numbers):
+        now = timezone.now()
+
+        tickets = RepairTicket.objects.bulk_create([
+            RepairTicket(
+                ticket_number=number,
+                equipment_id=data['equipment_id'],
+                asc_id=data['asc_id'],
+                created_by=self.user,
+                initial_problem_description=data['description'],
+                current_stage='SUPERVISOR',
+                current_holder=self.user
+            )
+            for number, data in zip(numbers, batch)
+        ])
+
+        Issue.objects.bulk_create([
+            Issue(ticket=ticket, problem_type_id=problem_type_id, description=data['issue_description'])
+            for ticket, data in zip(tickets, batch)
+            for problem_type_id in data['problem_type_ids']
+        ])
+
+        TicketEvent.objects.bulk_create([
+            TicketEvent(
+                ticket=ticket,
+                event_type='CREATED',
+                user=self.user,
+                from_role='SUPERVISOR',
+                to_role='SUPERVISOR',
+                comment='Ticket créé (import)',
+                timestamp=now
+            )
+            for ticket in tickets
+        ])
+
+        equipment_ids = [data['equipment_id'] for data in batch]
+        Equipment.objects.filter(pk__in=equipment_ids).update(status='UNDER_REPAIR', updated_at=now)
+        invalidate_timeline(*equipment_ids)
+        refresh_reliability(*equipment_ids)
+        index_tickets(*[ticket.pk for ticket in tickets])
+        return tickets
+
+    @staticmethod
+    def _unique_numbers(count):
+        """Tire count numéros de ticket distincts et absents de la base"""
+        numbers = set()
+        while len(numbers) < count:
+            candidates = {RepairTicket.generate_ticket_number() for _ in range(count - len(numbers))}
+            taken = set(
+                RepairTicket.objects.filter(ticket_number__in=candidates).values_list('ticket_number', flat=True)
+            )
+            numbers |= candidates - taken
+        return list(numbers)
+
+
+def import_tickets(fileobj, filename, user, batch_size=BATCH_SIZE, dry_run=False):
+    """Importe les tickets d'un fichier CSV/XLSX et retourne un ImportReport"""
+    rows = read_rows(fileobj, filename)
+    return TicketImporter(user, batch_size=batch_size, dry_run=dry_run).run(rows)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour mesurer le débit de création de tickets (génération du
+numéro unique comprise) avec plusieurs workers concurrents.
+
+Les données de test sont créées avec un préfixe dédié puis supprimées à la fin.
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, IntegrityError, OperationalError
+
+from accounts.models import User, ASC
+from assets.models import Equipment
+from locations.models import Region, District, Site
+from tickets.models import RepairTicket
+
+PREFIX = 'BENCH-TN'
+
+
+class Command(BaseCommand):
+    help = 'Mesure le nombre de tickets créés par seconde avec des workers concurrents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=100, help='Nombre de tickets par worker')
+        parser.add_argument('--workers', type=int, default=4, help='Nombre de workers concurrents')
+
+    def handle(self, *args, **options):
+        per_worker = options['tickets']
+        workers = options['workers']
+
+        self.stdout.write(self.style.SUCCESS('=== Benchmark de création de tickets ==='))
+        self.stdout.write(f'Tickets par worker: {per_worker} | Workers: {workers}')
+        self.stdout.write(f'Base de données: {connection.vendor}')
+
+        self._cleanup()
+        region = Region.objects.create(name=f'{PREFIX} Region', code=PREFIX)
+        district = District.objects.create(region=region, name=f'{PREFIX} District', code=PREFIX)
+        site = Site.objects.create(district=district, name=f'{PREFIX} Site', code=PREFIX)
+        user = User.objects.create_user(username=f'{PREFIX.lower()}-supervisor', role='SUPERVISOR')
+        asc = ASC.objects.create(first_name='Bench', last_name='ASC', code=PREFIX, site=site)
+        equipment = Equipment.objects.create(equipment_type='PHONE', brand='Bench', model='TN', imei=PREFIX, owner=asc)
+
+        counters = {'created': 0, 'lock_retries': 0, 'failures': 0}
+        lock = threading.Lock()
+
+        def worker():
+            local = dict.fromkeys(counters, 0)
+            try:
+                while local['created'] + local['failures'] < per_worker:
+                    try:
+                        RepairTicket.objects.create(
+                            equipment=equipment,
+                            asc=asc,
+                            created_by=user,
+                            initial_problem_description=PREFIX
+                        )
+                        local['created'] += 1
+                    except IntegrityError:
+                        local['failures'] += 1
+                    except OperationalError:
+                        # Verrou d'écriture (SQLite) : on réessaie
+                        local['lock_retries'] += 1
+                        time.sleep(0.005)
+            finally:
+                connection.close()
+            with lock:
+                for key, value in local.items():
+                    counters[key] += value
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        started = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            distinct = RepairTicket.objects.filter(
+                initial_problem_description=PREFIX
+            ).values('ticket_number').distinct().count()
+        finally:
+            self._cleanup()
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('=== Résultats ==='))
+        self.stdout.write(f'Tickets créés: {counters["created"]} ({distinct} numéros distincts)')
+        self.stdout.write(f'Échecs (numéro unique introuvable): {counters["failures"]}')
+        self.stdout.write(f'Conflits de verrou réessayés: {counters["lock_retries"]}')
+        self.stdout.write(f'Durée: {elapsed:.2f} s')
+        if elapsed:
+            self.stdout.write(self.style.SUCCESS(f'Débit: {counters["created"] / elapsed:.1f} tickets/s'))
+
+    def _cleanup(self):
+        """Supprime les données de test"""
+        RepairTicket.objects.filter(initial_problem_description=PREFIX).delete()
+        Equipment.objects.filter(imei=PREFIX).delete()
+        ASC.objects.filter(code=PREFIX).delete()
+        Region.objects.filter(code=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX.lower()).delete()
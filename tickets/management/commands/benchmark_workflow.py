@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour mesurer le débit du moteur de workflow (transitions par
+seconde) avec plusieurs workers concurrents.
+
+Les données de test sont créées avec un préfixe dédié puis supprimées à la fin.
+Utiliser PostgreSQL pour des mesures représentatives : SQLite sérialise les écritures.
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError
+
+from accounts.models import User, ASC
+from assets.models import Equipment
+from locations.models import Region, District, Site
+from tickets.models import RepairTicket
+from tickets import workflow
+
+PREFIX = 'BENCH-WF'
+MAX_ATTEMPTS = 20
+
+
+class Command(BaseCommand):
+    help = 'Mesure le nombre de transitions de workflow par seconde avec des workers concurrents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=200, help='Nombre de tickets à traiter')
+        parser.add_argument('--workers', type=int, default=4, help='Nombre de workers concurrents')
+        parser.add_argument(
+            '--contention',
+            action='store_true',
+            help='Tous les workers traitent les mêmes tickets (mesure des doubles traitements refusés)',
+        )
+
+    def handle(self, *args, **options):
+        ticket_count = options['tickets']
+        workers = options['workers']
+        contention = options['contention']
+
+        self.stdout.write(self.style.SUCCESS('=== Benchmark du workflow ==='))
+        self.stdout.write(f'Tickets: {ticket_count} | Workers: {workers} | Contention: {"oui" if contention else "non"}')
+        self.stdout.write(f'Base de données: {connection.vendor}')
+
+        sender, receiver, ticket_ids = self._create_fixtures(ticket_count)
+        try:
+            results = self._run(ticket_ids, sender, receiver, workers, contention)
+        finally:
+            self._cleanup()
+
+        elapsed = results['elapsed']
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('=== Résultats ==='))
+        self.stdout.write(f'Transitions appliquées: {results["applied"]}')
+        self.stdout.write(f'Transitions refusées (déjà traitées): {results["rejected"]}')
+        self.stdout.write(f'Conflits de verrou réessayés: {results["retries"]}')
+        self.stdout.write(f'Échecs après {MAX_ATTEMPTS} tentatives: {results["errors"]}')
+        self.stdout.write(f'Durée: {elapsed:.2f} s')
+        if elapsed:
+            self.stdout.write(self.style.SUCCESS(f'Débit: {results["applied"] / elapsed:.1f} transitions/s'))
+
+    def _create_fixtures(self, ticket_count):
+        """Crée la hiérarchie, les utilisateurs et les tickets de test"""
+        self._cleanup()
+        region = Region.objects.create(name=f'{PREFIX} Region', code=PREFIX)
+        district = District.objects.create(region=region, name=f'{PREFIX} District', code=PREFIX)
+        site = Site.objects.create(district=district, name=f'{PREFIX} Site', code=PREFIX)
+        sender = User.objects.create_user(username=f'{PREFIX.lower()}-supervisor', role='SUPERVISOR')
+        receiver = User.objects.create_user(username=f'{PREFIX.lower()}-program', role='PROGRAM')
+        asc = ASC.objects.create(first_name='Bench', last_name='ASC', code=PREFIX, site=site)
+
+        equipments = Equipment.objects.bulk_create([
+            Equipment(equipment_type='PHONE', brand='Bench', model='WF', imei=f'{PREFIX}-{i}', owner=asc)
+            for i in range(ticket_count)
+        ])
+        tickets = RepairTicket.objects.bulk_create([
+            RepairTicket(
+                ticket_number=f'{PREFIX}-{i}',
+                equipment=equipment,
+                asc=asc,
+                created_by=sender,
+                current_holder=sender,
+                initial_problem_description='Benchmark'
+            )
+            for i, equipment in enumerate(equipments)
+        ])
+        return sender, receiver, [ticket.pk for ticket in tickets]
+
+    def _run(self, ticket_ids, sender, receiver, workers, contention):
+        """Chaque ticket subit un envoi (SUPERVISOR -> PROGRAM) puis une réception"""
+        counters = {'applied': 0, 'rejected': 0, 'retries': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def transition(ticket_id, user, action, to_role, local):
+            # Les conflits de verrou (SQLite notamment) sont réessayés un nombre limité de fois
+            for attempt in range(MAX_ATTEMPTS):
+                try:
+                    workflow.apply_transition([ticket_id], user, action, to_role=to_role)
+                    local['applied'] += 1
+                    return
+                except workflow.TransitionError:
+                    local['rejected'] += 1
+                    return
+                except OperationalError:
+                    local['retries'] += 1
+                    time.sleep(0.005 * (attempt + 1))
+            local['errors'] += 1
+
+        def worker(ids):
+            local = dict.fromkeys(counters, 0)
+            try:
+                for ticket_id in ids:
+                    transition(ticket_id, sender, workflow.SEND, 'PROGRAM', local)
+                    transition(ticket_id, receiver, workflow.RECEIVE, None, local)
+            finally:
+                connection.close()
+            with lock:
+                for key, value in local.items():
+                    counters[key] += value
+
+        if contention:
+            slices = [ticket_ids] * workers
+        else:
+            slices = [ticket_ids[i::workers] for i in range(workers)]
+
+        threads = [threading.Thread(target=worker, args=(ids,)) for ids in slices]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counters['elapsed'] = time.perf_counter() - started
+        return counters
+
+    def _cleanup(self):
+        """Supprime les données de test"""
+        RepairTicket.objects.filter(ticket_number__startswith=PREFIX).delete()
+        Equipment.objects.filter(imei__startswith=PREFIX).delete()
+        ASC.objects.filter(code=PREFIX).delete()
+        Region.objects.filter(code=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX.lower()).delete()
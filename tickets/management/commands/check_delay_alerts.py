@@ -9,7 +9,9 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from monitoring.jobs import track_job
 from tickets.models import RepairTicket, DelayAlertRecipient, DelayAlertLog
+from tickets import workflow
 from datetime import timedelta
 
 
@@ -29,6 +31,11 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        # Exécution enregistrée pour /metrics (durée, emails envoyés / en erreur)
+        with track_job('check_delay_alerts') as self.job_run:
+            self.check_alerts(**options)
+
+    def check_alerts(self, **options):
         dry_run = options['dry_run']
         force = options['force']
 
@@ -130,7 +137,7 @@ class Command(BaseCommand):
             cc_recipients = []
 
             # Trouver les utilisateurs du rôle correspondant à l'étape
-            role_for_stage = User.get_role_for_stage(stage)
+            role_for_stage = workflow.role_for_stage(stage)
             if role_for_stage:
                 # Récupérer les destinataires du département concerné qui ont ce rôle
                 for dept_recipient in department_recipients:
@@ -210,6 +217,9 @@ class Command(BaseCommand):
                 )
                 error_count += 1
 
+        self.job_run.items_ok = success_count
+        self.job_run.items_failed = error_count
+
         # Résumé
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('=== Résumé ==='))
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Commande Django pour créer des tickets en masse depuis un fichier CSV ou XLSX
+(collectes de pannes). Voir tickets/importers.py pour le format attendu.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from tickets.importers import import_tickets, ImportFileError, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Importe des tickets de réparation depuis un fichier CSV ou XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Chemin du fichier CSV ou XLSX')
+        parser.add_argument('--user', required=True, help="Nom d'utilisateur du créateur des tickets")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Nombre de tickets par transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Valide le fichier sans rien écrire')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        path = options['path']
+        try:
+            with open(path, 'rb') as fileobj:
+                report = import_tickets(
+                    fileobj, path, user, batch_size=options['batch_size'], dry_run=options['dry_run']
+                )
+        except OSError as e:
+            raise CommandError(f'Impossible de lire le fichier : {e}')
+        except ImportFileError as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            line = f"Ligne {error['line']}" if error['line'] else 'Fichier'
+            self.stdout.write(self.style.WARNING(f"  ✗ {line} : {error['error']}"))
+
+        self.stdout.write('')
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Validation terminée (aucun ticket créé)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ {report.created} ticket(s) créé(s)'))
+        self.stdout.write(f'Lignes en erreur: {len(report.errors)}')
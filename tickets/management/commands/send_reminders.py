@@ -2,7 +2,7 @@
 from django.core.management.base import BaseCommand
 from django.core.mail import send_mail
 from django.conf import settings
-from django.utils import timezone
+from monitoring.jobs import track_job
 from tickets.models import RepairTicket
 
 
@@ -10,6 +10,13 @@ class Command(BaseCommand):
     help = 'Envoie des rappels par email pour les tickets en attente depuis trop longtemps'
 
     def handle(self, *args, **options):
+        # Exécution enregistrée pour /metrics (durée, rappels envoyés / en erreur)
+        with track_job('send_reminders') as run:
+            reminders_sent, errors = self.send_reminders()
+            run.items_ok = reminders_sent
+            run.items_failed = errors
+
+    def send_reminders(self):
         # Récupérer tous les tickets non clôturés avec un détenteur
         tickets = RepairTicket.objects.filter(
             status__in=['OPEN', 'IN_PROGRESS', 'REPAIRED', 'RETURNING'],
@@ -17,6 +24,7 @@ class Command(BaseCommand):
         ).select_related('current_holder', 'equipment', 'asc')
 
         reminders_sent = 0
+        errors = 0
 
         for ticket in tickets:
             days = ticket.get_time_at_current_stage()
@@ -29,6 +37,10 @@ class Command(BaseCommand):
 
                 # Créer le message
                 subject = f"[{urgency}] Rappel: Ticket {ticket.ticket_number} - {days} jours"
+                request_text = (
+                    'Merci de traiter ce ticket rapidement et de l\'envoyer à l\'étape suivante.' if days == 7
+                    else 'Ce ticket nécessite une attention URGENTE. Veuillez le traiter immédiatement.'
+                )
 
                 message = f"""
 Bonjour {ticket.current_holder.get_full_name()},
@@ -43,10 +55,7 @@ ASC: {ticket.asc.get_full_name()}
 L'équipement est dans votre département depuis {days} jours.
 ⚠️ ÉTAT: {color.upper()}
 
-{
-'Merci de traiter ce ticket rapidement et de l\'envoyer à l\'étape suivante.' if days == 7
-else 'Ce ticket nécessite une attention URGENTE. Veuillez le traiter immédiatement.'
-}
+{request_text}
 
 Description du problème:
 {ticket.initial_problem_description}
@@ -83,6 +92,7 @@ Système de suivi des réparations - Repair Tracker
                             )
                         )
                 except Exception as e:
+                    errors += 1
                     self.stdout.write(
                         self.style.ERROR(
                             f'Erreur lors de l\'envoi du rappel pour le ticket {ticket.ticket_number}: {str(e)}'
@@ -94,3 +104,4 @@ Système de suivi des réparations - Repair Tracker
                 f'\nRappels envoyés: {reminders_sent}'
             )
         )
+        return reminders_sent, errors
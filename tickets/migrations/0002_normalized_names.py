@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 17:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_normalized_names'),
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='delayalertrecipient',
+            options={'ordering': ['user__last_name_normalized', 'user__first_name_normalized'], 'verbose_name': "Destinataire d'alerte", 'verbose_name_plural': "Destinataires d'alertes"},
+        ),
+    ]
@@ -1,9 +1,37 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 from datetime import timedelta
 from accounts.models import User, ASC
 from assets.models import Equipment
 
+# Nombre maximal de tentatives de génération d'un numéro de ticket unique
+TICKET_NUMBER_MAX_ATTEMPTS = 5
+
+
+def stage_segments(events, end=None):
+    """
+    Passages du ticket dans chaque étape : (étape, entrée, sortie) à partir des
+    événements (type, destination, date) triés par date. Un envoi (SENT) fait
+    entrer dans l'étape de destination, la réception (RECEIVED) par cette étape
+    remet le compteur à zéro ; la dernière étape court jusqu'à end (ignorée si
+    end est None).
+    """
+    current_stage = None
+    entry_time = None
+    for event_type, to_role, timestamp in events:
+        if event_type == 'SENT':
+            # Quitter une étape, entrer dans la suivante
+            if current_stage and entry_time:
+                yield current_stage, entry_time, timestamp
+            current_stage = to_role
+            entry_time = timestamp
+        elif event_type == 'RECEIVED' and to_role == current_stage:
+            # Confirmer l'entrée dans l'étape
+            entry_time = timestamp
+    if current_stage and entry_time and end is not None:
+        yield current_stage, entry_time, end
+
 
 class ProblemType(models.Model):
     """Type de problème pour les tickets de réparation"""
@@ -171,14 +199,33 @@ class RepairTicket(models.Model):
     def __str__(self):
         return f"{self.ticket_number} - {self.equipment} - {self.get_status_display()}"
 
+    @staticmethod
+    def generate_ticket_number():
+        """Génère un numéro de ticket TKT-YYYYMMDD-XXXXXX (unicité vérifiée à l'insertion)"""
+        timestamp = timezone.now().strftime('%Y%m%d')
+        random_str = get_random_string(6, allowed_chars='0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+        return f"TKT-{timestamp}-{random_str}"
+
     def save(self, *args, **kwargs):
-        if not self.ticket_number:
-            # Génération automatique du numéro de ticket
-            from django.utils.crypto import get_random_string
-            timestamp = timezone.now().strftime('%Y%m%d')
-            random_str = get_random_string(6, allowed_chars='0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            self.ticket_number = f"TKT-{timestamp}-{random_str}"
-        super().save(*args, **kwargs)
+        if self.ticket_number:
+            return super().save(*args, **kwargs)
+
+        # Génération automatique du numéro de ticket : en cas de collision avec un
+        # ticket créé en parallèle, on réessaie avec un nouveau numéro
+        for attempt in range(TICKET_NUMBER_MAX_ATTEMPTS):
+            self.ticket_number = self.generate_ticket_number()
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                collision = RepairTicket.objects.filter(ticket_number=self.ticket_number).exists()
+                self.ticket_number = ''
+                if not collision:
+                    raise
+
+        raise IntegrityError(
+            f"Impossible de générer un numéro de ticket unique après {TICKET_NUMBER_MAX_ATTEMPTS} tentatives"
+        )
 
     def get_delay_days(self):
         """Calcule le nombre de jours depuis l'envoi initial"""
@@ -258,30 +305,10 @@ class RepairTicket(models.Model):
 
         events = self.events.filter(
             event_type__in=['SENT', 'RECEIVED']
-        ).order_by('timestamp')
-
-        current_stage = None
-        entry_time = None
-
-        for event in events:
-            if event.event_type == 'SENT':
-                # Quitter une étape
-                if current_stage and entry_time:
-                    delta = event.timestamp - entry_time
-                    stage_times[current_stage] += delta.days
-                # Entrer dans une nouvelle étape
-                current_stage = event.to_role
-                entry_time = event.timestamp
-            elif event.event_type == 'RECEIVED':
-                # Confirmer l'entrée dans l'étape
-                if event.to_role == current_stage:
-                    entry_time = event.timestamp
-
-        # Ajouter le temps de l'étape actuelle
-        if current_stage and entry_time:
-            from django.utils import timezone
-            delta = timezone.now() - entry_time
-            stage_times[current_stage] += delta.days
+        ).order_by('timestamp').values_list('event_type', 'to_role', 'timestamp')
+
+        for stage, entered, left in stage_segments(events, timezone.now()):
+            stage_times[stage] += (left - entered).days
 
         return dict(stage_times)
 
@@ -444,7 +471,7 @@ class DelayAlertRecipient(models.Model):
     class Meta:
         verbose_name = "Destinataire d'alerte"
         verbose_name_plural = "Destinataires d'alertes"
-        ordering = ['user__last_name', 'user__first_name']
+        ordering = ['user__last_name_normalized', 'user__first_name_normalized']
         unique_together = ['user']
 
     def __str__(self):
@@ -1,9 +1,26 @@
-from django.test import TestCase
+import csv
+import io
+import random
+import threading
+import time
+import zipfile
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import http_date
+from config.conditional import start_of_today
 from accounts.models import User, ASC
 from locations.models import Region, District, Site
 from assets.models import Equipment
-from .models import RepairTicket, Issue, TicketEvent
+from .models import RepairTicket, Issue, TicketEvent, TicketComment, ProblemType
+from .importers import read_rows, TicketImporter
+from . import workflow
 
 
 class RepairTicketModelTest(TestCase):
@@ -80,14 +97,19 @@ class RepairTicketModelTest(TestCase):
             initial_problem_description='Test problem'
         )
 
+        problem_type = ProblemType.objects.create(
+            name='Écran cassé',
+            code='SCREEN_BROKEN',
+            category='HARDWARE'
+        )
         issue = Issue.objects.create(
             ticket=ticket,
-            issue_type='HARDWARE',
+            problem_type=problem_type,
             description='Écran cassé'
         )
 
         self.assertEqual(issue.ticket, ticket)
-        self.assertEqual(issue.issue_type, 'HARDWARE')
+        self.assertEqual(issue.problem_type.category, 'HARDWARE')
 
 
 class TicketEventModelTest(TestCase):
@@ -143,3 +165,613 @@ class TicketEventModelTest(TestCase):
         self.assertEqual(event.ticket, self.ticket)
         self.assertEqual(event.event_type, 'CREATED')
         self.assertEqual(event.user, self.supervisor)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor',
+            password='testpass',
+            role='SUPERVISOR',
+            site=site
+        )
+        self.asc = ASC.objects.create(
+            first_name='Test',
+            last_name='ASC',
+            code='ASC-TEST',
+            site=site,
+            supervisor=self.supervisor
+        )
+        self.equipment = Equipment.objects.create(
+            equipment_type='PHONE',
+            brand='Test Brand',
+            model='Test Model',
+            imei='123456789',
+            owner=self.asc,
+            status='FAULTY'
+        )
+        self.ticket = RepairTicket.objects.create(
+            equipment=self.equipment,
+            asc=self.asc,
+            created_by=self.supervisor,
+            initial_problem_description='Test problem'
+        )
+        self.client.force_login(self.supervisor)
+
+    def test_api_detail_not_modified(self):
+        """Test 304 sur l'API quand l'ETag correspond"""
+        url = reverse('ticket-detail', args=[self.ticket.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.ticket.status = 'IN_PROGRESS'
+        self.ticket.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_list_not_modified(self):
+        """Test 304 sur une liste de l'API, invalidé par une création"""
+        url = reverse('equipment-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Equipment.objects.create(equipment_type='PHONE', brand='B', model='M', imei='987654321', owner=self.asc)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_html_detail_invalidated_by_comment(self):
+        """Test 304 sur la page de détail, invalidé par un nouveau commentaire"""
+        url = reverse('tickets:detail', args=[self.ticket.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        TicketComment.objects.create(ticket=self.ticket, user=self.supervisor, comment='Test')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_last_modified_not_before_start_of_day(self):
+        """Test Last-Modified relevé au début du jour : délais recalculés chaque jour"""
+        day_before = timezone.now() - timezone.timedelta(days=2)
+        RepairTicket.objects.filter(pk=self.ticket.pk).update(updated_at=day_before)
+        Equipment.objects.filter(pk=self.equipment.pk).update(updated_at=day_before)
+        ASC.objects.filter(pk=self.asc.pk).update(updated_at=day_before)
+
+        for url in [reverse('tickets:detail', args=[self.ticket.pk]), reverse('ticket-detail', args=[self.ticket.pk])]:
+            response = self.client.get(url)
+            self.assertEqual(response['Last-Modified'], http_date(start_of_today().timestamp()), url)
+            # Validé la veille : contenu renvoyé
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(day_before.timestamp()))
+            self.assertEqual(response.status_code, 200, url)
+
+
+class BulkTransitionAPITest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor',
+            password='testpass',
+            role='SUPERVISOR',
+            site=site
+        )
+        User.objects.create_user(
+            username='testprogram',
+            password='testpass',
+            role='PROGRAM',
+            email='program@example.com'
+        )
+        self.asc = ASC.objects.create(
+            first_name='Test',
+            last_name='ASC',
+            code='ASC-TEST',
+            site=site,
+            supervisor=self.supervisor
+        )
+        self.tickets = []
+        for i in range(3):
+            equipment = Equipment.objects.create(
+                equipment_type='PHONE',
+                brand='Test Brand',
+                model='Test Model',
+                imei=f'12345678{i}',
+                owner=self.asc,
+                status='FAULTY'
+            )
+            self.tickets.append(RepairTicket.objects.create(
+                equipment=equipment,
+                asc=self.asc,
+                created_by=self.supervisor,
+                current_holder=self.supervisor,
+                initial_problem_description='Test problem'
+            ))
+        self.url = reverse('ticket-bulk-transition')
+        self.client.force_login(self.supervisor)
+
+    def test_bulk_send(self):
+        """Test envoi groupé : événements, étapes et une seule notification"""
+        payload = {
+            'action': 'SEND',
+            'ticket_ids': [t.pk for t in self.tickets],
+            'to_role': 'PROGRAM',
+            'comment': 'Lot de la semaine',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, payload, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(
+            RepairTicket.objects.filter(current_stage='PROGRAM', current_holder__isnull=True).count(), 3
+        )
+        self.assertEqual(TicketEvent.objects.filter(event_type='SENT', to_role='PROGRAM').count(), 3)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['program@example.com'])
+
+    def test_bulk_send_invalid_transition_rejects_batch(self):
+        """Test qu'une transition invalide rejette tout le lot"""
+        self.tickets[0].current_stage = 'LOGISTICS'
+        self.tickets[0].save()
+
+        payload = {
+            'action': 'SEND',
+            'ticket_ids': [t.pk for t in self.tickets],
+            'to_role': 'PROGRAM',
+        }
+        response = self.client.post(self.url, payload, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(self.tickets[0].pk), response.json()['errors'])
+        self.assertFalse(TicketEvent.objects.filter(event_type='SENT').exists())
+        self.assertEqual(RepairTicket.objects.filter(current_stage='PROGRAM').count(), 0)
+
+
+class TicketImportTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor',
+            password='testpass',
+            role='SUPERVISOR',
+            site=site
+        )
+        self.asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=site)
+        self.other_asc = ASC.objects.create(first_name='Autre', last_name='ASC', code='ASC-OTHER', site=site)
+        for i in range(3):
+            Equipment.objects.create(
+                equipment_type='PHONE',
+                brand='Test Brand',
+                model='Test Model',
+                imei=f'12345678{i}',
+                owner=self.asc,
+                status='FAULTY'
+            )
+        ProblemType.objects.create(name='Écran cassé', code='SCREEN_BROKEN', category='HARDWARE')
+        ProblemType.objects.create(name='Batterie', code='BATTERY', category='HARDWARE')
+        self.url = reverse('ticket-import-file')
+        self.client.force_login(self.supervisor)
+
+    def upload(self, content, name='tickets.csv', **data):
+        data['file'] = SimpleUploadedFile(name, content.encode('utf-8'))
+        return self.client.post(self.url, data)
+
+    def test_import_csv(self):
+        """Test import : tickets, problèmes, événements et équipements en réparation"""
+        content = (
+            'imei;asc_code;problem_description;problem_types;issue_description\n'
+            '123456780;;Écran noir;SCREEN_BROKEN|BATTERY;Chute\n'
+            '123456781;ASC-OTHER;Ne charge plus;BATTERY;\n'
+        )
+        response = self.upload(content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(response.json()['errors'], [])
+
+        ticket = RepairTicket.objects.get(equipment__imei='123456780')
+        self.assertEqual(ticket.asc, self.asc)
+        self.assertEqual(ticket.current_holder, self.supervisor)
+        self.assertTrue(ticket.ticket_number.startswith('TKT-'))
+        self.assertEqual(ticket.issues.count(), 2)
+        self.assertEqual(ticket.events.get().event_type, 'CREATED')
+        self.assertEqual(RepairTicket.objects.get(equipment__imei='123456781').asc, self.other_asc)
+        self.assertEqual(Equipment.objects.filter(status='UNDER_REPAIR').count(), 2)
+
+    def test_import_reports_invalid_rows(self):
+        """Test que les lignes invalides sont rapportées sans bloquer les autres"""
+        content = (
+            'imei,problem_description,problem_types\n'
+            '123456780,Écran noir,SCREEN_BROKEN\n'
+            '999999999,Inconnu,\n'
+            '123456781,Type inconnu,UNKNOWN\n'
+            '123456780,Doublon,\n'
+            '123456782,,\n'
+        )
+        response = self.upload(content)
+
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([error['line'] for error in report['errors']], [3, 4, 5, 6])
+        self.assertEqual(RepairTicket.objects.count(), 1)
+
+    def test_import_dry_run(self):
+        """Test validation seule : rien n'est écrit"""
+        response = self.upload('imei,problem_description\n123456780,Écran noir\n', dry_run='true')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['errors'], [])
+        self.assertFalse(RepairTicket.objects.exists())
+        self.assertFalse(Equipment.objects.filter(status='UNDER_REPAIR').exists())
+
+    def test_import_missing_columns(self):
+        """Test qu'un fichier sans les colonnes obligatoires est refusé"""
+        response = self.upload('serial,description\n123456780,Écran noir\n')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('imei', response.json()['file'][0])
+
+    def test_import_query_count_is_constant(self):
+        """Test que le nombre de requêtes ne dépend pas du nombre de lignes"""
+        for i in range(3, 20):
+            Equipment.objects.create(
+                equipment_type='PHONE', brand='Test Brand', model='Test Model',
+                imei=f'12345678{i}', owner=self.asc, status='FAULTY'
+            )
+        content = 'imei,problem_description,problem_types\n' + ''.join(
+            f'12345678{i},Panne,BATTERY\n' for i in range(20)
+        )
+        importer = TicketImporter(self.supervisor)
+        # 7 requêtes d'écriture + 2 pour le résumé de fiabilité des équipements
+        # + 3 pour l'index de recherche (commentaires, tickets, upsert des documents)
+        with self.assertNumQueries(12):
+            report = importer.run(read_rows(io.BytesIO(content.encode('utf-8')), 'tickets.csv'))
+        self.assertEqual(report.created, 20)
+
+    def test_import_retries_only_ticket_number_collisions(self):
+        """Test nouveau tirage sur collision de numéro, autres erreurs d'intégrité rapportées par ligne"""
+        existing = RepairTicket.objects.create(
+            equipment=Equipment.objects.get(imei='123456782'), asc=self.asc,
+            created_by=self.supervisor, initial_problem_description='Panne'
+        )
+        # Numéro libre au tirage, pris par une création concurrente avant l'insertion
+        draws = [[existing.ticket_number], ['TKT-20260101-BBBBBB']]
+        with mock.patch.object(TicketImporter, '_unique_numbers', side_effect=draws):
+            response = self.upload('imei,problem_description\n123456780,Écran noir\n')
+        self.assertEqual(response.json()['ticket_numbers'], ['TKT-20260101-BBBBBB'])
+
+        with mock.patch.object(Issue.objects, 'bulk_create', side_effect=IntegrityError('FOREIGN KEY constraint failed')):
+            response = self.upload('imei,problem_description\n123456781,Écran noir\n')
+        report = response.json()
+        self.assertEqual(report['created'], 0)
+        self.assertEqual([error['line'] for error in report['errors']], [2])
+        self.assertIn('FOREIGN KEY', report['errors'][0]['error'])
+        self.assertFalse(RepairTicket.objects.filter(equipment__imei='123456781').exists())
+
+
+class WorkflowTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor',
+            password='testpass',
+            role='SUPERVISOR',
+            site=site
+        )
+        self.program = User.objects.create_user(
+            username='testprogram',
+            password='testpass',
+            role='PROGRAM'
+        )
+        self.asc = ASC.objects.create(
+            first_name='Test',
+            last_name='ASC',
+            code='ASC-TEST',
+            site=site,
+            supervisor=self.supervisor
+        )
+        self.equipment = Equipment.objects.create(
+            equipment_type='PHONE',
+            brand='Test Brand',
+            model='Test Model',
+            imei='123456789',
+            owner=self.asc,
+            status='FAULTY'
+        )
+        self.ticket = RepairTicket.objects.create(
+            equipment=self.equipment,
+            asc=self.asc,
+            created_by=self.supervisor,
+            current_holder=self.supervisor,
+            initial_problem_description='Test problem'
+        )
+
+    def test_role_tables(self):
+        """Test des tables de rôles partagées"""
+        self.assertEqual(workflow.role_for_stage('RETURNING_LOGISTICS'), 'LOGISTICS')
+        self.assertEqual(User.get_role_for_stage('RETURNING_SUPERVISOR'), 'SUPERVISOR')
+        self.assertEqual(workflow.next_stages('LOGISTICS'), ('REPAIRER', 'ESANTE'))
+
+    def test_send_then_receive(self):
+        """Test envoi puis réception"""
+        ticket = workflow.send(self.ticket, self.supervisor, 'PROGRAM', comment='Go')
+        self.assertEqual(ticket.current_stage, 'PROGRAM')
+        self.assertIsNone(ticket.current_holder)
+
+        ticket = workflow.receive(ticket, self.program)
+        self.assertEqual(ticket.current_holder, self.program)
+        self.assertEqual(ticket.status, 'IN_PROGRESS')
+        self.assertEqual(
+            list(ticket.events.values_list('event_type', flat=True).order_by('timestamp', 'pk')),
+            ['SENT', 'RECEIVED']
+        )
+
+    def test_double_processing_rejected(self):
+        """Test qu'un ticket déjà envoyé ou reçu ne peut pas être traité deux fois"""
+        workflow.send(self.ticket, self.supervisor, 'PROGRAM')
+        with self.assertRaises(workflow.TransitionError):
+            workflow.send(self.ticket, self.supervisor, 'PROGRAM')
+
+        workflow.receive(self.ticket, self.program)
+        with self.assertRaises(workflow.TransitionError):
+            workflow.receive(self.ticket, self.program)
+        self.assertEqual(self.ticket.events.count(), 2)
+
+    def test_sender_cannot_receive(self):
+        """Test que l'expéditeur ne peut pas confirmer la réception"""
+        workflow.send(self.ticket, self.supervisor, 'PROGRAM')
+        with self.assertRaises(workflow.TransitionError):
+            workflow.receive(self.ticket, self.supervisor)
+
+    def test_cancel_resets_equipment(self):
+        """Test annulation : équipement remis en panne"""
+        self.equipment.status = 'UNDER_REPAIR'
+        self.equipment.save()
+
+        workflow.cancel(self.ticket, self.supervisor, 'Doublon')
+
+        self.ticket.refresh_from_db()
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'CANCELLED')
+        self.assertEqual(self.ticket.cancellation_reason, 'Doublon')
+        self.assertEqual(self.equipment.status, 'FAULTY')
+
+
+class TicketNumberTest(TransactionTestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        site = Site.objects.create(district=district, name='Test Site', code='TS')
+
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor',
+            password='testpass',
+            role='SUPERVISOR',
+            site=site
+        )
+        self.asc = ASC.objects.create(
+            first_name='Test',
+            last_name='ASC',
+            code='ASC-TEST',
+            site=site,
+            supervisor=self.supervisor
+        )
+        self.equipment = Equipment.objects.create(
+            equipment_type='PHONE',
+            brand='Test Brand',
+            model='Test Model',
+            imei='123456789',
+            owner=self.asc,
+            status='FAULTY'
+        )
+
+    def _create_ticket(self):
+        return RepairTicket.objects.create(
+            equipment=self.equipment,
+            asc=self.asc,
+            created_by=self.supervisor,
+            initial_problem_description='Test problem'
+        )
+
+    def test_collision_is_retried(self):
+        """Test qu'une collision de numéro est réessayée avec un nouveau numéro"""
+        with mock.patch.object(RepairTicket, 'generate_ticket_number', return_value='TKT-20260101-AAAAAA'):
+            self._create_ticket()
+
+        numbers = ['TKT-20260101-AAAAAA', 'TKT-20260101-BBBBBB']
+        with mock.patch.object(RepairTicket, 'generate_ticket_number', side_effect=numbers):
+            ticket = self._create_ticket()
+
+        self.assertEqual(ticket.ticket_number, 'TKT-20260101-BBBBBB')
+        self.assertEqual(RepairTicket.objects.count(), 2)
+
+    def test_attempts_are_bounded(self):
+        """Test que le nombre de tentatives est limité"""
+        with mock.patch.object(RepairTicket, 'generate_ticket_number', return_value='TKT-20260101-AAAAAA'):
+            self._create_ticket()
+            with self.assertRaises(IntegrityError):
+                self._create_ticket()
+
+        self.assertEqual(RepairTicket.objects.count(), 1)
+
+    def test_concurrent_creation(self):
+        """Test de création de tickets depuis plusieurs threads avec des collisions forcées"""
+        errors = []
+        # Espace de numéros réduit pour provoquer des collisions entre threads
+        pool = [f'TKT-20260101-{i:06d}' for i in range(1000)]
+
+        def worker():
+            try:
+                created = 0
+                while created < 10:
+                    try:
+                        self._create_ticket()
+                        created += 1
+                    except OperationalError:
+                        # Verrouillage de table propre à SQLite en mémoire partagée
+                        time.sleep(0.01)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with mock.patch.object(RepairTicket, 'generate_ticket_number', side_effect=lambda: random.choice(pool)):
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        numbers = list(RepairTicket.objects.values_list('ticket_number', flat=True))
+        self.assertEqual(len(numbers), 80)
+        self.assertEqual(len(set(numbers)), 80)
+
+
+class TicketExportTest(TestCase):
+    def setUp(self):
+        """Créer des données de test"""
+        region = Region.objects.create(name='Test Region', code='TR')
+        district = District.objects.create(region=region, name='Test District', code='TD')
+        self.site = Site.objects.create(district=district, name='Test Site', code='TS')
+        other_site = Site.objects.create(district=district, name='Autre Site', code='AS')
+
+        self.user = User.objects.create_user(username='testlogistics', password='testpass', role='LOGISTICS')
+        self.supervisor = User.objects.create_user(
+            username='testsupervisor', password='testpass', role='SUPERVISOR', site=self.site
+        )
+        asc = ASC.objects.create(first_name='Test', last_name='ASC', code='ASC-TEST', site=self.site)
+        other_asc = ASC.objects.create(first_name='Autre', last_name='ASC', code='ASC-OTHER', site=other_site)
+
+        self.now = timezone.now()
+        self.tickets = []
+        for i, owner in enumerate([asc, asc, other_asc]):
+            equipment = Equipment.objects.create(
+                equipment_type='PHONE', brand='Tecno', model='Spark', imei=f'35000000000000{i}', owner=owner
+            )
+            ticket = RepairTicket.objects.create(
+                equipment=equipment, asc=owner, created_by=self.user, status='IN_PROGRESS',
+                current_stage='LOGISTICS', initial_problem_description=f'Écran cassé {i}',
+                initial_send_date=self.now - timezone.timedelta(days=5),
+            )
+            TicketEvent.objects.bulk_create([
+                TicketEvent(ticket=ticket, event_type='CREATED', to_role='SUPERVISOR', user=self.user,
+                            timestamp=self.now - timezone.timedelta(days=6)),
+                TicketEvent(ticket=ticket, event_type='SENT', from_role='SUPERVISOR', to_role='PROGRAM',
+                            user=self.user, timestamp=self.now - timezone.timedelta(days=5)),
+                TicketEvent(ticket=ticket, event_type='RECEIVED', to_role='PROGRAM', user=self.user,
+                            timestamp=self.now - timezone.timedelta(days=4)),
+                TicketEvent(ticket=ticket, event_type='SENT', from_role='PROGRAM', to_role='LOGISTICS',
+                            user=self.user, timestamp=self.now - timezone.timedelta(days=1)),
+            ])
+            self.tickets.append(ticket)
+        self.client.force_login(self.user)
+
+    def _csv(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        return list(csv.reader(io.StringIO(content[1:])))
+
+    def test_ticket_csv_has_delays_and_stage_durations(self):
+        """Test export CSV : une ligne par ticket avec délai et durées par étape"""
+        rows = self._csv(reverse('tickets:export'))
+
+        header, first = rows[0], rows[1]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(first[header.index('Numéro')], self.tickets[0].ticket_number)
+        self.assertEqual(first[header.index('Étape actuelle')], 'Logistique')
+        self.assertEqual(first[header.index('Délai (jours)')], '5')
+        self.assertEqual(first[header.index("Jours à l'étape actuelle")], '1')
+        # Programme : de la réception (J-4) à l'envoi suivant (J-1)
+        self.assertEqual(first[header.index('Jours — Programme')], '3.0')
+        self.assertEqual(first[header.index('Jours — Logistique')], '1.0')
+
+    def test_cancelled_ticket_delay_stops_at_cancellation(self):
+        """Test délai d'un ticket annulé : de l'envoi initial à l'annulation"""
+        RepairTicket.objects.filter(pk=self.tickets[1].pk).update(
+            status='CANCELLED', cancelled_date=self.now - timezone.timedelta(days=2)
+        )
+        rows = self._csv(reverse('tickets:export'))
+
+        header = rows[0]
+        delays = {row[header.index('Numéro')]: row[header.index('Délai (jours)')] for row in rows[1:]}
+        self.assertEqual(delays[self.tickets[1].ticket_number], '3')
+        self.assertEqual(delays[self.tickets[0].ticket_number], '5')
+
+    def test_export_is_constant_in_queries(self):
+        """Test export : deux requêtes lues par paquets, quel que soit le nombre de tickets"""
+        response = self.client.get(reverse('tickets:export'))
+        with self.assertNumQueries(2):
+            b''.join(response.streaming_content)
+
+    def test_export_keeps_list_filters_and_scope(self):
+        """Test export : filtres de la liste et périmètre du superviseur"""
+        RepairTicket.objects.filter(pk=self.tickets[1].pk).update(status='CLOSED', closed_date=self.now)
+        rows = self._csv(reverse('tickets:export'), {'status': 'CLOSED'})
+        self.assertEqual([row[0] for row in rows[1:]], [self.tickets[1].ticket_number])
+        self.assertEqual(rows[1][rows[0].index("Jours à l'étape actuelle")], '')
+
+        self.client.force_login(self.supervisor)
+        rows = self._csv(reverse('tickets:export'))
+        self.assertEqual(
+            [row[0] for row in rows[1:]], [self.tickets[0].ticket_number, self.tickets[1].ticket_number]
+        )
+
+    def test_ticket_xlsx_is_a_valid_workbook(self):
+        """Test export XLSX : classeur lisible, dates typées"""
+        response = self.client.get(reverse('tickets:export'), {'format': 'xlsx'})
+        self.assertIn('tickets-', response['Content-Disposition'])
+        self.assertTrue(response['Content-Disposition'].endswith('.xlsx"'))
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('xl/workbook.xml', archive.namelist())
+        namespace = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        rows = sheet.findall('.//x:sheetData/x:row', namespace)
+        self.assertEqual(len(rows), 4)
+        cells = rows[1].findall('x:c', namespace)
+        self.assertEqual(cells[0].find('x:is/x:t', namespace).text, self.tickets[0].ticket_number)
+        # Créé le : date Excel (nombre de jours) au format date/heure
+        self.assertEqual(cells[3].get('s'), '1')
+        self.assertGreater(float(cells[3].find('x:v', namespace).text), 40000)
+
+    def test_events_export_filters_by_type_and_period(self):
+        """Test export des événements : type d'événement et période"""
+        today = timezone.localdate(self.now)
+        rows = self._csv(reverse('tickets:export_events'), {'event_type': 'SENT'})
+        self.assertEqual(len(rows), 7)
+        self.assertEqual({row[1] for row in rows[1:]}, {'Envoyé'})
+
+        rows = self._csv(reverse('tickets:export_events'), {
+            'date_from': (today - timezone.timedelta(days=1)).isoformat(), 'date_to': today.isoformat(),
+        })
+        self.assertEqual([row[3] for row in rows[1:]], ['Logistique'] * 3)
+
+        rows = self._csv(reverse('tickets:export_events'), {'date_from': '2024-02-30'})
+        self.assertEqual(len(rows), 13)
+
+    def test_time_by_stage_uses_received_dates(self):
+        """Test get_time_by_stage : durées comptées depuis la réception"""
+        self.assertEqual(self.tickets[0].get_time_by_stage(), {'PROGRAM': 3, 'LOGISTICS': 1})
@@ -5,6 +5,8 @@ app_name = 'tickets'
 
 urlpatterns = [
     path('', views.ticket_list, name='list'),
+    path('export/', views.ticket_export, name='export'),
+    path('export/events/', views.ticket_events_export, name='export_events'),
     path('<int:pk>/', views.ticket_detail, name='detail'),
     path('create/', views.ticket_create, name='create'),
     path('<int:pk>/receive/', views.ticket_receive, name='receive'),
@@ -4,15 +4,22 @@ from django.contrib import messages
 from django.utils import timezone
 from django.http import JsonResponse
 from django.db import models
+from config.conditional import conditional_page, latest_of, start_of_today, today_part
+from config.exports import export_format, export_response
 from .models import RepairTicket, TicketEvent, TicketComment, Issue, DelayAlertRecipient, DelayAlertLog, ProblemType
+from . import exports, workflow
 from assets.models import Equipment
-from accounts.models import User
+from assets.reliability import REPEAT_FAILURE_COUNT
+from accounts.models import ASC, User
+from accounts.scoping import scope_ascs, scope_equipment, scope_tickets
+from search.autocomplete import autocomplete
+from search.models import SearchDocument
+from search.query import matching_ids
 
 
-@login_required
-def ticket_list(request):
-    """Liste des tickets avec filtres"""
-    tickets = RepairTicket.objects.all().select_related('equipment', 'asc', 'current_holder')
+def _filtered_tickets(request):
+    """Tickets visibles filtrés par statut, étape et recherche (liste et exports)"""
+    tickets = scope_tickets(RepairTicket.objects.all(), request.user)
 
     # Filtres
     status = request.GET.get('status')
@@ -24,20 +31,83 @@ def ticket_list(request):
     if stage:
         tickets = tickets.filter(current_stage=stage)
     if search:
-        tickets = tickets.filter(ticket_number__icontains=search)
+        # Index plein texte : numéro, description, commentaires, ASC, IMEI, site ;
+        # numéro partiel ou d'un caractère (« 42 », « 0042 ») cherché aussi directement
+        tickets = tickets.filter(
+            models.Q(pk__in=matching_ids(search, SearchDocument.TICKET))
+            | models.Q(ticket_number__icontains=search.strip())
+        )
+    return tickets
+
+
+@login_required
+def ticket_list(request):
+    """Liste des tickets avec filtres"""
+    tickets = _filtered_tickets(request).select_related('equipment', 'asc', 'current_holder')
 
     context = {
         'tickets': tickets,
         'status_choices': RepairTicket.STATUS_CHOICES,
         'stage_choices': RepairTicket.STAGE_CHOICES,
+        'event_type_choices': TicketEvent.EVENT_TYPE_CHOICES,
+        'export_querystring': _export_querystring(request),
     }
     return render(request, 'tickets/list.html', context)
 
 
+def _export_querystring(request):
+    """Filtres de la liste repris dans les liens d'export"""
+    params = request.GET.copy()
+    params.pop('format', None)
+    return params.urlencode()
+
+
+@login_required
+def ticket_export(request):
+    """Export CSV / XLSX en flux des tickets filtrés, avec délais et durées par étape"""
+    return export_response(
+        exports.TICKET_HEADER, exports.ticket_rows(_filtered_tickets(request)),
+        f'tickets-{timezone.localdate():%Y%m%d}', export_format(request), sheet_name='Tickets',
+    )
+
+
 @login_required
+def ticket_events_export(request):
+    """Export CSV / XLSX en flux des événements des tickets filtrés (période, type)"""
+    events = exports.filter_events(
+        TicketEvent.objects.filter(ticket__in=_filtered_tickets(request).values('pk')), request.GET
+    )
+    return export_response(
+        exports.EVENT_HEADER, exports.event_rows(events),
+        f'evenements-{timezone.localdate():%Y%m%d}', export_format(request), sheet_name='Événements',
+    )
+
+
+def _ticket_detail_state(request, pk):
+    """État du ticket pour l'ETag : ticket, événements et commentaires en une requête"""
+    state = scope_tickets(RepairTicket.objects.filter(pk=pk), request.user).aggregate(
+        updated_at=models.Max('updated_at'),
+        equipment_updated_at=models.Max('equipment__updated_at'),
+        asc_updated_at=models.Max('asc__updated_at'),
+        last_event=models.Max('events__id'),
+        last_comment=models.Max('comments__id'),
+        last_comment_at=models.Max('comments__created_at'),
+    )
+    if state['updated_at'] is None:
+        return None
+    return tuple(state.values()) + (today_part(),), latest_of(
+        state['updated_at'], state['equipment_updated_at'],
+        state['asc_updated_at'], state['last_comment_at'], start_of_today(),
+    )
+
+
+@login_required
+@conditional_page(_ticket_detail_state)
 def ticket_detail(request, pk):
     """Détail d'un ticket avec timeline"""
-    ticket = get_object_or_404(RepairTicket.objects.select_related('equipment', 'asc', 'current_holder'), pk=pk)
+    ticket = get_object_or_404(
+        scope_tickets(RepairTicket.objects.select_related('equipment', 'asc', 'current_holder'), request.user), pk=pk
+    )
     events = ticket.events.all().select_related('user').order_by('timestamp')
     comments = ticket.comments.all().select_related('user').order_by('created_at')
     issues = ticket.issues.all()
@@ -64,12 +134,11 @@ def ticket_create(request):
         asc_id = request.POST.get('asc')
         problem_description = request.POST.get('problem_description')
 
-        equipment = get_object_or_404(Equipment, pk=equipment_id)
+        equipment = get_object_or_404(scope_equipment(Equipment.objects.all(), request.user), pk=equipment_id)
 
         # Utiliser l'ASC du formulaire, sinon celui de l'équipement
-        from accounts.models import ASC
         if asc_id:
-            asc = get_object_or_404(ASC, pk=asc_id)
+            asc = get_object_or_404(scope_ascs(ASC.objects.all(), request.user), pk=asc_id)
         else:
             asc = equipment.owner
 
@@ -105,10 +174,19 @@ def ticket_create(request):
             comment='Ticket créé'
         )
 
+        # Ne pas écraser le résumé de fiabilité mis à jour à la création du ticket
         equipment.status = 'UNDER_REPAIR'
-        equipment.save()
+        equipment.save(update_fields=['status', 'updated_at'])
 
         messages.success(request, f'Ticket {ticket.ticket_number} créé avec succès!')
+
+        equipment.refresh_from_db(fields=['ticket_count', 'repeat_anchor_at'])
+        if equipment.is_repeat_failure:
+            messages.warning(
+                request,
+                f'Pannes répétées : cet équipement a eu au moins {REPEAT_FAILURE_COUNT} tickets '
+                f'au cours des 6 derniers mois ({equipment.ticket_count} au total).'
+            )
         return redirect('tickets:detail', pk=ticket.pk)
 
     # Récupérer tous les types de problèmes actifs et les grouper par catégorie
@@ -119,7 +197,9 @@ def ticket_create(request):
     software_problems = problem_types.filter(category='SOFTWARE')
     other_problems = problem_types.filter(category='OTHER')
 
-    equipments = Equipment.objects.filter(status__in=['FAULTY', 'FUNCTIONAL']).select_related('owner')
+    equipments = scope_equipment(
+        Equipment.objects.filter(status__in=['FAULTY', 'FUNCTIONAL']), request.user
+    ).select_related('owner')
     context = {
         'equipments': equipments,
         'hardware_problems': hardware_problems,
@@ -132,7 +212,7 @@ def ticket_create(request):
 @login_required
 def ticket_receive(request, pk):
     """Confirmer la réception d'un ticket"""
-    ticket = get_object_or_404(RepairTicket, pk=pk)
+    ticket = get_object_or_404(scope_tickets(RepairTicket.objects.all(), request.user), pk=pk)
 
     # Vérifier que l'utilisateur n'est pas celui qui a envoyé le ticket
     last_sent_event = ticket.events.filter(event_type='SENT').order_by('-timestamp').first()
@@ -142,19 +222,11 @@ def ticket_receive(request, pk):
 
     # Confirmation automatique via paramètre GET (pour les liens dans les emails)
     if request.method == 'GET' and request.GET.get('auto_confirm') == '1':
-        TicketEvent.objects.create(
-            ticket=ticket,
-            event_type='RECEIVED',
-            user=request.user,
-            from_role=ticket.current_stage,
-            to_role=ticket.current_stage,
-            comment='Confirmation automatique depuis l\'email',
-            timestamp=timezone.now()
-        )
-
-        ticket.current_holder = request.user
-        ticket.status = 'IN_PROGRESS'
-        ticket.save()
+        try:
+            workflow.receive(ticket, request.user, comment='Confirmation automatique depuis l\'email')
+        except workflow.TransitionError as e:
+            messages.error(request, str(e))
+            return redirect('tickets:detail', pk=ticket.pk)
 
         messages.success(request, 'Réception confirmée automatiquement!')
         return redirect('tickets:detail', pk=ticket.pk)
@@ -162,19 +234,11 @@ def ticket_receive(request, pk):
     if request.method == 'POST':
         comment = request.POST.get('comment', '')
 
-        TicketEvent.objects.create(
-            ticket=ticket,
-            event_type='RECEIVED',
-            user=request.user,
-            from_role=ticket.current_stage,
-            to_role=ticket.current_stage,
-            comment=comment,
-            timestamp=timezone.now()
-        )
-
-        ticket.current_holder = request.user
-        ticket.status = 'IN_PROGRESS'
-        ticket.save()
+        try:
+            workflow.receive(ticket, request.user, comment=comment)
+        except workflow.TransitionError as e:
+            messages.error(request, str(e))
+            return redirect('tickets:detail', pk=ticket.pk)
 
         messages.success(request, 'Réception confirmée!')
         return redirect('tickets:detail', pk=ticket.pk)
@@ -188,22 +252,10 @@ def ticket_send(request, pk):
     from accounts.models import User
     from .email_notifications import send_ticket_notification
 
-    ticket = get_object_or_404(RepairTicket, pk=pk)
-
-    # Définir les transitions possibles selon l'étape actuelle
-    workflow_transitions = {
-        'SUPERVISOR': ['PROGRAM'],
-        'PROGRAM': ['LOGISTICS'],
-        'LOGISTICS': ['REPAIRER', 'ESANTE'],
-        'REPAIRER': ['RETURNING_LOGISTICS'],
-        'ESANTE': ['RETURNING_LOGISTICS'],
-        'RETURNING_LOGISTICS': ['RETURNING_PROGRAM'],
-        'RETURNING_PROGRAM': ['RETURNING_SUPERVISOR'],
-        'RETURNING_SUPERVISOR': ['RETURNED_ASC'],
-    }
+    ticket = get_object_or_404(scope_tickets(RepairTicket.objects.all(), request.user), pk=pk)
 
     # Filtrer les choix possibles selon l'étape actuelle
-    possible_next_stages = workflow_transitions.get(ticket.current_stage, [])
+    possible_next_stages = workflow.next_stages(ticket.current_stage)
     stage_choices = [(stage, label) for stage, label in RepairTicket.STAGE_CHOICES if stage in possible_next_stages]
 
     if request.method == 'POST':
@@ -211,11 +263,6 @@ def ticket_send(request, pk):
         recipient_id = request.POST.get('recipient')
         comment = request.POST.get('comment', '')
 
-        # Vérifier que la transition est valide
-        if to_role not in possible_next_stages:
-            messages.error(request, 'Transition invalide!')
-            return redirect('tickets:detail', pk=ticket.pk)
-
         # Récupérer le destinataire
         recipient = None
         if recipient_id and to_role != 'RETURNED_ASC':
@@ -225,31 +272,12 @@ def ticket_send(request, pk):
                 messages.error(request, 'Destinataire invalide!')
                 return redirect('tickets:send', pk=ticket.pk)
 
-        TicketEvent.objects.create(
-            ticket=ticket,
-            event_type='SENT',
-            user=request.user,
-            from_role=ticket.current_stage,
-            to_role=to_role,
-            comment=comment,
-            timestamp=timezone.now()
-        )
-
-        ticket.current_stage = to_role
-        ticket.current_holder = None  # Sera défini à la réception
-
-        # Mettre à jour le statut si on retourne l'équipement
-        if to_role.startswith('RETURNING'):
-            ticket.status = 'RETURNING'
-
-        # Clôturer le ticket si retourné à l'ASC
-        if to_role == 'RETURNED_ASC':
-            ticket.status = 'CLOSED'
-            ticket.closed_date = timezone.now()
-            ticket.equipment.status = 'FUNCTIONAL'
-            ticket.equipment.save()
-
-        ticket.save()
+        # Valider et appliquer la transition (statut, clôture, état de l'équipement)
+        try:
+            ticket = workflow.send(ticket, request.user, to_role, comment=comment)
+        except workflow.TransitionError as e:
+            messages.error(request, str(e))
+            return redirect('tickets:detail', pk=ticket.pk)
 
         # Envoyer la notification par email
         email_sent = send_ticket_notification(
@@ -261,7 +289,7 @@ def ticket_send(request, pk):
         )
 
         # Notifier l'utilisateur
-        destination_name = dict(RepairTicket.STAGE_CHOICES)[to_role]
+        destination_name = workflow.STAGE_LABELS[to_role]
         if recipient:
             success_msg = f'Ticket envoyé à {recipient.get_full_name()} ({destination_name})!'
         else:
@@ -287,27 +315,16 @@ def ticket_send(request, pk):
 @login_required
 def ticket_mark_repaired(request, pk):
     """Marquer un ticket comme réparé"""
-    ticket = get_object_or_404(RepairTicket, pk=pk)
+    ticket = get_object_or_404(scope_tickets(RepairTicket.objects.all(), request.user), pk=pk)
 
     if request.method == 'POST':
         resolution_notes = request.POST.get('resolution_notes', '')
 
-        # Mettre à jour le ticket
-        ticket.status = 'REPAIRED'
-        ticket.repair_completed_date = timezone.now()
-        ticket.resolution_notes = resolution_notes
-        ticket.save()
-
-        # Créer un événement
-        TicketEvent.objects.create(
-            ticket=ticket,
-            event_type='REPAIRED',
-            user=request.user,
-            from_role=ticket.current_stage,
-            to_role=ticket.current_stage,
-            comment=f'Réparation terminée. {resolution_notes}',
-            timestamp=timezone.now()
-        )
+        try:
+            workflow.mark_repaired(ticket, request.user, resolution_notes)
+        except workflow.TransitionError as e:
+            messages.error(request, str(e))
+            return redirect('tickets:detail', pk=ticket.pk)
 
         messages.success(request, 'Réparation marquée comme terminée! Vous pouvez maintenant renvoyer l\'équipement.')
         return redirect('tickets:detail', pk=ticket.pk)
@@ -319,7 +336,7 @@ def ticket_mark_repaired(request, pk):
 @login_required
 def ticket_add_comment(request, pk):
     """Ajouter un commentaire à un ticket"""
-    ticket = get_object_or_404(RepairTicket, pk=pk)
+    ticket = get_object_or_404(scope_tickets(RepairTicket.objects.all(), request.user), pk=pk)
 
     if request.method == 'POST':
         comment_text = request.POST.get('comment')
@@ -339,7 +356,7 @@ def ticket_add_comment(request, pk):
 @login_required
 def ticket_cancel(request, pk):
     """Annuler un ticket"""
-    ticket = get_object_or_404(RepairTicket, pk=pk)
+    ticket = get_object_or_404(scope_tickets(RepairTicket.objects.all(), request.user), pk=pk)
 
     # Vérifier que le ticket n'est pas déjà clôturé ou annulé
     if ticket.status in ['CLOSED', 'CANCELLED']:
@@ -353,26 +370,12 @@ def ticket_cancel(request, pk):
             messages.error(request, 'Veuillez fournir une raison pour l\'annulation.')
             return render(request, 'tickets/cancel.html', {'ticket': ticket})
 
-        # Mettre à jour le ticket
-        ticket.status = 'CANCELLED'
-        ticket.cancelled_date = timezone.now()
-        ticket.cancellation_reason = cancellation_reason
-        ticket.save()
-
-        # Créer un événement d'annulation
-        TicketEvent.objects.create(
-            ticket=ticket,
-            event_type='CANCELLED',
-            user=request.user,
-            from_role=ticket.current_stage,
-            to_role=ticket.current_stage,
-            comment=f'Ticket annulé. Raison: {cancellation_reason}',
-            timestamp=timezone.now()
-        )
-
-        # Remettre l'équipement en panne (pas en réparation)
-        ticket.equipment.status = 'FAULTY'
-        ticket.equipment.save()
+        # Annuler le ticket et remettre l'équipement en panne
+        try:
+            workflow.cancel(ticket, request.user, cancellation_reason)
+        except workflow.TransitionError as e:
+            messages.error(request, str(e))
+            return redirect('tickets:detail', pk=ticket.pk)
 
         messages.success(request, f'Ticket {ticket.ticket_number} annulé avec succès!')
         return redirect('tickets:detail', pk=ticket.pk)
@@ -419,7 +422,7 @@ def alert_recipients_config(request):
     current_recipients = DelayAlertRecipient.objects.all().select_related('user')
 
     # Récupérer tous les utilisateurs pour la sélection
-    all_users = User.objects.filter(is_active=True).order_by('last_name', 'first_name')
+    all_users = User.objects.filter(is_active=True).order_by('last_name_normalized', 'first_name_normalized')
 
     # Récupérer l'historique des alertes
     recent_alerts = DelayAlertLog.objects.select_related('ticket').order_by('-sent_at')[:20]
@@ -434,27 +437,8 @@ def alert_recipients_config(request):
 
 @login_required
 def search_users_api(request):
-    """API pour la recherche d'utilisateurs (autocomplétion)"""
-    query = request.GET.get('q', '')
-
-    if len(query) < 2:
-        return JsonResponse({'results': []})
-
-    users = User.objects.filter(
-        is_active=True
-    ).filter(
-        models.Q(first_name__icontains=query) |
-        models.Q(last_name__icontains=query) |
-        models.Q(email__icontains=query)
-    ).order_by('last_name', 'first_name')[:10]
-
-    results = [{
-        'id': user.id,
-        'text': f"{user.get_full_name()} ({user.get_role_display()})",
-        'email': user.email or ''
-    } for user in users]
-
-    return JsonResponse({'results': results})
+    """API pour la recherche d'utilisateurs (autocomplétion en mémoire, voir search/autocomplete.py)"""
+    return JsonResponse({'results': autocomplete('users', request.GET.get('q', ''))})
 
 
 @login_required
@@ -0,0 +1,238 @@
+"""
+Moteur de workflow des tickets de réparation
+
+Regroupe les tables précalculées (immuables) des transitions et des rôles par
+étape, ainsi que la validation et l'application atomique des transitions
+(événement + état du ticket). Utilisé par les vues, l'API et les commandes.
+"""
+from types import MappingProxyType
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from assets.models import Equipment
+from assets.reliability import refresh_reliability
+from assets.timeline import invalidate_timeline
+from .models import RepairTicket, TicketEvent
+
+
+# Étapes suivantes possibles pour chaque étape
+TRANSITIONS = MappingProxyType({
+    'SUPERVISOR': ('PROGRAM',),
+    'PROGRAM': ('LOGISTICS',),
+    'LOGISTICS': ('REPAIRER', 'ESANTE'),
+    'REPAIRER': ('RETURNING_LOGISTICS',),
+    'ESANTE': ('RETURNING_LOGISTICS',),
+    'RETURNING_LOGISTICS': ('RETURNING_PROGRAM',),
+    'RETURNING_PROGRAM': ('RETURNING_SUPERVISOR',),
+    'RETURNING_SUPERVISOR': ('RETURNED_ASC',),
+})
+
+# Rôle utilisateur responsable de chaque étape
+STAGE_ROLES = MappingProxyType({
+    'SUPERVISOR': 'SUPERVISOR',
+    'PROGRAM': 'PROGRAM',
+    'LOGISTICS': 'LOGISTICS',
+    'REPAIRER': 'REPAIRER',
+    'ESANTE': 'ESANTE',
+    'RETURNING_LOGISTICS': 'LOGISTICS',
+    'RETURNING_PROGRAM': 'PROGRAM',
+    'RETURNING_SUPERVISOR': 'SUPERVISOR',
+})
+
+STAGE_LABELS = MappingProxyType(dict(RepairTicket.STAGE_CHOICES))
+
+# Étapes où la réparation peut être déclarée terminée
+REPAIR_STAGES = frozenset(['REPAIRER', 'ESANTE'])
+
+# Statuts pour lesquels plus aucune action n'est possible
+FINAL_STATUSES = frozenset(['CLOSED', 'CANCELLED'])
+
+# Actions du workflow
+SEND = 'SEND'
+RECEIVE = 'RECEIVE'
+REPAIR = 'REPAIR'
+CANCEL = 'CANCEL'
+
+ACTION_CHOICES = [
+    (SEND, 'Envoyer'),
+    (RECEIVE, 'Confirmer la réception'),
+    (REPAIR, 'Marquer comme réparé'),
+    (CANCEL, 'Annuler'),
+]
+
+# Champs du ticket modifiés par une transition (bulk_update)
+UPDATED_FIELDS = [
+    'current_stage', 'current_holder', 'status', 'repair_completed_date', 'resolution_notes',
+    'closed_date', 'cancelled_date', 'cancellation_reason', 'updated_at',
+]
+
+
+class TransitionError(Exception):
+    """Transition refusée ; errors associe l'id de chaque ticket refusé au motif"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(' '.join(dict.fromkeys(errors.values())))
+
+
+def next_stages(stage):
+    """Étapes vers lesquelles un ticket peut être envoyé depuis l'étape donnée"""
+    return TRANSITIONS.get(stage, ())
+
+
+def role_for_stage(stage):
+    """Rôle correspondant à une étape du workflow"""
+    return STAGE_ROLES.get(stage)
+
+
+def check_transition(ticket, action, user, to_role=None):
+    """Retourne le motif de refus d'une transition, ou None si elle est permise"""
+    if ticket.status in FINAL_STATUSES:
+        return f'Ce ticket est déjà {ticket.get_status_display().lower()}.'
+
+    if action == SEND:
+        if to_role not in next_stages(ticket.current_stage):
+            return 'Transition invalide!'
+        if ticket.current_holder_id is None:
+            return 'La réception du ticket doit être confirmée avant son envoi.'
+    elif action == RECEIVE:
+        if ticket.current_holder_id is not None:
+            return 'La réception de ce ticket a déjà été confirmée.'
+        if getattr(ticket, 'last_sender_id', None) == user.pk:
+            return 'Vous ne pouvez pas confirmer la réception d\'un ticket que vous avez vous-même envoyé.'
+    elif action == REPAIR:
+        if ticket.current_stage not in REPAIR_STAGES:
+            return 'La réparation ne peut être déclarée qu\'à l\'étape Réparateur ou E-Santé.'
+        if ticket.status == 'REPAIRED':
+            return 'Ce ticket est déjà marqué comme réparé.'
+    elif action != CANCEL:
+        return 'Action inconnue.'
+    return None
+
+
+def _apply(ticket, action, user, to_role, comment, now):
+    """Met à jour le ticket en mémoire et retourne l'événement correspondant"""
+    from_role = ticket.current_stage
+    event_type = {SEND: 'SENT', RECEIVE: 'RECEIVED', REPAIR: 'REPAIRED', CANCEL: 'CANCELLED'}[action]
+    event_comment = comment
+
+    if action == SEND:
+        ticket.current_stage = to_role
+        ticket.current_holder = None  # Sera défini à la réception
+        if to_role.startswith('RETURNING'):
+            ticket.status = 'RETURNING'
+        if to_role == 'RETURNED_ASC':
+            ticket.status = 'CLOSED'
+            ticket.closed_date = now
+    elif action == RECEIVE:
+        ticket.current_holder = user
+        ticket.status = 'IN_PROGRESS'
+    elif action == REPAIR:
+        ticket.status = 'REPAIRED'
+        ticket.repair_completed_date = now
+        ticket.resolution_notes = comment
+        event_comment = f'Réparation terminée. {comment}'
+    elif action == CANCEL:
+        ticket.status = 'CANCELLED'
+        ticket.cancelled_date = now
+        ticket.cancellation_reason = comment
+        event_comment = f'Ticket annulé. Raison: {comment}'
+
+    # bulk_update ne déclenche pas auto_now
+    ticket.updated_at = now
+
+    return TicketEvent(
+        ticket=ticket,
+        event_type=event_type,
+        user=user,
+        from_role=from_role,
+        to_role=ticket.current_stage,
+        comment=event_comment,
+        timestamp=now
+    )
+
+
+def _equipment_status(action, to_role):
+    """Nouvel état de l'équipement après la transition, ou None s'il ne change pas"""
+    if action == SEND and to_role == 'RETURNED_ASC':
+        return 'FUNCTIONAL'
+    if action == CANCEL:
+        # Remettre l'équipement en panne (pas en réparation)
+        return 'FAULTY'
+    return None
+
+
+def apply_transition(ticket_ids, user, action, to_role=None, comment=''):
+    """
+    Valide et applique une transition à un ou plusieurs tickets de façon atomique.
+
+    Les tickets sont verrouillés (select_for_update) puis validés avec leur état
+    à jour, ce qui empêche qu'un même ticket soit traité deux fois par des
+    requêtes concurrentes. Le lot est refusé en entier (TransitionError) dès
+    qu'un ticket ne respecte pas les règles. Retourne les tickets mis à jour.
+    """
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    now = timezone.now()
+
+    last_sender = TicketEvent.objects.filter(
+        ticket=OuterRef('pk'), event_type='SENT'
+    ).order_by('-timestamp').values('user_id')[:1]
+
+    with transaction.atomic():
+        # Verrouillage dans un ordre stable pour éviter les interblocages
+        tickets = list(
+            RepairTicket.objects.select_for_update()
+            .filter(pk__in=ticket_ids)
+            .annotate(last_sender_id=Subquery(last_sender))
+            .order_by('pk')
+        )
+
+        found = {ticket.pk for ticket in tickets}
+        errors = {pk: 'Ticket introuvable.' for pk in ticket_ids if pk not in found}
+        for ticket in tickets:
+            reason = check_transition(ticket, action, user, to_role)
+            if reason:
+                errors[ticket.pk] = reason
+        if errors:
+            raise TransitionError(errors)
+
+        events = [_apply(ticket, action, user, to_role, comment, now) for ticket in tickets]
+        TicketEvent.objects.bulk_create(events)
+        RepairTicket.objects.bulk_update(tickets, UPDATED_FIELDS)
+
+        equipment_status = _equipment_status(action, to_role)
+        if equipment_status:
+            Equipment.objects.filter(pk__in=[ticket.equipment_id for ticket in tickets]).update(
+                status=equipment_status, updated_at=now
+            )
+
+        # bulk_create / bulk_update ne déclenchent pas les signaux d'invalidation
+        equipment_ids = [ticket.equipment_id for ticket in tickets]
+        invalidate_timeline(*equipment_ids)
+        if action == SEND and to_role == 'RETURNED_ASC':
+            # Clôture : dernière date de retour et temps moyen entre pannes
+            refresh_reliability(*equipment_ids)
+
+    return tickets
+
+
+def send(ticket, user, to_role, comment=''):
+    """Envoie un ticket à l'étape suivante"""
+    return apply_transition([ticket.pk], user, SEND, to_role=to_role, comment=comment)[0]
+
+
+def receive(ticket, user, comment=''):
+    """Confirme la réception d'un ticket"""
+    return apply_transition([ticket.pk], user, RECEIVE, comment=comment)[0]
+
+
+def mark_repaired(ticket, user, resolution_notes=''):
+    """Marque un ticket comme réparé"""
+    return apply_transition([ticket.pk], user, REPAIR, comment=resolution_notes)[0]
+
+
+def cancel(ticket, user, reason):
+    """Annule un ticket"""
+    return apply_transition([ticket.pk], user, CANCEL, comment=reason)[0]